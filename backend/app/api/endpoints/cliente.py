@@ -5,6 +5,17 @@ from app.config import settings
 
 router = APIRouter()
 
+@router.get("/cache/stats")
+async def get_clients_cache_stats():
+    """Obtiene los contadores de la caché de clientes"""
+    return ClienteService.cache_stats()
+
+@router.delete("/cache")
+async def invalidate_clients_cache():
+    """Invalida la caché de clientes de esta instancia"""
+    ClienteService.invalidate_cache()
+    return ClienteService.cache_stats()
+
 @router.get("/{client_id}")
 async def get_client(client_id: str = settings.DEFAULT_CLIENT_ID):
     """Obtiene información del cliente"""
@@ -13,6 +24,14 @@ async def get_client(client_id: str = settings.DEFAULT_CLIENT_ID):
         raise HTTPException(status_code=404, detail="Cliente no encontrado")
     return client
 
+@router.get("/{client_id}/portfolio")
+async def get_client_portfolio(client_id: str = settings.DEFAULT_CLIENT_ID):
+    """Obtiene el resumen de cartera del cliente (saldo, fondos activos, total invertido y conteo por categoría)"""
+    portfolio = await ClienteService.get_portfolio(client_id)
+    if not portfolio:
+        raise HTTPException(status_code=404, detail="Cliente no encontrado")
+    return portfolio
+
 @router.patch("/{client_id}")
 async def update_client(client_id: str, client_data: ClienteUpdate):
     """Actualiza preferencias del cliente"""
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, HTTPException, Query
+from app.services.dashboard_service import DashboardService
+from app.config import settings
+
+router = APIRouter()
+
+@router.get("/{client_id}")
+async def get_dashboard(
+    client_id: str = settings.DEFAULT_CLIENT_ID,
+    limit: int = Query(10, ge=1, description="Transacciones del historial a incluir")
+):
+    """Obtiene cliente, fondos, suscripciones activas e historial en una sola llamada"""
+    dashboard = await DashboardService.get_dashboard(client_id, limit)
+    if not dashboard:
+        raise HTTPException(status_code=404, detail="Cliente no encontrado")
+    return dashboard
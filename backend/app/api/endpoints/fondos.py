@@ -1,15 +1,54 @@
-from fastapi import APIRouter, HTTPException
+import json
+from botocore.exceptions import ClientError
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from typing import List
 from app.models.fondo import Fondo
 from app.services.fondo_service import FondoService
+from app.services.pagination import read_first_page
+from app.services.serialization import json_friendly
 
 router = APIRouter()
 
+
+async def _json_array(pages):
+    """
+    Escribe un array JSON elemento a elemento a medida que llegan las páginas. Si una página falla
+    la excepción corta la conexión sin cerrar el array: el cliente no recibe un JSON válido
+    """
+    yield "["
+    first = True
+    async for page in pages:
+        for item in page:
+            chunk = json.dumps(json_friendly(item), ensure_ascii=False, separators=(",", ":"))
+            yield chunk if first else "," + chunk
+            first = False
+    yield "]"
+
+
 @router.get("", response_model=List[dict])
-async def get_all_funds():
+async def get_all_funds(stream: bool = Query(False, description="Enviar el array según llegan las páginas del scan")):
     """Obtiene todos los fondos disponibles"""
+    if stream:
+        # La primera página se lee antes de responder: un error inicial es un 500, no un array vacío
+        try:
+            pages = await read_first_page(FondoService.stream_funds())
+        except ClientError:
+            raise HTTPException(status_code=500, detail="Error al obtener los fondos")
+        return StreamingResponse(_json_array(pages), media_type="application/json")
     return await FondoService.get_all_funds()
 
+@router.get("/cache/stats")
+async def get_funds_cache_stats():
+    """Obtiene los contadores de la caché del catálogo de fondos"""
+    return FondoService.cache_stats()
+
+@router.delete("/cache")
+async def invalidate_funds_cache():
+    """Invalida la caché del catálogo de fondos de esta instancia"""
+    FondoService.invalidate_cache()
+    return FondoService.cache_stats()
+
 @router.get("/{fund_id}")
 async def get_fund(fund_id: str):
     """Obtiene información de un fondo específico"""
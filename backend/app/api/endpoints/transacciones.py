@@ -1,40 +1,142 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
-from app.models.transaccion import TransaccionCreate
+from botocore.exceptions import ClientError
+from datetime import datetime
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional
+from app.models.transaccion import TransaccionCreate, TransaccionBatch
 from app.services.transaccion_service import TransaccionService
+from app.services.batch_service import BatchService
+from app.services.export_service import stream_export, export_stats, MEDIA_TYPES
+from app.services.pagination import read_first_page
+from app.services.idempotency import MAX_KEY_LENGTH, KEY_REUSED_ERROR
 from app.config import settings
 
 router = APIRouter()
 
+IDEMPOTENCY_KEY_HEADER = Header(
+    None, alias="Idempotency-Key", min_length=1, max_length=MAX_KEY_LENGTH,
+    description="Clave única por operación: los reintentos con la misma clave devuelven la respuesta original"
+)
+
+INCLUDE_QUERY = Query(
+    None, description="portfolio: añade la vista completa del cliente (saldo, suscripciones activas e historial)"
+)
+
+def _raise_on_error(result: dict):
+    if result.get("error"):
+        # Reutilizar una clave con otra operación es un error de la petición, no del negocio
+        status_code = 422 if result["error"] == KEY_REUSED_ERROR else 400
+        raise HTTPException(status_code=status_code, detail=result["error"])
+
 @router.post("/subscriptions")
 async def create_subscription(
     subscription_data: TransaccionCreate, 
-    client_id: str = settings.DEFAULT_CLIENT_ID
+    client_id: str = settings.DEFAULT_CLIENT_ID,
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER,
+    include: Optional[Literal["portfolio"]] = INCLUDE_QUERY
 ):
-    """Suscribe al cliente a un fondo"""
-    result = await TransaccionService.create_subscription(client_id, subscription_data)
-    if result.get("error"):
-        raise HTTPException(status_code=400, detail=result["error"])
+    """Suscribe al cliente a un fondo; devuelve la transacción, el nuevo saldo y la suscripción"""
+    result = await TransaccionService.create_subscription(
+        client_id, subscription_data, idempotency_key, include_portfolio=include == "portfolio"
+    )
+    _raise_on_error(result)
     return result
 
 @router.delete("/subscriptions/{fund_id}")
 async def cancel_subscription(
     fund_id: str, 
-    client_id: str = settings.DEFAULT_CLIENT_ID
+    client_id: str = settings.DEFAULT_CLIENT_ID,
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER,
+    include: Optional[Literal["portfolio"]] = INCLUDE_QUERY
 ):
-    """Cancela la suscripción del cliente a un fondo"""
-    result = await TransaccionService.cancel_subscription(client_id, fund_id)
-    if result.get("error"):
-        raise HTTPException(status_code=400, detail=result["error"])
+    """Cancela la suscripción del cliente a un fondo; devuelve la transacción, el nuevo saldo y la suscripción"""
+    result = await TransaccionService.cancel_subscription(
+        client_id, fund_id, idempotency_key, include_portfolio=include == "portfolio"
+    )
+    _raise_on_error(result)
     return result
 
+@router.post("/batch")
+async def process_batch(batch: TransaccionBatch):
+    """
+    Procesa varias suscripciones y cancelaciones (de uno o varios clientes) en una sola petición.
+    Devuelve el resultado de cada operación en el orden recibido.
+    """
+    if len(batch.operations) > settings.BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El lote admite como máximo {settings.BATCH_MAX_OPERATIONS} operaciones"
+        )
+    return await BatchService.process(batch.operations)
+
 @router.get("/history")
 async def get_transactions_history(
+    response: Response,
     client_id: str = settings.DEFAULT_CLIENT_ID,
-    limit: int = Query(10, description="Número máximo de transacciones a devolver")
+    limit: int = Query(10, ge=1, description="Número máximo de transacciones a devolver"),
+    next_token: Optional[str] = Query(None, description="Token de la cabecera X-Next-Token de la página anterior")
 ):
-    """Obtiene el historial de transacciones del cliente"""
-    return await TransaccionService.get_client_transactions(client_id, limit)
+    """Obtiene el historial de transacciones del cliente, paginado de más reciente a más antiguo"""
+    try:
+        page = await TransaccionService.get_client_transactions_page(client_id, limit, next_token)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page["nextToken"]:
+        response.headers["X-Next-Token"] = page["nextToken"]
+    return page["items"]
+
+async def _export_response(pages, export_format: str, filename: str):
+    # La primera página se lee antes de responder: un error inicial es un 500, no un 200 vacío
+    try:
+        pages = await read_first_page(pages)
+    except ClientError:
+        raise HTTPException(status_code=500, detail="Error al exportar las transacciones")
+    return StreamingResponse(
+        stream_export(pages, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'}
+    )
+
+def _check_range(start_date: Optional[datetime], end_date: Optional[datetime]):
+    if start_date and end_date and end_date.timestamp() < start_date.timestamp():
+        raise HTTPException(status_code=400, detail="end_date debe ser posterior a start_date")
+
+@router.get("/export")
+async def export_client_transactions(
+    client_id: str = settings.DEFAULT_CLIENT_ID,
+    fund_id: Optional[str] = Query(None, description="Exportar solo las transacciones de este fondo"),
+    start_date: Optional[datetime] = Query(None, description="Fecha inicial (inclusive), ISO 8601"),
+    end_date: Optional[datetime] = Query(None, description="Fecha final (inclusive), ISO 8601"),
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format")
+):
+    """
+    Exporta el historial completo del cliente en NDJSON o CSV, transmitido página a página. Bajo
+    uvicorn la memoria no crece con el tamaño del historial; en Lambda, Mangum acumula el cuerpo
+    completo antes de responder y la exportación queda limitada al tamaño máximo de respuesta
+    """
+    _check_range(start_date, end_date)
+    pages = TransaccionService.iter_client_transaction_pages(client_id, fund_id, start_date, end_date)
+    return await _export_response(pages, export_format, f"transacciones-{client_id}")
+
+@router.get("/export/funds/{fund_id}")
+async def export_fund_transactions(
+    fund_id: str,
+    start_date: Optional[datetime] = Query(None, description="Fecha inicial (inclusive), ISO 8601"),
+    end_date: Optional[datetime] = Query(None, description="Fecha final (inclusive), ISO 8601"),
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format")
+):
+    """
+    Exporta las transacciones de un fondo de todos los clientes en NDJSON o CSV (consulta al
+    índice TransactionsByFund; mismas condiciones de memoria que la exportación del cliente)
+    """
+    _check_range(start_date, end_date)
+    pages = TransaccionService.iter_fund_transaction_pages(fund_id, start_date, end_date)
+    return await _export_response(pages, export_format, f"transacciones-fondo-{fund_id}")
+
+@router.get("/export/stats")
+async def get_export_stats():
+    """Filas, bytes y bytes/s de las exportaciones servidas por esta instancia"""
+    return export_stats.stats()
 
 @router.get("/subscriptions")
 async def get_active_subscriptions(client_id: str = settings.DEFAULT_CLIENT_ID):
@@ -0,0 +1,118 @@
+import logging
+import time
+from app.services.log import (
+    CORRELATION_HEADER, get_logger, new_correlation_id, reset_correlation_id, set_correlation_id, should_sample
+)
+from app.services.metrics import start_request, end_request, record_request
+
+logger = get_logger(__name__)
+
+# Ruta registrada para las peticiones que no coinciden con ninguna ruta (404), para no crear
+# una serie de métricas por cada URL desconocida
+UNMATCHED_ROUTE = "unmatched"
+
+
+def route_template(scope):
+    """
+    Plantilla de la ruta que atendió la petición. Si la ruta resuelta no incluye el prefijo del
+    router (routers anidados), se reconstruye sustituyendo los parámetros en la URL.
+    """
+    route = scope.get("route")
+    if route is None:
+        return UNMATCHED_ROUTE
+    path_regex = getattr(route, "path_regex", None)
+    if path_regex is not None and path_regex.match(scope["path"]):
+        return route.path
+    names = {str(value): name for name, value in scope.get("path_params", {}).items()}
+    return "/".join(f"{{{names[part]}}}" if part in names else part for part in scope["path"].split("/"))
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide la latencia de cada petición HTTP y le atribuye las llamadas a
+    DynamoDB hechas mientras se atendía. La ruta se etiqueta con la plantilla del router
+    (p. ej. /api/v1/clientes/{client_id}) y no con la URL concreta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        request, token = start_request()
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            seconds = time.perf_counter() - started
+            end_request(request, token)
+            record_request(scope["method"], route_template(scope), status, seconds, request)
+
+
+def _correlation_id(scope):
+    """Cabecera X-Correlation-Id (o X-Request-Id) del cliente, id de API Gateway o uno nuevo"""
+    headers = dict(scope.get("headers") or [])
+    for header in (CORRELATION_HEADER.lower().encode(), b"x-request-id"):
+        if headers.get(header):
+            return headers[header].decode("latin-1")[:128]
+    event = scope.get("aws.event") or {}
+    return (event.get("requestContext") or {}).get("requestId") or new_correlation_id()
+
+
+class RequestLogMiddleware:
+    """
+    Fija el identificador de correlación de la petición (lo devuelve en X-Correlation-Id) y
+    escribe una línea de log con ruta, método, estado y latencia. Las peticiones correctas se
+    muestrean con LOG_SAMPLE_RATE; las que terminan en 5xx se registran siempre.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        correlation_id = _correlation_id(scope)
+        token = set_correlation_id(correlation_id)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_correlation(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers") or [])
+                headers.append((CORRELATION_HEADER.lower().encode(), correlation_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_correlation)
+        except Exception:
+            logger.exception("Error no controlado", extra={"method": scope["method"], "path": scope["path"]})
+            raise
+        finally:
+            if status >= 500 or should_sample():
+                logger.log(
+                    logging.ERROR if status >= 500 else logging.INFO, "request",
+                    extra={
+                        "method": scope["method"],
+                        "route": route_template(scope),
+                        "status": status,
+                        "latencyMs": round((time.perf_counter() - started) * 1000, 3)
+                    }
+                )
+            reset_correlation_id(token)
@@ -12,6 +12,76 @@ class Settings(BaseSettings):
     FUNDS_TABLE_NAME: str = os.environ.get("FUNDS_TABLE_NAME", "Funds")
     SUBSCRIPTIONS_TABLE_NAME: str = os.environ.get("SUBSCRIPTIONS_TABLE_NAME", "Subscriptions")
     TRANSACTIONS_TABLE_NAME: str = os.environ.get("TRANSACTIONS_TABLE_NAME", "Transactions")
+    IDEMPOTENCY_TABLE_NAME: str = os.environ.get("IDEMPOTENCY_TABLE_NAME", "IdempotencyKeys")
+    NOTIFICATION_OUTBOX_TABLE_NAME: str = os.environ.get("NOTIFICATION_OUTBOX_TABLE_NAME", "NotificationOutbox")
+
+    # Tiempo durante el que se recuerda una clave Idempotency-Key (segundos)
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "86400"))
+
+    # Operaciones admitidas por petición en POST /transacciones/batch
+    BATCH_MAX_OPERATIONS: int = int(os.environ.get("BATCH_MAX_OPERATIONS", "500"))
+
+    # Almacenamiento: "dynamodb" (AWS o DynamoDB local) o "memory" (motor en memoria, sin red;
+    # desarrollo local y pruebas de carga de la API). STORAGE_MEMORY_SEED carga los fondos y el
+    # cliente por defecto de scripts/create_tables.py al crear el motor en memoria
+    STORAGE_BACKEND: str = os.environ.get("STORAGE_BACKEND", "dynamodb")
+    STORAGE_MEMORY_SEED: bool = os.environ.get("STORAGE_MEMORY_SEED", "true").lower() == "true"
+
+    # Conexión a DynamoDB. Para DynamoDB local: DYNAMODB_ENDPOINT_URL=http://localhost:8000
+    DYNAMODB_ENDPOINT_URL: str = os.environ.get("DYNAMODB_ENDPOINT_URL", "")
+    DYNAMODB_CONNECT_TIMEOUT: float = float(os.environ.get("DYNAMODB_CONNECT_TIMEOUT", "2"))
+    DYNAMODB_READ_TIMEOUT: float = float(os.environ.get("DYNAMODB_READ_TIMEOUT", "5"))
+    DYNAMODB_MAX_ATTEMPTS: int = int(os.environ.get("DYNAMODB_MAX_ATTEMPTS", "3"))
+
+    # Capacidad consumida devuelta por DynamoDB para las métricas: TOTAL, INDEXES o NONE (no se pide)
+    DYNAMODB_RETURN_CONSUMED_CAPACITY: str = os.environ.get("DYNAMODB_RETURN_CONSUMED_CAPACITY", "TOTAL")
+
+    # Métricas: una línea EMF por petición en los logs (activo por defecto en Lambda) y su namespace
+    METRICS_EMF_ENABLED: bool = os.environ.get(
+        "METRICS_EMF_ENABLED", "true" if os.environ.get("AWS_LAMBDA_FUNCTION_NAME") else "false"
+    ).lower() == "true"
+    METRICS_NAMESPACE: str = os.environ.get("METRICS_NAMESPACE", "ElClienteFondos")
+
+    # Logs JSON: nivel y fracción de peticiones correctas que se registran (las fallidas siempre)
+    LOG_LEVEL: str = os.environ.get("LOG_LEVEL", "INFO")
+    LOG_SAMPLE_RATE: float = float(os.environ.get("LOG_SAMPLE_RATE", "1"))
+
+    # Hilos dedicados a las llamadas bloqueantes de boto3 (acota la concurrencia hacia DynamoDB)
+    DYNAMODB_MAX_WORKERS: int = int(os.environ.get("DYNAMODB_MAX_WORKERS", "32"))
+
+    # Caché del catálogo de fondos (segundos). 0 desactiva la caché y consulta DynamoDB siempre.
+    FUNDS_CACHE_TTL_SECONDS: int = int(os.environ.get("FUNDS_CACHE_TTL_SECONDS", "300"))
+
+    # Caché de clientes (LRU con TTL en segundos; 0 la desactiva), actualizada con las escrituras de
+    # esta instancia. CLIENT_CONSISTENT_READS lee el cliente con lectura fuertemente consistente, sin
+    # caché, en las comprobaciones de saldo de suscripciones y cancelaciones
+    CLIENT_CACHE_TTL_SECONDS: float = float(os.environ.get("CLIENT_CACHE_TTL_SECONDS", "5"))
+    CLIENT_CACHE_MAX_SIZE: int = int(os.environ.get("CLIENT_CACHE_MAX_SIZE", "10000"))
+    CLIENT_CONSISTENT_READS: bool = os.environ.get("CLIENT_CONSISTENT_READS", "false").lower() == "true"
+
+    # Agrupar lecturas concurrentes de la misma clave (cliente, fondo, catálogo) en una sola llamada
+    SINGLE_FLIGHT_ENABLED: bool = os.environ.get("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+    # Lectura completa de Funds: segmentos del scan paralelo (1 = secuencial) y tamaño de página (0 = 1 MB)
+    FUNDS_SCAN_SEGMENTS: int = int(os.environ.get("FUNDS_SCAN_SEGMENTS", "1"))
+    FUNDS_SCAN_PAGE_SIZE: int = int(os.environ.get("FUNDS_SCAN_PAGE_SIZE", "0"))
+
+    # Notificaciones: "queue" las entrega en segundo plano, "inline" antes de responder (Lambda),
+    # "outbox" las registra en NOTIFICATION_OUTBOX_TABLE_NAME, en la misma escritura que la operación,
+    # para un consumidor externo
+    NOTIFICATION_DISPATCH_MODE: str = os.environ.get("NOTIFICATION_DISPATCH_MODE", "queue")
+    NOTIFICATION_QUEUE_MAX_SIZE: int = int(os.environ.get("NOTIFICATION_QUEUE_MAX_SIZE", "1000"))
+    NOTIFICATION_WORKERS: int = int(os.environ.get("NOTIFICATION_WORKERS", "4"))
+    NOTIFICATION_MAX_ATTEMPTS: int = int(os.environ.get("NOTIFICATION_MAX_ATTEMPTS", "3"))
+    NOTIFICATION_RETRY_BACKOFF_SECONDS: float = float(os.environ.get("NOTIFICATION_RETRY_BACKOFF_SECONDS", "0.5"))
+    NOTIFICATION_DRAIN_TIMEOUT_SECONDS: float = float(os.environ.get("NOTIFICATION_DRAIN_TIMEOUT_SECONDS", "10"))
+
+    # Envíos masivos: concurrencia y mensajes por segundo por canal (0 = sin límite de tasa).
+    # Valores por defecto alineados con las cuotas iniciales de SES (14/s) y SNS SMS (20/s)
+    EMAIL_BATCH_CONCURRENCY: int = int(os.environ.get("EMAIL_BATCH_CONCURRENCY", "10"))
+    EMAIL_RATE_PER_SECOND: float = float(os.environ.get("EMAIL_RATE_PER_SECOND", "14"))
+    SMS_BATCH_CONCURRENCY: int = int(os.environ.get("SMS_BATCH_CONCURRENCY", "10"))
+    SMS_RATE_PER_SECOND: float = float(os.environ.get("SMS_RATE_PER_SECOND", "20"))
     
     # Valores default para desarrollo local
     DEFAULT_CLIENT_ID: str = os.environ.get("DEFAULT_CLIENT_ID", "C123456")
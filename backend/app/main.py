@@ -1,12 +1,26 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.endpoints import cliente, fondos, transacciones
+from fastapi.responses import PlainTextResponse
+from app.api.endpoints import cliente, dashboard, fondos, transacciones
+from app.api.middleware import MetricsMiddleware, RequestLogMiddleware
 from app.config import settings
+from app.services.metrics import metrics
+from app.services.notification_queue import drain_notifications
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Entregar las notificaciones pendientes antes de apagar el proceso
+    await drain_notifications(settings.NOTIFICATION_DRAIN_TIMEOUT_SECONDS)
+
 
 app = FastAPI(
     title=settings.APP_NAME,
     description="API para gestión de fondos de inversión",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -16,8 +30,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Token", "X-Correlation-Id"],  # Paginación del historial y correlación de logs
 )
 
+# Latencia por ruta y llamadas a DynamoDB de cada petición
+app.add_middleware(MetricsMiddleware)
+
+# Identificador de correlación y log muestreado de cada petición (el más externo)
+app.add_middleware(RequestLogMiddleware)
+
 # Rutas API
 app.include_router(
     cliente.router,
@@ -34,7 +55,18 @@ app.include_router(
     prefix=f"{settings.API_V1_PREFIX}/transacciones",
     tags=["transacciones"]
 )
+app.include_router(
+    dashboard.router,
+    prefix=f"{settings.API_V1_PREFIX}/dashboard",
+    tags=["dashboard"]
+)
 
 @app.get("/", tags=["root"])
 async def root():
-    return {"message": "Bienvenido a la API de Fondos de EL CLIENTE"}
\ No newline at end of file
+    return {"message": "Bienvenido a la API de Fondos de EL CLIENTE"}
+
+
+@app.get("/metrics", tags=["root"], response_class=PlainTextResponse)
+async def get_metrics():
+    """Métricas del proceso en formato de texto de Prometheus"""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
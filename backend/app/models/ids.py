@@ -0,0 +1,67 @@
+import os
+import threading
+import time
+from uuid import UUID
+
+# Identificadores UUIDv7 (RFC 9562): 48 bits de milisegundos Unix, versión, 12 bits de contador
+# y 62 bits aleatorios. En su forma de texto se ordenan cronológicamente, por lo que sirven
+# como clave de ordenación de DynamoDB para obtener los registros más recientes sin índices.
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+_COUNTER_MAX = 0xFFF
+
+
+def _build(timestamp_ms: int, counter: int):
+    rand_b = int.from_bytes(os.urandom(8), 'big') & ((1 << 62) - 1)
+    value = (timestamp_ms & ((1 << 48) - 1)) << 80
+    value |= 0x7 << 76 | counter << 64 | 0b10 << 62 | rand_b
+    return str(UUID(int=value))
+
+
+def time_ordered_id():
+    """
+    Nuevo UUIDv7 como texto. Dentro del proceso es estrictamente creciente: los generados en el
+    mismo milisegundo incrementan el contador y, si se agota, se toma el milisegundo siguiente.
+    """
+    global _last_ms, _counter
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _last_ms:
+            # Contador inicial aleatorio con el bit alto a 0 para dejar margen de incremento
+            _last_ms, _counter = now_ms, int.from_bytes(os.urandom(2), 'big') & 0x7FF
+        elif _counter < _COUNTER_MAX:
+            _counter += 1
+        else:
+            _last_ms, _counter = _last_ms + 1, 0
+        return _build(_last_ms, _counter)
+
+
+def id_for_timestamp(timestamp_ms: int):
+    """UUIDv7 para un instante dado (migración de registros existentes); no es monotónico"""
+    return _build(timestamp_ms, int.from_bytes(os.urandom(2), 'big') & _COUNTER_MAX)
+
+
+def is_time_ordered(identifier: str):
+    """Indica si el identificador es un UUIDv7"""
+    try:
+        return UUID(identifier).version == 7
+    except (ValueError, TypeError, AttributeError):
+        return False
+
+
+def id_timestamp_ms(identifier: str):
+    """Milisegundos Unix codificados en un UUIDv7"""
+    return UUID(identifier).int >> 80
+
+
+def lowest_id_for(timestamp_ms: int):
+    """Menor UUIDv7 posible en ese milisegundo: límite inferior inclusivo de un rango por fecha"""
+    return str(UUID(int=(timestamp_ms << 80) | 0x7 << 76 | 0b10 << 62))
+
+
+def highest_id_for(timestamp_ms: int):
+    """Mayor UUIDv7 posible en ese milisegundo: límite superior inclusivo de un rango por fecha"""
+    return str(UUID(int=(timestamp_ms << 80) | 0x7 << 76 | _COUNTER_MAX << 64 | 0b10 << 62 | ((1 << 62) - 1)))
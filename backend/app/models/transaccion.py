@@ -1,11 +1,13 @@
 from pydantic import BaseModel, Field
-from typing import Literal, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
-from uuid import uuid4
+from app.models.ids import time_ordered_id
 
 
 class Transaccion(BaseModel):
-    transactionId: str = Field(default_factory=lambda: str(uuid4()))  # Toda transacción debe generar un identificador único.
+    # Toda transacción debe generar un identificador único. Es la clave de ordenación de
+    # Transactions: al ser cronológico, la tabla base devuelve el historial ya ordenado.
+    transactionId: str = Field(default_factory=time_ordered_id)
     clientId: str
     fundId: str
     type: Literal["SUBSCRIPTION", "CANCELLATION"]
@@ -20,9 +22,19 @@ class TransaccionCreate(BaseModel):
 
 
 class Subscription(BaseModel):
-    subscriptionId: str = Field(default_factory=lambda: str(uuid4()))
+    subscriptionId: str = Field(default_factory=time_ordered_id)
     clientId: str
     fundId: str
     amountSubscribed: float
     status: Literal["ACTIVE", "CANCELLED"] = "ACTIVE"
-    subscriptionDate: datetime = Field(default_factory=datetime.now)
\ No newline at end of file
+    subscriptionDate: datetime = Field(default_factory=datetime.now)
+
+
+class BatchOperation(BaseModel):
+    clientId: str
+    fundId: str
+    type: Literal["SUBSCRIPTION", "CANCELLATION"]
+
+
+class TransaccionBatch(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1)
@@ -0,0 +1,279 @@
+import asyncio
+from botocore.exceptions import ClientError
+from datetime import datetime
+from decimal import Decimal
+from app.models.ids import time_ordered_id
+from app.models.transaccion import Transaccion, TransaccionCreate, Subscription
+from app.services.cliente_service import ClienteService, client_cache
+from app.services.fondo_service import FondoService
+from app.services.dynamodb import run_db
+from app.services.log import get_logger
+from app.services import transaccion_service
+from app.services.transaccion_service import (
+    TransaccionService, client_debit_update, client_refund_update, subscription_put,
+    subscription_cancel_update, transaction_put, notification_item, notify_client
+)
+
+logger = get_logger(__name__)
+
+# Límite de elementos de TransactWriteItems. Cada grupo de operaciones de un mismo cliente
+# ocupa un Update de Clients más dos elementos por operación (suscripción y transacción), tres
+# en modo outbox (registro de la notificación).
+TRANSACT_MAX_ITEMS = 100
+
+# Motivos de cancelación de TransactWriteItems que no dependen de los datos (otra transacción sobre
+# los mismos items, limitación de capacidad): el grupo se reintenta entero con espera exponencial
+RETRYABLE_CANCELLATIONS = {'TransactionConflict', 'ThrottlingError', 'ProvisionedThroughputExceeded'}
+COMMIT_ATTEMPTS = 3
+COMMIT_RETRY_BACKOFF_SECONDS = 0.05
+
+
+def _items_per_operation(entries):
+    return 3 if entries and entries[0].outbox else 2
+
+
+def _failed(index: int, operation, error: str):
+    return {
+        "index": index,
+        "clientId": operation.clientId,
+        "fundId": operation.fundId,
+        "type": operation.type,
+        "status": "FAILED",
+        "error": error
+    }
+
+
+class _Planned:
+    """Operación validada en memoria, lista para escribirse"""
+
+    def __init__(self, index, operation, client, fund, amount: Decimal):
+        self.index = index
+        self.operation = operation
+        self.client = client
+        self.fund = fund
+        self.amount = amount
+        current_time = datetime.now()
+        self.transaction = Transaccion(
+            transactionId=time_ordered_id(),
+            clientId=operation.clientId,
+            fundId=operation.fundId,
+            type=operation.type,
+            amount=float(amount),
+            transactionDate=current_time,
+            status="COMPLETED"
+        )
+        self.subscription = Subscription(
+            subscriptionId=time_ordered_id(),
+            clientId=operation.clientId,
+            fundId=operation.fundId,
+            amountSubscribed=float(amount),
+            status="ACTIVE",
+            subscriptionDate=current_time
+        ) if operation.type == "SUBSCRIPTION" else None
+        self.outbox = notification_item(client, self.message())
+
+    def message(self):
+        if self.operation.type == "SUBSCRIPTION":
+            return f"Se ha suscrito exitosamente al fondo {self.fund['name']}"
+        return f"Ha cancelado exitosamente su suscripción al fondo {self.fund['name']}"
+
+    def response(self):
+        return {"index": self.index, **self.transaction.model_dump(), "fundName": self.fund['name']}
+
+
+def _rounds(planned):
+    """
+    Agrupa por cliente (manteniendo el orden) en bloques que caben en una TransactWriteItems y los
+    reparte en rondas: la ronda k lleva el k-ésimo bloque de cada cliente. Los bloques de un mismo
+    cliente quedan así en rondas sucesivas y se escriben uno tras otro, nunca en paralelo (sus
+    condiciones sobre el mismo item del cliente se cancelarían entre sí)
+    """
+    by_client = {}
+    for entry in planned:
+        by_client.setdefault(entry.operation.clientId, []).append(entry)
+    rounds = []
+    for entries in by_client.values():
+        per_chunk = (TRANSACT_MAX_ITEMS - 1) // _items_per_operation(entries)
+        for position, start in enumerate(range(0, len(entries), per_chunk)):
+            if position == len(rounds):
+                rounds.append([])
+            rounds[position].append(entries[start:start + per_chunk])
+    return rounds
+
+
+def _pack(chunks):
+    """
+    Reparte los bloques en grupos de como máximo TRANSACT_MAX_ITEMS elementos, sin repetir cliente
+    dentro de un grupo (una transacción no puede incluir dos operaciones sobre el mismo item)
+    """
+    groups = []
+    for chunk in chunks:
+        size = 1 + _items_per_operation(chunk) * len(chunk)
+        client_id = chunk[0].operation.clientId
+        for group in groups:
+            if group['size'] + size <= TRANSACT_MAX_ITEMS and client_id not in group['clients']:
+                break
+        else:
+            group = {'size': 0, 'clients': set(), 'chunks': []}
+            groups.append(group)
+        group['size'] += size
+        group['clients'].add(client_id)
+        group['chunks'].append(chunk)
+    return [group['chunks'] for group in groups]
+
+
+def _chunk_items(chunk):
+    """
+    Update agregado de Clients + suscripción y transacción de cada operación del bloque (y el
+    registro de su notificación en modo outbox)
+    """
+    client_id = chunk[0].operation.clientId
+    total = sum((entry.amount for entry in chunk), Decimal('0'))
+    fund_ids = {entry.operation.fundId for entry in chunk}
+    category_deltas = {}
+    for entry in chunk:
+        category_deltas[entry.fund['category']] = category_deltas.get(entry.fund['category'], 0) + 1
+
+    if chunk[0].operation.type == "SUBSCRIPTION":
+        items = [client_debit_update(client_id, total, fund_ids, category_deltas)]
+        for entry in chunk:
+            items += [subscription_put(entry.subscription), transaction_put(entry.transaction)]
+    else:
+        items = [client_refund_update(client_id, total, fund_ids, category_deltas)]
+        for entry in chunk:
+            items += [subscription_cancel_update(client_id, entry.operation.fundId, entry.amount),
+                      transaction_put(entry.transaction)]
+    return items + [entry.outbox for entry in chunk if entry.outbox]
+
+
+async def _run_individually(entries):
+    """
+    Camino de respaldo cuando un grupo se cancela (saldo o suscripción modificados por otra
+    petición desde la lectura): cada operación se vuelve a validar y escribir por separado
+    """
+    results = []
+    for entry in entries:
+        operation = entry.operation
+        if operation.type == "SUBSCRIPTION":
+            result = await TransaccionService.create_subscription(
+                operation.clientId, TransaccionCreate(fundId=operation.fundId)
+            )
+        else:
+            result = await TransaccionService.cancel_subscription(operation.clientId, operation.fundId)
+        if result.get("error"):
+            results.append(_failed(entry.index, operation, result["error"]))
+        else:
+            results.append({"index": entry.index, **result})
+    return results
+
+
+def _cancellation_reasons(error: ClientError):
+    """Códigos de cancelación de un TransactWriteItems (sin los de las operaciones que no fallaron)"""
+    if error.response['Error']['Code'] != 'TransactionCanceledException':
+        return set()
+    return {reason.get('Code') for reason in error.response.get('CancellationReasons') or []} - {'None', None}
+
+
+async def _commit_group(chunks):
+    """
+    Escribe un grupo en una sola TransactWriteItems. Si alguna condición falla, cada operación se
+    vuelve a validar y escribir por separado; los conflictos y limitaciones se reintentan con el
+    grupo entero, y cualquier otro error marca como fallidas las operaciones del grupo
+    """
+    entries = [entry for chunk in chunks for entry in chunk]
+    items = [item for chunk in chunks for item in _chunk_items(chunk)]
+    for attempt in range(1, COMMIT_ATTEMPTS + 1):
+        try:
+            with client_cache.writing(*{entry.operation.clientId for entry in entries}):
+                await run_db(transaccion_service.dynamodb_client.transact_write_items, TransactItems=items)
+            break
+        except ClientError as e:
+            reasons = _cancellation_reasons(e)
+            if 'ConditionalCheckFailed' in reasons:
+                return await _run_individually(entries)
+            if reasons and reasons <= RETRYABLE_CANCELLATIONS and attempt < COMMIT_ATTEMPTS:
+                await asyncio.sleep(COMMIT_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+                continue
+            logger.error("Error committing batch group",
+                         extra={"operations": len(entries), "attempts": attempt, "error": str(e)})
+            return [_failed(entry.index, entry.operation, "Error al confirmar el lote") for entry in entries]
+
+    for entry in entries:
+        await notify_client(entry.client, entry.message(), recorded=entry.outbox is not None)
+    return [entry.response() for entry in entries]
+
+
+class BatchService:
+    @staticmethod
+    async def process(operations):
+        """
+        Procesa un lote de suscripciones y cancelaciones y devuelve el resultado de cada una en el
+        orden recibido. Clientes, fondos y suscripciones se leen con lecturas agrupadas, los saldos
+        se validan en memoria y las escrituras se agrupan en TransactWriteItems de hasta 100
+        elementos. Las cancelaciones se aplican antes que las suscripciones, de modo que el saldo
+        reintegrado queda disponible para las suscripciones del mismo lote.
+        """
+        results = [None] * len(operations)
+        pairs = {(op.clientId, op.fundId) for op in operations}
+        try:
+            clients, funds, subscriptions = await asyncio.gather(
+                ClienteService.get_clients_by_ids(op.clientId for op in operations),
+                FondoService.get_funds_by_ids(op.fundId for op in operations),
+                TransaccionService.get_subscriptions_by_keys(pairs)
+            )
+        except ClientError as e:
+            logger.error("Error reading batch", extra={"operations": len(operations), "error": str(e)})
+            error = "Error al leer los datos del lote"
+            return BatchService._summary([_failed(i, op, error) for i, op in enumerate(operations)])
+
+        balances = {client_id: client['balance'] for client_id, client in clients.items()}
+        seen = set()
+        planned = {"CANCELLATION": [], "SUBSCRIPTION": []}
+        ordered = sorted(enumerate(operations), key=lambda pair: pair[1].type != "CANCELLATION")
+        for index, operation in ordered:
+            pair = (operation.clientId, operation.fundId)
+            client, fund = clients.get(operation.clientId), funds.get(operation.fundId)
+            subscription = subscriptions.get(pair)
+            active = subscription is not None and subscription.get('status') == 'ACTIVE'
+
+            if pair in seen:
+                results[index] = _failed(index, operation, "Operación duplicada en el lote")
+                continue
+            seen.add(pair)
+            if not client or not fund:
+                results[index] = _failed(index, operation, "Cliente o fondo no encontrado")
+                continue
+
+            if operation.type == "CANCELLATION":
+                if not active:
+                    results[index] = _failed(index, operation, "No está suscrito a este fondo")
+                    continue
+                amount = Decimal(str(subscription['amountSubscribed']))
+                balances[operation.clientId] += amount
+            else:
+                if active:
+                    results[index] = _failed(index, operation, "Ya está suscrito a este fondo")
+                    continue
+                amount = Decimal(str(fund['minimumAmount']))
+                if balances[operation.clientId] < amount:
+                    results[index] = _failed(
+                        index, operation, f"No tiene saldo disponible para vincularse al fondo {fund['name']}"
+                    )
+                    continue
+                balances[operation.clientId] -= amount
+            planned[operation.type].append(_Planned(index, operation, client, fund, amount))
+
+        # Primero todas las cancelaciones y después las suscripciones; dentro de una fase, los
+        # grupos de una misma ronda (a lo sumo un bloque por cliente) se escriben en paralelo
+        for phase in ("CANCELLATION", "SUBSCRIPTION"):
+            for chunks in _rounds(planned[phase]):
+                groups = _pack(chunks)
+                for group_results in await asyncio.gather(*(_commit_group(group) for group in groups)):
+                    for result in group_results:
+                        results[result["index"]] = result
+        return BatchService._summary(results)
+
+    @staticmethod
+    def _summary(results):
+        completed = sum(1 for result in results if result["status"] == "COMPLETED")
+        return {"results": results, "completed": completed, "failed": len(results) - completed}
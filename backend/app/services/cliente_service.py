@@ -1,65 +1,275 @@
-import boto3
+import copy
+import itertools
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from botocore.exceptions import ClientError
 from decimal import Decimal
 from app.models.cliente import Cliente, ClienteUpdate
 from app.config import settings
+from app.services.dynamodb import run_db, lazy_table, shared_resource, batch_get_items
+from app.services.log import get_logger
+from app.services.single_flight import single_flight
 
-# conexión a DynamoDB nube
-dynamodb = boto3.resource('dynamodb', region_name=settings.AWS_REGION)
-table = dynamodb.Table(settings.CLIENTS_TABLE_NAME)
+logger = get_logger(__name__)
 
-# conexión a DynamoDB local
-# dynamodb = boto3.resource(
-#     'dynamodb', 
-#     endpoint_url='http://localhost:8000',  # Usar DynamoDB local
-#     region_name=settings.AWS_REGION,
-#     aws_access_key_id='dummy',  # Credenciales dummy para DynamoDB local
-#     aws_secret_access_key='dummy'
-# )
-# table = dynamodb.Table('Clients')
+# Tabla resuelta en el primer uso contra el recurso DynamoDB compartido
+dynamodb = shared_resource
+table = lazy_table(settings.CLIENTS_TABLE_NAME)
 
+# Resumen de cartera desnormalizado sobre el item del cliente. TransaccionService lo actualiza
+# en la misma escritura transaccional que cada suscripción y cancelación.
+ACTIVE_FUNDS_ATTRIBUTE = 'activeFundIds'        # Conjunto (SS) de fondos con suscripción activa
+TOTAL_INVESTED_ATTRIBUTE = 'totalInvested'      # Suma de los montos suscritos activos
+CATEGORY_COUNT_PREFIX = 'activeCount_'          # activeCount_FPV, activeCount_FIC, ...
+FUND_CATEGORIES = ('FPV', 'FIC')
 
-# Función auxiliar para convertir floats a Decimal
-def float_to_decimal(obj):
-    if isinstance(obj, dict):
-        return {k: float_to_decimal(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [float_to_decimal(i) for i in obj]
-    elif isinstance(obj, float):
-        return Decimal(str(obj))
-    return obj
+# Contador de escrituras del item del cliente: toda escritura lo incrementa, y las suscripciones y
+# cancelaciones lo usan como condición para que el saldo que devuelven sea el que quedó escrito
+REVISION_ATTRIBUTE = 'revision'
+
+
+def category_count_attribute(category: str):
+    return f"{CATEGORY_COUNT_PREFIX}{category}"
+
+
+def build_portfolio(item: dict):
+    """Construye la respuesta del resumen de cartera a partir del item del cliente"""
+    category_counts = {category: 0 for category in FUND_CATEGORIES}
+    for attribute, value in item.items():
+        if attribute.startswith(CATEGORY_COUNT_PREFIX):
+            category_counts[attribute[len(CATEGORY_COUNT_PREFIX):]] = value
+    active_fund_ids = sorted(item.get(ACTIVE_FUNDS_ATTRIBUTE) or [])
+    return {
+        "clientId": item['clientId'],
+        "balance": item['balance'],
+        "totalInvested": item.get(TOTAL_INVESTED_ATTRIBUTE, 0),
+        "activeFundIds": active_fund_ids,
+        "activeCount": len(active_fund_ids),
+        "categoryCounts": category_counts
+    }
+
+
+class _WriteState:
+    """Escrituras de esta instancia sobre un cliente: en curso, solapadas y secuencia del último cambio"""
+
+    def __init__(self, sequence: int):
+        self.pending = 0
+        self.overlapped = False
+        self.sequence = sequence
+
+
+class ClientCache:
+    """
+    Caché LRU de clientes con TTL, actualizada con los atributos que devuelve UpdateItem.
+
+    Cada inicio y fin de escritura sobre un cliente avanza su secuencia: una lectura solo se
+    guarda si no hubo escrituras de esta instancia sobre el cliente mientras estaba en curso, y
+    el resultado de una escritura solo se aplica si no se solapó con otra. En cualquier otro caso
+    la entrada se descarta. Las escrituras de otras instancias, y una lectura eventualmente
+    consistente que aún no refleje una escritura reciente, quedan acotadas por `ttl_seconds`; las
+    suscripciones y cancelaciones no dependen de ello, porque su escritura se condiciona a la
+    revisión del cliente leída (ver TransaccionService).
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()    # clientId -> (item, guardado en)
+        self.writes = {}                # clientId -> _WriteState
+        self._sequence = itertools.count(1)
+        self._floor = 0                 # Secuencia más alta de los estados de escritura descartados
+        self.hits = 0
+        self.misses = 0
+        self.updates = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get(self, client_id: str):
+        entry = self.entries.get(client_id)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl_seconds:
+            self.entries.move_to_end(client_id)
+            self.hits += 1
+            return copy.deepcopy(entry[0])
+        if entry is not None:
+            del self.entries[client_id]
+        self.misses += 1
+        return None
+
+    def begin_read(self):
+        return next(self._sequence)
+
+    def version(self, client_id: str):
+        """Secuencia de la última escritura de esta instancia sobre el cliente (cambia al empezar y al terminar)"""
+        state = self.writes.get(client_id)
+        return state.sequence if state else self._floor
+
+    def fill(self, client_id: str, item: dict, read: int):
+        """Guarda el resultado de una lectura iniciada en `read` si ninguna escritura la alcanzó"""
+        if not self.enabled:
+            return
+        state = self.writes.get(client_id)
+        if (state.pending if state else 0) or (state.sequence if state else self._floor) > read:
+            return
+        self.entries[client_id] = (copy.deepcopy(item), time.monotonic())
+        self.entries.move_to_end(client_id)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def begin_write(self, client_id: str):
+        state = self.writes.get(client_id)
+        if state is None:
+            state = self.writes[client_id] = _WriteState(self._floor)
+        state.overlapped = state.overlapped or state.pending > 0
+        state.pending += 1
+        state.sequence = next(self._sequence)
+        return state
+
+    def end_write(self, client_id: str, state: _WriteState, attributes: dict = None):
+        """
+        Cierra una escritura. Con los atributos devueltos por UpdateItem (UPDATED_NEW) actualiza la
+        entrada en caché; sin ellos, o si otra escritura se solapó, la descarta.
+        """
+        state.pending -= 1
+        state.sequence = next(self._sequence)
+        entry = self.entries.get(client_id)
+        if entry is not None:
+            if attributes and not state.overlapped:
+                entry[0].update(copy.deepcopy(attributes))
+                self.updates += 1
+            else:
+                del self.entries[client_id]
+                self.invalidations += 1
+        if state.pending == 0:
+            state.overlapped = False
+            self._prune()
+
+    @contextmanager
+    def writing(self, *client_ids):
+        """Escritura sin valores de retorno (TransactWriteItems): descarta las entradas al terminar"""
+        states = [(client_id, self.begin_write(client_id)) for client_id in client_ids]
+        try:
+            yield
+        finally:
+            for client_id, state in states:
+                self.end_write(client_id, state)
+
+    def _prune(self):
+        if len(self.writes) <= self.max_size:
+            return
+        for client_id, state in list(self.writes.items()):
+            if state.pending == 0:
+                self._floor = max(self._floor, state.sequence)
+                del self.writes[client_id]
+
+    def invalidate(self):
+        self.invalidations += len(self.entries)
+        self.entries.clear()
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "ttlSeconds": self.ttl_seconds,
+            "maxSize": self.max_size,
+            "size": len(self.entries),
+            "consistentReads": settings.CLIENT_CONSISTENT_READS,
+            "hits": self.hits,
+            "misses": self.misses,
+            "updates": self.updates,
+            "invalidations": self.invalidations
+        }
+
+
+# Clientes leídos recientemente. Las escrituras de esta instancia la mantienen al día
+client_cache = ClientCache(settings.CLIENT_CACHE_MAX_SIZE, settings.CLIENT_CACHE_TTL_SECONDS)
 
 
 class ClienteService:
     @staticmethod
-    async def get_client(client_id: str):
+    async def get_client(client_id: str, consistent: bool = False):
+        """
+        Obtiene el cliente, desde la caché si está vigente. Con consistent=True se lee siempre de
+        DynamoDB con lectura fuertemente consistente (comprobaciones de saldo)
+        """
+        if client_cache.enabled and not consistent:
+            cached = client_cache.get(client_id)
+            if cached is not None:
+                return cached
+        # Las lecturas concurrentes del mismo cliente se agrupan, salvo con una escritura de esta
+        # instancia de por medio: la versión forma parte de la clave
+        key = (client_id, consistent, client_cache.version(client_id))
+        try:
+            return await single_flight.run(
+                settings.CLIENTS_TABLE_NAME, key, lambda: ClienteService._read_client(client_id, consistent)
+            )
+        except ClientError as e:
+            logger.error("Error getting client", extra={"clientId": client_id, "error": e.response['Error']['Message']})
+            return None
+
+    @staticmethod
+    async def _read_client(client_id: str, consistent: bool):
+        read = client_cache.begin_read()
+        params = {'ConsistentRead': True} if consistent else {}
+        response = await run_db(table.get_item, Key={'clientId': client_id}, **params)
+        item = response.get('Item')
+        if item:
+            client_cache.fill(client_id, item, read)
+        return item
+
+    @staticmethod
+    async def get_clients_by_ids(client_ids):
+        """Obtiene varios clientes con BatchGetItem; devuelve un dict clientId -> cliente"""
+        keys = [{'clientId': cid} for cid in sorted(set(client_ids))]
+        if not keys:
+            return {}
         try:
-            response = table.get_item(Key={'clientId': client_id})
-            return response.get('Item')
+            items = await batch_get_items(dynamodb, settings.CLIENTS_TABLE_NAME, keys)
+            return {item['clientId']: item for item in items}
         except ClientError as e:
-            print(f"Error getting client: {e.response['Error']['Message']}")
+            logger.error("Error getting clients", extra={"clients": len(keys), "error": e.response['Error']['Message']})
+            return {}
+
+    @staticmethod
+    async def get_portfolio(client_id: str):
+        """Obtiene el resumen de cartera del cliente con una sola lectura, sin recorrer sus suscripciones"""
+        try:
+            response = await run_db(table.get_item, Key={'clientId': client_id})
+        except ClientError as e:
+            logger.error("Error getting portfolio", extra={"clientId": client_id, "error": e.response['Error']['Message']})
             return None
+        item = response.get('Item')
+        return build_portfolio(item) if item else None
 
     @staticmethod
     async def update_client_balance(client_id: str, amount: float):
-        """Actualiza el saldo del cliente (suma o resta)"""
+        """Actualiza el saldo del cliente (suma o resta) y la entrada en caché con el saldo devuelto"""
+        # Convertir amount a Decimal
+        decimal_amount = Decimal(str(amount))
+        
+        write = client_cache.begin_write(client_id)
+        attributes = None
         try:
-            # Convertir amount a Decimal
-            decimal_amount = Decimal(str(amount))
-            
-            response = table.update_item(
+            response = await run_db(
+                table.update_item,
                 Key={'clientId': client_id},
-                UpdateExpression="SET balance = balance + :val",
-                ExpressionAttributeValues={':val': decimal_amount},
+                UpdateExpression=f"SET balance = balance + :val ADD {REVISION_ATTRIBUTE} :one",
+                ExpressionAttributeValues={':val': decimal_amount, ':one': 1},
                 ReturnValues="UPDATED_NEW"
             )
-            return response.get('Attributes')
+            attributes = response.get('Attributes')
+            return attributes
         except ClientError as e:
-            print(f"Error updating balance: {e.response['Error']['Message']}")
+            logger.error("Error updating balance", extra={"clientId": client_id, "error": e.response['Error']['Message']})
             return None
+        finally:
+            client_cache.end_write(client_id, write, attributes)
 
     @staticmethod
     async def update_client_preferences(client_id: str, update_data: ClienteUpdate):
+        """Actualiza las preferencias de notificación y la entrada en caché con los valores devueltos"""
         update_expression = "SET "
         expression_attribute_values = {}
         
@@ -76,16 +286,33 @@ class ClienteService:
             expression_attribute_values[':phone'] = update_data.phone
         
         # Eliminar la última coma
-        update_expression = update_expression[:-2]
+        update_expression = update_expression[:-2] + f" ADD {REVISION_ATTRIBUTE} :one"
+        expression_attribute_values[':one'] = 1
         
+        write = client_cache.begin_write(client_id)
+        attributes = None
         try:
-            response = table.update_item(
+            response = await run_db(
+                table.update_item,
                 Key={'clientId': client_id},
                 UpdateExpression=update_expression,
                 ExpressionAttributeValues=expression_attribute_values,
                 ReturnValues="UPDATED_NEW"
             )
-            return response.get('Attributes')
+            attributes = response.get('Attributes')
+            return attributes
         except ClientError as e:
-            print(f"Error updating client: {e.response['Error']['Message']}")
-            return None
\ No newline at end of file
+            logger.error("Error updating client", extra={"clientId": client_id, "error": e.response['Error']['Message']})
+            return None
+        finally:
+            client_cache.end_write(client_id, write, attributes)
+
+    @staticmethod
+    def invalidate_cache():
+        """Descarta los clientes en caché de esta instancia"""
+        client_cache.invalidate()
+
+    @staticmethod
+    def cache_stats():
+        """Contadores de la caché de clientes"""
+        return client_cache.stats()
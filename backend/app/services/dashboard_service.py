@@ -0,0 +1,39 @@
+import asyncio
+from app.services.cliente_service import ClienteService
+from app.services.fondo_service import FondoService
+from app.services.transaccion_service import TransaccionService
+
+
+def _attach_names(items, fund_names: dict):
+    for item in items:
+        name = fund_names.get(item['fundId'])
+        if name:
+            item['fundName'] = name
+    return items
+
+
+class DashboardService:
+    @staticmethod
+    async def get_dashboard(client_id: str, history_limit: int = 10):
+        """
+        Reúne en una sola respuesta lo que necesita la página principal: cliente, catálogo de fondos,
+        suscripciones activas y la primera página del historial. Las cuatro lecturas se lanzan a la
+        vez y los nombres de fondo se resuelven una sola vez a partir del catálogo ya leído.
+        """
+        client, funds, subscriptions, history = await asyncio.gather(
+            ClienteService.get_client(client_id),
+            FondoService.get_all_funds(),
+            TransaccionService.get_client_active_subscriptions(client_id, with_fund_names=False),
+            TransaccionService.get_client_transactions_page(client_id, history_limit, with_fund_names=False)
+        )
+        if not client:
+            return None
+
+        fund_names = {fund['fundId']: fund['name'] for fund in funds}
+        return {
+            "client": client,
+            "funds": funds,
+            "activeSubscriptions": _attach_names(subscriptions, fund_names),
+            "transactions": _attach_names(history["items"], fund_names),
+            "nextToken": history["nextToken"]
+        }
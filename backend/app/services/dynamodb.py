@@ -0,0 +1,214 @@
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from app.config import settings
+from app.services.metrics import DynamoDBCall, record_dynamodb_call
+
+# boto3 es síncrono: cada llamada a DynamoDB se ejecuta en un pool de hilos acotado
+# para no bloquear el event loop de uvicorn mientras se espera la respuesta de red.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.DYNAMODB_MAX_WORKERS,
+    thread_name_prefix="dynamodb"
+)
+
+# Un solo cliente de botocore por proceso (seguro entre hilos), con un pool de conexiones para todos
+# los hilos de _executor. Los recursos de boto3 (y sus Table) no son seguros entre hilos: con el
+# backend "dynamodb" cada hilo usa su propio recurso, una envoltura ligera sobre ese mismo cliente,
+# sin volver a cargar los modelos ni abrir otro pool. El motor en memoria (o el recurso fijado con
+# set_resource) se comparte tal cual. Importar boto3 y cargar los modelos de botocore es la parte
+# más costosa del arranque en frío de la Lambda: nada se crea hasta la primera llamada.
+_resource = None
+_per_thread = False
+_resource_lock = threading.Lock()
+_local = threading.local()
+
+# Proxies creados con LazyProxy, para poder reiniciarlos al cambiar de recurso
+_proxies = weakref.WeakSet()
+
+
+def _create_dynamodb_resource():
+    import boto3
+    from botocore.config import Config
+
+    config = Config(
+        max_pool_connections=settings.DYNAMODB_MAX_WORKERS,  # Tantas conexiones como hilos en el pool
+        tcp_keepalive=True,
+        connect_timeout=settings.DYNAMODB_CONNECT_TIMEOUT,
+        read_timeout=settings.DYNAMODB_READ_TIMEOUT,
+        retries={'mode': 'standard', 'max_attempts': settings.DYNAMODB_MAX_ATTEMPTS}
+    )
+    # Sesión propia: la sesión por defecto de boto3 no es segura entre hilos
+    return boto3.session.Session().resource(
+        'dynamodb',
+        region_name=settings.AWS_REGION,
+        endpoint_url=settings.DYNAMODB_ENDPOINT_URL or None,
+        config=config
+    )
+
+
+def _create_memory_resource():
+    from app.services.memory_engine import MemoryDynamoDB, create_app_tables, seed_default_data
+
+    database = create_app_tables(MemoryDynamoDB(record_calls=False))
+    return seed_default_data(database) if settings.STORAGE_MEMORY_SEED else database
+
+
+# Implementaciones del API de boto3 (resource/Table/meta.client) que usan los servicios
+STORAGE_BACKENDS = {
+    'dynamodb': _create_dynamodb_resource,
+    'memory': _create_memory_resource,
+}
+
+# Backends cuyo recurso no es seguro entre hilos: uno por hilo sobre el cliente compartido
+PER_THREAD_BACKENDS = {'dynamodb'}
+
+
+def _thread_resource(resource):
+    """Recurso de boto3 para el hilo actual que reutiliza el cliente (y el pool) de `resource`"""
+    return type(resource)(client=resource.meta.client)
+
+
+def get_resource():
+    """
+    Devuelve el recurso del backend configurado en STORAGE_BACKEND, creándolo la primera vez. Con
+    DynamoDB cada hilo recibe su propio recurso sobre el cliente del proceso
+    """
+    global _resource, _per_thread
+    resource = _resource
+    if resource is None:
+        backend = settings.STORAGE_BACKEND.lower()
+        if backend not in STORAGE_BACKENDS:
+            raise ValueError(
+                f"STORAGE_BACKEND no soportado: {settings.STORAGE_BACKEND} "
+                f"(válidos: {', '.join(STORAGE_BACKENDS)})"
+            )
+        with _resource_lock:
+            if _resource is None:
+                _resource = STORAGE_BACKENDS[backend]()
+                _per_thread = backend in PER_THREAD_BACKENDS
+            resource = _resource
+    if not _per_thread:
+        return resource
+    local = getattr(_local, 'resource', None)
+    if local is None:
+        local = _local.resource = _thread_resource(resource)
+    return local
+
+
+def set_resource(resource):
+    """
+    Sustituye el recurso compartido (None vuelve a crearlo desde STORAGE_BACKEND en el siguiente uso).
+    Las tablas y clientes ya resueltos por los servicios se vuelven a resolver contra el nuevo recurso.
+    """
+    global _resource, _per_thread, _local
+    with _resource_lock:
+        _resource = resource
+        _per_thread = False
+        _local = threading.local()
+    for proxy in list(_proxies):
+        proxy.reset()
+
+
+class _ThreadBoundMethod:
+    """
+    Operación de un LazyProxy (p. ej. table.get_item) que se resuelve en el hilo que la ejecuta:
+    run_db la recibe en el event loop pero la llama en un hilo del pool, con el recurso de ese hilo
+    """
+
+    def __init__(self, proxy, name: str):
+        self.__self__ = proxy
+        self.__name__ = name
+
+    def __call__(self, *args, **kwargs):
+        return getattr(self.__self__.resolve(), self.__name__)(*args, **kwargs)
+
+
+class LazyProxy:
+    """
+    Objeto que se construye con `factory` en el primer acceso a uno de sus atributos, una vez por
+    hilo. Las operaciones de DynamoDB se resuelven al llamarlas, en el hilo que las ejecuta
+    """
+
+    def __init__(self, factory, name: str = None):
+        self._factory = factory
+        self._local = threading.local()
+        self.name = name    # Nombre de la tabla, para las métricas de run_db
+        _proxies.add(self)
+
+    def reset(self):
+        self._local = threading.local()
+
+    def resolve(self):
+        target = getattr(self._local, 'target', None)
+        if target is None:
+            target = self._local.target = self._factory()
+        return target
+
+    def __getattr__(self, attribute):
+        if attribute in CAPACITY_OPERATIONS:
+            return _ThreadBoundMethod(self, attribute)
+        return getattr(self.resolve(), attribute)
+
+
+def lazy_table(table_name: str):
+    """Tabla DynamoDB que se resuelve contra el recurso del hilo en el primer uso"""
+    return LazyProxy(lambda: get_resource().Table(table_name), name=table_name)
+
+
+# Recurso y cliente de bajo nivel usados por todos los servicios
+shared_resource = LazyProxy(get_resource)
+shared_client = LazyProxy(lambda: get_resource().meta.client)
+
+
+# Operaciones de DynamoDB que admiten ReturnConsumedCapacity
+CAPACITY_OPERATIONS = {
+    'get_item', 'put_item', 'update_item', 'delete_item', 'query', 'scan',
+    'batch_get_item', 'batch_write_item', 'transact_get_items', 'transact_write_items'
+}
+
+
+def describe_operation(operation, kwargs):
+    """Tabla y nombre de una operación de boto3, para etiquetar sus métricas"""
+    name = getattr(operation, '__name__', None) or 'unknown'
+    table = getattr(getattr(operation, '__self__', None), 'name', None)
+    if not isinstance(table, str):
+        # Operaciones del recurso o del cliente: las tablas van en los parámetros
+        tables = set(kwargs.get('RequestItems') or {})
+        for entry in kwargs.get('TransactItems') or []:
+            tables.update(request['TableName'] for request in entry.values() if 'TableName' in request)
+        table = ','.join(sorted(tables)) or kwargs.get('TableName') or '-'
+    return table, name
+
+
+async def run_db(operation, *args, **kwargs):
+    """
+    Ejecuta una operación de boto3 (p. ej. table.get_item) fuera del event loop, midiendo su
+    latencia y la capacidad consumida por tabla y operación (ver app/services/metrics.py)
+    """
+    table, name = describe_operation(operation, kwargs)
+    if name in CAPACITY_OPERATIONS and settings.DYNAMODB_RETURN_CONSUMED_CAPACITY != 'NONE':
+        kwargs.setdefault('ReturnConsumedCapacity', settings.DYNAMODB_RETURN_CONSUMED_CAPACITY)
+    call = DynamoDBCall(table, name)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_executor, call.run, partial(operation, *args, **kwargs))
+    finally:
+        record_dynamodb_call(call)
+
+
+# BatchGetItem admite hasta 100 claves por llamada
+BATCH_GET_MAX_KEYS = 100
+
+
+async def batch_get_items(resource, table_name: str, keys):
+    """Lee todas las claves con BatchGetItem en bloques de 100, reintentando las UnprocessedKeys"""
+    items = []
+    for start in range(0, len(keys), BATCH_GET_MAX_KEYS):
+        request = {table_name: {'Keys': keys[start:start + BATCH_GET_MAX_KEYS]}}
+        while request:
+            response = await run_db(resource.batch_get_item, RequestItems=request)
+            items.extend(response.get('Responses', {}).get(table_name, []))
+            request = response.get('UnprocessedKeys') or None
+    return items
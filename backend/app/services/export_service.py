@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+import time
+from app.services.log import get_logger
+from app.services.serialization import json_friendly
+
+logger = get_logger(__name__)
+
+EXPORT_COLUMNS = ('transactionId', 'clientId', 'fundId', 'type', 'amount', 'transactionDate', 'status')
+
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+class ExportStats:
+    """Contadores de las exportaciones servidas por esta instancia (filas, bytes y bytes/s)"""
+
+    def __init__(self):
+        self.exports = 0
+        self.active = 0
+        self.rows = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.last = None
+
+    def start(self):
+        self.active += 1
+
+    def finish(self, rows: int, sent_bytes: int, seconds: float, completed: bool):
+        self.active -= 1
+        self.exports += 1
+        self.rows += rows
+        self.bytes += sent_bytes
+        self.seconds += seconds
+        self.last = {
+            "rows": rows,
+            "bytes": sent_bytes,
+            "seconds": round(seconds, 3),
+            "bytesPerSecond": round(sent_bytes / seconds) if seconds > 0 else None,
+            "completed": completed
+        }
+
+    def stats(self):
+        return {
+            "exports": self.exports,
+            "active": self.active,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "bytesPerSecond": round(self.bytes / self.seconds) if self.seconds > 0 else None,
+            "last": self.last
+        }
+
+
+export_stats = ExportStats()
+
+
+def _ndjson_rows(page):
+    return "".join(
+        json.dumps(json_friendly(item), ensure_ascii=False, separators=(",", ":")) + "\n" for item in page
+    )
+
+
+def _csv_rows(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return buffer.getvalue()
+
+
+def _csv_page(page):
+    return _csv_rows([json_friendly(item.get(column, "")) for column in EXPORT_COLUMNS] for item in page)
+
+
+async def stream_export(pages, export_format: str):
+    """
+    Convierte las páginas de transacciones en bytes NDJSON o CSV a medida que llegan: en memoria
+    solo hay una página a la vez, sea cual sea el tamaño del historial (bajo uvicorn; en Lambda,
+    Mangum acumula el cuerpo entero). Al terminar (o si el cliente corta la descarga) registra
+    filas, bytes y bytes/s en export_stats.
+    """
+    formatter = _csv_page if export_format == 'csv' else _ndjson_rows
+    rows = sent_bytes = 0
+    completed = False
+    started = time.monotonic()
+    export_stats.start()
+    try:
+        if export_format == 'csv':
+            header = _csv_rows([EXPORT_COLUMNS]).encode("utf-8")
+            sent_bytes += len(header)
+            yield header
+        async for page in pages:
+            if not page:
+                continue
+            chunk = formatter(page).encode("utf-8")
+            rows += len(page)
+            sent_bytes += len(chunk)
+            yield chunk
+        completed = True
+    finally:
+        seconds = time.monotonic() - started
+        export_stats.finish(rows, sent_bytes, seconds, completed)
+        logger.info("Export finished", extra={
+            "format": export_format, "rows": rows, "bytes": sent_bytes,
+            "seconds": round(seconds, 3), "completed": completed
+        })
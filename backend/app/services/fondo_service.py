@@ -1,42 +1,217 @@
-import boto3
+import asyncio
+import time
 from botocore.exceptions import ClientError
 from decimal import Decimal
 from app.models.fondo import Fondo
 from app.config import settings
+from app.services.dynamodb import run_db, lazy_table, shared_resource, batch_get_items
+from app.services.log import get_logger
+from app.services.single_flight import single_flight
 
-# conexión a DynamoDB nube
-dynamodb = boto3.resource('dynamodb', region_name=settings.AWS_REGION)
-table = dynamodb.Table(settings.FUNDS_TABLE_NAME)
+logger = get_logger(__name__)
 
+# Tabla resuelta en el primer uso contra el recurso DynamoDB compartido
+dynamodb = shared_resource
+table = lazy_table(settings.FUNDS_TABLE_NAME)
 
-# conexión a DynamoDB local
-# dynamodb = boto3.resource(
-#     'dynamodb', 
-#     endpoint_url='http://localhost:8000',  # Usar DynamoDB local
-#     region_name=settings.AWS_REGION,
-#     aws_access_key_id='dummy',  # Credenciales dummy para DynamoDB local
-#     aws_secret_access_key='dummy'
-# )
-# table = dynamodb.Table('Funds')
+
+class FundCatalogCache:
+    """Copia en memoria de la tabla Funds, válida durante `ttl_seconds`"""
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self.funds = {}
+        self.loaded_at = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.ttl_seconds > 0
+
+    def is_fresh(self):
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl_seconds
+
+    def load(self, items):
+        self.funds = {item['fundId']: item for item in items}
+        self.loaded_at = time.monotonic()
+
+    def invalidate(self):
+        self.funds = {}
+        self.loaded_at = None
+        self.invalidations += 1
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "ttlSeconds": self.ttl_seconds,
+            "size": len(self.funds),
+            "ageSeconds": round(time.monotonic() - self.loaded_at, 3) if self.loaded_at is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations
+        }
+
+
+# Clave del scan completo de Funds en el registro de lecturas en curso (no coincide con ningún fundId)
+CATALOG_SCAN_KEY = ('scan',)
+
+# El catálogo de fondos casi nunca cambia: se carga completo una vez y se sirve desde memoria
+fund_catalog = FundCatalogCache(settings.FUNDS_CACHE_TTL_SECONDS)
+
+
+async def _scan_segment(segment: int, total_segments: int, pages: asyncio.Queue):
+    """Recorre un segmento del scan siguiendo LastEvaluatedKey y encola cada página al llegar"""
+    params = {}
+    if total_segments > 1:
+        params.update(Segment=segment, TotalSegments=total_segments)
+    if settings.FUNDS_SCAN_PAGE_SIZE > 0:
+        params['Limit'] = settings.FUNDS_SCAN_PAGE_SIZE
+    while True:
+        response = await run_db(table.scan, **params)
+        await pages.put(response.get('Items', []))
+        if not response.get('LastEvaluatedKey'):
+            return
+        params['ExclusiveStartKey'] = response['LastEvaluatedKey']
 
 
 class FondoService:
+    @staticmethod
+    async def scan_pages(total_segments: int = None):
+        """
+        Genera las páginas de un scan completo de Funds a medida que llegan. Con más de un
+        segmento, los segmentos se recorren en paralelo y sus páginas se intercalan. La cola admite
+        una página por segmento: si el consumidor va más lento, los segmentos esperan en lugar de
+        acumular la tabla en memoria.
+        """
+        total_segments = max(1, total_segments or settings.FUNDS_SCAN_SEGMENTS)
+        pages = asyncio.Queue(maxsize=total_segments)
+        tasks = [asyncio.ensure_future(_scan_segment(segment, total_segments, pages))
+                 for segment in range(total_segments)]
+        done = asyncio.ensure_future(asyncio.gather(*tasks))
+        try:
+            while True:
+                next_page = asyncio.ensure_future(pages.get())
+                await asyncio.wait({next_page, done}, return_when=asyncio.FIRST_COMPLETED)
+                if next_page.done():
+                    yield next_page.result()
+                    continue
+                next_page.cancel()
+                # Todos los segmentos terminaron: vaciar lo que quede y propagar errores
+                while not pages.empty():
+                    yield pages.get_nowait()
+                done.result()
+                return
+        finally:
+            # Si el consumidor deja de leer (p. ej. el cliente cierra la conexión) se detienen los segmentos
+            for task in tasks:
+                task.cancel()
+            done.cancel()
+
+    @staticmethod
+    async def _scan_all():
+        items = []
+        async for page in FondoService.scan_pages():
+            items.extend(page)
+        return items
+
+    @staticmethod
+    async def _load_catalog():
+        """Devuelve el catálogo en memoria, recargándolo desde DynamoDB si expiró"""
+        if fund_catalog.is_fresh():
+            fund_catalog.hits += 1
+            return fund_catalog.funds
+        
+        fund_catalog.misses += 1
+        # Al expirar, todas las peticiones concurrentes esperan el mismo scan
+        fund_catalog.load(await single_flight.run(settings.FUNDS_TABLE_NAME, CATALOG_SCAN_KEY, FondoService._scan_all))
+        return fund_catalog.funds
+
     @staticmethod
     async def get_all_funds():
         """Obtiene todos los fondos disponibles"""
         try:
-            response = table.scan()
-            return response.get('Items', [])
+            if not fund_catalog.enabled:
+                return await FondoService._scan_all()
+            
+            catalog = await FondoService._load_catalog()
+            return [dict(fund) for fund in catalog.values()]
         except ClientError as e:
-            print(f"Error getting funds: {e.response['Error']['Message']}")
+            logger.error("Error getting funds", extra={"error": e.response['Error']['Message']})
             return []
 
+    @staticmethod
+    async def stream_funds():
+        """
+        Genera los fondos por páginas sin acumular el catálogo completo. Si la caché está fresca
+        se sirve desde memoria; si no, cada página se entrega según llega del scan y al terminar
+        se recarga la caché. Un error de DynamoDB se propaga (ClientError).
+        """
+        if fund_catalog.is_fresh():
+            fund_catalog.hits += 1
+            yield [dict(fund) for fund in fund_catalog.funds.values()]
+            return
+        
+        loaded = None
+        if fund_catalog.enabled:
+            fund_catalog.misses += 1
+            loaded = []
+        try:
+            async for page in FondoService.scan_pages():
+                if loaded is not None:
+                    loaded.extend(page)
+                yield page
+        except ClientError as e:
+            # Se propaga para cortar la respuesta: cerrar el array daría un catálogo truncado válido
+            logger.error("Error getting funds", extra={"error": e.response['Error']['Message']})
+            raise
+        if loaded is not None:
+            fund_catalog.load(loaded)
+
     @staticmethod
     async def get_fund(fund_id: str):
         """Obtiene un fondo específico por ID"""
         try:
-            response = table.get_item(Key={'fundId': fund_id})
-            return response.get('Item')
+            if not fund_catalog.enabled:
+                return await single_flight.run(settings.FUNDS_TABLE_NAME, fund_id, lambda: FondoService._read_fund(fund_id))
+            
+            fund = (await FondoService._load_catalog()).get(fund_id)
+            return dict(fund) if fund else None
+        except ClientError as e:
+            logger.error("Error getting fund", extra={"fundId": fund_id, "error": e.response['Error']['Message']})
+            return None
+
+    @staticmethod
+    async def _read_fund(fund_id: str):
+        response = await run_db(table.get_item, Key={'fundId': fund_id})
+        return response.get('Item')
+
+    @staticmethod
+    async def get_funds_by_ids(fund_ids):
+        """Obtiene varios fondos en una sola lectura; devuelve un dict fundId -> fondo"""
+        fund_ids = set(fund_ids)
+        if not fund_ids:
+            return {}
+        
+        try:
+            if fund_catalog.enabled:
+                catalog = await FondoService._load_catalog()
+                return {fid: dict(catalog[fid]) for fid in fund_ids if fid in catalog}
+            
+            keys = [{'fundId': fid} for fid in sorted(fund_ids)]
+            items = await batch_get_items(dynamodb, settings.FUNDS_TABLE_NAME, keys)
+            return {item['fundId']: item for item in items}
         except ClientError as e:
-            print(f"Error getting fund: {e.response['Error']['Message']}")
-            return None
\ No newline at end of file
+            logger.error("Error getting funds", extra={"error": e.response['Error']['Message']})
+            return {}
+
+    @staticmethod
+    def invalidate_cache():
+        """Descarta el catálogo en memoria; la siguiente lectura lo recarga desde DynamoDB"""
+        fund_catalog.invalidate()
+
+    @staticmethod
+    def cache_stats():
+        """Contadores de aciertos/fallos del catálogo en memoria"""
+        return fund_catalog.stats()
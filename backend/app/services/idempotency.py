@@ -0,0 +1,65 @@
+import time
+from app.config import settings
+from app.services.dynamodb import run_db, lazy_table
+from app.services.serialization import serialize_item, serialize_value, json_friendly
+
+# Tabla de claves de idempotencia: idempotencyKey (clientId#clave) -> respuesta almacenada.
+# DynamoDB elimina los registros vencidos a partir del atributo TTL expiresAt.
+idempotency_table = lazy_table(settings.IDEMPOTENCY_TABLE_NAME)
+
+KEY_ATTRIBUTE = 'idempotencyKey'
+EXPIRES_ATTRIBUTE = 'expiresAt'
+MAX_KEY_LENGTH = 255
+
+KEY_REUSED_ERROR = "La clave de idempotencia ya se usó para otra operación"
+
+
+def record_key(client_id: str, key: str):
+    """Las claves se guardan por cliente: dos clientes pueden enviar la misma clave sin colisionar"""
+    return f"{client_id}#{key}"
+
+
+def operation_fingerprint(transaction_type: str, fund_id: str):
+    """Identifica la operación asociada a la clave para detectar su reutilización con otra petición"""
+    return f"{transaction_type}:{fund_id}"
+
+
+async def get_stored_response(client_id: str, key: str, operation: str):
+    """
+    Devuelve la respuesta guardada para la clave, un error si la clave se usó con otra operación,
+    o None si la clave no existe o ya venció (el borrado por TTL puede tardar).
+    """
+    item = (await run_db(
+        idempotency_table.get_item,
+        Key={KEY_ATTRIBUTE: record_key(client_id, key)},
+        ConsistentRead=True
+    )).get('Item')
+    if not item or item[EXPIRES_ATTRIBUTE] <= int(time.time()):
+        return None
+    if item['operation'] != operation:
+        return {"error": KEY_REUSED_ERROR, "status": "FAILED"}
+    return json_friendly(item['response'])
+
+
+def put_record(client_id: str, key: str, operation: str, response: dict):
+    """
+    Operación Put para añadir al TransactWriteItems de la escritura: la respuesta queda guardada
+    solo si la operación se confirma, y la condición impide que dos peticiones con la misma clave
+    se confirmen a la vez (un registro vencido pendiente de borrado se puede reemplazar).
+    """
+    now = int(time.time())
+    return {'Put': {
+        'TableName': settings.IDEMPOTENCY_TABLE_NAME,
+        'Item': {
+            **serialize_item({
+                KEY_ATTRIBUTE: record_key(client_id, key),
+                'operation': operation,
+                'createdAt': now,
+                EXPIRES_ATTRIBUTE: now + settings.IDEMPOTENCY_TTL_SECONDS
+            }),
+            'response': serialize_value(response)
+        },
+        'ConditionExpression': f"attribute_not_exists({KEY_ATTRIBUTE}) OR #expires <= :now",
+        'ExpressionAttributeNames': {'#expires': EXPIRES_ATTRIBUTE},
+        'ExpressionAttributeValues': serialize_item({':now': now})
+    }}
@@ -0,0 +1,88 @@
+import json
+import logging
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from app.config import settings
+
+# Identificador de correlación de la petición en curso. El middleware lo fija al recibir la
+# petición y cada línea de log de los servicios lo incluye sin tener que pasarlo como parámetro.
+_correlation_id: ContextVar = ContextVar("correlation_id", default=None)
+
+CORRELATION_HEADER = "X-Correlation-Id"
+
+# Atributos propios de LogRecord: el resto son los campos pasados con `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def get_correlation_id():
+    return _correlation_id.get()
+
+
+def set_correlation_id(value: str):
+    return _correlation_id.set(value)
+
+
+def reset_correlation_id(token):
+    _correlation_id.reset(token)
+
+
+def new_correlation_id():
+    return uuid.uuid4().hex
+
+
+def should_sample():
+    """Decide si se registra una petición correcta según LOG_SAMPLE_RATE (los errores siempre)"""
+    rate = settings.LOG_SAMPLE_RATE
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro: nivel, logger, mensaje, correlationId y los campos de `extra`"""
+
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        correlation_id = get_correlation_id()
+        if correlation_id:
+            entry["correlationId"] = correlation_id
+        for attribute, value in vars(record).items():
+            if attribute not in _RECORD_ATTRIBUTES:
+                entry[attribute] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class StdoutHandler(logging.Handler):
+    """Escribe en el sys.stdout vigente (CloudWatch Logs en Lambda, la consola en local)"""
+
+    def emit(self, record):
+        try:
+            sys.stdout.write(self.format(record) + "\n")
+        except Exception:
+            self.handleError(record)
+
+
+def configure_logging():
+    """Loggers de la aplicación (`app.*`) en JSON; no se propagan para no duplicar líneas en Lambda"""
+    root = logging.getLogger("app")
+    if not any(isinstance(handler, StdoutHandler) for handler in root.handlers):
+        handler = StdoutHandler()
+        handler.setFormatter(JsonFormatter())
+        root.addHandler(handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+    root.propagate = False
+
+
+def get_logger(name: str):
+    return logging.getLogger(name)
+
+
+configure_logging()
@@ -0,0 +1,666 @@
+"""
+Motor de almacenamiento en memoria con el API de boto3 que usan los servicios.
+
+Implementa Table.get_item/put_item/update_item/delete_item/query/scan, resource.batch_get_item,
+client.transact_write_items con la misma semántica que DynamoDB para expresiones condicionales,
+transacciones (todo o nada, sin dos operaciones sobre el mismo ítem) y paginación (Limit,
+LastEvaluatedKey, ExclusiveStartKey). Se selecciona con STORAGE_BACKEND=memory (ver
+app/services/dynamodb.py) y lo usan también los tests y benchmarks.
+
+Cada tabla guarda los ítems en un dict por clave primaria y, para la tabla y cada GSI, una lista
+ordenada por clave de ordenación dentro de cada partición: una consulta por cliente recorre solo
+sus ítems, ya ordenados, en lugar de filtrar y ordenar la tabla completa. Las expresiones se
+compilan una vez y se reutilizan.
+
+Todas las operaciones se serializan con un lock, igual que DynamoDB serializa las escrituras sobre
+un mismo ítem. `latency` simula el tiempo de red (fuera del lock) para que las peticiones
+concurrentes se intercalen como en producción; `record_calls` guarda las operaciones hechas en
+cada tabla (tests y benchmarks).
+"""
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from decimal import Decimal
+from functools import lru_cache
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.exceptions import ClientError
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+def _normalize(value):
+    """Pasa el valor por el serializador de boto3: rechaza floats y convierte int a Decimal"""
+    return _deserializer.deserialize(_serializer.serialize(value))
+
+
+def _clone(value):
+    """Copia independiente de un ítem (más rápida que deepcopy para mapas, listas y conjuntos)"""
+    if isinstance(value, dict):
+        return {key: _clone(inner) for key, inner in value.items()}
+    if isinstance(value, list):
+        return [_clone(inner) for inner in value]
+    if isinstance(value, set):
+        return set(value)
+    return value
+
+
+def _client_error(code, message, operation, **extra):
+    response = {'Error': {'Code': code, 'Message': message}}
+    response.update(extra)
+    return ClientError(response, operation)
+
+
+# ---------------------------------------------------------------------------
+# Expresiones
+# ---------------------------------------------------------------------------
+
+_TOKEN_RE = re.compile(r"\s*(<>|<=|>=|[=<>(),+\-]|[:#]?[A-Za-z_][\w.]*)")
+_KEYWORDS = {'AND', 'OR', 'NOT', 'BETWEEN', 'IN', 'SET', 'REMOVE', 'ADD', 'DELETE'}
+_MISSING = object()
+
+
+def _tokenize(expression):
+    tokens, position = [], 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = _TOKEN_RE.match(expression, position)
+        if not match:
+            raise ValueError(f"Expresión no soportada: {expression!r}")
+        token = match.group(1)
+        tokens.append(token.upper() if token.upper() in _KEYWORDS else token)
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Compila una expresión a funciones `f(item, values)`: los nombres (#x) se resuelven al compilar
+    y los valores (:x) al evaluar, de modo que la misma expresión compilada sirve para cada llamada
+    """
+
+    def __init__(self, expression, names):
+        self.tokens = _tokenize(expression)
+        self.position = 0
+        self.names = names
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self, expected=None):
+        token = self.peek()
+        if expected is not None and token != expected:
+            raise ValueError(f"Se esperaba {expected!r} y se encontró {token!r}")
+        self.position += 1
+        return token
+
+    # -- operandos ---------------------------------------------------------
+
+    def path(self):
+        token = self.take()
+        return [self.names[part] if part.startswith('#') else part for part in token.split('.')]
+
+    def operand(self):
+        token = self.peek()
+        if token.startswith(':'):
+            self.take()
+            return lambda item, values: values[token]
+        if token in ('if_not_exists', 'list_append', 'size'):
+            return self.function_operand()
+        path = self.path()
+        return lambda item, values: _get_path(item, path)
+
+    def function_operand(self):
+        name = self.take()
+        self.take('(')
+        if name == 'size':
+            path = self.path()
+            self.take(')')
+            return lambda item, values: Decimal(len(_get_path(item, path)))
+        first = self.operand()
+        self.take(',')
+        second = self.operand()
+        self.take(')')
+        if name == 'if_not_exists':
+            def if_not_exists(item, values):
+                current = first(item, values)
+                return current if current is not _MISSING else second(item, values)
+            return if_not_exists
+        return lambda item, values: list(first(item, values)) + list(second(item, values))
+
+    # -- condiciones -------------------------------------------------------
+
+    def condition(self):
+        left = self.conjunction()
+        while self.peek() == 'OR':
+            self.take()
+            left = (lambda a, b: lambda item, values: a(item, values) or b(item, values))(left, self.conjunction())
+        return left
+
+    def conjunction(self):
+        left = self.negation()
+        while self.peek() == 'AND':
+            self.take()
+            left = (lambda a, b: lambda item, values: a(item, values) and b(item, values))(left, self.negation())
+        return left
+
+    def negation(self):
+        if self.peek() == 'NOT':
+            self.take()
+            inner = self.negation()
+            return lambda item, values: not inner(item, values)
+        return self.comparison()
+
+    def comparison(self):
+        token = self.peek()
+        if token == '(':
+            self.take()
+            inner = self.condition()
+            self.take(')')
+            return inner
+        if token in ('attribute_exists', 'attribute_not_exists', 'begins_with', 'contains'):
+            self.take()
+            self.take('(')
+            path = self.path()
+            if token == 'attribute_exists':
+                self.take(')')
+                return lambda item, values: _get_path(item, path) is not _MISSING
+            if token == 'attribute_not_exists':
+                self.take(')')
+                return lambda item, values: _get_path(item, path) is _MISSING
+            self.take(',')
+            argument = self.operand()
+            self.take(')')
+            if token == 'begins_with':
+                return lambda item, values: _starts_with(_get_path(item, path), argument(item, values))
+            return lambda item, values: _contains(_get_path(item, path), argument(item, values))
+
+        left = self.operand()
+        operator = self.take()
+        if operator == 'BETWEEN':
+            low = self.operand()
+            self.take('AND')
+            high = self.operand()
+            return lambda item, values: (_compare(left(item, values), '>=', low(item, values))
+                                         and _compare(left(item, values), '<=', high(item, values)))
+        if operator == 'IN':
+            self.take('(')
+            options = [self.operand()]
+            while self.peek() == ',':
+                self.take()
+                options.append(self.operand())
+            self.take(')')
+            return lambda item, values: any(_compare(left(item, values), '=', option(item, values))
+                                            for option in options)
+        right = self.operand()
+        return lambda item, values: _compare(left(item, values), operator, right(item, values))
+
+    # -- actualizaciones ---------------------------------------------------
+
+    def update_actions(self):
+        actions = []
+        while self.peek() is not None:
+            clause = self.take()
+            while True:
+                path = self.path()
+                if clause == 'SET':
+                    self.take('=')
+                    actions.append(('SET', path, self.set_value()))
+                elif clause == 'REMOVE':
+                    actions.append(('REMOVE', path, None))
+                elif clause in ('ADD', 'DELETE'):
+                    actions.append((clause, path, self.operand()))
+                else:
+                    raise ValueError(f"Cláusula no soportada: {clause!r}")
+                if self.peek() != ',':
+                    break
+                self.take()
+        return actions
+
+    def set_value(self):
+        left = self.operand()
+        if self.peek() in ('+', '-'):
+            operator = self.take()
+            right = self.operand()
+            if operator == '+':
+                return lambda item, values: left(item, values) + right(item, values)
+            return lambda item, values: left(item, values) - right(item, values)
+        return left
+
+
+def _get_path(item, path):
+    current = item
+    for part in path:
+        if not isinstance(current, dict) or part not in current:
+            return _MISSING
+        current = current[part]
+    return current
+
+
+def _set_path(item, path, value):
+    current = item
+    for part in path[:-1]:
+        current = current[part]
+    current[path[-1]] = value
+
+
+def _remove_path(item, path):
+    current = item
+    for part in path[:-1]:
+        current = current.get(part, {})
+    current.pop(path[-1], None)
+
+
+def _compare(left, operator, right):
+    if left is _MISSING or right is _MISSING:
+        return operator == '<>'
+    try:
+        if operator == '=':
+            return left == right
+        if operator == '<>':
+            return left != right
+        if operator == '<':
+            return left < right
+        if operator == '<=':
+            return left <= right
+        if operator == '>':
+            return left > right
+        if operator == '>=':
+            return left >= right
+    except TypeError:
+        return False
+    raise ValueError(f"Operador no soportado: {operator!r}")
+
+
+def _starts_with(value, prefix):
+    return isinstance(value, str) and value.startswith(prefix)
+
+
+def _contains(value, element):
+    return value is not _MISSING and element in value
+
+
+def _names_key(names):
+    return tuple(sorted((names or {}).items()))
+
+
+@lru_cache(maxsize=1024)
+def _compiled_condition(expression, names_key):
+    return _Parser(expression, dict(names_key)).condition()
+
+
+@lru_cache(maxsize=1024)
+def _compiled_update(expression, names_key):
+    return _Parser(expression, dict(names_key)).update_actions()
+
+
+@lru_cache(maxsize=1024)
+def _hash_placeholder(expression, names_key, hash_key):
+    """Valor (:x) con el que la KeyConditionExpression fija la clave de partición"""
+    names = dict(names_key)
+    tokens = _tokenize(expression)
+    for position in range(len(tokens) - 2):
+        left, operator, right = tokens[position:position + 3]
+        if operator != '=':
+            continue
+        for path, value in ((left, right), (right, left)):
+            if value.startswith(':') and names.get(path, path) == hash_key:
+                return value
+    raise _client_error('ValidationException', 'Query condition missed key schema element', 'Query')
+
+
+def evaluate_condition(expression, item, names=None, values=None):
+    if not expression:
+        return True
+    return _compiled_condition(expression, _names_key(names))(item or {}, values or {})
+
+
+def apply_update(expression, item, names=None, values=None):
+    actions = _compiled_update(expression, _names_key(names))
+    values = values or {}
+    # Todas las expresiones se evalúan sobre el estado previo del ítem
+    snapshot = _clone(item)
+    results = [(action, path, value(snapshot, values) if value else None) for action, path, value in actions]
+    for action, path, value in results:
+        if action == 'SET':
+            if value is _MISSING:
+                raise ValueError("El operando de SET no existe")
+            _set_path(item, path, value)
+        elif action == 'REMOVE':
+            _remove_path(item, path)
+        elif action == 'ADD':
+            current = _get_path(item, path)
+            if current is _MISSING:
+                _set_path(item, path, value)
+            elif isinstance(value, set):
+                _set_path(item, path, current | value)
+            else:
+                _set_path(item, path, current + value)
+        elif action == 'DELETE':
+            current = _get_path(item, path)
+            if current is not _MISSING:
+                remaining = current - value
+                if remaining:
+                    _set_path(item, path, remaining)
+                else:
+                    _remove_path(item, path)
+    return item
+
+
+# ---------------------------------------------------------------------------
+# Tablas
+# ---------------------------------------------------------------------------
+
+class MemoryTable:
+    def __init__(self, database, name, hash_key, range_key=None, indexes=None):
+        self.database = database
+        self.name = name
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.indexes = indexes or {}
+        self.items = {}
+        self.calls = []
+        # Tabla (None) y cada GSI: valor de partición -> [(clave de ordenación, clave primaria)] ordenada
+        self._partitions = {index_name: {} for index_name in [None, *self.indexes]}
+
+    # -- utilidades ------------------------------------------------------
+
+    def key_of(self, item):
+        return (item[self.hash_key], item[self.range_key] if self.range_key else None)
+
+    def key_attributes(self, index_name=None):
+        attributes = [self.hash_key] + ([self.range_key] if self.range_key else [])
+        if index_name:
+            attributes += [a for a in self.indexes[index_name] if a and a not in attributes]
+        return attributes
+
+    def _schema(self, index_name):
+        return self.indexes[index_name] if index_name else (self.hash_key, self.range_key)
+
+    def _entry(self, index_name, item, key):
+        """Posición del ítem en la partición del índice; None si el ítem no está indexado (GSI disperso)"""
+        hash_key, range_key = self._schema(index_name)
+        if hash_key not in item or (range_key is not None and range_key not in item):
+            return None
+        return item[hash_key], (item[range_key] if range_key else '', key)
+
+    def _store(self, key, new_item):
+        """Sustituye el ítem de la clave (None lo elimina) manteniendo los índices"""
+        current = self.items.get(key)
+        for index_name, partitions in self._partitions.items():
+            if current is not None:
+                entry = self._entry(index_name, current, key)
+                if entry is not None:
+                    partition = partitions[entry[0]]
+                    del partition[bisect_left(partition, entry[1])]
+                    if not partition:
+                        del partitions[entry[0]]
+            if new_item is not None:
+                entry = self._entry(index_name, new_item, key)
+                if entry is not None:
+                    insort(partitions.setdefault(entry[0], []), entry[1])
+        if new_item is None:
+            self.items.pop(key, None)
+        else:
+            self.items[key] = new_item
+        return current
+
+    def _record(self, operation):
+        if self.database.record_calls:
+            self.calls.append(operation)
+
+    def call_count(self, operation=None):
+        return len([c for c in self.calls if operation is None or c == operation])
+
+    def _check_and_write(self, operation, key, new_item, condition, names, values):
+        current = self.items.get(key)
+        if not evaluate_condition(condition, current, names, values):
+            raise _client_error('ConditionalCheckFailedException', 'The conditional request failed', operation)
+        self._store(key, new_item)
+        self.database.notify(self.name, new_item)
+        return current
+
+    # -- API boto3 -------------------------------------------------------
+
+    def get_item(self, Key, ConsistentRead=False, **kwargs):
+        self.database.delay()
+        with self.database.lock:
+            self._record('GetItem')
+            item = self.items.get(self.key_of(Key))
+            return {'Item': _clone(item)} if item is not None else {}
+
+    def put_item(self, Item, ConditionExpression=None, ExpressionAttributeNames=None,
+                 ExpressionAttributeValues=None, **kwargs):
+        item = _normalize(Item)
+        values = _normalize(ExpressionAttributeValues or {})
+        self.database.delay()
+        with self.database.lock:
+            self._record('PutItem')
+            self._check_and_write('PutItem', self.key_of(item), item, ConditionExpression,
+                                  ExpressionAttributeNames, values)
+            return {}
+
+    def update_item(self, Key, UpdateExpression, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ReturnValues='NONE', **kwargs):
+        values = _normalize(ExpressionAttributeValues or {})
+        self.database.delay()
+        with self.database.lock:
+            self._record('UpdateItem')
+            key = self.key_of(Key)
+            current = self.items.get(key)
+            updated = apply_update(UpdateExpression, _clone(current) if current else dict(Key),
+                                   ExpressionAttributeNames, values)
+            self._check_and_write('UpdateItem', key, updated, ConditionExpression,
+                                  ExpressionAttributeNames, values)
+            if ReturnValues == 'ALL_NEW':
+                return {'Attributes': _clone(updated)}
+            if ReturnValues == 'UPDATED_NEW':
+                changed = {k: v for k, v in updated.items() if (current or {}).get(k, _MISSING) != v}
+                return {'Attributes': _clone(changed)}
+            return {}
+
+    def delete_item(self, Key, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, **kwargs):
+        values = _normalize(ExpressionAttributeValues or {})
+        self.database.delay()
+        with self.database.lock:
+            self._record('DeleteItem')
+            self._check_and_write('DeleteItem', self.key_of(Key), None, ConditionExpression,
+                                  ExpressionAttributeNames, values)
+            return {}
+
+    def query(self, KeyConditionExpression, IndexName=None, FilterExpression=None,
+              ExpressionAttributeNames=None, ExpressionAttributeValues=None, ScanIndexForward=True,
+              Limit=None, ExclusiveStartKey=None, **kwargs):
+        values = _normalize(ExpressionAttributeValues or {})
+        self.database.delay()
+        with self.database.lock:
+            self._record('Query')
+            names_key = _names_key(ExpressionAttributeNames)
+            hash_key, _ = self._schema(IndexName)
+            partition_value = values[_hash_placeholder(KeyConditionExpression, names_key, hash_key)]
+            entries = self._partitions[IndexName].get(partition_value, [])
+
+            # La partición ya está ordenada: se continúa tras ExclusiveStartKey con una búsqueda binaria
+            if ExclusiveStartKey:
+                start = self._entry(IndexName, ExclusiveStartKey, self.key_of(ExclusiveStartKey))[1]
+                entries = entries[bisect_right(entries, start):] if ScanIndexForward \
+                    else entries[:bisect_left(entries, start)]
+            ordered = entries if ScanIndexForward else reversed(entries)
+
+            key_condition = _compiled_condition(KeyConditionExpression, names_key)
+            matches = (self.items[key] for _, key in ordered)
+            matches = (item for item in matches if key_condition(item, values))
+            return self._page(matches, IndexName, FilterExpression, ExpressionAttributeNames, values, Limit)
+
+    def scan(self, FilterExpression=None, ExpressionAttributeNames=None, ExpressionAttributeValues=None,
+             Limit=None, ExclusiveStartKey=None, Segment=None, TotalSegments=None, **kwargs):
+        values = _normalize(ExpressionAttributeValues or {})
+        self.database.delay()
+        with self.database.lock:
+            self._record('Scan')
+            keys = sorted(self.items)
+            if TotalSegments:
+                keys = [key for position, key in enumerate(keys) if position % TotalSegments == Segment]
+            if ExclusiveStartKey:
+                keys = keys[bisect_right(keys, self.key_of(ExclusiveStartKey)):]
+            return self._page((self.items[key] for key in keys), None, FilterExpression,
+                              ExpressionAttributeNames, values, Limit)
+
+    def _page(self, candidates, index_name, filter_expression, names, values, limit):
+        """
+        Limit cuenta los ítems leídos antes de aplicar FilterExpression, como en DynamoDB;
+        LastEvaluatedKey se devuelve solo si quedan más ítems por leer
+        """
+        page, more = [], False
+        for item in candidates:
+            if limit and len(page) == limit:
+                more = True
+                break
+            page.append(item)
+        response = {
+            'Items': [_clone(item) for item in page if evaluate_condition(filter_expression, item, names, values)],
+            'ScannedCount': len(page)
+        }
+        response['Count'] = len(response['Items'])
+        if more:
+            response['LastEvaluatedKey'] = {a: page[-1][a] for a in self.key_attributes(index_name)}
+        return response
+
+
+class MemoryClient:
+    """Equivalente a resource.meta.client: API de bajo nivel con valores tipados"""
+
+    def __init__(self, database):
+        self.database = database
+        self.calls = []
+
+    def transact_write_items(self, TransactItems, **kwargs):
+        database = self.database
+        operations = []
+        for entry in TransactItems:
+            (kind, request), = entry.items()
+            table = database.tables[request['TableName']]
+            names = request.get('ExpressionAttributeNames')
+            values = {k: _deserializer.deserialize(v) for k, v in request.get('ExpressionAttributeValues', {}).items()}
+            if kind == 'Put':
+                item = {k: _deserializer.deserialize(v) for k, v in request['Item'].items()}
+                key = table.key_of(item)
+            else:
+                item = None
+                key = table.key_of({k: _deserializer.deserialize(v) for k, v in request['Key'].items()})
+            operations.append((kind, table, key, item, request, names, values))
+
+        database.delay()
+        with database.lock:
+            if database.record_calls:
+                self.calls.append('TransactWriteItems')
+            targets = [(table.name, key) for _, table, key, _, _, _, _ in operations]
+            if len(set(targets)) != len(targets):
+                raise _client_error('ValidationException',
+                                    'Transaction request cannot include multiple operations on one item',
+                                    'TransactWriteItems')
+
+            # Primero se evalúan todas las condiciones; si alguna falla no se escribe nada
+            reasons, staged = [], []
+            for kind, table, key, item, request, names, values in operations:
+                current = table.items.get(key)
+                ok = evaluate_condition(request.get('ConditionExpression'), current, names, values)
+                reasons.append({'Code': 'None'} if ok else {'Code': 'ConditionalCheckFailed',
+                                                           'Message': 'The conditional request failed'})
+                if kind == 'Update':
+                    base = _clone(current) if current else dict(zip(table.key_attributes(), key))
+                    item = apply_update(request['UpdateExpression'], base, names, values)
+                staged.append((kind, table, key, item))
+
+            if any(reason['Code'] != 'None' for reason in reasons):
+                raise _client_error('TransactionCanceledException',
+                                    'Transaction cancelled, please refer cancellation reasons for specific reasons',
+                                    'TransactWriteItems', CancellationReasons=reasons)
+
+            for kind, table, key, item in staged:
+                if kind == 'Delete':
+                    table._store(key, None)
+                elif kind in ('Put', 'Update'):
+                    table._store(key, item)
+                    database.notify(table.name, item)
+            return {}
+
+
+class MemoryDynamoDB:
+    """Equivalente a boto3.resource('dynamodb')"""
+
+    def __init__(self, latency=0, record_calls=True):
+        self.latency = latency
+        self.record_calls = record_calls
+        self.lock = threading.RLock()
+        self.tables = {}
+        self.listeners = []
+        self.meta = type('Meta', (), {})()
+        self.meta.client = MemoryClient(self)
+
+    def create_table(self, name, hash_key, range_key=None, indexes=None):
+        self.tables[name] = MemoryTable(self, name, hash_key, range_key, indexes)
+        return self.tables[name]
+
+    def Table(self, name):
+        return self.tables[name]
+
+    def delay(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def notify(self, table_name, item):
+        for listener in self.listeners:
+            listener(table_name, item)
+
+    def batch_get_item(self, RequestItems, **kwargs):
+        self.delay()
+        with self.lock:
+            responses = {}
+            for table_name, request in RequestItems.items():
+                table = self.tables[table_name]
+                table._record('BatchGetItem')
+                found = [table.items.get(table.key_of(key)) for key in request['Keys']]
+                responses[table_name] = [_clone(item) for item in found if item is not None]
+            return {'Responses': responses, 'UnprocessedKeys': {}}
+
+
+def create_app_tables(database=None):
+    """Crea las tablas de la aplicación con los mismos esquemas que scripts/create_tables.py"""
+    from app.config import settings
+    database = database or MemoryDynamoDB()
+    database.create_table(settings.CLIENTS_TABLE_NAME, 'clientId')
+    database.create_table(settings.FUNDS_TABLE_NAME, 'fundId')
+    database.create_table(settings.SUBSCRIPTIONS_TABLE_NAME, 'clientId', 'fundId',
+                          indexes={'ActiveSubscriptions': ('clientId', 'activeSince')})
+    database.create_table(settings.TRANSACTIONS_TABLE_NAME, 'clientId', 'transactionId',
+                          indexes={'TransactionsByFund': ('fundId', 'transactionId')})
+    database.create_table(settings.IDEMPOTENCY_TABLE_NAME, 'idempotencyKey')
+    database.create_table(settings.NOTIFICATION_OUTBOX_TABLE_NAME, 'clientId', 'notificationId')
+    return database
+
+
+# Datos iniciales de scripts/create_tables.py: catálogo de fondos y cliente por defecto
+SEED_FUNDS = [
+    {'fundId': '1', 'name': 'FPV_EL CLIENTE_RECAUDADORA', 'category': 'FPV', 'minimumAmount': Decimal('75000')},
+    {'fundId': '2', 'name': 'FPV_EL CLIENTE_ECOPETROL', 'category': 'FPV', 'minimumAmount': Decimal('125000')},
+    {'fundId': '3', 'name': 'DEUDAPRIVADA', 'category': 'FIC', 'minimumAmount': Decimal('50000')},
+    {'fundId': '4', 'name': 'FDO-ACCIONES', 'category': 'FIC', 'minimumAmount': Decimal('250000')},
+    {'fundId': '5', 'name': 'FPV_EL CLIENTE_DINAMICA', 'category': 'FPV', 'minimumAmount': Decimal('100000')},
+]
+
+
+def seed_default_data(database):
+    from app.config import settings
+    for fund in SEED_FUNDS:
+        database.Table(settings.FUNDS_TABLE_NAME).put_item(Item=fund)
+    database.Table(settings.CLIENTS_TABLE_NAME).put_item(Item={
+        'clientId': settings.DEFAULT_CLIENT_ID,
+        'balance': Decimal('500000'),
+        'preferredNotification': 'email',
+        'email': 'cliente@ejemplo.com',
+        'phone': '+573001234567'
+    })
+    return database
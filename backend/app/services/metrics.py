@@ -0,0 +1,231 @@
+import json
+import threading
+import time
+from contextvars import ContextVar
+from app.config import settings
+from app.services.log import get_correlation_id
+
+# Límites (segundos) de los histogramas de latencia, en la escala de DynamoDB y de la API
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIC_HELP = {
+    "http_requests_total": ("counter", "Peticiones HTTP atendidas por ruta y código de estado"),
+    "http_request_duration_seconds": ("histogram", "Latencia de las peticiones HTTP por ruta"),
+    "dynamodb_calls_total": ("counter", "Llamadas a DynamoDB por ruta, tabla, operación y resultado"),
+    "dynamodb_call_duration_seconds": ("histogram", "Latencia de las llamadas a DynamoDB"),
+    "dynamodb_consumed_capacity_units_total": ("counter", "Unidades de capacidad consumidas (ReturnConsumedCapacity)"),
+    "singleflight_reads_total": ("counter", "Lecturas por tabla ejecutadas o agrupadas con otra igual en curso"),
+}
+
+# Ruta asignada a las llamadas a DynamoDB hechas fuera de una petición (scripts, tareas en segundo plano)
+NO_ROUTE = "-"
+
+
+def _label_key(labels: dict):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """Contadores e histogramas en memoria del proceso, identificados por nombre y etiquetas"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def increment(self, name: str, labels: dict, amount=1):
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, labels: dict, value: float):
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            key = _label_key(labels)
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram["buckets"][position] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def counter_value(self, name: str, **labels):
+        """Suma de las series del contador que coinciden con las etiquetas indicadas"""
+        with self._lock:
+            return sum(value for key, value in self._counters.get(name, {}).items()
+                       if labels.items() <= dict(key).items())
+
+    def histogram_count(self, name: str, **labels):
+        """Observaciones registradas en las series del histograma que coinciden con las etiquetas"""
+        with self._lock:
+            return sum(histogram["count"] for key, histogram in self._histograms.get(name, {}).items()
+                       if labels.items() <= dict(key).items())
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render_prometheus(self):
+        """Contenido de /metrics en el formato de texto de Prometheus (versión 0.0.4)"""
+        lines = []
+        with self._lock:
+            for name in sorted(self._counters):
+                lines += self._header(name, "counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_number(value)}")
+            for name in sorted(self._histograms):
+                lines += self._header(name, "histogram")
+                for key, histogram in sorted(self._histograms[name].items()):
+                    for bound, count in zip(self.buckets, histogram["buckets"]):
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', _format_number(bound))])} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {histogram['count']}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_number(histogram['sum'])}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram['count']}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    @staticmethod
+    def _header(name, default_type):
+        metric_type, description = METRIC_HELP.get(name, (default_type, name))
+        return [f"# HELP {name} {description}", f"# TYPE {name} {metric_type}"]
+
+
+metrics = MetricsRegistry()
+
+
+class DynamoDBCall:
+    """Una llamada a DynamoDB medida por run_db"""
+
+    def __init__(self, table: str, operation: str):
+        self.table = table
+        self.operation = operation
+        self.seconds = 0.0
+        self.outcome = "ok"
+        self.capacity = {}
+
+    def run(self, call):
+        """Ejecuta la llamada (en el hilo del pool) midiendo su duración y la capacidad consumida"""
+        started = time.perf_counter()
+        try:
+            response = call()
+        except Exception as e:
+            error = getattr(e, "response", None)
+            self.outcome = error.get("Error", {}).get("Code", "error") if isinstance(error, dict) else "error"
+            raise
+        finally:
+            self.seconds = time.perf_counter() - started
+        if isinstance(response, dict):
+            consumed = response.get("ConsumedCapacity")
+            for entry in consumed if isinstance(consumed, list) else [consumed] if consumed else []:
+                table = entry.get("TableName", self.table)
+                self.capacity[table] = self.capacity.get(table, 0) + float(entry.get("CapacityUnits", 0))
+        return response
+
+
+class RequestMetrics:
+    """Llamadas a DynamoDB hechas durante una petición, para atribuirlas a su ruta al terminar"""
+
+    def __init__(self):
+        self.dynamodb_calls = []
+        self.finished = False
+
+
+_current_request: ContextVar = ContextVar("request_metrics", default=None)
+
+
+def start_request():
+    request = RequestMetrics()
+    return request, _current_request.set(request)
+
+
+def end_request(request: RequestMetrics, token):
+    request.finished = True
+    _current_request.reset(token)
+
+
+def _record_dynamodb_call(call: DynamoDBCall, route: str):
+    labels = {"route": route, "table": call.table, "operation": call.operation}
+    metrics.increment("dynamodb_calls_total", {**labels, "outcome": call.outcome})
+    metrics.observe("dynamodb_call_duration_seconds", labels, call.seconds)
+    for table, units in call.capacity.items():
+        metrics.increment("dynamodb_consumed_capacity_units_total", {**labels, "table": table}, units)
+
+
+def record_dynamodb_call(call: DynamoDBCall):
+    """
+    Dentro de una petición la llamada se guarda hasta conocer la ruta resuelta por el router;
+    fuera de ellas (o en tareas que sobreviven a la petición) se registra directamente sin ruta
+    """
+    request = _current_request.get()
+    if request is not None and not request.finished:
+        request.dynamodb_calls.append(call)
+    else:
+        _record_dynamodb_call(call, NO_ROUTE)
+
+
+def record_request(method: str, route: str, status: int, seconds: float, request: RequestMetrics):
+    metrics.increment("http_requests_total", {"method": method, "route": route, "status": str(status)})
+    metrics.observe("http_request_duration_seconds", {"method": method, "route": route}, seconds)
+    for call in request.dynamodb_calls:
+        _record_dynamodb_call(call, route)
+    if settings.METRICS_EMF_ENABLED:
+        print(emf_line(method, route, status, seconds, request))
+
+
+def emf_line(method: str, route: str, status: int, seconds: float, request: RequestMetrics):
+    """
+    Línea JSON en Embedded Metric Format: CloudWatch Logs extrae las métricas de la petición
+    (latencia, llamadas, tiempo y capacidad de DynamoDB) con las dimensiones ruta y método
+    """
+    calls = request.dynamodb_calls
+    breakdown = {}
+    for call in calls:
+        entry = breakdown.setdefault(f"{call.table}.{call.operation}", {"calls": 0, "ms": 0.0, "capacity": 0.0})
+        entry["calls"] += 1
+        entry["ms"] = round(entry["ms"] + call.seconds * 1000, 3)
+        entry["capacity"] += sum(call.capacity.values())
+    return json.dumps({
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": settings.METRICS_NAMESPACE,
+                "Dimensions": [["route", "method"]],
+                "Metrics": [
+                    {"Name": "Latency", "Unit": "Milliseconds"},
+                    {"Name": "DynamoDBCalls", "Unit": "Count"},
+                    {"Name": "DynamoDBLatency", "Unit": "Milliseconds"},
+                    {"Name": "ConsumedCapacity", "Unit": "Count"},
+                ]
+            }]
+        },
+        "route": route,
+        "method": method,
+        "status": status,
+        "correlationId": get_correlation_id(),
+        "Latency": round(seconds * 1000, 3),
+        "DynamoDBCalls": len(calls),
+        "DynamoDBLatency": round(sum(call.seconds for call in calls) * 1000, 3),
+        "ConsumedCapacity": sum(sum(call.capacity.values()) for call in calls),
+        "dynamodb": breakdown
+    }, separators=(",", ":"))
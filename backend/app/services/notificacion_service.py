@@ -1,7 +1,46 @@
-import boto3
+import asyncio
+import time
+from typing import List
 from botocore.exceptions import ClientError
 from app.config import settings
+from app.services.log import get_logger
 
+logger = get_logger(__name__)
+
+# Atributo del cliente con el destino de cada canal
+CHANNEL_DESTINATIONS = {"email": "email", "sms": "phone"}
+
+
+def channel_limits(channel: str):
+    """(concurrencia, mensajes por segundo) configurados para el canal"""
+    if channel == "email":
+        return settings.EMAIL_BATCH_CONCURRENCY, settings.EMAIL_RATE_PER_SECOND
+    return settings.SMS_BATCH_CONCURRENCY, settings.SMS_RATE_PER_SECOND
+
+
+class RateLimiter:
+    """Token bucket: como máximo `rate` envíos por segundo, con ráfagas de hasta un segundo de cuota"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        # El lock atiende a los que esperan en orden de llegada
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
 
 
 class NotificacionService:
@@ -14,7 +53,8 @@ class NotificacionService:
         elif notification_type == "sms" and phone:
             return await NotificacionService.send_sms(phone, message)
         else:
-            print(f"No se pudo enviar notificación al cliente {client_id}: datos insuficientes")
+            logger.warning("No se pudo enviar la notificación: datos insuficientes",
+                           extra={"clientId": client_id, "channel": notification_type})
             return False
 
     @staticmethod
@@ -23,10 +63,10 @@ class NotificacionService:
         # En un entorno real, usaríamos AWS SES
         # Para esta prueba, solo simulamos el envío
         try:
-            print(f"[EMAIL ENVIADO] Destino: {email}, Mensaje: {message}")
+            logger.info("Email enviado", extra={"destination": email, "notification": message})
             return True
         except Exception as e:
-            print(f"Error al enviar email: {str(e)}")
+            logger.error("Error al enviar email", extra={"destination": email, "error": str(e)})
             return False
 
     @staticmethod
@@ -35,8 +75,62 @@ class NotificacionService:
         # En un entorno real, usaríamos AWS SNS
         # Para esta prueba, solo simulamos el envío
         try:
-            print(f"[SMS ENVIADO] Destino: {phone}, Mensaje: {message}")
+            logger.info("SMS enviado", extra={"destination": phone, "notification": message})
             return True
         except Exception as e:
-            print(f"Error al enviar SMS: {str(e)}")
-            return False
\ No newline at end of file
+            logger.error("Error al enviar SMS", extra={"destination": phone, "error": str(e)})
+            return False
+
+    @staticmethod
+    async def send_batch(notifications: List[dict]) -> List[dict]:
+        """
+        Envía muchas notificaciones agrupadas por canal, con concurrencia y tasa acotadas por canal.
+        Cada elemento lleva client_id, notification_type, message, email y phone; devuelve un
+        resultado por elemento, en el mismo orden.
+        """
+        results = [None] * len(notifications)
+        channels = {}
+        for index, notification in enumerate(notifications):
+            channel = notification.get('notification_type')
+            destination = notification.get(CHANNEL_DESTINATIONS.get(channel, ''))
+            if not destination:
+                results[index] = {
+                    "clientId": notification.get('client_id'),
+                    "channel": channel,
+                    "success": False,
+                    "error": "Datos insuficientes"
+                }
+                continue
+            channels.setdefault(channel, []).append((index, destination))
+
+        await asyncio.gather(*(
+            NotificacionService._send_channel(channel, pending, notifications, results)
+            for channel, pending in channels.items()
+        ))
+        return results
+
+    @staticmethod
+    async def _send_channel(channel: str, pending: list, notifications: List[dict], results: list):
+        """Consume los envíos de un canal con un número fijo de workers y un limitador de tasa compartido"""
+        concurrency, rate = channel_limits(channel)
+        limiter = RateLimiter(rate)
+        send = getattr(NotificacionService, f"send_{channel}")
+        queue = iter(pending)
+
+        async def worker():
+            for index, destination in queue:
+                notification = notifications[index]
+                await limiter.acquire()
+                try:
+                    sent = await send(destination, notification['message'])
+                    error = None if sent else "Envío rechazado"
+                except Exception as e:
+                    sent, error = False, str(e)
+                results[index] = {
+                    "clientId": notification.get('client_id'),
+                    "channel": channel,
+                    "success": bool(sent),
+                    "error": error
+                }
+
+        await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(pending))))))
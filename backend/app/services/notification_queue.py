@@ -0,0 +1,250 @@
+import asyncio
+from datetime import datetime
+from app.config import settings
+from app.models.ids import time_ordered_id
+from app.services.dynamodb import run_db, lazy_table
+from app.services.serialization import serialize_item
+from app.services.log import get_logger, get_correlation_id, set_correlation_id, reset_correlation_id
+from app.services.notificacion_service import NotificacionService
+
+logger = get_logger(__name__)
+
+
+async def deliver(notification: dict, max_attempts: int, backoff_seconds: float):
+    """Entrega una notificación reintentando con espera exponencial si el envío lanza una excepción"""
+    for attempt in range(1, max_attempts + 1):
+        try:
+            # send_notification devuelve False ante fallos definitivos (p. ej. datos insuficientes): no se reintenta
+            return await NotificacionService.send_notification(**notification)
+        except Exception as e:
+            if attempt == max_attempts:
+                logger.error("Notificación descartada", extra={
+                    "clientId": notification.get('client_id'), "attempts": attempt, "error": str(e)
+                })
+                return False
+            await asyncio.sleep(backoff_seconds * 2 ** (attempt - 1))
+
+
+def outbox_record(client_id: str, notification_type: str, message: str, email: str = None, phone: str = None):
+    """Registro PENDING de la tabla outbox para una notificación"""
+    item = {
+        'clientId': client_id,
+        'notificationId': time_ordered_id(),
+        'type': notification_type,
+        'message': message,
+        'status': 'PENDING',
+        'createdAt': datetime.now().isoformat()
+    }
+    if email:
+        item['email'] = email
+    if phone:
+        item['phone'] = phone
+    return item
+
+
+class NotificationDispatcher:
+    """
+    Interfaz común: `dispatch` se llama cuando la escritura financiera ya se confirmó. Los
+    dispatchers que devuelven una operación en `transaction_item` registran la notificación dentro
+    de esa misma escritura, y `recorded` se llama cuando se confirma
+    """
+
+    def __init__(self, max_attempts: int, backoff_seconds: float):
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.delivered = 0
+        self.failed = 0
+        self.dropped = 0
+
+    async def dispatch(self, **notification) -> bool:
+        raise NotImplementedError
+
+    def transaction_item(self, **notification):
+        """Operación para el TransactWriteItems de la escritura financiera, o None"""
+        return None
+
+    def recorded(self):
+        pass
+
+    async def drain(self, timeout: float = None) -> bool:
+        """Espera a que se entreguen las notificaciones pendientes; False si vence el plazo"""
+        return True
+
+    async def _deliver(self, notification: dict):
+        if await deliver(notification, self.max_attempts, self.backoff_seconds):
+            self.delivered += 1
+        else:
+            self.failed += 1
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "dropped": self.dropped
+        }
+
+
+class InlineNotificationDispatcher(NotificationDispatcher):
+    """Envía antes de devolver el control. Para Lambda, donde no hay trabajo después de la respuesta"""
+    mode = "inline"
+
+    async def dispatch(self, **notification) -> bool:
+        await self._deliver(notification)
+        return True
+
+
+class QueueNotificationDispatcher(NotificationDispatcher):
+    """Cola en memoria acotada, consumida por `workers` tareas en segundo plano"""
+    mode = "queue"
+
+    def __init__(self, max_size: int, workers: int, max_attempts: int, backoff_seconds: float):
+        super().__init__(max_attempts, backoff_seconds)
+        self.max_size = max_size
+        self.workers = workers
+        self._loop = None
+        self._queue = None
+        self._tasks = []
+
+    def _ensure_started(self):
+        # La cola y los workers pertenecen al event loop que los creó; si cambia (p. ej. TestClient)
+        # se crean de nuevo en el loop actual
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._queue is not None and self._queue.qsize():
+            logger.warning("Se pierden notificaciones pendientes de un event loop anterior",
+                           extra={"pending": self._queue.qsize()})
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def _worker(self):
+        while True:
+            # Cada entrega se registra con la correlación de la petición que la encoló
+            correlation_id, notification = await self._queue.get()
+            token = set_correlation_id(correlation_id)
+            try:
+                await self._deliver(notification)
+            finally:
+                reset_correlation_id(token)
+                self._queue.task_done()
+
+    async def dispatch(self, **notification) -> bool:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((get_correlation_id(), notification))
+        except asyncio.QueueFull:
+            # La operación financiera ya está confirmada: no se bloquea la respuesta por la notificación
+            self.dropped += 1
+            logger.warning("Cola de notificaciones llena: se descarta la notificación",
+                           extra={"clientId": notification.get('client_id'), "maxSize": self.max_size})
+            return False
+        return True
+
+    async def drain(self, timeout: float = None) -> bool:
+        if self._queue is None or self._loop is not asyncio.get_running_loop():
+            return True
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning("Quedaron notificaciones sin entregar al apagar", extra={"pending": self._queue.qsize()})
+            return False
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            self._loop = None
+            self._queue = None
+            self._tasks = []
+
+    def stats(self):
+        return {
+            **super().stats(),
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "maxSize": self.max_size,
+            "workers": self.workers
+        }
+
+
+class OutboxNotificationDispatcher(NotificationDispatcher):
+    """
+    Registra cada notificación en la tabla outbox; la entrega la hace un consumidor externo de la
+    tabla (p. ej. DynamoDB Streams). Suscripciones y cancelaciones añaden el registro a su
+    TransactWriteItems (`transaction_item`), así que se confirma junto con el saldo o no se escribe.
+    `dispatch` queda para notificaciones ajenas a una operación: un PutItem antes de responder
+    """
+    mode = "outbox"
+
+    def __init__(self, table_name: str, table=None):
+        super().__init__(0, 0)
+        self.table_name = table_name
+        self.table = table if table is not None else lazy_table(table_name)
+        self.recorded_count = 0
+
+    def transaction_item(self, **notification):
+        return {'Put': {'TableName': self.table_name, 'Item': serialize_item(outbox_record(**notification))}}
+
+    def recorded(self):
+        self.recorded_count += 1
+
+    async def dispatch(self, **notification) -> bool:
+        try:
+            await run_db(self.table.put_item, Item=outbox_record(**notification))
+        except Exception as e:
+            # La operación financiera ya está confirmada: solo se pierde la notificación
+            self.dropped += 1
+            logger.error("No se pudo registrar la notificación en el outbox",
+                         extra={"clientId": notification['client_id'], "error": str(e)})
+            return False
+        self.recorded_count += 1
+        return True
+
+    def stats(self):
+        return {
+            **super().stats(),
+            "recorded": self.recorded_count
+        }
+
+
+def create_dispatcher(mode: str) -> NotificationDispatcher:
+    if mode == "inline":
+        return InlineNotificationDispatcher(
+            settings.NOTIFICATION_MAX_ATTEMPTS, settings.NOTIFICATION_RETRY_BACKOFF_SECONDS
+        )
+    if mode == "queue":
+        return QueueNotificationDispatcher(
+            settings.NOTIFICATION_QUEUE_MAX_SIZE, settings.NOTIFICATION_WORKERS,
+            settings.NOTIFICATION_MAX_ATTEMPTS, settings.NOTIFICATION_RETRY_BACKOFF_SECONDS
+        )
+    if mode == "outbox":
+        return OutboxNotificationDispatcher(settings.NOTIFICATION_OUTBOX_TABLE_NAME)
+    raise ValueError(f"Modo de despacho de notificaciones desconocido: {mode}")
+
+
+# Sustituible por otra implementación con set_notification_dispatcher
+notification_dispatcher = create_dispatcher(settings.NOTIFICATION_DISPATCH_MODE)
+
+
+def set_notification_dispatcher(dispatcher: NotificationDispatcher):
+    global notification_dispatcher
+    notification_dispatcher = dispatcher
+
+
+async def dispatch_notification(**notification) -> bool:
+    """Encola la notificación en el dispatcher configurado"""
+    return await notification_dispatcher.dispatch(**notification)
+
+
+def notification_transaction_item(**notification):
+    """Registro de la notificación para la escritura atómica de la operación, si el dispatcher lo admite"""
+    return notification_dispatcher.transaction_item(**notification)
+
+
+def notification_recorded():
+    """Marca como registrada una notificación que se confirmó dentro de la escritura de la operación"""
+    notification_dispatcher.recorded()
+
+
+async def drain_notifications(timeout: float = None) -> bool:
+    return await notification_dispatcher.drain(timeout)
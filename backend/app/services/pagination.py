@@ -0,0 +1,49 @@
+import base64
+import binascii
+import json
+from app.services.serialization import serialize_item, deserialize_item
+
+
+def encode_page_token(last_evaluated_key):
+    """Convierte el LastEvaluatedKey de DynamoDB en un token opaco (None si no hay más páginas)"""
+    if not last_evaluated_key:
+        return None
+    typed_key = serialize_item(last_evaluated_key)
+    raw = json.dumps(typed_key, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_page_token(token: str, key_attributes, **expected_values):
+    """Reconstruye el ExclusiveStartKey a partir de un token; lanza ValueError si no es válido"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        typed_key = json.loads(raw)
+        key = deserialize_item(typed_key)
+    except (binascii.Error, ValueError, TypeError, AttributeError):
+        raise ValueError("Token de paginación inválido")
+    
+    if set(key) != set(key_attributes):
+        raise ValueError("Token de paginación inválido")
+    for attribute, value in expected_values.items():
+        if key.get(attribute) != value:
+            raise ValueError("Token de paginación inválido")
+    return key
+
+
+async def _prepend(first_page, pages):
+    yield first_page
+    async for page in pages:
+        yield page
+
+
+async def read_first_page(pages):
+    """
+    Lee la primera página de un iterador asíncrono de páginas y devuelve un iterador equivalente que
+    la incluye. Los errores de la primera lectura se lanzan aquí, antes de empezar una respuesta en
+    streaming: el endpoint puede devolver un 500 en lugar de un 200 vacío o cortado
+    """
+    try:
+        first_page = await pages.__anext__()
+    except StopAsyncIteration:
+        first_page = []
+    return _prepend(first_page, pages)
@@ -0,0 +1,138 @@
+import math
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from pydantic import BaseModel
+
+# Conversión directa entre modelos/dicts de la app y el formato de DynamoDB, sin copias intermedias
+# (model.dict() + recorrido recursivo) ni el TypeSerializer de boto3.
+
+
+def _fields(obj):
+    """Pares (atributo, valor) de un modelo pydantic o de un dict, sin copiar el objeto"""
+    if isinstance(obj, BaseModel):
+        return ((name, getattr(obj, name)) for name in type(obj).model_fields)
+    return obj.items()
+
+
+def _float_to_number(value: float) -> str:
+    if not math.isfinite(value):
+        raise TypeError(f"DynamoDB no admite el número {value}")
+    # str(float) es la representación decimal más corta, la misma que daba Decimal(str(value))
+    return str(value)
+
+
+def serialize_value(value):
+    """Convierte un valor de Python en un AttributeValue tipado ({'S': ...}, {'N': ...}, ...)"""
+    kind = type(value)
+    if kind is str:
+        return {'S': value}
+    if kind is float:
+        return {'N': _float_to_number(value)}
+    if kind is Decimal or kind is int:
+        return {'N': str(value)}
+    if kind is bool:
+        return {'BOOL': value}
+    if value is None:
+        return {'NULL': True}
+    if kind is datetime or kind is date:
+        return {'S': value.isoformat()}
+    if kind is dict or isinstance(value, BaseModel):
+        return {'M': {k: serialize_value(v) for k, v in _fields(value)}}
+    if kind is list or kind is tuple:
+        return {'L': [serialize_value(v) for v in value]}
+    return _serialize_other(value)
+
+
+def _serialize_other(value):
+    """Camino lento: subclases y tipos poco frecuentes"""
+    if isinstance(value, Enum):
+        return serialize_value(value.value)
+    if isinstance(value, bool):
+        return {'BOOL': bool(value)}
+    if isinstance(value, str):
+        return {'S': str(value)}
+    if isinstance(value, (int, Decimal)):
+        return {'N': str(value)}
+    if isinstance(value, float):
+        return {'N': _float_to_number(value)}
+    if isinstance(value, (datetime, date)):
+        return {'S': value.isoformat()}
+    if isinstance(value, (bytes, bytearray)):
+        return {'B': bytes(value)}
+    if isinstance(value, dict):
+        return {'M': {k: serialize_value(v) for k, v in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return {'L': [serialize_value(v) for v in value]}
+    if isinstance(value, (set, frozenset)):
+        if not value:
+            raise TypeError("DynamoDB no admite conjuntos vacíos")
+        if all(isinstance(v, str) for v in value):
+            return {'SS': sorted(value)}
+        if all(isinstance(v, (bytes, bytearray)) for v in value):
+            return {'BS': [bytes(v) for v in value]}
+        if all(isinstance(v, (int, float, Decimal)) and not isinstance(v, bool) for v in value):
+            return {'NS': [serialize_value(v)['N'] for v in value]}
+        raise TypeError("Los conjuntos de DynamoDB deben ser de un solo tipo")
+    raise TypeError(f"Tipo no soportado por DynamoDB: {type(value).__name__}")
+
+
+def serialize_item(obj):
+    """Modelo pydantic o dict -> mapa de AttributeValues para el cliente de bajo nivel"""
+    return {k: serialize_value(v) for k, v in _fields(obj)}
+
+
+def json_number(value):
+    """Decimal (o número en texto) -> int si es entero, float si no (mismo criterio que FastAPI)"""
+    if type(value) is str:
+        if '.' not in value and 'e' not in value and 'E' not in value:
+            return int(value)
+        value = Decimal(value)
+    if value.as_tuple().exponent >= 0:
+        return int(value)
+    return float(value)
+
+
+def json_friendly(obj):
+    """Item de la API de recurso -> estructura serializable con json.dumps (Decimal y sets convertidos)"""
+    kind = type(obj)
+    if kind is dict:
+        return {k: json_friendly(v) for k, v in obj.items()}
+    if kind is list:
+        return [json_friendly(v) for v in obj]
+    if kind is Decimal:
+        return json_number(obj)
+    if isinstance(obj, (set, frozenset)):
+        return sorted(json_friendly(v) for v in obj)
+    return obj
+
+
+def deserialize_value(attribute_value):
+    """AttributeValue tipado -> valor de Python listo para JSON (números como int/float)"""
+    (kind, value), = attribute_value.items()
+    if kind == 'S':
+        return value
+    if kind == 'N':
+        return json_number(value)
+    if kind == 'BOOL':
+        return value
+    if kind == 'NULL':
+        return None
+    if kind == 'M':
+        return {k: deserialize_value(v) for k, v in value.items()}
+    if kind == 'L':
+        return [deserialize_value(v) for v in value]
+    if kind == 'SS':
+        return sorted(value)
+    if kind == 'NS':
+        return sorted(json_number(v) for v in value)
+    if kind == 'B':
+        return value
+    if kind == 'BS':
+        return list(value)
+    raise TypeError(f"Tipo de DynamoDB desconocido: {kind}")
+
+
+def deserialize_item(attributes):
+    """Mapa de AttributeValues -> dict de Python listo para JSON"""
+    return {k: deserialize_value(v) for k, v in attributes.items()}
@@ -0,0 +1,57 @@
+import asyncio
+import copy
+from app.config import settings
+from app.services.metrics import metrics
+
+
+class SingleFlight:
+    """
+    Agrupa las lecturas concurrentes de una misma clave: mientras una lectura de (tabla, clave)
+    está en curso, las demás peticiones del proceso esperan su resultado en lugar de repetirla.
+    Solo comparte lecturas que ya están en vuelo; no guarda resultados (eso lo hacen las cachés),
+    así que también reduce llamadas con las cachés desactivadas.
+
+    La lectura se ejecuta en su propia tarea: si la petición que la inició se cancela, las que
+    esperan reciben igualmente el resultado. Cada llamador recibe una copia del resultado, que
+    puede modificar sin afectar a los demás. Los errores se propagan a todos los que esperan.
+    """
+
+    def __init__(self):
+        self.in_flight = {}     # (tabla, clave) -> tarea de la lectura en curso
+        self.executed = 0
+        self.coalesced = 0
+
+    async def run(self, table: str, key, read):
+        """Devuelve el resultado de `read()` (corrutina), compartiendo la lectura en curso de (table, key)"""
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return await read()
+        flight_key = (table, key)
+        task = self.in_flight.get(flight_key)
+        if task is None:
+            self.executed += 1
+            metrics.increment("singleflight_reads_total", {"table": table, "result": "executed"})
+            task = asyncio.ensure_future(read())
+            self.in_flight[flight_key] = task
+            task.add_done_callback(lambda done: self._finish(flight_key, done))
+        else:
+            self.coalesced += 1
+            metrics.increment("singleflight_reads_total", {"table": table, "result": "coalesced"})
+        return copy.deepcopy(await asyncio.shield(task))
+
+    def _finish(self, flight_key, task):
+        if self.in_flight.get(flight_key) is task:
+            del self.in_flight[flight_key]
+        if not task.cancelled():
+            task.exception()    # Marca el error como recuperado aunque todos los llamadores se cancelaran
+
+    def stats(self):
+        return {
+            "enabled": settings.SINGLE_FLIGHT_ENABLED,
+            "inFlight": len(self.in_flight),
+            "executed": self.executed,
+            "coalesced": self.coalesced
+        }
+
+
+# Lecturas en curso del proceso, compartidas por todos los servicios
+single_flight = SingleFlight()
@@ -1,76 +1,322 @@
-import boto3
+import asyncio
 from botocore.exceptions import ClientError
 from datetime import datetime
-from uuid import uuid4
 from decimal import Decimal
 from app.models.transaccion import Transaccion, TransaccionCreate, Subscription
-from app.services.cliente_service import ClienteService
+from app.models.ids import time_ordered_id, lowest_id_for, highest_id_for
+from app.services.cliente_service import (
+    ClienteService, category_count_attribute, client_cache, ACTIVE_FUNDS_ATTRIBUTE, TOTAL_INVESTED_ATTRIBUTE,
+    REVISION_ATTRIBUTE
+)
 from app.services.fondo_service import FondoService
-from app.services.notificacion_service import NotificacionService
+from app.services.notification_queue import (
+    dispatch_notification, notification_transaction_item, notification_recorded
+)
 from app.config import settings
+from app.services.dynamodb import run_db, lazy_table, shared_resource, shared_client, batch_get_items
+from app.services.pagination import encode_page_token, decode_page_token
+from app.services.serialization import serialize_item
+from app.services import idempotency
+from app.services.log import get_logger
+
+logger = get_logger(__name__)
+
+# Tablas resueltas en el primer uso contra el recurso DynamoDB compartido
+dynamodb = shared_resource
+transaction_table = lazy_table(settings.TRANSACTIONS_TABLE_NAME)
+subscription_table = lazy_table(settings.SUBSCRIPTIONS_TABLE_NAME)
+# API de bajo nivel (valores tipados) para TransactWriteItems
+dynamodb_client = shared_client
+
+
+# Clave de Transactions: transactionId es un UUIDv7, así que el orden de la tabla es cronológico
+TRANSACTIONS_KEY = ('clientId', 'transactionId')
+
+# Índice de Transactions por fondo (fundId + transactionId), para la exportación por fondo
+TRANSACTIONS_BY_FUND_INDEX = 'TransactionsByFund'
+
+# Índice disperso de Subscriptions (clientId + activeSince): activeSince solo existe mientras la
+# suscripción está activa, así que el índice contiene únicamente suscripciones activas
+ACTIVE_SUBSCRIPTIONS_INDEX = 'ActiveSubscriptions'
+ACTIVE_SINCE_ATTRIBUTE = 'activeSince'
+
+# Transacciones de la primera página del historial en la vista completa (?include=portfolio)
+PORTFOLIO_HISTORY_LIMIT = 10
+
+# Campos que la respuesta de una suscripción o cancelación añade a los de la transacción
+DELTA_FIELDS = ('balance', 'subscription', 'portfolio')
+
+# Posición del registro de idempotencia dentro de los TransactWriteItems de suscripción y cancelación
+IDEMPOTENCY_POSITION = 3
+
+# Intentos de suscripción y cancelación condicionados a la revisión leída del cliente. Si otra
+# escritura sobre el cliente se adelanta en todos, se escribe sin esa condición y la respuesta no
+# incluye el saldo (no estaría garantizado)
+GUARDED_WRITE_ATTEMPTS = 3
+
+
+def _cancelled_by_condition(error: ClientError, position: int):
+    """Indica si la operación `position` de un TransactWriteItems falló por su condición"""
+    reasons = error.response.get('CancellationReasons') or []
+    return position < len(reasons) and reasons[position].get('Code') == 'ConditionalCheckFailed'
+
+
+def _date_bounds(start: datetime = None, end: datetime = None):
+    """
+    Rango inclusivo de transactionId equivalente a [start, end]: como el identificador es un
+    UUIDv7, un filtro por fecha es un BETWEEN sobre la clave de ordenación, sin índices
+    """
+    start_ms = int(start.timestamp() * 1000) if start else 0
+    end_ms = int(end.timestamp() * 1000) if end else (1 << 48) - 1
+    return lowest_id_for(start_ms), highest_id_for(end_ms)
+
+
+def _category_counts(category_deltas: dict, names: dict, values: dict):
+    """Fragmentos `#cN :cN` del ADD para los contadores por categoría del resumen de cartera"""
+    actions = []
+    for position, (category, delta) in enumerate(sorted(category_deltas.items())):
+        names[f'#c{position}'] = category_count_attribute(category)
+        values[f':c{position}'] = delta
+        actions.append(f"#c{position} :c{position}")
+    return actions
+
+
+def _revision_actions(revision, names: dict, values: dict):
+    """
+    Incremento de la revisión del cliente y, si se indica la revisión leída, condición de que no
+    haya cambiado: el estado calculado en memoria a partir de esa lectura es el que queda escrito
+    """
+    names['#rev'] = REVISION_ATTRIBUTE
+    values[':one'] = 1
+    if revision is None:
+        return "#rev :one", None
+    if not revision:
+        return "#rev :one", "attribute_not_exists(#rev)"
+    values[':rev'] = revision
+    return "#rev :one", "#rev = :rev"
+
+
+def _with_guard(condition: str, guard: str):
+    return f"{condition} AND {guard}" if guard else condition
+
+
+def client_debit_update(client_id: str, amount: Decimal, fund_ids: set, category_deltas: dict,
+                        revision: int = None):
+    """
+    Update de Clients para una o varias suscripciones del cliente: débito condicionado al saldo
+    y altas en el resumen de cartera (total invertido, fondos activos y conteo por categoría).
+    Con `revision`, condicionado además a que el cliente siga en esa revisión
+    """
+    names, values = {}, {':amount': amount, ':fundIds': set(fund_ids)}
+    counts = _category_counts(category_deltas, names, values)
+    increment, guard = _revision_actions(revision, names, values)
+    return {'Update': {
+        'TableName': settings.CLIENTS_TABLE_NAME,
+        'Key': serialize_item({'clientId': client_id}),
+        'UpdateExpression': "SET balance = balance - :amount "
+                            "ADD " + ", ".join(["totalInvested :amount", "activeFundIds :fundIds"] + counts + [increment]),
+        'ConditionExpression': _with_guard("balance >= :amount", guard),
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': serialize_item(values)
+    }}
+
+
+def client_refund_update(client_id: str, amount: Decimal, fund_ids: set, category_deltas: dict,
+                         revision: int = None):
+    """
+    Update de Clients para una o varias cancelaciones del cliente: reintegro y bajas en el resumen.
+    Con `revision`, condicionado además a que el cliente siga en esa revisión
+    """
+    names, values = {}, {':amount': amount, ':refund': -amount, ':fundIds': set(fund_ids)}
+    counts = _category_counts({c: -n for c, n in category_deltas.items()}, names, values)
+    increment, guard = _revision_actions(revision, names, values)
+    return {'Update': {
+        'TableName': settings.CLIENTS_TABLE_NAME,
+        'Key': serialize_item({'clientId': client_id}),
+        'UpdateExpression': "SET balance = balance + :amount "
+                            "ADD " + ", ".join(["totalInvested :refund"] + counts + [increment]) + " "
+                            "DELETE activeFundIds :fundIds",
+        'ConditionExpression': _with_guard("attribute_exists(clientId)", guard),
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': serialize_item(values)
+    }}
+
+
+def client_after_update(client: dict, amount: Decimal, fund_ids: set, category_deltas: dict,
+                        refund: bool = False):
+    """
+    Item del cliente tras aplicar en memoria el mismo cambio que client_debit_update (o
+    client_refund_update con refund=True) sobre el item leído antes de la escritura. Solo es el
+    estado escrito si la escritura se condicionó a la revisión de ese item
+    """
+    sign = 1 if refund else -1
+    after = dict(client)
+    after[REVISION_ATTRIBUTE] = client.get(REVISION_ATTRIBUTE, 0) + 1
+    after['balance'] = client['balance'] + sign * amount
+    after[TOTAL_INVESTED_ATTRIBUTE] = client.get(TOTAL_INVESTED_ATTRIBUTE, 0) - sign * amount
+    active = set(client.get(ACTIVE_FUNDS_ATTRIBUTE) or ())
+    active = active - set(fund_ids) if refund else active | set(fund_ids)
+    if active:
+        after[ACTIVE_FUNDS_ATTRIBUTE] = active
+    else:
+        after.pop(ACTIVE_FUNDS_ATTRIBUTE, None)
+    for category, delta in category_deltas.items():
+        attribute = category_count_attribute(category)
+        after[attribute] = client.get(attribute, 0) - sign * delta
+    return after
+
+
+def subscription_put(subscription: Subscription):
+    """Put de la suscripción activa; falla si ya hay una suscripción activa al mismo fondo"""
+    return {'Put': {
+        'TableName': settings.SUBSCRIPTIONS_TABLE_NAME,
+        'Item': {
+            **serialize_item(subscription),
+            ACTIVE_SINCE_ATTRIBUTE: {'S': subscription.subscriptionDate.isoformat()}
+        },
+        'ConditionExpression': "attribute_not_exists(clientId) OR #status <> :active",
+        'ExpressionAttributeNames': {'#status': 'status'},
+        'ExpressionAttributeValues': serialize_item({':active': 'ACTIVE'})
+    }}
+
+
+def subscription_cancel_update(client_id: str, fund_id: str, amount: Decimal):
+    """
+    Update que cancela la suscripción. La condición sobre el monto evita reintegrar dos veces
+    o reintegrar una suscripción distinta de la leída.
+    """
+    return {'Update': {
+        'TableName': settings.SUBSCRIPTIONS_TABLE_NAME,
+        'Key': serialize_item({'clientId': client_id, 'fundId': fund_id}),
+        'UpdateExpression': f"SET #status = :cancelled REMOVE {ACTIVE_SINCE_ATTRIBUTE}",
+        'ConditionExpression': "#status = :active AND amountSubscribed = :amount",
+        'ExpressionAttributeNames': {'#status': 'status'},
+        'ExpressionAttributeValues': serialize_item({
+            ':cancelled': 'CANCELLED',
+            ':active': 'ACTIVE',
+            ':amount': amount
+        })
+    }}
+
+
+def transaction_put(transaction: Transaccion):
+    return {'Put': {
+        'TableName': settings.TRANSACTIONS_TABLE_NAME,
+        'Item': serialize_item(transaction),
+        'ConditionExpression': "attribute_not_exists(transactionId)"
+    }}
+
+
+def client_notification(client: dict, message: str):
+    """Datos de la notificación al cliente por su canal preferido"""
+    return {
+        "client_id": client['clientId'],
+        "notification_type": client['preferredNotification'],
+        "message": message,
+        "email": client.get('email'),
+        "phone": client.get('phone')
+    }
+
+
+def notification_item(client: dict, message: str):
+    """
+    Registro de la notificación para añadir al final del TransactWriteItems de la operación en
+    modo outbox; None con los dispatchers que la envían después de confirmar
+    """
+    return notification_transaction_item(**client_notification(client, message))
+
+
+async def notify_client(client: dict, message: str, recorded: bool = False):
+    """
+    Encola la notificación de una operación confirmada por el canal preferido del cliente. Con
+    recorded=True ya quedó registrada en la misma escritura que la operación
+    """
+    if recorded:
+        notification_recorded()
+        return
+    await dispatch_notification(**client_notification(client, message))
+
+
+async def _stored_response(client_id: str, idempotency_key: str, operation: str):
+    """Respuesta ya registrada para la clave de idempotencia (None si no hay clave o no existe)"""
+    if not idempotency_key:
+        return None
+    try:
+        return await idempotency.get_stored_response(client_id, idempotency_key, operation)
+    except ClientError as e:
+        logger.error("Error reading idempotency key", extra={"clientId": client_id, "error": str(e)})
+        return {"error": "Error al verificar la clave de idempotencia", "status": "FAILED"}
+
+
+async def _failure_or_stored(error: dict, client_id: str, idempotency_key: str, operation: str):
+    """
+    Antes de devolver un rechazo comprueba de nuevo la clave: si una petición concurrente con la
+    misma clave se confirmó mientras tanto, el rechazo se debe a ella y se devuelve su respuesta.
+    """
+    stored = await _stored_response(client_id, idempotency_key, operation)
+    return stored if stored and not stored.get("error") else error
+
+
+def _with_idempotency(items, client_id: str, idempotency_key: str, operation: str, response: dict):
+    """Añade el registro de la clave a la escritura atómica (posición IDEMPOTENCY_POSITION)"""
+    if idempotency_key:
+        items.append(idempotency.put_record(client_id, idempotency_key, operation, response))
+    return items
+
+
+async def _with_portfolio(response: dict, client_id: str, include_portfolio: bool, client: dict = None):
+    """Añade a la respuesta de una operación confirmada la vista completa del cliente si se pidió"""
+    if not include_portfolio or response.get("error"):
+        return response
+    return {**response, "portfolio": await TransaccionService.portfolio_view(client_id, response, client)}
 
-# conexión a DynamoDB nube
-dynamodb = boto3.resource('dynamodb', region_name=settings.AWS_REGION)
-transaction_table = dynamodb.Table(settings.TRANSACTIONS_TABLE_NAME)
-subscription_table = dynamodb.Table(settings.SUBSCRIPTIONS_TABLE_NAME)
-
-#  conexión a DynamoDB local
-# dynamodb = boto3.resource(
-#     'dynamodb', 
-#     endpoint_url='http://localhost:8000',  # Usar DynamoDB local
-#     region_name=settings.AWS_REGION,
-#     aws_access_key_id='dummy',  # Credenciales dummy para DynamoDB local
-#     aws_secret_access_key='dummy'
-# )
-# transaction_table = dynamodb.Table('Transactions')
-# subscription_table = dynamodb.Table('Subscriptions')
-
-
-# Función auxiliar para convertir tipos para DynamoDB
-def convert_types_for_dynamodb(obj):
-    from datetime import datetime
-    
-    if isinstance(obj, dict):
-        return {k: convert_types_for_dynamodb(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_types_for_dynamodb(i) for i in obj]
-    elif isinstance(obj, float):
-        return Decimal(str(obj))
-    elif isinstance(obj, datetime):
-        return obj.isoformat()  # Convertir datetime a string ISO8601
-    return obj
 
 class TransaccionService:
     @staticmethod
-    async def create_subscription(client_id: str, subscription_data: TransaccionCreate):
-        """Suscribe a un cliente a un fondo"""
+    async def _attach_fund_names(items):
+        """Añade fundName a cada elemento resolviendo todos los fondos distintos en una sola lectura"""
+        if not items:
+            return items
+        
+        funds = await FondoService.get_funds_by_ids(item['fundId'] for item in items)
+        for item in items:
+            fund = funds.get(item['fundId'])
+            if fund:
+                item['fundName'] = fund['name']
+        return items
+
+    @staticmethod
+    async def create_subscription(client_id: str, subscription_data: TransaccionCreate,
+                                  idempotency_key: str = None, include_portfolio: bool = False):
+        """
+        Suscribe a un cliente a un fondo y devuelve la transacción con el nuevo saldo y la fila
+        de la suscripción. Con include_portfolio añade la vista completa del cliente. Con
+        idempotency_key, un reintento con la misma clave devuelve la respuesta original sin
+        volver a debitar el saldo.
+        """
+        operation = idempotency.operation_fingerprint("SUBSCRIPTION", subscription_data.fundId)
+        stored = await _stored_response(client_id, idempotency_key, operation)
+        if stored:
+            return await _with_portfolio(stored, client_id, include_portfolio)
+        
         # Obtener información del cliente y del fondo
-        client = await ClienteService.get_client(client_id)
+        client = await ClienteService.get_client(client_id, consistent=settings.CLIENT_CONSISTENT_READS)
         fund = await FondoService.get_fund(subscription_data.fundId)
         
         if not client or not fund:
             return {"error": "Cliente o fondo no encontrado"}
         
-        # Verificar saldo suficiente
-        if client['balance'] < fund['minimumAmount']:
-            return {
-                "error": f"No tiene saldo disponible para vincularse al fondo {fund['name']}",
-                "status": "FAILED"
-            }
+        insufficient_balance = {
+            "error": f"No tiene saldo disponible para vincularse al fondo {fund['name']}",
+            "status": "FAILED"
+        }
         
-        # Verificar si ya está suscrito
-        try:
-            existing = subscription_table.get_item(
-                Key={'clientId': client_id, 'fundId': subscription_data.fundId}
-            ).get('Item')
-            
-            if existing and existing['status'] == 'ACTIVE':
-                return {"error": "Ya está suscrito a este fondo", "status": "FAILED"}
-        except ClientError:
-            pass  # Si hay error es porque no existe, lo cual es correcto
+        # Verificar saldo suficiente (la condición de la transacción lo garantiza ante concurrencia)
+        if client['balance'] < fund['minimumAmount']:
+            return await _failure_or_stored(insufficient_balance, client_id, idempotency_key, operation)
         
         # Crear la suscripción
-        subscription_id = str(uuid4())
+        subscription_id = time_ordered_id()
         current_time = datetime.now()
         subscription = Subscription(
             subscriptionId=subscription_id,
@@ -82,7 +328,7 @@ class TransaccionService:
         )
         
         # Registrar transacción
-        transaction_id = str(uuid4())
+        transaction_id = time_ordered_id()
         transaction = Transaccion(
             transactionId=transaction_id,
             clientId=client_id,
@@ -93,66 +339,100 @@ class TransaccionService:
             status="COMPLETED"
         )
         
-        # Actualizar balance del cliente
-        await ClienteService.update_client_balance(client_id, -fund['minimumAmount'])
-        
-        # Convertir tipos para DynamoDB
-        subscription_dict = convert_types_for_dynamodb(subscription.dict())
-        transaction_dict = convert_types_for_dynamodb(transaction.dict())
+        amount = Decimal(str(fund['minimumAmount']))
+        fund_ids, category_deltas = {subscription_data.fundId}, {fund['category']: 1}
+        subscription_row = {
+            **subscription.model_dump(),
+            ACTIVE_SINCE_ATTRIBUTE: subscription.subscriptionDate.isoformat(),
+            "fundName": fund['name']
+        }
+        message = f"Se ha suscrito exitosamente al fondo {fund['name']}"
         
-        # Guardar transacción y suscripción
-        try:
-            subscription_table.put_item(Item=subscription_dict)
-            transaction_table.put_item(Item=transaction_dict)
-            
-            # Enviar notificación
-            await NotificacionService.send_notification(
-                client_id=client_id,
-                notification_type=client['preferredNotification'],
-                message=f"Se ha suscrito exitosamente al fondo {fund['name']}",
-                email=client.get('email'),
-                phone=client.get('phone')
-            )
+        for attempt in range(GUARDED_WRITE_ATTEMPTS + 1):
+            # Respuesta con el estado posterior: transacción, nuevo saldo y fila de la suscripción.
+            # El saldo solo se incluye si la escritura está condicionada a la revisión leída
+            guarded = attempt < GUARDED_WRITE_ATTEMPTS
+            client_after = client_after_update(client, amount, fund_ids, category_deltas) if guarded else None
+            response = {
+                **transaction.model_dump(),
+                "fundName": fund['name'],
+                **({"balance": client_after['balance']} if guarded else {}),
+                "subscription": subscription_row
+            }
+            revision = client.get(REVISION_ATTRIBUTE, 0) if guarded else None
             
-            return {**transaction.dict(), "fundName": fund['name']}
-        except ClientError as e:
-            print(f"Error creating subscription: {str(e)}")
-            return {"error": "Error al crear suscripción", "status": "FAILED"}
+            # Débito (y resumen de cartera), suscripción, transacción, clave de idempotencia y,
+            # en modo outbox, la notificación en una sola escritura atómica
+            try:
+                outbox = notification_item(client, message)
+                with client_cache.writing(client_id):
+                    await run_db(dynamodb_client.transact_write_items, TransactItems=_with_idempotency([
+                        client_debit_update(client_id, amount, fund_ids, category_deltas, revision),
+                        subscription_put(subscription),
+                        transaction_put(transaction)
+                    ], client_id, idempotency_key, operation, response) + ([outbox] if outbox else []))
+                break
+            except ClientError as e:
+                if idempotency_key and _cancelled_by_condition(e, IDEMPOTENCY_POSITION):
+                    # Otra petición con la misma clave se confirmó primero: devolver su respuesta
+                    return await _stored_response(client_id, idempotency_key, operation)
+                if _cancelled_by_condition(e, 1):
+                    return {"error": "Ya está suscrito a este fondo", "status": "FAILED"}
+                if _cancelled_by_condition(e, 0):
+                    # Saldo insuficiente u otra escritura sobre el cliente desde la lectura
+                    if not guarded:
+                        return insufficient_balance
+                    client = await ClienteService.get_client(client_id, consistent=True)
+                    if not client:
+                        return {"error": "Cliente o fondo no encontrado"}
+                    if client['balance'] < amount:
+                        return insufficient_balance
+                    continue
+                logger.error("Error creating subscription",
+                             extra={"clientId": client_id, "fundId": subscription_data.fundId, "error": str(e)})
+                return {"error": "Error al crear suscripción", "status": "FAILED"}
+        
+        # Encolar la notificación: la respuesta no espera a su entrega
+        await notify_client(client, message, recorded=outbox is not None)
+        
+        return await _with_portfolio(response, client_id, include_portfolio, client_after)
 
     @staticmethod
-    async def cancel_subscription(client_id: str, fund_id: str):
-        """Cancela la suscripción de un cliente a un fondo"""
+    async def cancel_subscription(client_id: str, fund_id: str, idempotency_key: str = None,
+                                  include_portfolio: bool = False):
+        """
+        Cancela la suscripción de un cliente a un fondo y devuelve la transacción con el nuevo
+        saldo y la fila de la suscripción. Con include_portfolio añade la vista completa del
+        cliente. Con idempotency_key, un reintento con la misma clave devuelve la respuesta
+        original sin volver a reintegrar el saldo.
+        """
+        operation = idempotency.operation_fingerprint("CANCELLATION", fund_id)
+        stored = await _stored_response(client_id, idempotency_key, operation)
+        if stored:
+            return await _with_portfolio(stored, client_id, include_portfolio)
+        
         # Verificar si está suscrito
         try:
-            subscription = subscription_table.get_item(
+            subscription = (await run_db(
+                subscription_table.get_item,
                 Key={'clientId': client_id, 'fundId': fund_id}
-            ).get('Item')
+            )).get('Item')
             
             if not subscription or subscription['status'] != 'ACTIVE':
-                return {"error": "No está suscrito a este fondo", "status": "FAILED"}
+                return await _failure_or_stored({"error": "No está suscrito a este fondo", "status": "FAILED"},
+                                                client_id, idempotency_key, operation)
         except ClientError as e:
             return {"error": f"Error al verificar suscripción: {str(e)}", "status": "FAILED"}
         
         # Obtener información del fondo
         fund = await FondoService.get_fund(fund_id)
-        client = await ClienteService.get_client(client_id)
+        client = await ClienteService.get_client(client_id, consistent=settings.CLIENT_CONSISTENT_READS)
         
         if not fund or not client:
             return {"error": "Fondo o cliente no encontrado", "status": "FAILED"}
         
-        # Actualizar la suscripción
-        try:
-            subscription_table.update_item(
-                Key={'clientId': client_id, 'fundId': fund_id},
-                UpdateExpression="SET #status = :status",
-                ExpressionAttributeNames={'#status': 'status'},
-                ExpressionAttributeValues={':status': 'CANCELLED'}
-            )
-        except ClientError as e:
-            return {"error": f"Error al cancelar suscripción: {str(e)}", "status": "FAILED"}
-        
         # Registrar transacción de cancelación
-        transaction_id = str(uuid4())
+        transaction_id = time_ordered_id()
         current_time = datetime.now()
         transaction = Transaccion(
             transactionId=transaction_id,
@@ -164,75 +444,205 @@ class TransaccionService:
             status="COMPLETED"
         )
         
-        # Devolver el dinero al cliente
-        await ClienteService.update_client_balance(client_id, subscription['amountSubscribed'])
+        amount = Decimal(str(subscription['amountSubscribed']))
+        fund_ids, category_deltas = {fund_id}, {fund['category']: 1}
+        cancelled = {k: v for k, v in subscription.items() if k != ACTIVE_SINCE_ATTRIBUTE}
+        subscription_row = {**cancelled, "status": "CANCELLED", "fundName": fund['name']}
+        message = f"Ha cancelado exitosamente su suscripción al fondo {fund['name']}"
+        
+        for attempt in range(GUARDED_WRITE_ATTEMPTS + 1):
+            # Respuesta con el estado posterior: transacción, nuevo saldo y fila de la suscripción
+            # cancelada. El saldo solo se incluye si la escritura está condicionada a la revisión leída
+            guarded = attempt < GUARDED_WRITE_ATTEMPTS
+            client_after = client_after_update(client, amount, fund_ids, category_deltas, refund=True) if guarded else None
+            response = {
+                **transaction.model_dump(),
+                "fundName": fund['name'],
+                **({"balance": client_after['balance']} if guarded else {}),
+                "subscription": subscription_row
+            }
+            revision = client.get(REVISION_ATTRIBUTE, 0) if guarded else None
+            
+            # Cancelación, reintegro del saldo (y resumen de cartera), transacción, clave de
+            # idempotencia y, en modo outbox, la notificación en una sola escritura atómica
+            try:
+                outbox = notification_item(client, message)
+                with client_cache.writing(client_id):
+                    await run_db(dynamodb_client.transact_write_items, TransactItems=_with_idempotency([
+                        subscription_cancel_update(client_id, fund_id, amount),
+                        client_refund_update(client_id, amount, fund_ids, category_deltas, revision),
+                        transaction_put(transaction)
+                    ], client_id, idempotency_key, operation, response) + ([outbox] if outbox else []))
+                break
+            except ClientError as e:
+                if idempotency_key and _cancelled_by_condition(e, IDEMPOTENCY_POSITION):
+                    # Otra petición con la misma clave se confirmó primero: devolver su respuesta
+                    return await _stored_response(client_id, idempotency_key, operation)
+                if _cancelled_by_condition(e, 0):
+                    return {"error": "No está suscrito a este fondo", "status": "FAILED"}
+                if guarded and _cancelled_by_condition(e, 1):
+                    # Otra escritura sobre el cliente desde la lectura: releer y reintentar
+                    client = await ClienteService.get_client(client_id, consistent=True)
+                    if not client:
+                        return {"error": "Fondo o cliente no encontrado", "status": "FAILED"}
+                    continue
+                logger.error("Error cancelling subscription",
+                             extra={"clientId": client_id, "fundId": fund_id, "error": str(e)})
+                return {"error": "Error al cancelar suscripción", "status": "FAILED"}
         
-        # Convertir tipos para DynamoDB
-        transaction_dict = convert_types_for_dynamodb(transaction.dict())
+        # Encolar la notificación: la respuesta no espera a su entrega
+        await notify_client(client, message, recorded=outbox is not None)
+        
+        return await _with_portfolio(response, client_id, include_portfolio, client_after)
+
+    @staticmethod
+    async def get_subscriptions_by_keys(keys):
+        """Lee varias suscripciones (clientId, fundId) con BatchGetItem; dict (clientId, fundId) -> item"""
+        keys = sorted(set(keys))
+        if not keys:
+            return {}
+        items = await batch_get_items(dynamodb, settings.SUBSCRIPTIONS_TABLE_NAME,
+                                      [{'clientId': client_id, 'fundId': fund_id} for client_id, fund_id in keys])
+        return {(item['clientId'], item['fundId']): item for item in items}
+
+    @staticmethod
+    async def get_client_transactions_page(client_id: str, limit: int = 10, next_token: str = None,
+                                           with_fund_names: bool = True):
+        """
+        Obtiene una página del historial (más recientes primero) y el token de la siguiente página.
+        Con with_fund_names=False no se resuelven los nombres de los fondos (lo hace quien llama).
+        """
+        query = {
+            'KeyConditionExpression': "clientId = :cid",
+            'ExpressionAttributeValues': {':cid': client_id},
+            'ScanIndexForward': False,  # Orden descendente por transactionId (cronológico)
+            'Limit': limit
+        }
+        if next_token:
+            # Lanza ValueError si el token no corresponde a esta tabla o a este cliente
+            query['ExclusiveStartKey'] = decode_page_token(next_token, TRANSACTIONS_KEY, clientId=client_id)
         
-        # Guardar transacción
         try:
-            transaction_table.put_item(Item=transaction_dict)
+            response = await run_db(transaction_table.query, **query)
             
-            # Enviar notificación
-            await NotificacionService.send_notification(
-                client_id=client_id,
-                notification_type=client['preferredNotification'],
-                message=f"Ha cancelado exitosamente su suscripción al fondo {fund['name']}",
-                email=client.get('email'),
-                phone=client.get('phone')
-            )
-            
-            return {**transaction.dict(), "fundName": fund['name']}
+            transactions = response.get('Items', [])
+            if with_fund_names:
+                transactions = await TransaccionService._attach_fund_names(transactions)
+            return {
+                "items": transactions,
+                "nextToken": encode_page_token(response.get('LastEvaluatedKey'))
+            }
         except ClientError as e:
-            print(f"Error registering cancellation: {str(e)}")
-            return {"error": "Error al registrar cancelación", "status": "FAILED"}
+            logger.error("Error getting transactions", extra={"clientId": client_id, "error": str(e)})
+            return {"items": [], "nextToken": None}
+
+    @staticmethod
+    async def iter_client_transaction_pages(client_id: str, fund_id: str = None,
+                                            start: datetime = None, end: datetime = None):
+        """
+        Recorre todo el historial del cliente (más recientes primero) página a página, sin
+        acumularlo: cada página se entrega en cuanto llega. Opcionalmente filtra por fondo
+        y por rango de fechas.
+        """
+        lower, upper = _date_bounds(start, end)
+        query = {
+            'KeyConditionExpression': "clientId = :cid AND transactionId BETWEEN :lower AND :upper",
+            'ExpressionAttributeValues': {':cid': client_id, ':lower': lower, ':upper': upper},
+            'ScanIndexForward': False
+        }
+        if fund_id:
+            query['FilterExpression'] = "fundId = :fid"
+            query['ExpressionAttributeValues'][':fid'] = fund_id
+        while True:
+            response = await run_db(transaction_table.query, **query)
+            yield response.get('Items', [])
+            if not response.get('LastEvaluatedKey'):
+                return
+            query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    @staticmethod
+    async def iter_fund_transaction_pages(fund_id: str, start: datetime = None, end: datetime = None):
+        """
+        Recorre las transacciones de un fondo de todos los clientes (más recientes primero) página a
+        página, con una consulta al índice TransactionsByFund: solo se leen las del fondo y el rango
+        """
+        lower, upper = _date_bounds(start, end)
+        query = {
+            'IndexName': TRANSACTIONS_BY_FUND_INDEX,
+            'KeyConditionExpression': "fundId = :fid AND transactionId BETWEEN :lower AND :upper",
+            'ExpressionAttributeValues': {':fid': fund_id, ':lower': lower, ':upper': upper},
+            'ScanIndexForward': False
+        }
+        while True:
+            response = await run_db(transaction_table.query, **query)
+            yield response.get('Items', [])
+            if not response.get('LastEvaluatedKey'):
+                return
+            query['ExclusiveStartKey'] = response['LastEvaluatedKey']
 
     @staticmethod
     async def get_client_transactions(client_id: str, limit: int = 10):
-        """Obtiene el historial de transacciones de un cliente"""
+        """Obtiene las transacciones más recientes de un cliente"""
+        page = await TransaccionService.get_client_transactions_page(client_id, limit)
+        return page["items"]
+
+    @staticmethod
+    async def get_client_active_subscriptions(client_id: str, with_fund_names: bool = True):
+        """Obtiene las suscripciones activas de un cliente (solo lee filas activas, vía índice disperso)"""
+        query = {
+            'IndexName': ACTIVE_SUBSCRIPTIONS_INDEX,
+            'KeyConditionExpression': "clientId = :cid",
+            'ExpressionAttributeValues': {':cid': client_id}
+        }
         try:
-            response = transaction_table.query(
-                KeyConditionExpression="clientId = :cid",
-                ExpressionAttributeValues={':cid': client_id},
-                ScanIndexForward=False,  # Orden descendente por fecha
-                Limit=limit
-            )
+            subscriptions = []
+            while True:
+                response = await run_db(subscription_table.query, **query)
+                subscriptions.extend(response.get('Items', []))
+                if not response.get('LastEvaluatedKey'):
+                    break
+                query['ExclusiveStartKey'] = response['LastEvaluatedKey']
             
+            if not with_fund_names:
+                return subscriptions
             # Añadir nombres de fondos
-            transactions = response.get('Items', [])
-            for tx in transactions:
-                fund = await FondoService.get_fund(tx['fundId'])
-                if fund:
-                    tx['fundName'] = fund['name']
-            
-            return transactions
+            return await TransaccionService._attach_fund_names(subscriptions)
         except ClientError as e:
-            print(f"Error getting transactions: {str(e)}")
+            logger.error("Error getting subscriptions", extra={"clientId": client_id, "error": str(e)})
             return []
 
     @staticmethod
-    async def get_client_active_subscriptions(client_id: str):
-        """Obtiene las suscripciones activas de un cliente"""
-        try:
-            response = subscription_table.query(
-                KeyConditionExpression="clientId = :cid",
-                FilterExpression="#status = :status",
-                ExpressionAttributeNames={'#status': 'status'},
-                ExpressionAttributeValues={
-                    ':cid': client_id,
-                    ':status': 'ACTIVE'
-                }
-            )
-            
-            # Añadir nombres de fondos
-            subscriptions = response.get('Items', [])
-            for sub in subscriptions:
-                fund = await FondoService.get_fund(sub['fundId'])
-                if fund:
-                    sub['fundName'] = fund['name']
-            
-            return subscriptions
-        except ClientError as e:
-            print(f"Error getting subscriptions: {str(e)}")
-            return []
\ No newline at end of file
+    async def portfolio_view(client_id: str, operation: dict, client: dict = None):
+        """
+        Vista completa del cliente tras una suscripción o cancelación, con la forma del dashboard:
+        cliente, suscripciones activas y primera página del historial. El cliente es el calculado
+        a partir de la escritura (se lee solo si no se pasa). El índice de suscripciones activas y
+        las lecturas del historial son eventualmente consistentes, así que la suscripción y la
+        transacción de la operación se aplican sobre lo leído.
+        """
+        reads = [
+            TransaccionService.get_client_active_subscriptions(client_id),
+            TransaccionService.get_client_transactions_page(client_id, PORTFOLIO_HISTORY_LIMIT)
+        ]
+        if client is None:
+            reads.append(ClienteService.get_client(client_id))
+        subscriptions, history, *read_client = await asyncio.gather(*reads)
+        client = client if client is not None else read_client[0]
+
+        changed = operation.get("subscription")
+        if changed:
+            subscriptions = [item for item in subscriptions if item['fundId'] != changed['fundId']]
+            if changed['status'] == 'ACTIVE':
+                subscriptions.append(changed)
+
+        transactions = history["items"]
+        if all(item['transactionId'] != operation['transactionId'] for item in transactions):
+            transaction = {k: v for k, v in operation.items() if k not in DELTA_FIELDS}
+            transactions = [transaction] + transactions[:PORTFOLIO_HISTORY_LIMIT - 1]
+
+        return {
+            "client": client,
+            "activeSubscriptions": subscriptions,
+            "transactions": transactions,
+            "nextToken": history["nextToken"]
+        }
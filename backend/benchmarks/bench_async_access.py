@@ -0,0 +1,154 @@
+"""
+Benchmark de latencia de GET /api/v1/transacciones/subscriptions con 1, 10 y 100 clientes concurrentes.
+
+Compara el acceso bloqueante original (boto3 llamado directamente dentro del event loop)
+con el acceso a través de run_db (pool de hilos acotado). DynamoDB se sustituye por tablas
+en memoria que simulan la latencia de red con time.sleep, igual que haría boto3.
+
+La API se sirve con uvicorn en un proceso hijo y los clientes se ejecutan en el proceso
+principal, de modo que la latencia medida incluye el tiempo que una petición espera a que
+el servidor quede libre (como la percibiría un cliente real).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_async_access
+    python -m benchmarks.bench_async_access --latency-ms 20 --requests 200
+"""
+import argparse
+import asyncio
+import multiprocessing
+import socket
+import statistics
+import time
+from unittest.mock import patch
+
+import httpx
+import uvicorn
+
+from app.main import app
+from app.services import cliente_service, fondo_service, transaccion_service
+
+SERVICE_MODULES = (cliente_service, fondo_service, transaccion_service)
+CONCURRENCY_LEVELS = (1, 10, 100)
+ENDPOINT = "/api/v1/transacciones/subscriptions"
+
+
+class SlowTable:
+    """Tabla falsa que bloquea el hilo que la llama durante `latency` segundos"""
+
+    def __init__(self, latency, items=None, item=None):
+        self.latency = latency
+        self.items = items or []
+        self.item = item
+
+    def query(self, **kwargs):
+        time.sleep(self.latency)
+        return {'Items': [dict(i) for i in self.items]}
+
+    def get_item(self, **kwargs):
+        time.sleep(self.latency)
+        return {'Item': dict(self.item)} if self.item else {}
+
+
+async def blocking_run_db(operation, *args, **kwargs):
+    """Comportamiento previo: la llamada de boto3 se ejecuta dentro del event loop"""
+    return operation(*args, **kwargs)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def serve(mode, latency, port):
+    """Proceso hijo: aplica las tablas lentas (y el modo bloqueante si aplica) y arranca uvicorn"""
+    subscriptions = [
+        {'clientId': 'C123456', 'fundId': '1', 'status': 'ACTIVE', 'amountSubscribed': 75000},
+        {'clientId': 'C123456', 'fundId': '3', 'status': 'ACTIVE', 'amountSubscribed': 50000},
+    ]
+    fund = {'fundId': '1', 'name': 'FPV_EL CLIENTE_RECAUDADORA', 'category': 'FPV', 'minimumAmount': 75000}
+
+    patches = [
+        patch.object(transaccion_service, 'subscription_table', SlowTable(latency, items=subscriptions)),
+        patch.object(fondo_service, 'table', SlowTable(latency, item=fund)),
+    ]
+    if mode == 'blocking':
+        patches += [patch.object(module, 'run_db', blocking_run_db) for module in SERVICE_MODULES]
+
+    for p in patches:
+        p.start()
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off", backlog=4096)
+
+
+def wait_for_port(port, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"uvicorn no respondió en el puerto {port}")
+
+
+async def run_level(base_url, concurrency, total_requests):
+    latencies = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        queue = asyncio.Queue()
+        for _ in range(total_requests):
+            queue.put_nowait(None)
+
+        async def worker():
+            while not queue.empty():
+                queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.get(ENDPOINT)
+                latencies.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        'p50': statistics.median(latencies),
+        'p99': percentile(latencies, 99),
+        'rps': total_requests / elapsed,
+    }
+
+
+def run_mode(mode, latency, total_requests, port):
+    server = multiprocessing.Process(target=serve, args=(mode, latency, port), daemon=True)
+    server.start()
+    try:
+        wait_for_port(port)
+        base_url = f"http://127.0.0.1:{port}"
+        results = {}
+        for concurrency in CONCURRENCY_LEVELS:
+            # Con un solo cliente no hace falta repetir tantas peticiones
+            requests_for_level = min(total_requests, 50) if concurrency == 1 else max(concurrency, total_requests)
+            results[concurrency] = asyncio.run(run_level(base_url, concurrency, requests_for_level))
+        return results
+    finally:
+        server.terminate()
+        server.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency-ms', type=float, default=10.0, help="Latencia simulada por llamada a DynamoDB")
+    parser.add_argument('--requests', type=int, default=300, help="Peticiones por nivel de concurrencia")
+    parser.add_argument('--port', type=int, default=8765, help="Puerto local para uvicorn")
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    print(f"Endpoint: {ENDPOINT} - latencia simulada por llamada: {args.latency_ms} ms")
+    print(f"{'modo':<10}{'clientes':>10}{'p50 (ms)':>12}{'p99 (ms)':>12}{'req/s':>10}")
+    for mode in ('blocking', 'run_db'):
+        for concurrency, stats in run_mode(mode, latency, args.requests, args.port).items():
+            print(f"{mode:<10}{concurrency:>10}{stats['p50']:>12.1f}{stats['p99']:>12.1f}{stats['rps']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
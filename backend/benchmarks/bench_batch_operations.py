@@ -0,0 +1,119 @@
+"""
+Throughput (operaciones/segundo) de suscripciones masivas: una llamada a
+TransaccionService.create_subscription por operación frente a BatchService.process con el lote
+completo (lecturas agrupadas, validación en memoria y TransactWriteItems de hasta 100 elementos).
+
+DynamoDB se sustituye por el motor en memoria (app/services/memory_engine.py), con una
+latencia simulada por llamada. Las notificaciones se descartan para medir solo el acceso a datos.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_batch_operations
+    python -m benchmarks.bench_batch_operations --operations 2000 --latency-ms 10 --concurrency 10
+"""
+import argparse
+import asyncio
+import time
+from contextlib import ExitStack
+from decimal import Decimal
+from unittest.mock import patch
+from app.services.memory_engine import create_app_tables
+from app.config import settings
+from app.models.transaccion import BatchOperation, TransaccionCreate
+from app.services.batch_service import BatchService
+from app.services.fondo_service import fund_catalog
+from app.services.transaccion_service import TransaccionService
+
+FUNDS = [
+    {'fundId': '1', 'name': 'FPV_EL CLIENTE_RECAUDADORA', 'category': 'FPV', 'minimumAmount': Decimal('75000')},
+    {'fundId': '2', 'name': 'FPV_EL CLIENTE_ECOPETROL', 'category': 'FPV', 'minimumAmount': Decimal('125000')},
+    {'fundId': '3', 'name': 'DEUDAPRIVADA', 'category': 'FIC', 'minimumAmount': Decimal('50000')},
+    {'fundId': '4', 'name': 'FDO-ACCIONES', 'category': 'FIC', 'minimumAmount': Decimal('250000')},
+    {'fundId': '5', 'name': 'FPV_EL CLIENTE_DINAMICA', 'category': 'FPV', 'minimumAmount': Decimal('100000')},
+]
+
+
+async def discard_notification(**kwargs):
+    return True
+
+
+def setup_database(operations: int, latency: float):
+    """Un cliente con saldo suficiente por cada cinco operaciones (una por fondo)"""
+    database = create_app_tables()
+    for fund in FUNDS:
+        database.Table(settings.FUNDS_TABLE_NAME).put_item(Item=fund)
+    clients = (operations + len(FUNDS) - 1) // len(FUNDS)
+    for i in range(clients):
+        database.Table(settings.CLIENTS_TABLE_NAME).put_item(Item={
+            'clientId': f'C{i:06d}', 'balance': Decimal('1000000'), 'preferredNotification': 'email'
+        })
+    database.latency = latency
+    for table in database.tables.values():
+        table.calls.clear()  # Solo se cuentan las llamadas de la medición
+    batch = [BatchOperation(clientId=f'C{i // len(FUNDS):06d}', fundId=FUNDS[i % len(FUNDS)]['fundId'],
+                            type='SUBSCRIPTION') for i in range(operations)]
+    return database, batch
+
+
+def patches(database):
+    return [
+        patch('app.services.cliente_service.table', database.Table(settings.CLIENTS_TABLE_NAME)),
+        patch('app.services.cliente_service.dynamodb', database),
+        patch('app.services.fondo_service.table', database.Table(settings.FUNDS_TABLE_NAME)),
+        patch('app.services.fondo_service.dynamodb', database),
+        patch('app.services.transaccion_service.dynamodb', database),
+        patch('app.services.transaccion_service.subscription_table', database.Table(settings.SUBSCRIPTIONS_TABLE_NAME)),
+        patch('app.services.transaccion_service.transaction_table', database.Table(settings.TRANSACTIONS_TABLE_NAME)),
+        patch('app.services.transaccion_service.dynamodb_client', database.meta.client),
+        patch('app.services.transaccion_service.dispatch_notification', discard_notification),
+    ]
+
+
+async def one_by_one(batch, concurrency: int):
+    """Comportamiento previo: una petición por operación, `concurrency` peticiones a la vez"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(operation):
+        async with semaphore:
+            return await TransaccionService.create_subscription(
+                operation.clientId, TransaccionCreate(fundId=operation.fundId)
+            )
+
+    results = await asyncio.gather(*(run(operation) for operation in batch))
+    return sum(1 for result in results if result.get('status') == 'COMPLETED')
+
+
+async def batched(batch, concurrency: int):
+    return (await BatchService.process(batch))['completed']
+
+
+def measure(mode, runner, operations, latency, concurrency):
+    database, batch = setup_database(operations, latency)
+    fund_catalog.invalidate()
+    with ExitStack() as stack:
+        for p in patches(database):
+            stack.enter_context(p)
+        start = time.perf_counter()
+        completed = asyncio.run(runner(batch, concurrency))
+        elapsed = time.perf_counter() - start
+    calls = len(database.meta.client.calls) + sum(len(t.calls) for t in database.tables.values())
+    print(f"{mode:<14}{completed:>12}{elapsed:>12.2f}{completed / elapsed:>12.0f}{calls:>16}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--operations', type=int, default=1000, help="Suscripciones por medición")
+    parser.add_argument('--latency-ms', type=float, default=5, help="Latencia simulada por llamada a DynamoDB")
+    parser.add_argument('--concurrency', type=int, default=10,
+                        help="Peticiones simultáneas en el modo de una operación por llamada")
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    print(f"{args.operations} suscripciones, latencia {args.latency_ms} ms, "
+          f"concurrencia individual {args.concurrency}")
+    print(f"{'modo':<14}{'completadas':>12}{'segundos':>12}{'ops/s':>12}{'llamadas DB':>16}")
+    measure('individual', one_by_one, args.operations, latency, args.concurrency)
+    measure('lote', batched, args.operations, latency, args.concurrency)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark del arranque en frío del handler de Lambda.
+
+Cada medición se ejecuta en un intérprete nuevo (como un contenedor de Lambda recién creado):
+  - import: tiempo de `import lambda_handler` (la fase INIT de Lambda)
+  - primer acceso: tiempo adicional hasta tener las tablas y el cliente de DynamoDB listos,
+    que ahora ocurre en la primera invocación en lugar de en la importación
+
+Además se ejecuta `python -X importtime` para listar los módulos que más tardan en importarse.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_cold_start
+    python -m benchmarks.bench_cold_start --runs 10 --top 15
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+MEASURE_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import lambda_handler
+imported = time.perf_counter()
+from app.config import settings
+from app.services import dynamodb
+for name in (settings.CLIENTS_TABLE_NAME, settings.FUNDS_TABLE_NAME,
+             settings.SUBSCRIPTIONS_TABLE_NAME, settings.TRANSACTIONS_TABLE_NAME):
+    dynamodb.lazy_table(name).resolve()
+dynamodb.shared_client.meta
+ready = time.perf_counter()
+print(imported - start, ready - imported, 'boto3' in sys.modules)
+"""
+
+
+def measure_once():
+    output = subprocess.run([sys.executable, '-c', MEASURE_SCRIPT], capture_output=True, text=True, check=True)
+    import_time, first_access, _ = output.stdout.split()
+    return float(import_time) * 1000, float(first_access) * 1000
+
+
+def boto3_imported_by_handler():
+    code = "import sys, lambda_handler; print('boto3' in sys.modules)"
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return output.stdout.strip() == 'True'
+
+
+def top_imports(limit):
+    """Módulos importados directamente por el handler con mayor tiempo acumulado (-X importtime)"""
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import lambda_handler'],
+                            capture_output=True, text=True, check=True)
+    modules = []
+    for line in output.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # importtime sangra dos espacios por nivel: los hijos directos de lambda_handler llevan tres
+        if len(name) - len(name.lstrip(' ')) == 3:
+            modules.append((int(cumulative) / 1000, name.strip()))
+    return sorted(modules, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help="Intérpretes nuevos a medir")
+    parser.add_argument('--top', type=int, default=10, help="Módulos a listar de -X importtime")
+    args = parser.parse_args()
+
+    samples = [measure_once() for _ in range(args.runs)]
+    imports = [s[0] for s in samples]
+    accesses = [s[1] for s in samples]
+
+    print(f"Arranques en frío medidos: {args.runs}")
+    print(f"{'fase':<28}{'mediana (ms)':>14}{'mín (ms)':>12}")
+    print(f"{'import lambda_handler':<28}{statistics.median(imports):>14.1f}{min(imports):>12.1f}")
+    print(f"{'primer acceso a DynamoDB':<28}{statistics.median(accesses):>14.1f}{min(accesses):>12.1f}")
+    print(f"boto3 importado por el handler: {'sí' if boto3_imported_by_handler() else 'no'}")
+
+    print("\nImportaciones más lentas de lambda_handler (-X importtime):")
+    for cumulative_ms, name in top_imports(args.top):
+        print(f"  {cumulative_ms:>8.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,346 @@
+"""
+Prueba de carga de la API completa con tráfico mixto: suscripciones, cancelaciones, historial y
+listado de fondos. Informa throughput, latencias p50/p95/p99 y llamadas a DynamoDB por petición
+(por escenario y en total) y puede fallar si empeora respecto a una línea base guardada.
+
+La aplicación se ejecuta en el mismo proceso, de dos formas:
+  - asgi:   peticiones HTTP en memoria (httpx.ASGITransport) con `--concurrency` clientes.
+  - mangum: eventos sintéticos de API Gateway (REST) a través del handler de Lambda, de uno en
+            uno como los atiende una instancia de Lambda.
+
+DynamoDB se sustituye por el motor en memoria (app/services/memory_engine.py) con una
+latencia simulada por llamada. Las llamadas por petición salen del registro de métricas de la
+aplicación (dynamodb_calls_total por ruta). Notificaciones, logs por petición y EMF se desactivan
+para medir solo la API y el acceso a datos.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_load
+    python -m benchmarks.bench_load --mode mangum --requests 500
+    python -m benchmarks.bench_load --mix subscribe=40,cancel=10,history=40,funds=10
+    python -m benchmarks.bench_load --save-baseline benchmarks/baselines/load_asgi.json
+    python -m benchmarks.bench_load --baseline benchmarks/baselines/load_asgi.json --tolerance 0.25
+
+Con --baseline el proceso termina con código 1 si el throughput baja, las latencias p95/p99 suben
+más de la tolerancia o aumentan las llamadas a DynamoDB o los errores por escenario. La
+comparación solo es válida con los mismos parámetros con los que se guardó la línea base.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from contextlib import ExitStack
+from decimal import Decimal
+from unittest.mock import patch
+from app.services.memory_engine import create_app_tables
+from app.config import settings
+from app.main import app
+from app.services.fondo_service import fund_catalog
+from app.services.metrics import metrics
+
+API = settings.API_V1_PREFIX
+
+FUNDS = [
+    {'fundId': '1', 'name': 'FPV_EL CLIENTE_RECAUDADORA', 'category': 'FPV', 'minimumAmount': Decimal('75000')},
+    {'fundId': '2', 'name': 'FPV_EL CLIENTE_ECOPETROL', 'category': 'FPV', 'minimumAmount': Decimal('125000')},
+    {'fundId': '3', 'name': 'DEUDAPRIVADA', 'category': 'FIC', 'minimumAmount': Decimal('50000')},
+    {'fundId': '4', 'name': 'FDO-ACCIONES', 'category': 'FIC', 'minimumAmount': Decimal('250000')},
+    {'fundId': '5', 'name': 'FPV_EL CLIENTE_DINAMICA', 'category': 'FPV', 'minimumAmount': Decimal('100000')},
+]
+
+# Escenario -> ruta (plantilla) con la que el registro de métricas etiqueta sus llamadas a DynamoDB
+ROUTES = {
+    'subscribe': f"{API}/transacciones/subscriptions",
+    'cancel': f"{API}/transacciones/subscriptions/{{fund_id}}",
+    'history': f"{API}/transacciones/history",
+    'funds': f"{API}/fondos",
+}
+DEFAULT_MIX = 'subscribe=30,cancel=20,history=35,funds=15'
+
+# Latencias comparadas con la línea base (p50 varía demasiado entre ejecuciones para usarse)
+GATED_LATENCIES = ('p95Ms', 'p99Ms')
+
+
+def parse_mix(text: str):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in ROUTES:
+            raise argparse.ArgumentTypeError(f"Escenario desconocido: {name} (válidos: {', '.join(ROUTES)})")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def setup_database(clients: int, latency: float):
+    database = create_app_tables()
+    for fund in FUNDS:
+        database.Table(settings.FUNDS_TABLE_NAME).put_item(Item=fund)
+    for i in range(clients):
+        database.Table(settings.CLIENTS_TABLE_NAME).put_item(Item={
+            'clientId': f'L{i:05d}', 'balance': Decimal('1000000000'), 'preferredNotification': 'email',
+            'email': f'cliente{i}@ejemplo.com'
+        })
+    database.latency = latency
+    return database
+
+
+def patches(database):
+    async def discard_notification(**kwargs):
+        return True
+
+    return [
+        patch('app.services.cliente_service.table', database.Table(settings.CLIENTS_TABLE_NAME)),
+        patch('app.services.cliente_service.dynamodb', database),
+        patch('app.services.fondo_service.table', database.Table(settings.FUNDS_TABLE_NAME)),
+        patch('app.services.fondo_service.dynamodb', database),
+        patch('app.services.transaccion_service.dynamodb', database),
+        patch('app.services.transaccion_service.subscription_table', database.Table(settings.SUBSCRIPTIONS_TABLE_NAME)),
+        patch('app.services.transaccion_service.transaction_table', database.Table(settings.TRANSACTIONS_TABLE_NAME)),
+        patch('app.services.transaccion_service.dynamodb_client', database.meta.client),
+        patch('app.services.idempotency.idempotency_table', database.Table(settings.IDEMPOTENCY_TABLE_NAME)),
+        patch('app.services.transaccion_service.dispatch_notification', discard_notification),
+        patch.object(settings, 'LOG_SAMPLE_RATE', 0),
+        patch.object(settings, 'METRICS_EMF_ENABLED', False),
+    ]
+
+
+def plan_requests(total: int, workers: int, clients: int, mix: dict, seed: int):
+    """
+    Secuencia reproducible de peticiones repartida entre `workers`. Cada cliente pertenece a un
+    único worker, de modo que sus operaciones se ejecutan en orden: una cancelación siempre llega
+    después de la suscripción que cancela y las suscripciones no chocan con una ya activa.
+    """
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    owned = [[f'L{i:05d}' for i in range(clients) if i % workers == w] for w in range(workers)]
+    active = {}
+    plans = [[] for _ in range(workers)]
+    for position in range(total):
+        worker = position % workers
+        client_id = rng.choice(owned[worker])
+        subscribed = active.setdefault(client_id, set())
+        scenario = rng.choices(names, weights)[0]
+        if scenario == 'cancel' and not subscribed:
+            scenario = 'subscribe'
+        if scenario == 'subscribe' and len(subscribed) == len(FUNDS):
+            scenario = 'cancel'
+
+        if scenario == 'subscribe':
+            fund_id = rng.choice([f['fundId'] for f in FUNDS if f['fundId'] not in subscribed])
+            subscribed.add(fund_id)
+            request = ('POST', ROUTES['subscribe'], {'client_id': client_id}, {'fundId': fund_id})
+        elif scenario == 'cancel':
+            fund_id = rng.choice(sorted(subscribed))
+            subscribed.discard(fund_id)
+            request = ('DELETE', f"{API}/transacciones/subscriptions/{fund_id}", {'client_id': client_id}, None)
+        elif scenario == 'history':
+            request = ('GET', ROUTES['history'], {'client_id': client_id, 'limit': '10'}, None)
+        else:
+            request = ('GET', ROUTES['funds'], {}, None)
+        plans[worker].append((scenario,) + request)
+    return plans
+
+
+async def run_asgi(plans):
+    """Cada worker es un cliente HTTP que envía sus peticiones una tras otra"""
+    import httpx
+
+    samples = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        async def worker(plan):
+            for scenario, method, path, params, body in plan:
+                started = time.perf_counter()
+                response = await client.request(method, path, params=params, json=body)
+                samples.append((scenario, time.perf_counter() - started, response.status_code))
+
+        await asyncio.gather(*(worker(plan) for plan in plans))
+    return samples
+
+
+def api_gateway_event(method: str, path: str, params: dict, body):
+    """Evento de API Gateway (REST, proxy) como el que recibe lambda_handler"""
+    request_id = f"bench-{random.getrandbits(48):012x}"
+    headers = {'Host': 'bench.execute-api.local', 'Content-Type': 'application/json'}
+    return {
+        'resource': '/{proxy+}',
+        'path': path,
+        'httpMethod': method,
+        'headers': headers,
+        'multiValueHeaders': {k: [v] for k, v in headers.items()},
+        'queryStringParameters': params or None,
+        'multiValueQueryStringParameters': {k: [v] for k, v in params.items()} or None,
+        'pathParameters': {'proxy': path.lstrip('/')},
+        'stageVariables': None,
+        'requestContext': {
+            'resourcePath': '/{proxy+}', 'httpMethod': method, 'path': path, 'stage': 'bench',
+            'requestId': request_id, 'identity': {'sourceIp': '127.0.0.1'}
+        },
+        'body': json.dumps(body) if body is not None else None,
+        'isBase64Encoded': False
+    }
+
+
+def run_mangum(plans):
+    """Una instancia de Lambda atiende un evento a la vez: las peticiones se envían en secuencia"""
+    from mangum import Mangum
+    from app.services.notification_queue import InlineNotificationDispatcher, set_notification_dispatcher, \
+        notification_dispatcher
+
+    handler = Mangum(app, lifespan='off')
+    samples = []
+    ordered = [request for plan in plans for request in plan]
+    previous = notification_dispatcher
+    set_notification_dispatcher(InlineNotificationDispatcher(1, 0))
+    try:
+        for scenario, method, path, params, body in ordered:
+            started = time.perf_counter()
+            response = handler(api_gateway_event(method, path, params, body), None)
+            samples.append((scenario, time.perf_counter() - started, response['statusCode']))
+    finally:
+        set_notification_dispatcher(previous)
+    return samples
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    position = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[position]
+
+
+def summarize(samples, elapsed: float):
+    def stats(entries, route=None):
+        latencies = sorted(seconds * 1000 for _, seconds, _ in entries)
+        calls = metrics.counter_value('dynamodb_calls_total', **({'route': route} if route else {}))
+        return {
+            'requests': len(entries),
+            'errors': sum(1 for _, _, status in entries if status >= 400),
+            'p50Ms': round(percentile(latencies, 0.50), 3),
+            'p95Ms': round(percentile(latencies, 0.95), 3),
+            'p99Ms': round(percentile(latencies, 0.99), 3),
+            'dynamodbCallsPerRequest': round(calls / len(entries), 3) if entries else 0.0,
+        }
+
+    overall = stats(samples)
+    overall['throughput'] = round(len(samples) / elapsed, 1) if elapsed > 0 else 0.0
+    scenarios = {}
+    for scenario, route in ROUTES.items():
+        entries = [sample for sample in samples if sample[0] == scenario]
+        if entries:
+            scenarios[scenario] = stats(entries, route)
+    return {'overall': overall, 'scenarios': scenarios}
+
+
+def compare(results: dict, baseline: dict, tolerance: float, latency_slack_ms: float = 0):
+    """
+    Lista de regresiones respecto a la línea base (vacía si no hay ninguna). Una latencia empeora
+    si supera la de la línea base en más de `tolerance` y además en más de `latency_slack_ms`, para
+    que las variaciones de pocos milisegundos en escenarios rápidos no fallen la ejecución.
+    """
+    regressions = []
+    base, current = baseline['overall'], results['overall']
+    if current['throughput'] < base['throughput'] * (1 - tolerance):
+        regressions.append(f"throughput {current['throughput']} req/s < {base['throughput']} req/s")
+    for name, base_stats in [('overall', base)] + sorted(baseline['scenarios'].items()):
+        stats = current if name == 'overall' else results['scenarios'].get(name)
+        if stats is None:
+            regressions.append(f"{name}: el escenario no se ejecutó")
+            continue
+        for metric in GATED_LATENCIES:
+            if stats[metric] > max(base_stats[metric] * (1 + tolerance), base_stats[metric] + latency_slack_ms):
+                regressions.append(f"{name}: {metric} {stats[metric]} > {base_stats[metric]}")
+        # Llamadas a DynamoDB y errores son deterministas con la misma semilla: no admiten tolerancia
+        if stats['dynamodbCallsPerRequest'] > base_stats['dynamodbCallsPerRequest'] + 0.001:
+            regressions.append(f"{name}: llamadas a DynamoDB por petición "
+                               f"{stats['dynamodbCallsPerRequest']} > {base_stats['dynamodbCallsPerRequest']}")
+        if stats['errors'] > base_stats['errors']:
+            regressions.append(f"{name}: errores {stats['errors']} > {base_stats['errors']}")
+    return regressions
+
+
+def run(parameters: dict):
+    plans = plan_requests(parameters['requests'], parameters['concurrency'], parameters['clients'],
+                          parameters['mix'], parameters['seed'])
+    database = setup_database(parameters['clients'], parameters['latencyMs'] / 1000)
+    fund_catalog.invalidate()
+    with ExitStack() as stack:
+        for p in patches(database):
+            stack.enter_context(p)
+        metrics.reset()
+        start = time.perf_counter()
+        if parameters['mode'] == 'mangum':
+            samples = run_mangum(plans)
+        else:
+            samples = asyncio.run(run_asgi(plans))
+        elapsed = time.perf_counter() - start
+        results = summarize(samples, elapsed)
+    fund_catalog.invalidate()
+    return results
+
+
+def print_results(parameters: dict, results: dict):
+    print(f"modo {parameters['mode']}, {parameters['requests']} peticiones, concurrencia "
+          f"{parameters['concurrency']}, latencia DynamoDB {parameters['latencyMs']} ms, semilla {parameters['seed']}")
+    print(f"{'escenario':<12}{'peticiones':>12}{'errores':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'DB/pet.':>10}")
+    rows = list(results['scenarios'].items()) + [('total', results['overall'])]
+    for name, stats in rows:
+        print(f"{name:<12}{stats['requests']:>12}{stats['errors']:>9}{stats['p50Ms']:>10.2f}{stats['p95Ms']:>10.2f}"
+              f"{stats['p99Ms']:>10.2f}{stats['dynamodbCallsPerRequest']:>10.2f}")
+    print(f"throughput: {results['overall']['throughput']} peticiones/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=('asgi', 'mangum'), default='asgi')
+    parser.add_argument('--requests', type=int, default=2000, help="Peticiones medidas")
+    parser.add_argument('--concurrency', type=int, default=20, help="Clientes simultáneos (modo asgi)")
+    parser.add_argument('--clients', type=int, default=200, help="Clientes sembrados en la tabla Clients")
+    parser.add_argument('--latency-ms', type=float, default=2, help="Latencia simulada por llamada a DynamoDB")
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Pesos por escenario (por defecto {DEFAULT_MIX})")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--baseline', help="Línea base JSON con la que comparar; código 1 si hay regresiones")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Empeoramiento admitido en throughput y latencias (fracción)")
+    parser.add_argument('--latency-slack-ms', type=float, default=10,
+                        help="Empeoramiento absoluto de latencia que se admite siempre (ms)")
+    parser.add_argument('--save-baseline', help="Guarda los resultados como línea base en esta ruta")
+    args = parser.parse_args()
+
+    # En modo mangum los eventos se atienden de uno en uno, como en una instancia de Lambda
+    concurrency = 1 if args.mode == 'mangum' else args.concurrency
+    parameters = {
+        'mode': args.mode, 'requests': args.requests, 'concurrency': concurrency,
+        'clients': max(args.clients, concurrency), 'latencyMs': args.latency_ms, 'mix': args.mix,
+        'seed': args.seed
+    }
+    results = run(parameters)
+    print_results(parameters, results)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({'parameters': parameters, **results}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Línea base guardada en {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline['parameters'] != parameters:
+            print(f"Los parámetros no coinciden con la línea base: {baseline['parameters']}")
+            sys.exit(2)
+        regressions = compare(results, baseline, args.tolerance, args.latency_slack_ms)
+        if regressions:
+            print("REGRESIONES respecto a la línea base:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print(f"Sin regresiones respecto a {args.baseline} (tolerancia {args.tolerance:.0%})")
+
+
+if __name__ == '__main__':
+    main()
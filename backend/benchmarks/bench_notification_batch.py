@@ -0,0 +1,116 @@
+"""
+Benchmark de throughput de NotificacionService.send_batch con 1.000 y 10.000 mensajes.
+
+send_email y send_sms se sustituyen por peticiones HTTP a un SES/SNS falso servido con
+uvicorn en un proceso hijo, que responde tras `--latency-ms`. Se compara con el envío uno a
+uno (un await por mensaje), medido sobre una muestra para no alargar el benchmark.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_notification_batch
+    python -m benchmarks.bench_notification_batch --concurrency 50 --rate 0 --latency-ms 20
+"""
+import argparse
+import asyncio
+import multiprocessing
+import time
+from unittest.mock import patch
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.config import settings
+from app.services.notificacion_service import NotificacionService
+from benchmarks.bench_async_access import wait_for_port
+
+BATCH_SIZES = (1000, 10000)
+SEQUENTIAL_SAMPLE = 200
+
+
+def fake_provider(latency):
+    """SES/SNS falso: acepta cada mensaje tras la latencia indicada"""
+    async def accept(request):
+        await asyncio.sleep(latency)
+        return JSONResponse({"MessageId": "fake"})
+
+    return Starlette(routes=[Route("/email", accept, methods=["POST"]), Route("/sms", accept, methods=["POST"])])
+
+
+def serve(latency, port):
+    uvicorn.run(fake_provider(latency), host="127.0.0.1", port=port, log_level="warning", backlog=4096)
+
+
+def make_notifications(count):
+    return [{
+        'client_id': f'C{i:06d}',
+        'notification_type': 'email' if i % 2 else 'sms',
+        'message': 'Campaña: nuevo fondo disponible',
+        'email': f'cliente{i}@ejemplo.com',
+        'phone': f'+57300{i:07d}'
+    } for i in range(count)]
+
+
+async def run(base_url, args):
+    limits = httpx.Limits(max_connections=2 * args.concurrency, max_keepalive_connections=2 * args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def send_email(email, message):
+            response = await client.post("/email", json={"to": email, "message": message})
+            return response.status_code == 200
+
+        async def send_sms(phone, message):
+            response = await client.post("/sms", json={"to": phone, "message": message})
+            return response.status_code == 200
+
+        with patch.object(NotificacionService, 'send_email', staticmethod(send_email)), \
+                patch.object(NotificacionService, 'send_sms', staticmethod(send_sms)), \
+                patch.object(settings, 'EMAIL_BATCH_CONCURRENCY', args.concurrency), \
+                patch.object(settings, 'SMS_BATCH_CONCURRENCY', args.concurrency), \
+                patch.object(settings, 'EMAIL_RATE_PER_SECOND', args.rate), \
+                patch.object(settings, 'SMS_RATE_PER_SECOND', args.rate):
+            sample = make_notifications(SEQUENTIAL_SAMPLE)
+            start = time.perf_counter()
+            for notification in sample:
+                await NotificacionService.send_notification(**notification)
+            sequential_rate = len(sample) / (time.perf_counter() - start)
+
+            rows = []
+            for size in BATCH_SIZES:
+                notifications = make_notifications(size)
+                start = time.perf_counter()
+                results = await NotificacionService.send_batch(notifications)
+                elapsed = time.perf_counter() - start
+                failed = sum(1 for r in results if not r['success'])
+                rows.append((size, elapsed, size / elapsed, failed, size / sequential_rate))
+    return sequential_rate, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency-ms', type=float, default=10.0, help="Latencia del proveedor falso por mensaje")
+    parser.add_argument('--concurrency', type=int, default=settings.EMAIL_BATCH_CONCURRENCY,
+                        help="Envíos simultáneos por canal")
+    parser.add_argument('--rate', type=float, default=0, help="Mensajes por segundo por canal (0 = sin límite)")
+    parser.add_argument('--port', type=int, default=8766, help="Puerto local del proveedor falso")
+    args = parser.parse_args()
+
+    server = multiprocessing.Process(target=serve, args=(args.latency_ms / 1000, args.port), daemon=True)
+    server.start()
+    try:
+        wait_for_port(args.port)
+        sequential_rate, rows = asyncio.run(run(f"http://127.0.0.1:{args.port}", args))
+    finally:
+        server.terminate()
+        server.join()
+
+    print(f"Latencia del proveedor: {args.latency_ms} ms - concurrencia por canal: {args.concurrency} "
+          f"- tasa por canal: {args.rate or 'sin límite'}")
+    print(f"Envío uno a uno: {sequential_rate:.1f} msg/s (muestra de {SEQUENTIAL_SAMPLE})")
+    print(f"{'mensajes':>10}{'tiempo (s)':>12}{'msg/s':>10}{'fallidos':>10}{'uno a uno (s)':>15}")
+    for size, elapsed, rate, failed, sequential in rows:
+        print(f"{size:>10}{elapsed:>12.2f}{rate:>10.1f}{failed:>10}{sequential:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
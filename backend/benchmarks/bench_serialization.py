@@ -0,0 +1,94 @@
+"""
+Micro-benchmark del coste por registro de convertir Transaccion/Subscription/Cliente al
+formato de DynamoDB y de vuelta.
+
+  - anterior: model.dict() + convert_types_for_dynamodb (recorrido recursivo, Decimal(str(x)))
+    + TypeSerializer de boto3, y un segundo model.dict() para la respuesta
+  - actual:   serialize_item(model) directo desde los atributos del modelo + un model.dict()
+
+Uso (desde backend/):
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --records 50000
+"""
+import argparse
+import time
+import warnings
+from datetime import datetime
+from decimal import Decimal
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+from app.models.cliente import Cliente
+from app.models.transaccion import Subscription, Transaccion
+from app.services.serialization import deserialize_item, serialize_item
+
+warnings.filterwarnings("ignore")  # .dict() está deprecado en pydantic v2; es el camino que se mide
+
+
+def convert_types_for_dynamodb(obj):
+    """Conversión recursiva usada antes en transaccion_service"""
+    if isinstance(obj, dict):
+        return {k: convert_types_for_dynamodb(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [convert_types_for_dynamodb(i) for i in obj]
+    elif isinstance(obj, float):
+        return Decimal(str(obj))
+    elif isinstance(obj, datetime):
+        return obj.isoformat()
+    return obj
+
+
+SERIALIZER = TypeSerializer()
+DESERIALIZER = TypeDeserializer()
+
+
+def previous_write(model):
+    item = {k: SERIALIZER.serialize(v) for k, v in convert_types_for_dynamodb(model.dict()).items()}
+    return item, model.dict()
+
+
+def current_write(model):
+    return serialize_item(model), model.dict()
+
+
+def previous_read(item):
+    return {k: DESERIALIZER.deserialize(v) for k, v in item.items()}
+
+
+def sample_models():
+    now = datetime(2025, 3, 28, 12, 0, 0)
+    return {
+        'Transaccion': Transaccion(clientId='C123456', fundId='1', type='SUBSCRIPTION', amount=75000.0,
+                                   transactionDate=now),
+        'Subscription': Subscription(clientId='C123456', fundId='1', amountSubscribed=75000.0,
+                                     subscriptionDate=now),
+        'Cliente': Cliente(clientId='C123456', email='cliente@ejemplo.com', phone='+573001234567'),
+    }
+
+
+def per_record_us(function, argument, records):
+    start = time.perf_counter()
+    for _ in range(records):
+        function(argument)
+    return (time.perf_counter() - start) / records * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=20000, help="Registros por medición")
+    args = parser.parse_args()
+
+    print(f"{'modelo':<14}{'operación':<12}{'anterior (µs)':>15}{'actual (µs)':>13}{'mejora':>9}")
+    for name, model in sample_models().items():
+        item = serialize_item(model)
+        for operation, previous, current, argument in (
+            ('escritura', previous_write, current_write, model),
+            ('lectura', previous_read, deserialize_item, item),
+        ):
+            before = per_record_us(previous, argument, args.records)
+            after = per_record_us(current, argument, args.records)
+            print(f"{name:<14}{operation:<12}{before:>15.2f}{after:>13.2f}{before / after:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
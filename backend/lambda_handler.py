@@ -1,10 +1,11 @@
+import json
 from mangum import Mangum
 from app.main import app
-import logging
+from app.services.log import get_logger
 
-# Configurar logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+# Logs JSON de la aplicación (app/services/log.py). El evento completo no se registra: la línea
+# muestreada de cada petición (ruta, correlación, estado y latencia) la escribe RequestLogMiddleware
+logger = get_logger("app.lambda_handler")
 
 # Crear manejador para Lambda con mejores configuraciones
 handler = Mangum(app, lifespan="off")
@@ -12,12 +13,16 @@ handler = Mangum(app, lifespan="off")
 
 # Agregar un wrapper para capturar errores
 def lambda_handler(event, context):
-    logger.info(f"Evento recibido: {event}")
     try:
         return handler(event, context)
     except Exception as e:
-        logger.error(f"Error en Lambda handler: {str(e)}")
+        request_context = (event or {}).get("requestContext") or {}
+        logger.exception("Error en Lambda handler", extra={
+            "requestId": request_context.get("requestId") or getattr(context, "aws_request_id", None),
+            "route": (event or {}).get("resource") or (event or {}).get("path")
+        })
         return {
             "statusCode": 500,
-            "body": '{"message": "Error interno del servidor - ' + str(e) + '"}'
-        }
\ No newline at end of file
+            "headers": {"Content-Type": "application/json"},
+            "body": json.dumps({"message": f"Error interno del servidor - {str(e)}"})
+        }
@@ -0,0 +1,100 @@
+"""
+Prepara los datos existentes para el índice disperso ActiveSubscriptions:
+  - suscripciones ACTIVE sin activeSince: se les asigna su subscriptionDate
+  - suscripciones no activas con activeSince: se les elimina (no deben aparecer en el índice)
+
+Cada escritura es condicional sobre el estado leído, de modo que una suscripción o cancelación
+concurrente no se sobrescribe. Se puede ejecutar varias veces sin efectos adicionales.
+
+Uso (desde backend/):
+    python scripts/backfill_active_subscriptions.py --endpoint-url http://localhost:8000
+    python scripts/backfill_active_subscriptions.py --dry-run
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from botocore.exceptions import ClientError  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.services.transaccion_service import ACTIVE_SINCE_ATTRIBUTE  # noqa: E402
+
+
+def _scan(table, **kwargs):
+    while True:
+        response = table.scan(**kwargs)
+        yield from response.get('Items', [])
+        if not response.get('LastEvaluatedKey'):
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def _conditional_update(table, **kwargs):
+    """Aplica la actualización; False si el item cambió desde que se leyó"""
+    try:
+        table.update_item(**kwargs)
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        raise
+
+
+def backfill(resource, dry_run=False):
+    """Devuelve (activadas, limpiadas, omitidas por cambios concurrentes)"""
+    table = resource.Table(settings.SUBSCRIPTIONS_TABLE_NAME)
+    activated = cleared = skipped = 0
+    for subscription in _scan(table):
+        key = {'clientId': subscription['clientId'], 'fundId': subscription['fundId']}
+        is_active = subscription.get('status') == 'ACTIVE'
+        has_index_key = ACTIVE_SINCE_ATTRIBUTE in subscription
+        if is_active == has_index_key:
+            continue
+
+        if dry_run:
+            print(f"{key}: {'añadir' if is_active else 'eliminar'} {ACTIVE_SINCE_ATTRIBUTE}")
+            continue
+
+        if is_active:
+            since = subscription.get('subscriptionDate') or datetime.now().isoformat()
+            done = _conditional_update(
+                table,
+                Key=key,
+                UpdateExpression="SET #since = :since",
+                ConditionExpression="#status = :active AND attribute_not_exists(#since)",
+                ExpressionAttributeNames={'#since': ACTIVE_SINCE_ATTRIBUTE, '#status': 'status'},
+                ExpressionAttributeValues={':since': since, ':active': 'ACTIVE'}
+            )
+            activated += done
+        else:
+            done = _conditional_update(
+                table,
+                Key=key,
+                UpdateExpression="REMOVE #since",
+                ConditionExpression="#status <> :active",
+                ExpressionAttributeNames={'#since': ACTIVE_SINCE_ATTRIBUTE, '#status': 'status'},
+                ExpressionAttributeValues={':active': 'ACTIVE'}
+            )
+            cleared += done
+        skipped += not done
+    return activated, cleared, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoint-url', default=settings.DYNAMODB_ENDPOINT_URL or None,
+                        help="Endpoint de DynamoDB (p. ej. http://localhost:8000 para DynamoDB local)")
+    parser.add_argument('--dry-run', action='store_true', help="Solo mostrar los cambios")
+    args = parser.parse_args()
+
+    import boto3
+    resource = boto3.resource('dynamodb', region_name=settings.AWS_REGION, endpoint_url=args.endpoint_url)
+    activated, cleared, skipped = backfill(resource, dry_run=args.dry_run)
+    print(f"Suscripciones activadas en el índice: {activated}, limpiadas: {cleared}, "
+          f"omitidas por cambios concurrentes: {skipped}")
+
+
+if __name__ == '__main__':
+    main()
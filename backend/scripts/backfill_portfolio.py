@@ -0,0 +1,145 @@
+"""
+Recalcula el resumen de cartera (activeFundIds, totalInvested, activeCount_<categoría>) de cada
+cliente a partir de sus suscripciones activas. Necesario una vez para los clientes que ya tenían
+suscripciones antes de que TransaccionService mantuviera el resumen en cada escritura.
+
+Cada cliente se escribe con la condición de que su revisión no haya cambiado desde que se leyó
+(toda escritura del cliente la incrementa, también esta): si una suscripción o cancelación llega
+en medio, ese cliente se recalcula de nuevo, aunque el saldo haya quedado igual.
+
+Uso (desde backend/):
+    python scripts/backfill_portfolio.py --endpoint-url http://localhost:8000
+    python scripts/backfill_portfolio.py --dry-run
+"""
+import argparse
+import os
+import sys
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from botocore.exceptions import ClientError  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.services.cliente_service import (  # noqa: E402
+    ACTIVE_FUNDS_ATTRIBUTE, TOTAL_INVESTED_ATTRIBUTE, CATEGORY_COUNT_PREFIX, FUND_CATEGORIES, REVISION_ATTRIBUTE,
+    category_count_attribute
+)
+
+MAX_RETRIES = 5
+
+
+def _paginate(operation, **kwargs):
+    while True:
+        response = operation(**kwargs)
+        yield from response.get('Items', [])
+        if not response.get('LastEvaluatedKey'):
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def compute_portfolio(subscriptions_table, fund_categories, client_id):
+    """Fondos activos, total invertido y conteo por categoría según la tabla Subscriptions"""
+    active = list(_paginate(
+        subscriptions_table.query,
+        KeyConditionExpression="clientId = :cid",
+        FilterExpression="#status = :active",
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues={':cid': client_id, ':active': 'ACTIVE'}
+    ))
+    counts = {category: 0 for category in FUND_CATEGORIES}
+    for subscription in active:
+        category = fund_categories.get(subscription['fundId'])
+        if category:
+            counts[category] = counts.get(category, 0) + 1
+    return {
+        'fund_ids': {s['fundId'] for s in active},
+        'total': sum((Decimal(str(s['amountSubscribed'])) for s in active), Decimal('0')),
+        'counts': counts
+    }
+
+
+def write_portfolio(clients_table, client, portfolio):
+    names = {'#total': TOTAL_INVESTED_ATTRIBUTE, '#funds': ACTIVE_FUNDS_ATTRIBUTE, '#rev': REVISION_ATTRIBUTE}
+    values = {':total': portfolio['total'], ':one': 1}
+    if REVISION_ATTRIBUTE in client:
+        values[':rev'] = client[REVISION_ATTRIBUTE]
+        condition = "#rev = :rev"
+    else:
+        condition = "attribute_not_exists(#rev)"
+    assignments = ["#total = :total"]
+    for position, (category, count) in enumerate(sorted(portfolio['counts'].items())):
+        names[f'#c{position}'] = category_count_attribute(category)
+        values[f':c{position}'] = count
+        assignments.append(f"#c{position} = :c{position}")
+    # Categorías que ya no existen en el catálogo se eliminan del item
+    stale = [a for a in client if a.startswith(CATEGORY_COUNT_PREFIX)
+             and a[len(CATEGORY_COUNT_PREFIX):] not in portfolio['counts']]
+    removals = []
+    for position, attribute in enumerate(stale):
+        names[f'#s{position}'] = attribute
+        removals.append(f'#s{position}')
+    if portfolio['fund_ids']:
+        values[':funds'] = portfolio['fund_ids']
+        assignments.append("#funds = :funds")
+    else:
+        removals.append("#funds")  # DynamoDB no admite conjuntos vacíos
+
+    expression = "SET " + ", ".join(assignments)
+    if removals:
+        expression += " REMOVE " + ", ".join(removals)
+    expression += " ADD #rev :one"
+    clients_table.update_item(
+        Key={'clientId': client['clientId']},
+        UpdateExpression=expression,
+        ConditionExpression=condition,
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values
+    )
+
+
+def backfill(resource, dry_run=False):
+    """Recalcula el resumen de todos los clientes; devuelve cuántos se actualizaron"""
+    clients_table = resource.Table(settings.CLIENTS_TABLE_NAME)
+    subscriptions_table = resource.Table(settings.SUBSCRIPTIONS_TABLE_NAME)
+    funds_table = resource.Table(settings.FUNDS_TABLE_NAME)
+    fund_categories = {fund['fundId']: fund['category'] for fund in _paginate(funds_table.scan)}
+
+    updated = 0
+    for client in _paginate(clients_table.scan):
+        for attempt in range(MAX_RETRIES):
+            portfolio = compute_portfolio(subscriptions_table, fund_categories, client['clientId'])
+            if dry_run:
+                print(f"{client['clientId']}: {sorted(portfolio['fund_ids'])} total={portfolio['total']} "
+                      f"{portfolio['counts']}")
+                break
+            try:
+                write_portfolio(clients_table, client, portfolio)
+                updated += 1
+                break
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                # El cliente cambió mientras se calculaba: releer el cliente y recalcular
+                client = clients_table.get_item(Key={'clientId': client['clientId']}, ConsistentRead=True).get('Item')
+                if not client:
+                    break
+        else:
+            print(f"{client['clientId']}: no se pudo actualizar tras {MAX_RETRIES} intentos")
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoint-url', default=settings.DYNAMODB_ENDPOINT_URL or None,
+                        help="Endpoint de DynamoDB (p. ej. http://localhost:8000 para DynamoDB local)")
+    parser.add_argument('--dry-run', action='store_true', help="Solo mostrar el resumen calculado")
+    args = parser.parse_args()
+
+    import boto3
+    resource = boto3.resource('dynamodb', region_name=settings.AWS_REGION, endpoint_url=args.endpoint_url)
+    updated = backfill(resource, dry_run=args.dry_run)
+    print(f"Clientes actualizados: {updated}")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,7 +7,7 @@ dynamodb = boto3.resource('dynamodb', endpoint_url='http://localhost:8000')
 client = boto3.client('dynamodb', endpoint_url='http://localhost:8000')
 
 # Lista de nombres de tablas que queremos crear
-table_names = ['Clients', 'Funds', 'Subscriptions', 'Transactions']
+table_names = ['Clients', 'Funds', 'Subscriptions', 'Transactions', 'IdempotencyKeys', 'NotificationOutbox']
 
 # Eliminar tablas existentes si existen
 existing_tables = client.list_tables()['TableNames']
@@ -58,38 +58,53 @@ subscriptions_table = dynamodb.create_table(
     ],
     AttributeDefinitions=[
         {'AttributeName': 'clientId', 'AttributeType': 'S'},
-        {'AttributeName': 'fundId', 'AttributeType': 'S'}
+        {'AttributeName': 'fundId', 'AttributeType': 'S'},
+        {'AttributeName': 'activeSince', 'AttributeType': 'S'}
+    ],
+    # Índice disperso: activeSince solo existe en las suscripciones activas
+    GlobalSecondaryIndexes=[
+        {
+            'IndexName': 'ActiveSubscriptions',
+            'KeySchema': [
+                {'AttributeName': 'clientId', 'KeyType': 'HASH'},
+                {'AttributeName': 'activeSince', 'KeyType': 'RANGE'}
+            ],
+            'Projection': {'ProjectionType': 'ALL'},
+            'ProvisionedThroughput': {'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5}
+        }
     ],
     ProvisionedThroughput={'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5}
 )
 
 # Crear tabla Transactions
+# Índice TransactionsByFund: transacciones de un fondo de todos los clientes (exportación por fondo)
+transactions_schema = dict(
+    TableName='Transactions',
+    KeySchema=[
+        {'AttributeName': 'clientId', 'KeyType': 'HASH'},
+        {'AttributeName': 'transactionId', 'KeyType': 'RANGE'}
+    ],
+    AttributeDefinitions=[
+        {'AttributeName': 'clientId', 'AttributeType': 'S'},
+        {'AttributeName': 'transactionId', 'AttributeType': 'S'},
+        {'AttributeName': 'fundId', 'AttributeType': 'S'}
+    ],
+    GlobalSecondaryIndexes=[
+        {
+            'IndexName': 'TransactionsByFund',
+            'KeySchema': [
+                {'AttributeName': 'fundId', 'KeyType': 'HASH'},
+                {'AttributeName': 'transactionId', 'KeyType': 'RANGE'}
+            ],
+            'Projection': {'ProjectionType': 'ALL'},
+            'ProvisionedThroughput': {'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5}
+        }
+    ],
+    ProvisionedThroughput={'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5}
+)
 print("Creando tabla Transactions...")
 try:
-    transactions_table = dynamodb.create_table(
-        TableName='Transactions',
-        KeySchema=[
-            {'AttributeName': 'clientId', 'KeyType': 'HASH'},
-            {'AttributeName': 'transactionId', 'KeyType': 'RANGE'}
-        ],
-        AttributeDefinitions=[
-            {'AttributeName': 'clientId', 'AttributeType': 'S'},
-            {'AttributeName': 'transactionId', 'AttributeType': 'S'},
-            {'AttributeName': 'transactionDate', 'AttributeType': 'S'}
-        ],
-        GlobalSecondaryIndexes=[
-            {
-                'IndexName': 'TransactionsByDate',
-                'KeySchema': [
-                    {'AttributeName': 'clientId', 'KeyType': 'HASH'},
-                    {'AttributeName': 'transactionDate', 'KeyType': 'RANGE'}
-                ],
-                'Projection': {'ProjectionType': 'ALL'},
-                'ProvisionedThroughput': {'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5}
-            }
-        ],
-        ProvisionedThroughput={'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5}
-    )
+    transactions_table = dynamodb.create_table(**transactions_schema)
 except Exception as e:
     print(f"Error al crear la tabla Transactions: {str(e)}")
     # Si hay un error, puede ser porque la tabla se creó parcialmente
@@ -102,30 +117,35 @@ except Exception as e:
         
         # Crear la tabla nuevamente
         print("Intentando crear la tabla Transactions nuevamente...")
-        transactions_table = dynamodb.create_table(
-            TableName='Transactions',
-            KeySchema=[
-                {'AttributeName': 'clientId', 'KeyType': 'HASH'},
-                {'AttributeName': 'transactionId', 'KeyType': 'RANGE'}
-            ],
-            AttributeDefinitions=[
-                {'AttributeName': 'clientId', 'AttributeType': 'S'},
-                {'AttributeName': 'transactionId', 'AttributeType': 'S'},
-                {'AttributeName': 'transactionDate', 'AttributeType': 'S'}
-            ],
-            GlobalSecondaryIndexes=[
-                {
-                    'IndexName': 'TransactionsByDate',
-                    'KeySchema': [
-                        {'AttributeName': 'clientId', 'KeyType': 'HASH'},
-                        {'AttributeName': 'transactionDate', 'KeyType': 'RANGE'}
-                    ],
-                    'Projection': {'ProjectionType': 'ALL'},
-                    'ProvisionedThroughput': {'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5}
-                }
-            ],
-            ProvisionedThroughput={'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5}
-        )
+        transactions_table = dynamodb.create_table(**transactions_schema)
+
+# Crear tabla IdempotencyKeys (respuestas de suscripciones/cancelaciones por Idempotency-Key)
+print("Creando tabla IdempotencyKeys...")
+idempotency_table = dynamodb.create_table(
+    TableName='IdempotencyKeys',
+    KeySchema=[
+        {'AttributeName': 'idempotencyKey', 'KeyType': 'HASH'}
+    ],
+    AttributeDefinitions=[
+        {'AttributeName': 'idempotencyKey', 'AttributeType': 'S'}
+    ],
+    ProvisionedThroughput={'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5}
+)
+
+# Crear tabla NotificationOutbox (notificaciones pendientes con NOTIFICATION_DISPATCH_MODE=outbox)
+print("Creando tabla NotificationOutbox...")
+outbox_table = dynamodb.create_table(
+    TableName='NotificationOutbox',
+    KeySchema=[
+        {'AttributeName': 'clientId', 'KeyType': 'HASH'},
+        {'AttributeName': 'notificationId', 'KeyType': 'RANGE'}
+    ],
+    AttributeDefinitions=[
+        {'AttributeName': 'clientId', 'AttributeType': 'S'},
+        {'AttributeName': 'notificationId', 'AttributeType': 'S'}
+    ],
+    ProvisionedThroughput={'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5}
+)
 
 # Esperar a que todas las tablas estén creadas antes de insertar datos
 print("Esperando a que todas las tablas estén creadas...")
@@ -134,6 +154,12 @@ for table_name in table_names:
     waiter.wait(TableName=table_name)
     print(f"Tabla {table_name} creada y disponible.")
 
+# Los registros vencidos se eliminan por TTL (expiresAt, en segundos epoch)
+client.update_time_to_live(
+    TableName='IdempotencyKeys',
+    TimeToLiveSpecification={'Enabled': True, 'AttributeName': 'expiresAt'}
+)
+
 # Poblar la tabla de fondos con los datos iniciales - usando Decimal para valores numéricos
 print("Cargando datos en la tabla Funds...")
 funds_data = [
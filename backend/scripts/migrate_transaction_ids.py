@@ -0,0 +1,121 @@
+"""
+Reescribe las transacciones existentes con identificadores UUIDv7 derivados de su transactionDate.
+
+transactionId es la clave de ordenación de Transactions y el historial se lee de la tabla base en
+orden descendente, así que las filas con uuid4 (anteriores al cambio) quedarían desordenadas.
+Cada fila se copia con el nuevo identificador (guardando el anterior en legacyTransactionId) y se
+elimina la original en una misma TransactWriteItems. Las filas ya migradas se omiten, de modo que
+el script se puede ejecutar varias veces o reanudar tras una interrupción.
+
+Las fechas sin zona horaria se interpretan en UTC (la de la Lambda que las escribió), no en la
+zona de la máquina que ejecuta el script; --timezone indica otra zona IANA si se escribieron en ella.
+
+Ejecutar justo después de desplegar la versión que lee el historial sin el índice TransactionsByDate.
+
+Uso (desde backend/):
+    python scripts/migrate_transaction_ids.py --endpoint-url http://localhost:8000
+    python scripts/migrate_transaction_ids.py --dry-run
+    python scripts/migrate_transaction_ids.py --timezone America/Bogota
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from botocore.exceptions import ClientError  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.models.ids import id_for_timestamp, is_time_ordered  # noqa: E402
+from app.services.serialization import serialize_item  # noqa: E402
+
+LEGACY_ID_ATTRIBUTE = 'legacyTransactionId'
+
+
+def _scan(table, **kwargs):
+    while True:
+        response = table.scan(**kwargs)
+        yield from response.get('Items', [])
+        if not response.get('LastEvaluatedKey'):
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def new_transaction_id(transaction, tz=timezone.utc):
+    """UUIDv7 con el instante de la transacción (fechas sin zona en `tz`); None si no tiene una fecha válida"""
+    try:
+        moment = datetime.fromisoformat(transaction['transactionDate'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=tz)
+    return id_for_timestamp(int(moment.timestamp() * 1000))
+
+
+def migrate_transaction(client, transaction, new_id):
+    """Copia la fila con el nuevo identificador y elimina la original; False si ya cambió"""
+    old_key = {'clientId': transaction['clientId'], 'transactionId': transaction['transactionId']}
+    try:
+        client.transact_write_items(TransactItems=[
+            {'Put': {
+                'TableName': settings.TRANSACTIONS_TABLE_NAME,
+                'Item': serialize_item({
+                    **transaction,
+                    'transactionId': new_id,
+                    LEGACY_ID_ATTRIBUTE: transaction['transactionId']
+                }),
+                'ConditionExpression': "attribute_not_exists(transactionId)"
+            }},
+            {'Delete': {
+                'TableName': settings.TRANSACTIONS_TABLE_NAME,
+                'Key': serialize_item(old_key),
+                'ConditionExpression': "attribute_exists(transactionId)"
+            }}
+        ])
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'TransactionCanceledException':
+            return False
+        raise
+
+
+def migrate(resource, dry_run=False, tz=timezone.utc):
+    """Devuelve (migradas, omitidas: sin fecha o migradas por otra ejecución)"""
+    table = resource.Table(settings.TRANSACTIONS_TABLE_NAME)
+    migrated = skipped = 0
+    # La lista se materializa antes de escribir para no recorrer las filas recién creadas
+    legacy = [t for t in _scan(table) if not is_time_ordered(t['transactionId'])]
+    for transaction in legacy:
+        new_id = new_transaction_id(transaction, tz)
+        if not new_id:
+            print(f"{transaction['clientId']}/{transaction['transactionId']}: sin transactionDate válida")
+            skipped += 1
+            continue
+        if dry_run:
+            print(f"{transaction['clientId']}/{transaction['transactionId']} -> {new_id}")
+            continue
+        if migrate_transaction(resource.meta.client, transaction, new_id):
+            migrated += 1
+        else:
+            skipped += 1
+    return migrated, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoint-url', default=settings.DYNAMODB_ENDPOINT_URL or None,
+                        help="Endpoint de DynamoDB (p. ej. http://localhost:8000 para DynamoDB local)")
+    parser.add_argument('--dry-run', action='store_true', help="Solo mostrar los identificadores nuevos")
+    parser.add_argument('--timezone', default='UTC',
+                        help="Zona IANA de las transactionDate sin zona horaria (por defecto UTC)")
+    args = parser.parse_args()
+
+    import boto3
+    resource = boto3.resource('dynamodb', region_name=settings.AWS_REGION, endpoint_url=args.endpoint_url)
+    migrated, skipped = migrate(resource, dry_run=args.dry_run, tz=ZoneInfo(args.timezone))
+    print(f"Transacciones migradas: {migrated}, omitidas: {skipped}")
+
+
+if __name__ == '__main__':
+    main()
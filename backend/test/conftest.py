@@ -1,7 +1,14 @@
 import pytest
+from app.services.cliente_service import client_cache
 
 def pytest_configure(config):
     """Configure pytest."""
     # Register marks for asyncio tests
     config.addinivalue_line("markers", "asyncio: mark test as an asyncio test")
 
+@pytest.fixture(autouse=True)
+def reset_client_cache():
+    # The client cache is process-wide: every test starts with an empty cache
+    client_cache.invalidate()
+    yield
+    client_cache.invalidate()
@@ -0,0 +1,67 @@
+import importlib.util
+import os
+import pytest
+from decimal import Decimal
+from app.config import settings
+from app.services.memory_engine import create_app_tables
+
+SCRIPT = os.path.join(os.path.dirname(__file__), '..', 'scripts', 'backfill_active_subscriptions.py')
+spec = importlib.util.spec_from_file_location('backfill_active_subscriptions', SCRIPT)
+backfill_active_subscriptions = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(backfill_active_subscriptions)
+
+
+@pytest.fixture
+def database():
+    database = create_app_tables()
+    subscriptions = database.Table(settings.SUBSCRIPTIONS_TABLE_NAME)
+    # Datos previos al índice: ninguna suscripción tiene activeSince
+    subscriptions.put_item(Item={'clientId': 'C123456', 'fundId': '1', 'status': 'ACTIVE',
+                                 'amountSubscribed': Decimal('75000'), 'subscriptionDate': '2025-03-01T10:00:00'})
+    subscriptions.put_item(Item={'clientId': 'C123456', 'fundId': '3', 'status': 'CANCELLED',
+                                 'amountSubscribed': Decimal('50000'), 'subscriptionDate': '2025-02-01T10:00:00'})
+    # Inconsistencia: cancelada pero todavía con la clave del índice
+    subscriptions.put_item(Item={'clientId': 'C123456', 'fundId': '4', 'status': 'CANCELLED',
+                                 'amountSubscribed': Decimal('250000'), 'activeSince': '2025-01-01T10:00:00'})
+    return database
+
+
+def active_in_index(database):
+    response = database.Table(settings.SUBSCRIPTIONS_TABLE_NAME).query(
+        IndexName='ActiveSubscriptions',
+        KeyConditionExpression="clientId = :cid",
+        ExpressionAttributeValues={':cid': 'C123456'}
+    )
+    return [item['fundId'] for item in response['Items']]
+
+
+class TestBackfillActiveSubscriptions:
+
+    def test_backfill_populates_sparse_index(self, database):
+        # Setup
+        assert active_in_index(database) == ['4']
+
+        # Execute
+        result = backfill_active_subscriptions.backfill(database)
+
+        # Assert
+        assert result == (1, 1, 0)
+        assert active_in_index(database) == ['1']
+        item = database.Table(settings.SUBSCRIPTIONS_TABLE_NAME).get_item(Key={'clientId': 'C123456', 'fundId': '1'})['Item']
+        assert item['activeSince'] == '2025-03-01T10:00:00'
+
+    def test_backfill_is_idempotent(self, database):
+        # Execute
+        backfill_active_subscriptions.backfill(database)
+        second = backfill_active_subscriptions.backfill(database)
+
+        # Assert
+        assert second == (0, 0, 0)
+
+    def test_dry_run_does_not_write(self, database):
+        # Execute
+        result = backfill_active_subscriptions.backfill(database, dry_run=True)
+
+        # Assert
+        assert result == (0, 0, 0)
+        assert active_in_index(database) == ['4']
@@ -0,0 +1,128 @@
+import importlib.util
+import os
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+from app.config import settings
+from app.services.memory_engine import create_app_tables
+
+SCRIPT = os.path.join(os.path.dirname(__file__), '..', 'scripts', 'backfill_portfolio.py')
+spec = importlib.util.spec_from_file_location('backfill_portfolio', SCRIPT)
+backfill_portfolio = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(backfill_portfolio)
+
+
+@pytest.fixture
+def database():
+    database = create_app_tables()
+    for fund_id, category in (('1', 'FPV'), ('3', 'FIC'), ('4', 'FIC')):
+        database.Table(settings.FUNDS_TABLE_NAME).put_item(Item={
+            'fundId': fund_id, 'name': f'FONDO_{fund_id}', 'category': category, 'minimumAmount': Decimal('50000')
+        })
+    database.Table(settings.CLIENTS_TABLE_NAME).put_item(Item={
+        'clientId': 'C123456', 'balance': Decimal('375000'), 'activeCount_OLD': Decimal('2')
+    })
+    database.Table(settings.CLIENTS_TABLE_NAME).put_item(Item={
+        'clientId': 'C654321', 'balance': Decimal('500000'), 'activeFundIds': {'1'}
+    })
+    subscriptions = database.Table(settings.SUBSCRIPTIONS_TABLE_NAME)
+    subscriptions.put_item(Item={'clientId': 'C123456', 'fundId': '1', 'status': 'ACTIVE', 'amountSubscribed': Decimal('75000')})
+    subscriptions.put_item(Item={'clientId': 'C123456', 'fundId': '3', 'status': 'ACTIVE', 'amountSubscribed': Decimal('50000')})
+    subscriptions.put_item(Item={'clientId': 'C123456', 'fundId': '4', 'status': 'CANCELLED', 'amountSubscribed': Decimal('250000')})
+    subscriptions.put_item(Item={'clientId': 'C654321', 'fundId': '1', 'status': 'CANCELLED', 'amountSubscribed': Decimal('75000')})
+    return database
+
+
+def client_item(database, client_id):
+    return database.Table(settings.CLIENTS_TABLE_NAME).get_item(Key={'clientId': client_id})['Item']
+
+
+class TestBackfillPortfolio:
+
+    def test_backfill_rebuilds_portfolio_from_active_subscriptions(self, database):
+        # Execute
+        updated = backfill_portfolio.backfill(database)
+
+        # Assert
+        assert updated == 2
+        portfolio = client_item(database, 'C123456')
+        assert portfolio['activeFundIds'] == {'1', '3'}
+        assert portfolio['totalInvested'] == Decimal('125000')
+        assert portfolio['activeCount_FPV'] == 1
+        assert portfolio['activeCount_FIC'] == 1
+        assert 'activeCount_OLD' not in portfolio
+        # Un cliente sin suscripciones activas queda sin conjunto de fondos
+        empty = client_item(database, 'C654321')
+        assert 'activeFundIds' not in empty
+        assert empty['totalInvested'] == 0
+
+    def test_backfill_retries_when_the_client_changes(self, database):
+        # Setup: una suscripción concurrente cambia el saldo tras el primer cálculo
+        original = backfill_portfolio.compute_portfolio
+        calls = []
+
+        def compute_then_concurrent_write(subscriptions_table, fund_categories, client_id):
+            result = original(subscriptions_table, fund_categories, client_id)
+            calls.append(client_id)
+            if client_id == 'C123456' and calls.count(client_id) == 1:
+                database.Table(settings.CLIENTS_TABLE_NAME).update_item(
+                    Key={'clientId': client_id},
+                    UpdateExpression="SET balance = balance - :amount ADD revision :one",
+                    ExpressionAttributeValues={':amount': Decimal('100000'), ':one': 1}
+                )
+                database.Table(settings.SUBSCRIPTIONS_TABLE_NAME).put_item(Item={
+                    'clientId': client_id, 'fundId': '4', 'status': 'ACTIVE', 'amountSubscribed': Decimal('100000')
+                })
+            return result
+
+        with patch.object(backfill_portfolio, 'compute_portfolio', side_effect=compute_then_concurrent_write):
+            # Execute
+            backfill_portfolio.backfill(database)
+
+        # Assert: el segundo cálculo incluye la suscripción concurrente
+        assert calls.count('C123456') == 2
+        portfolio = client_item(database, 'C123456')
+        assert portfolio['activeFundIds'] == {'1', '3', '4'}
+        assert portfolio['activeCount_FIC'] == 2
+
+    def test_backfill_retries_when_a_concurrent_write_leaves_the_balance_unchanged(self, database):
+        # Setup: una cancelación y una suscripción del mismo monto llegan tras el primer cálculo
+        original = backfill_portfolio.compute_portfolio
+        calls = []
+
+        def compute_then_concurrent_writes(subscriptions_table, fund_categories, client_id):
+            result = original(subscriptions_table, fund_categories, client_id)
+            calls.append(client_id)
+            if client_id == 'C123456' and calls.count(client_id) == 1:
+                clients = database.Table(settings.CLIENTS_TABLE_NAME)
+                for delta in (Decimal('50000'), Decimal('-50000')):
+                    clients.update_item(
+                        Key={'clientId': client_id}, UpdateExpression="SET balance = balance + :d ADD revision :one",
+                        ExpressionAttributeValues={':d': delta, ':one': 1}
+                    )
+                subscriptions_table.put_item(Item={
+                    'clientId': client_id, 'fundId': '3', 'status': 'CANCELLED', 'amountSubscribed': Decimal('50000')
+                })
+                subscriptions_table.put_item(Item={
+                    'clientId': client_id, 'fundId': '4', 'status': 'ACTIVE', 'amountSubscribed': Decimal('50000')
+                })
+            return result
+
+        with patch.object(backfill_portfolio, 'compute_portfolio', side_effect=compute_then_concurrent_writes):
+            # Execute
+            backfill_portfolio.backfill(database)
+
+        # Assert: el saldo no cambió, pero la revisión sí
+        assert calls.count('C123456') == 2
+        portfolio = client_item(database, 'C123456')
+        assert portfolio['balance'] == Decimal('375000')
+        assert portfolio['activeFundIds'] == {'1', '4'}
+        assert portfolio['revision'] == 3
+
+    def test_dry_run_does_not_write(self, database):
+        # Execute
+        updated = backfill_portfolio.backfill(database, dry_run=True)
+
+        # Assert
+        assert updated == 0
+        assert 'totalInvested' not in client_item(database, 'C123456')
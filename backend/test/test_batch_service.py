@@ -0,0 +1,269 @@
+import pytest
+import threading
+import time
+from botocore.exceptions import ClientError
+from decimal import Decimal
+from unittest.mock import patch, AsyncMock, MagicMock
+from app.config import settings
+from app.models.transaccion import BatchOperation
+from app.services import batch_service
+from app.services.batch_service import BatchService, TRANSACT_MAX_ITEMS
+from app.services.fondo_service import fund_catalog
+from app.services.memory_engine import create_app_tables
+from app.services.notification_queue import OutboxNotificationDispatcher
+from app.services.transaccion_service import TransaccionService
+
+FUNDS = [
+    {'fundId': '1', 'name': 'FPV_EL CLIENTE_RECAUDADORA', 'category': 'FPV', 'minimumAmount': Decimal('75000')},
+    {'fundId': '2', 'name': 'FPV_EL CLIENTE_ECOPETROL', 'category': 'FPV', 'minimumAmount': Decimal('125000')},
+    {'fundId': '3', 'name': 'DEUDAPRIVADA', 'category': 'FIC', 'minimumAmount': Decimal('50000')},
+    {'fundId': '4', 'name': 'FDO-ACCIONES', 'category': 'FIC', 'minimumAmount': Decimal('250000')},
+]
+
+
+@pytest.fixture
+def local_dynamodb():
+    """Servicios apuntando a un DynamoDB en memoria"""
+    database = create_app_tables()
+    for fund in FUNDS:
+        database.Table(settings.FUNDS_TABLE_NAME).put_item(Item=fund)
+    for client_id in ('C1', 'C2', 'C3'):
+        database.Table(settings.CLIENTS_TABLE_NAME).put_item(Item={
+            'clientId': client_id, 'balance': Decimal('300000'), 'preferredNotification': 'email',
+            'email': f'{client_id.lower()}@ejemplo.com'
+        })
+
+    # Registrar cada saldo escrito para comprobar que nunca fue negativo
+    balances = []
+    database.listeners.append(
+        lambda table, item: balances.append(item['balance']) if table == settings.CLIENTS_TABLE_NAME else None
+    )
+    database.balances = balances
+    database.meta.client.transact_write_items = MagicMock(side_effect=database.meta.client.transact_write_items)
+
+    fund_catalog.invalidate()
+    with patch('app.services.cliente_service.table', database.Table(settings.CLIENTS_TABLE_NAME)), \
+            patch('app.services.cliente_service.dynamodb', database), \
+            patch('app.services.fondo_service.table', database.Table(settings.FUNDS_TABLE_NAME)), \
+            patch('app.services.fondo_service.dynamodb', database), \
+            patch('app.services.transaccion_service.dynamodb', database), \
+            patch('app.services.transaccion_service.subscription_table', database.Table(settings.SUBSCRIPTIONS_TABLE_NAME)), \
+            patch('app.services.transaccion_service.transaction_table', database.Table(settings.TRANSACTIONS_TABLE_NAME)), \
+            patch('app.services.transaccion_service.dynamodb_client', database.meta.client), \
+            patch('app.services.batch_service.notify_client', new_callable=AsyncMock) as notify, \
+            patch('app.services.transaccion_service.dispatch_notification', new_callable=AsyncMock):
+        database.notify_client = notify
+        yield database
+    fund_catalog.invalidate()
+
+
+def operation(client_id, fund_id, kind='SUBSCRIPTION'):
+    return BatchOperation(clientId=client_id, fundId=fund_id, type=kind)
+
+
+def client_item(database, client_id):
+    return database.Table(settings.CLIENTS_TABLE_NAME).get_item(Key={'clientId': client_id})['Item']
+
+
+def transact_sizes(database):
+    return [len(call[1]['TransactItems']) for call in database.meta.client.transact_write_items.call_args_list]
+
+
+class TestBatchService:
+
+    @pytest.mark.asyncio
+    async def test_batch_subscriptions_in_one_transaction(self, local_dynamodb):
+        # Setup
+        operations = [operation(client_id, fund_id) for client_id in ('C1', 'C2', 'C3') for fund_id in ('1', '3')]
+
+        # Execute
+        result = await BatchService.process(operations)
+
+        # Assert
+        assert result['completed'] == 6 and result['failed'] == 0
+        assert [r['index'] for r in result['results']] == list(range(6))
+        assert [(r['clientId'], r['fundId']) for r in result['results']] == [(o.clientId, o.fundId) for o in operations]
+        assert all(r['status'] == 'COMPLETED' and r['transactionId'] for r in result['results'])
+        # One batched read per table and one TransactWriteItems: 3 clients x (1 update + 2 x 2 items)
+        assert local_dynamodb.Table(settings.CLIENTS_TABLE_NAME).call_count('BatchGetItem') == 1
+        assert local_dynamodb.Table(settings.SUBSCRIPTIONS_TABLE_NAME).call_count('BatchGetItem') == 1
+        assert local_dynamodb.Table(settings.CLIENTS_TABLE_NAME).call_count('GetItem') == 0
+        assert transact_sizes(local_dynamodb) == [15]
+        for client_id in ('C1', 'C2', 'C3'):
+            client = client_item(local_dynamodb, client_id)
+            assert client['balance'] == Decimal('175000')
+            assert client['activeFundIds'] == {'1', '3'}
+            assert client['totalInvested'] == Decimal('125000')
+            assert client['activeCount_FPV'] == 1 and client['activeCount_FIC'] == 1
+        assert local_dynamodb.notify_client.await_count == 6
+
+    @pytest.mark.asyncio
+    async def test_batch_validation_per_operation(self, local_dynamodb):
+        # Setup: C1 already subscribed to fund 4 (balance 50.000 left)
+        await BatchService.process([operation('C1', '4')])
+        operations = [
+            operation('C1', '2'),                   # affordable only after the cancellation below
+            operation('C1', '4', 'CANCELLATION'),   # 50.000 + 250.000 refunded first
+            operation('C1', '2'),                   # duplicate pair
+            operation('C1', '1'),                   # 175.000 left after fund 2
+            operation('C1', '3'),                   # 100.000 left after fund 1
+            operation('C2', '4'),                   # 300.000 - 250.000
+            operation('C2', '2'),                   # 50.000 < 125.000
+            operation('C9', '1'),                   # unknown client
+            operation('C2', '3', 'CANCELLATION'),   # not subscribed
+        ]
+
+        # Execute
+        result = await BatchService.process(operations)
+
+        # Assert
+        statuses = [(r['status'], r.get('error')) for r in result['results']]
+        assert statuses == [
+            ('COMPLETED', None),
+            ('COMPLETED', None),
+            ('FAILED', 'Operación duplicada en el lote'),
+            ('COMPLETED', None),
+            ('COMPLETED', None),
+            ('COMPLETED', None),
+            ('FAILED', 'No tiene saldo disponible para vincularse al fondo FPV_EL CLIENTE_ECOPETROL'),
+            ('FAILED', 'Cliente o fondo no encontrado'),
+            ('FAILED', 'No está suscrito a este fondo'),
+        ]
+        assert result['completed'] == 5 and result['failed'] == 4
+        c1 = client_item(local_dynamodb, 'C1')
+        assert c1['balance'] == Decimal('50000')
+        assert c1['activeFundIds'] == {'1', '2', '3'}
+        assert c1['activeCount_FIC'] == 1 and c1['activeCount_FPV'] == 2
+        assert client_item(local_dynamodb, 'C2')['balance'] == Decimal('50000')
+        assert all(balance >= 0 for balance in local_dynamodb.balances)
+
+    @pytest.mark.asyncio
+    async def test_large_batch_is_split_into_transactions_of_100_items(self, local_dynamodb):
+        # Setup: 60 clients x 1 subscription = 60 x 3 items
+        for i in range(60):
+            local_dynamodb.Table(settings.CLIENTS_TABLE_NAME).put_item(Item={
+                'clientId': f'B{i:03d}', 'balance': Decimal('100000'), 'preferredNotification': 'sms'
+            })
+
+        # Execute
+        result = await BatchService.process([operation(f'B{i:03d}', '1') for i in range(60)])
+
+        # Assert
+        assert result['completed'] == 60
+        sizes = transact_sizes(local_dynamodb)
+        assert sum(sizes) == 180
+        assert max(sizes) <= TRANSACT_MAX_ITEMS
+        assert len(sizes) == 2
+        assert len(local_dynamodb.Table(settings.TRANSACTIONS_TABLE_NAME).items) == 60
+
+    @pytest.mark.asyncio
+    async def test_outbox_records_are_written_in_the_batch_transactions(self, local_dynamodb):
+        # Setup: 60 clients x 1 subscription = 60 x 4 items with the outbox record
+        for i in range(60):
+            local_dynamodb.Table(settings.CLIENTS_TABLE_NAME).put_item(Item={
+                'clientId': f'B{i:03d}', 'balance': Decimal('100000'), 'preferredNotification': 'sms'
+            })
+        dispatcher = OutboxNotificationDispatcher(settings.NOTIFICATION_OUTBOX_TABLE_NAME, MagicMock())
+
+        # Execute
+        with patch('app.services.notification_queue.notification_dispatcher', dispatcher):
+            result = await BatchService.process([operation(f'B{i:03d}', '1') for i in range(60)])
+
+        # Assert
+        assert result['completed'] == 60
+        sizes = transact_sizes(local_dynamodb)
+        assert sum(sizes) == 240
+        assert max(sizes) <= TRANSACT_MAX_ITEMS
+        assert len(local_dynamodb.Table(settings.NOTIFICATION_OUTBOX_TABLE_NAME).items) == 60
+        assert all(call.kwargs['recorded'] for call in local_dynamodb.notify_client.await_args_list)
+        dispatcher.table.put_item.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_group_falls_back_to_single_operations(self, local_dynamodb):
+        # Setup: the balance read by the batch is stale (another request spent it meanwhile)
+        stale = {client_id: client_item(local_dynamodb, client_id) for client_id in ('C1', 'C2')}
+        local_dynamodb.Table(settings.CLIENTS_TABLE_NAME).update_item(
+            Key={'clientId': 'C1'}, UpdateExpression="SET balance = :b", ExpressionAttributeValues={':b': Decimal('100000')}
+        )
+
+        # Execute
+        with patch('app.services.batch_service.ClienteService.get_clients_by_ids',
+                   new_callable=AsyncMock, return_value=stale):
+            result = await BatchService.process([operation('C1', '1'), operation('C1', '3'), operation('C2', '1')])
+
+        # Assert: the group is cancelled as a whole and each operation is re-validated on its own
+        assert [r['status'] for r in result['results']] == ['COMPLETED', 'FAILED', 'COMPLETED']
+        assert result['results'][1]['error'] == 'No tiene saldo disponible para vincularse al fondo DEUDAPRIVADA'
+        assert client_item(local_dynamodb, 'C1')['balance'] == Decimal('25000')
+        assert client_item(local_dynamodb, 'C2')['balance'] == Decimal('225000')
+        assert all(balance >= 0 for balance in local_dynamodb.balances)
+
+    @pytest.mark.asyncio
+    async def test_chunks_of_one_client_are_committed_one_after_another(self, local_dynamodb):
+        # Setup: 2 operations per transaction, so C1's three subscriptions need two chunks
+        commit = local_dynamodb.meta.client.transact_write_items.side_effect
+        in_flight, overlapped, lock = [], [], threading.Lock()
+
+        def slow_commit(**kwargs):
+            clients = {item['Update']['Key']['clientId']['S'] for item in kwargs['TransactItems'] if 'Update' in item}
+            with lock:
+                overlapped.extend(clients & set(in_flight))
+                in_flight.extend(clients)
+            time.sleep(0.02)
+            try:
+                return commit(**kwargs)
+            finally:
+                with lock:
+                    for client_id in clients:
+                        in_flight.remove(client_id)
+
+        local_dynamodb.meta.client.transact_write_items.side_effect = slow_commit
+
+        # Execute
+        with patch.object(batch_service, 'TRANSACT_MAX_ITEMS', 5), \
+                patch.object(TransaccionService, 'create_subscription', new_callable=AsyncMock) as single:
+            result = await BatchService.process([operation('C1', '1'), operation('C1', '2'), operation('C1', '3'),
+                                                 operation('C2', '1')])
+
+        # Assert
+        assert result['completed'] == 4
+        assert overlapped == []
+        single.assert_not_called()
+        assert client_item(local_dynamodb, 'C1')['balance'] == Decimal('50000')
+
+    @pytest.mark.asyncio
+    async def test_transaction_conflicts_are_retried_as_a_group(self, local_dynamodb):
+        # Setup: the first attempt is cancelled by a conflicting transaction
+        commit = local_dynamodb.meta.client.transact_write_items.side_effect
+        conflict = ClientError({'Error': {'Code': 'TransactionCanceledException', 'Message': 'conflict'},
+                                'CancellationReasons': [{'Code': 'TransactionConflict'}, {'Code': 'None'}]},
+                               'TransactWriteItems')
+        local_dynamodb.meta.client.transact_write_items.side_effect = [conflict, commit]
+
+        # Execute
+        with patch.object(batch_service, 'COMMIT_RETRY_BACKOFF_SECONDS', 0), \
+                patch.object(TransaccionService, 'create_subscription', new_callable=AsyncMock) as single:
+            result = await BatchService.process([operation('C1', '1'), operation('C1', '3')])
+
+        # Assert
+        assert result['completed'] == 2
+        assert local_dynamodb.meta.client.transact_write_items.call_count == 2
+        single.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_other_errors_fail_the_group_without_single_writes(self, local_dynamodb):
+        # Setup
+        local_dynamodb.meta.client.transact_write_items.side_effect = ClientError(
+            {'Error': {'Code': 'ValidationException', 'Message': 'bad request'}}, 'TransactWriteItems'
+        )
+
+        # Execute
+        with patch.object(TransaccionService, 'create_subscription', new_callable=AsyncMock) as single:
+            result = await BatchService.process([operation('C1', '1'), operation('C2', '3')])
+
+        # Assert
+        assert result['failed'] == 2
+        assert {r['error'] for r in result['results']} == {'Error al confirmar el lote'}
+        assert local_dynamodb.meta.client.transact_write_items.call_count == 1
+        single.assert_not_called()
+        assert client_item(local_dynamodb, 'C1')['balance'] == Decimal('300000')
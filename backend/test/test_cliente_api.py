@@ -40,6 +40,38 @@ class TestClienteAPI:
         assert response.status_code == 404
         assert response.json()['detail'] == "Cliente no encontrado"
     
+    @patch('app.api.endpoints.cliente.ClienteService')
+    def test_get_client_portfolio(self, mock_service):
+        # Setup
+        mock_portfolio = {
+            'clientId': 'C123456',
+            'balance': 375000,
+            'totalInvested': 125000,
+            'activeFundIds': ['1', '3'],
+            'activeCount': 2,
+            'categoryCounts': {'FPV': 1, 'FIC': 1}
+        }
+        mock_service.get_portfolio = AsyncMock(return_value=mock_portfolio)
+        
+        # Execute
+        response = client.get("/api/v1/clientes/C123456/portfolio")
+        
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == mock_portfolio
+        mock_service.get_portfolio.assert_called_once_with('C123456')
+    
+    @patch('app.api.endpoints.cliente.ClienteService')
+    def test_get_client_portfolio_not_found(self, mock_service):
+        # Setup
+        mock_service.get_portfolio = AsyncMock(return_value=None)
+        
+        # Execute
+        response = client.get("/api/v1/clientes/C999999/portfolio")
+        
+        # Assert
+        assert response.status_code == 404
+    
     @patch('app.api.endpoints.cliente.ClienteService')
     def test_update_client_success(self, mock_service):
         # Setup
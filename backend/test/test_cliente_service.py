@@ -4,7 +4,7 @@ import uuid
 from decimal import Decimal
 from unittest.mock import patch, MagicMock, AsyncMock  
 from app.models.cliente import Cliente, ClienteUpdate
-from app.services.cliente_service import ClienteService, float_to_decimal
+from app.services.cliente_service import ClienteService, ClientCache
 
 # Mocking the DynamoDB table operations
 @pytest.fixture
@@ -152,22 +152,172 @@ class TestClienteService:
         # Assert
         mock_dynamodb_table.update_item.assert_called_once()
         assert result is None
+
+
+    @pytest.mark.asyncio
+    async def test_get_portfolio_single_read(self, mock_dynamodb_table):
+        # Setup
+        mock_dynamodb_table.get_item.return_value = {'Item': {
+            'clientId': 'C123456',
+            'balance': Decimal('375000'),
+            'totalInvested': Decimal('125000'),
+            'activeFundIds': {'3', '1'},
+            'activeCount_FPV': Decimal('1'),
+            'activeCount_FIC': Decimal('1')
+        }}
+        
+        # Execute
+        result = await ClienteService.get_portfolio('C123456')
+        
+        # Assert
+        mock_dynamodb_table.get_item.assert_called_once_with(Key={'clientId': 'C123456'})
+        mock_dynamodb_table.query.assert_not_called()
+        assert result == {
+            'clientId': 'C123456',
+            'balance': Decimal('375000'),
+            'totalInvested': Decimal('125000'),
+            'activeFundIds': ['1', '3'],
+            'activeCount': 2,
+            'categoryCounts': {'FPV': Decimal('1'), 'FIC': Decimal('1')}
+        }
     
-    def test_float_to_decimal_conversion(self):
-        # Test conversion of float
-        assert float_to_decimal(10.5) == Decimal('10.5')
-        
-        # Test conversion of dict with float
-        input_dict = {'a': 10.5, 'b': 'string', 'c': 100}
-        expected = {'a': Decimal('10.5'), 'b': 'string', 'c': 100}
-        assert float_to_decimal(input_dict) == expected
-        
-        # Test conversion of list with float
-        input_list = [10.5, 'string', 100]
-        expected = [Decimal('10.5'), 'string', 100]
-        assert float_to_decimal(input_list) == expected
-        
-        # Test with nested structures
-        nested = {'a': [10.5, 20.5], 'b': {'c': 30.5}}
-        expected = {'a': [Decimal('10.5'), Decimal('20.5')], 'b': {'c': Decimal('30.5')}}
-        assert float_to_decimal(nested) == expected
+    @pytest.mark.asyncio
+    async def test_get_portfolio_without_subscriptions(self, mock_dynamodb_table):
+        # Setup: cliente que nunca se ha suscrito
+        mock_dynamodb_table.get_item.return_value = {'Item': {'clientId': 'C123456', 'balance': Decimal('500000')}}
+        
+        # Execute
+        result = await ClienteService.get_portfolio('C123456')
+        
+        # Assert
+        assert result['totalInvested'] == 0
+        assert result['activeFundIds'] == []
+        assert result['categoryCounts'] == {'FPV': 0, 'FIC': 0}
+    
+    @pytest.mark.asyncio
+    async def test_get_portfolio_not_found(self, mock_dynamodb_table):
+        # Setup
+        mock_dynamodb_table.get_item.return_value = {}
+        
+        # Execute
+        result = await ClienteService.get_portfolio('C999999')
+        
+        # Assert
+        assert result is None
+
+
+class TestClientCache:
+
+    @pytest.mark.asyncio
+    async def test_second_read_is_served_from_cache(self, mock_dynamodb_table, sample_client_data):
+        # Setup
+        mock_dynamodb_table.get_item.return_value = {'Item': sample_client_data}
+
+        # Execute
+        first = await ClienteService.get_client('C123456')
+        first['balance'] = Decimal('0')
+        second = await ClienteService.get_client('C123456')
+
+        # Assert: one read, and callers get copies they can modify
+        mock_dynamodb_table.get_item.assert_called_once_with(Key={'clientId': 'C123456'})
+        assert second['balance'] == Decimal('500000')
+
+    @pytest.mark.asyncio
+    async def test_balance_update_refreshes_cached_client(self, mock_dynamodb_table, sample_client_data):
+        # Setup
+        mock_dynamodb_table.get_item.return_value = {'Item': sample_client_data}
+        mock_dynamodb_table.update_item.return_value = {'Attributes': {'balance': Decimal('600000')}}
+        await ClienteService.get_client('C123456')
+
+        # Execute
+        await ClienteService.update_client_balance('C123456', 100000)
+        result = await ClienteService.get_client('C123456')
+
+        # Assert
+        mock_dynamodb_table.get_item.assert_called_once()
+        assert result['balance'] == Decimal('600000')
+        assert result['email'] == 'cliente@ejemplo.com'
+
+    @pytest.mark.asyncio
+    async def test_failed_update_invalidates_cached_client(self, mock_dynamodb_table, sample_client_data):
+        # Setup
+        from botocore.exceptions import ClientError
+        mock_dynamodb_table.get_item.return_value = {'Item': sample_client_data}
+        mock_dynamodb_table.update_item.side_effect = ClientError({'Error': {'Message': 'x'}}, 'UpdateItem')
+        await ClienteService.get_client('C123456')
+
+        # Execute
+        await ClienteService.update_client_preferences('C123456', ClienteUpdate(preferredNotification='sms'))
+        await ClienteService.get_client('C123456')
+
+        # Assert
+        assert mock_dynamodb_table.get_item.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_consistent_read_bypasses_cache(self, mock_dynamodb_table, sample_client_data):
+        # Setup
+        mock_dynamodb_table.get_item.return_value = {'Item': sample_client_data}
+        await ClienteService.get_client('C123456')
+
+        # Execute
+        await ClienteService.get_client('C123456', consistent=True)
+
+        # Assert
+        assert mock_dynamodb_table.get_item.call_count == 2
+        mock_dynamodb_table.get_item.assert_called_with(Key={'clientId': 'C123456'}, ConsistentRead=True)
+
+    @pytest.mark.asyncio
+    async def test_consistent_reads_are_opt_in(self, mock_dynamodb_table, sample_client_data):
+        # Setup
+        from app.config import Settings
+        mock_dynamodb_table.get_item.return_value = {'Item': sample_client_data}
+
+        # Execute: cache misses use normal reads and fill the cache
+        await ClienteService.get_client('C123456')
+        await ClienteService.get_client('C123456')
+
+        # Assert
+        assert Settings().CLIENT_CONSISTENT_READS is False
+        mock_dynamodb_table.get_item.assert_called_once_with(Key={'clientId': 'C123456'})
+
+    def test_read_overlapping_a_write_is_not_cached(self):
+        # Setup
+        cache = ClientCache(max_size=10, ttl_seconds=60)
+        read = cache.begin_read()
+        write = cache.begin_write('C1')
+        cache.end_write('C1', write)
+
+        # Execute: the read may have run before the write was applied
+        cache.fill('C1', {'clientId': 'C1', 'balance': Decimal('500')}, read)
+
+        # Assert
+        assert cache.get('C1') is None
+
+    def test_overlapping_writes_invalidate_instead_of_applying(self):
+        # Setup
+        cache = ClientCache(max_size=10, ttl_seconds=60)
+        cache.fill('C1', {'clientId': 'C1', 'balance': Decimal('500')}, cache.begin_read())
+        first, second = cache.begin_write('C1'), cache.begin_write('C1')
+
+        # Execute: responses may arrive in a different order than the writes were applied
+        cache.end_write('C1', second, {'balance': Decimal('300')})
+        cache.end_write('C1', first, {'balance': Decimal('400')})
+
+        # Assert
+        assert cache.get('C1') is None
+
+    def test_lru_eviction_and_ttl(self):
+        # Setup
+        cache = ClientCache(max_size=2, ttl_seconds=60)
+        for client_id in ('C1', 'C2'):
+            cache.fill(client_id, {'clientId': client_id}, cache.begin_read())
+        cache.get('C1')
+
+        # Execute
+        cache.fill('C3', {'clientId': 'C3'}, cache.begin_read())
+
+        # Assert
+        assert cache.get('C2') is None
+        assert cache.get('C1') and cache.get('C3')
+        with patch('app.services.cliente_service.time.monotonic', return_value=10 ** 9):
+            assert cache.get('C1') is None
@@ -0,0 +1,40 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, AsyncMock
+from app.main import app
+
+client = TestClient(app)
+
+class TestDashboardAPI:
+    
+    @patch('app.api.endpoints.dashboard.DashboardService')
+    def test_get_dashboard_success(self, mock_service):
+        # Setup
+        mock_dashboard = {
+            'client': {'clientId': 'C123456', 'balance': 500000},
+            'funds': [{'fundId': '1', 'name': 'FPV_EL CLIENTE_RECAUDADORA', 'category': 'FPV', 'minimumAmount': 75000}],
+            'activeSubscriptions': [],
+            'transactions': [],
+            'nextToken': None
+        }
+        mock_service.get_dashboard = AsyncMock(return_value=mock_dashboard)
+        
+        # Execute
+        response = client.get("/api/v1/dashboard/C123456?limit=5")
+        
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == mock_dashboard
+        mock_service.get_dashboard.assert_called_once_with('C123456', 5)
+    
+    @patch('app.api.endpoints.dashboard.DashboardService')
+    def test_get_dashboard_client_not_found(self, mock_service):
+        # Setup
+        mock_service.get_dashboard = AsyncMock(return_value=None)
+        
+        # Execute
+        response = client.get("/api/v1/dashboard/C999999")
+        
+        # Assert
+        assert response.status_code == 404
+        assert response.json()['detail'] == "Cliente no encontrado"
@@ -0,0 +1,89 @@
+import pytest
+import time
+from decimal import Decimal
+from unittest.mock import patch, AsyncMock
+from app.config import settings
+from app.services.dashboard_service import DashboardService
+from app.services.fondo_service import fund_catalog
+from app.services.memory_engine import create_app_tables
+
+LATENCY = 0.05
+
+
+@pytest.fixture
+def local_dynamodb():
+    """Tablas en memoria con 50 ms de latencia por llamada"""
+    database = create_app_tables()
+    database.Table(settings.CLIENTS_TABLE_NAME).put_item(Item={
+        'clientId': 'C123456', 'balance': Decimal('375000'), 'preferredNotification': 'email'
+    })
+    for fund_id, name in (('1', 'FPV_EL CLIENTE_RECAUDADORA'), ('3', 'DEUDAPRIVADA')):
+        database.Table(settings.FUNDS_TABLE_NAME).put_item(Item={
+            'fundId': fund_id, 'name': name, 'category': 'FPV', 'minimumAmount': Decimal('50000')
+        })
+    database.Table(settings.SUBSCRIPTIONS_TABLE_NAME).put_item(Item={
+        'clientId': 'C123456', 'fundId': '1', 'status': 'ACTIVE', 'amountSubscribed': Decimal('75000'),
+        'activeSince': '2025-03-28T12:00:00'
+    })
+    database.Table(settings.TRANSACTIONS_TABLE_NAME).put_item(Item={
+        'transactionId': 't1', 'clientId': 'C123456', 'fundId': '3', 'type': 'SUBSCRIPTION',
+        'amount': Decimal('50000'), 'transactionDate': '2025-03-28T12:00:00', 'status': 'COMPLETED'
+    })
+    database.latency = LATENCY
+
+    fund_catalog.invalidate()
+    with patch('app.services.cliente_service.table', database.Table(settings.CLIENTS_TABLE_NAME)), \
+            patch('app.services.fondo_service.table', database.Table(settings.FUNDS_TABLE_NAME)), \
+            patch('app.services.fondo_service.dynamodb', database), \
+            patch('app.services.transaccion_service.subscription_table', database.Table(settings.SUBSCRIPTIONS_TABLE_NAME)), \
+            patch('app.services.transaccion_service.transaction_table', database.Table(settings.TRANSACTIONS_TABLE_NAME)):
+        yield database
+    fund_catalog.invalidate()
+
+
+class TestDashboardService:
+
+    @pytest.mark.asyncio
+    async def test_get_dashboard_aggregates_all_sections(self, local_dynamodb):
+        # Execute
+        result = await DashboardService.get_dashboard('C123456')
+
+        # Assert
+        assert result['client']['balance'] == Decimal('375000')
+        assert {f['fundId'] for f in result['funds']} == {'1', '3'}
+        assert result['activeSubscriptions'][0]['fundName'] == 'FPV_EL CLIENTE_RECAUDADORA'
+        assert result['transactions'][0]['fundName'] == 'DEUDAPRIVADA'
+        assert result['nextToken'] is None
+
+    @pytest.mark.asyncio
+    async def test_get_dashboard_runs_reads_concurrently(self, local_dynamodb):
+        # Execute
+        start = time.perf_counter()
+        await DashboardService.get_dashboard('C123456')
+        elapsed = time.perf_counter() - start
+
+        # Assert: cuatro lecturas de 50 ms en paralelo, no en serie
+        assert elapsed < 3 * LATENCY
+
+    @pytest.mark.asyncio
+    async def test_get_dashboard_shares_fund_lookup(self, local_dynamodb):
+        # Setup: sin caché, cada resolución de nombres haría su propia lectura de Funds
+        with patch.object(fund_catalog, 'ttl_seconds', 0), \
+                patch('app.services.fondo_service.FondoService.get_funds_by_ids', new_callable=AsyncMock) as mock_lookup:
+            # Execute
+            result = await DashboardService.get_dashboard('C123456')
+
+        # Assert: una sola lectura del catálogo y ninguna búsqueda adicional de nombres
+        mock_lookup.assert_not_called()
+        funds_table = local_dynamodb.Table(settings.FUNDS_TABLE_NAME)
+        assert funds_table.call_count('Scan') == 1
+        assert funds_table.call_count('GetItem') == 0
+        assert result['activeSubscriptions'][0]['fundName'] == 'FPV_EL CLIENTE_RECAUDADORA'
+
+    @pytest.mark.asyncio
+    async def test_get_dashboard_unknown_client(self, local_dynamodb):
+        # Execute
+        result = await DashboardService.get_dashboard('C999999')
+
+        # Assert
+        assert result is None
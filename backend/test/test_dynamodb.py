@@ -0,0 +1,143 @@
+import pytest
+import asyncio
+import threading
+import time
+import boto3
+from unittest.mock import patch, MagicMock
+from app.config import settings
+from app.services.dynamodb import run_db
+
+
+class TestRunDb:
+
+    @pytest.mark.asyncio
+    async def test_run_db_returns_result_and_passes_arguments(self):
+        # Setup
+        def operation(*args, **kwargs):
+            return {'args': args, 'kwargs': kwargs}
+
+        # Execute
+        result = await run_db(operation, 1, Key={'clientId': 'C123456'})
+
+        # Assert
+        assert result == {'args': (1,), 'kwargs': {'Key': {'clientId': 'C123456'}}}
+
+    @pytest.mark.asyncio
+    async def test_run_db_executes_outside_event_loop_thread(self):
+        # Setup
+        loop_thread = threading.get_ident()
+
+        # Execute
+        worker_thread = await run_db(threading.get_ident)
+
+        # Assert
+        assert worker_thread != loop_thread
+
+    @pytest.mark.asyncio
+    async def test_run_db_does_not_block_event_loop(self):
+        # Setup: 10 llamadas "lentas" de 50 ms deben solaparse, no sumarse
+        def slow_operation():
+            time.sleep(0.05)
+            return True
+
+        # Execute
+        start = time.perf_counter()
+        results = await asyncio.gather(*(run_db(slow_operation) for _ in range(10)))
+        elapsed = time.perf_counter() - start
+
+        # Assert
+        assert all(results)
+        assert elapsed < 0.05 * 10 / 2
+
+    @pytest.mark.asyncio
+    async def test_run_db_propagates_exceptions(self):
+        # Setup
+        from botocore.exceptions import ClientError
+        error_response = {'Error': {'Message': 'Test error message'}}
+
+        def failing_operation():
+            raise ClientError(error_response, 'GetItem')
+
+        # Execute / Assert
+        with pytest.raises(ClientError):
+            await run_db(failing_operation)
+
+
+class TestSharedResource:
+
+    def test_one_client_per_process_with_a_resource_per_thread(self):
+        # Setup
+        from app.services import dynamodb
+        with patch.object(dynamodb, '_resource', None), patch.object(dynamodb, '_per_thread', False), \
+                patch.object(dynamodb, '_local', threading.local()), \
+                patch.object(settings, 'STORAGE_BACKEND', 'dynamodb'), \
+                patch('boto3.session.Session', wraps=boto3.session.Session) as mock_session:
+
+            # Execute
+            first = dynamodb.get_resource()
+            second = dynamodb.get_resource()
+            other_thread = []
+            worker = threading.Thread(target=lambda: other_thread.append(dynamodb.get_resource()))
+            worker.start()
+            worker.join()
+
+        # Assert: one session and client for the process, a separate resource object per thread
+        assert first is second
+        assert other_thread[0] is not first
+        assert other_thread[0].meta.client is first.meta.client
+        assert mock_session.call_count == 1
+        config = first.meta.client.meta.config
+        assert config.max_pool_connections == settings.DYNAMODB_MAX_WORKERS
+        assert config.tcp_keepalive is True
+        assert config.retries['mode'] == 'standard'
+
+    @pytest.mark.asyncio
+    async def test_run_db_resolves_lazy_tables_in_the_worker_thread(self):
+        # Setup
+        from app.services import dynamodb
+        resolved_in = []
+
+        def factory():
+            resolved_in.append(threading.current_thread().name)
+            return MagicMock()
+
+        table = dynamodb.LazyProxy(factory, name='Clients')
+
+        # Execute
+        await run_db(table.get_item, Key={'clientId': 'C123456'})
+
+        # Assert
+        assert len(resolved_in) == 1
+        assert resolved_in[0].startswith('dynamodb')
+
+    def test_lazy_table_resolves_on_first_use(self):
+        # Setup
+        from app.services import dynamodb
+        mock_resource = MagicMock()
+        with patch.object(dynamodb, 'get_resource', return_value=mock_resource):
+            table = dynamodb.lazy_table('Clients')
+            mock_resource.Table.assert_not_called()
+
+            # Execute
+            table.get_item(Key={'clientId': 'C123456'})
+            table.get_item(Key={'clientId': 'C123456'})
+
+        # Assert
+        mock_resource.Table.assert_called_once_with('Clients')
+        assert mock_resource.Table.return_value.get_item.call_count == 2
+
+    def test_importing_services_does_not_create_resource(self):
+        # Setup
+        import subprocess
+        import sys
+        code = (
+            "import sys, lambda_handler\n"
+            "from app.services import dynamodb\n"
+            "print(dynamodb._resource is None, 'boto3' in sys.modules)"
+        )
+
+        # Execute
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+
+        # Assert
+        assert output.stdout.split() == ['True', 'False']
@@ -0,0 +1,267 @@
+"""
+Parity between the in-memory engine (app/services/memory_engine.py) and DynamoDB Local for the
+condition and transaction paths of subscribe and cancel. Every scenario runs against both
+backends and the outcomes (responses, error codes, CancellationReasons and stored items) must
+match. Needs a DynamoDB Local instance dedicated to tests, e.g.:
+
+    docker run -p 8000:8000 amazon/dynamodb-local
+    DYNAMODB_LOCAL_URL=http://localhost:8000 python -m pytest test/test_dynamodb_parity.py
+
+The application tables are created and deleted by the test: if any of them already exists on
+that endpoint the test is skipped instead of touching it.
+"""
+import os
+import uuid
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import patch, AsyncMock
+from botocore.exceptions import ClientError
+from app.config import settings
+from app.models.ids import time_ordered_id
+from app.models.transaccion import Transaccion, TransaccionCreate, Subscription
+from app.services import dynamodb
+from app.services.cliente_service import ClienteService, client_cache
+from app.services.fondo_service import fund_catalog
+from app.services.memory_engine import MemoryDynamoDB, create_app_tables, seed_default_data
+from app.services.transaccion_service import (
+    TransaccionService, client_debit_update, client_refund_update, subscription_put,
+    subscription_cancel_update, transaction_put
+)
+
+DYNAMODB_LOCAL_URL = os.environ.get('DYNAMODB_LOCAL_URL')
+
+pytestmark = pytest.mark.skipif(not DYNAMODB_LOCAL_URL, reason="DYNAMODB_LOCAL_URL not set")
+
+CLIENT_ID = settings.DEFAULT_CLIENT_ID
+
+# Generated per write (ids, dates): compared by presence only
+VOLATILE_ATTRIBUTES = {'transactionId', 'subscriptionId', 'subscriptionDate', 'transactionDate',
+                       'activeSince', 'notificationId', 'expiresAt', 'createdAt'}
+
+
+def local_resource():
+    import boto3
+    return boto3.resource('dynamodb', endpoint_url=DYNAMODB_LOCAL_URL, region_name=settings.AWS_REGION,
+                          aws_access_key_id='parity', aws_secret_access_key='parity')
+
+
+def create_local_tables(resource):
+    """Creates on DynamoDB Local the same tables (keys and GSIs) as create_app_tables"""
+    for table in create_app_tables().tables.values():
+        keys = [(table.hash_key, 'HASH')] + ([(table.range_key, 'RANGE')] if table.range_key else [])
+        attributes = {name for name, _ in keys}
+        indexes = []
+        for index_name, (hash_key, range_key) in table.indexes.items():
+            attributes.update({hash_key, range_key})
+            indexes.append({
+                'IndexName': index_name,
+                'KeySchema': [{'AttributeName': hash_key, 'KeyType': 'HASH'},
+                              {'AttributeName': range_key, 'KeyType': 'RANGE'}],
+                'Projection': {'ProjectionType': 'ALL'}
+            })
+        request = {
+            'TableName': table.name,
+            'KeySchema': [{'AttributeName': name, 'KeyType': kind} for name, kind in keys],
+            'AttributeDefinitions': [{'AttributeName': name, 'AttributeType': 'S'} for name in sorted(attributes)],
+            'BillingMode': 'PAY_PER_REQUEST'
+        }
+        if indexes:
+            request['GlobalSecondaryIndexes'] = indexes
+        resource.create_table(**request).wait_until_exists()
+    return resource
+
+
+@pytest.fixture(scope="module")
+def local_database():
+    resource = local_resource()
+    names = set(create_app_tables().tables)
+    existing = names & set(resource.meta.client.list_tables()['TableNames'])
+    if existing:
+        pytest.skip(f"DynamoDB Local already has application tables: {', '.join(sorted(existing))}")
+    create_local_tables(resource)
+    yield resource
+    for name in names:
+        resource.Table(name).delete()
+
+
+@pytest.fixture
+def backends(local_database):
+    """Fresh data on both backends; each scenario selects one with use()"""
+    for name in create_app_tables().tables:
+        table = local_database.Table(name)
+        keys = [k['AttributeName'] for k in table.key_schema]
+        with table.batch_writer() as batch:
+            for item in table.scan()['Items']:
+                batch.delete_item(Key={k: item[k] for k in keys})
+    seed_default_data(local_database)
+    memory = seed_default_data(create_app_tables(MemoryDynamoDB(record_calls=False)))
+    with patch('app.services.notificacion_service.NotificacionService.send_notification',
+               new_callable=AsyncMock, return_value=True):
+        yield {'memory': memory, 'dynamodb-local': local_database}
+    dynamodb.set_resource(None)
+    client_cache.invalidate()
+    fund_catalog.invalidate()
+
+
+def use(resource):
+    dynamodb.set_resource(resource)
+    client_cache.invalidate()
+    fund_catalog.invalidate()
+
+
+def normalize(value):
+    if isinstance(value, dict):
+        return {k: '<volatile>' if k in VOLATILE_ATTRIBUTES else normalize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [normalize(v) for v in value]
+    if isinstance(value, float):
+        return Decimal(str(value))
+    return value
+
+
+def snapshot(resource):
+    """Clients and Subscriptions as stored, plus the number of transactions"""
+    def items(name):
+        return sorted((normalize(i) for i in resource.Table(name).scan()['Items']),
+                      key=lambda i: (i['clientId'], i.get('fundId', '')))
+    return {
+        'clients': items(settings.CLIENTS_TABLE_NAME),
+        'subscriptions': items(settings.SUBSCRIPTIONS_TABLE_NAME),
+        'transactions': len(resource.Table(settings.TRANSACTIONS_TABLE_NAME).scan()['Items'])
+    }
+
+
+def outcome(call):
+    """Error code and CancellationReasons codes of a raw write (or 'OK')"""
+    try:
+        call()
+        return 'OK'
+    except ClientError as e:
+        reasons = [r.get('Code') for r in e.response.get('CancellationReasons') or []]
+        return e.response['Error']['Code'], reasons
+
+
+def new_subscription(fund_id, amount):
+    return Subscription(subscriptionId=time_ordered_id(), clientId=CLIENT_ID, fundId=fund_id,
+                        amountSubscribed=float(amount), status="ACTIVE", subscriptionDate=datetime.now())
+
+
+def new_transaction(fund_id, kind, amount):
+    return Transaccion(transactionId=time_ordered_id(), clientId=CLIENT_ID, fundId=fund_id, type=kind,
+                       amount=float(amount), transactionDate=datetime.now(), status="COMPLETED")
+
+
+class TestDynamoDBParity:
+
+    @pytest.mark.asyncio
+    async def test_subscribe_and_cancel_flow(self, backends):
+        async def scenario(resource):
+            use(resource)
+            key = str(uuid.uuid4())
+            steps = [
+                await TransaccionService.create_subscription(CLIENT_ID, TransaccionCreate(fundId='1'), key),
+                await TransaccionService.create_subscription(CLIENT_ID, TransaccionCreate(fundId='1'), key),
+                await TransaccionService.create_subscription(CLIENT_ID, TransaccionCreate(fundId='1')),
+                await TransaccionService.create_subscription(CLIENT_ID, TransaccionCreate(fundId='4')),
+                await TransaccionService.create_subscription(CLIENT_ID, TransaccionCreate(fundId='2')),
+                await TransaccionService.cancel_subscription(CLIENT_ID, '1'),
+                await TransaccionService.cancel_subscription(CLIENT_ID, '1'),
+            ]
+            return normalize(steps), snapshot(resource)
+
+        # Execute
+        memory = await scenario(backends['memory'])
+        local = await scenario(backends['dynamodb-local'])
+
+        # Assert
+        assert memory == local
+
+    @pytest.mark.asyncio
+    async def test_stale_cached_client_is_retried_on_revision(self, backends):
+        async def scenario(resource):
+            use(resource)
+            await TransaccionService.create_subscription(CLIENT_ID, TransaccionCreate(fundId='1'))
+            await ClienteService.get_client(CLIENT_ID)
+            # Another instance writes the client after it was cached here
+            resource.Table(settings.CLIENTS_TABLE_NAME).update_item(
+                Key={'clientId': CLIENT_ID},
+                UpdateExpression="SET balance = balance - :amount ADD revision :one",
+                ExpressionAttributeValues={':amount': Decimal('300000'), ':one': 1}
+            )
+            steps = [
+                await TransaccionService.create_subscription(CLIENT_ID, TransaccionCreate(fundId='2')),
+                await TransaccionService.create_subscription(CLIENT_ID, TransaccionCreate(fundId='3')),
+            ]
+            return normalize(steps), snapshot(resource)
+
+        # Execute
+        memory = await scenario(backends['memory'])
+        local = await scenario(backends['dynamodb-local'])
+
+        # Assert
+        assert memory == local
+
+    def test_transaction_cancellation_reasons(self, backends):
+        def scenario(resource):
+            use(resource)
+            transact = resource.meta.client.transact_write_items
+            subscription = new_subscription('1', Decimal('75000'))
+
+            def subscribe(amount, revision=None, sub=subscription):
+                return lambda: transact(TransactItems=[
+                    client_debit_update(CLIENT_ID, amount, {sub.fundId}, {'FPV': 1}, revision),
+                    subscription_put(sub),
+                    transaction_put(new_transaction(sub.fundId, 'SUBSCRIPTION', amount))
+                ])
+
+            def cancel(amount, revision=None):
+                return lambda: transact(TransactItems=[
+                    subscription_cancel_update(CLIENT_ID, '1', amount),
+                    client_refund_update(CLIENT_ID, amount, {'1'}, {'FPV': 1}, revision),
+                    transaction_put(new_transaction('1', 'CANCELLATION', amount))
+                ])
+
+            steps = [
+                subscribe(Decimal('900000')),                      # Balance below the amount
+                subscribe(Decimal('75000'), revision=3),           # Revision never written
+                subscribe(Decimal('75000'), revision=0),           # No revision yet: guarded first write
+                subscribe(Decimal('75000'), sub=new_subscription('1', Decimal('75000'))),  # Already active
+                cancel(Decimal('50000')),                          # Amount differs from the subscription
+                cancel(Decimal('75000'), revision=0),              # Stale revision
+                cancel(Decimal('75000'), revision=1),
+                cancel(Decimal('75000')),                          # Already cancelled
+            ]
+            return [outcome(step) for step in steps], snapshot(resource)
+
+        # Execute
+        memory = scenario(backends['memory'])
+        local = scenario(backends['dynamodb-local'])
+
+        # Assert
+        assert memory == local
+        assert memory[0][2] == 'OK' and memory[0][6] == 'OK'
+
+    def test_conditional_put_and_update(self, backends):
+        def scenario(resource):
+            use(resource)
+            clients = resource.Table(settings.CLIENTS_TABLE_NAME)
+            steps = [
+                lambda: clients.put_item(Item={'clientId': CLIENT_ID, 'balance': Decimal('1')},
+                                         ConditionExpression='attribute_not_exists(clientId)'),
+                lambda: clients.update_item(Key={'clientId': CLIENT_ID},
+                                            UpdateExpression="SET balance = balance - :a",
+                                            ConditionExpression="balance >= :a",
+                                            ExpressionAttributeValues={':a': Decimal('600000')}),
+                lambda: clients.update_item(Key={'clientId': 'C-missing'}, UpdateExpression="SET balance = :a",
+                                            ConditionExpression="attribute_exists(clientId)",
+                                            ExpressionAttributeValues={':a': Decimal('1')}),
+            ]
+            return [outcome(step) for step in steps], snapshot(resource)
+
+        # Execute
+        memory = scenario(backends['memory'])
+        local = scenario(backends['dynamodb-local'])
+
+        # Assert
+        assert memory == local
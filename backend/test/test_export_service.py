@@ -0,0 +1,155 @@
+import csv
+import io
+import json
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from botocore.exceptions import ClientError
+from unittest.mock import patch, MagicMock
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.main import app
+from app.models.ids import id_for_timestamp
+from app.services.export_service import stream_export, export_stats, EXPORT_COLUMNS
+from app.services.transaccion_service import TransaccionService
+from app.services.memory_engine import create_app_tables
+
+client = TestClient(app)
+
+
+def transaction(client_id, fund_id, date, kind='SUBSCRIPTION'):
+    moment = datetime.fromisoformat(date)
+    return {
+        'transactionId': id_for_timestamp(int(moment.timestamp() * 1000)),
+        'clientId': client_id,
+        'fundId': fund_id,
+        'type': kind,
+        'amount': Decimal('75000'),
+        'transactionDate': date,
+        'status': 'COMPLETED'
+    }
+
+
+@pytest.fixture
+def transactions_table():
+    database = create_app_tables()
+    table = database.Table(settings.TRANSACTIONS_TABLE_NAME)
+    for item in (transaction('C123456', '1', '2025-01-10T09:00:00'),
+                 transaction('C123456', '3', '2025-02-10T09:00:00'),
+                 transaction('C123456', '1', '2025-03-10T09:00:00', 'CANCELLATION'),
+                 transaction('C999999', '1', '2025-02-20T09:00:00')):
+        table.put_item(Item=item)
+    with patch('app.services.transaccion_service.transaction_table', table):
+        yield table
+
+
+async def collect(pages, export_format):
+    return b"".join([chunk async for chunk in stream_export(pages, export_format)]).decode("utf-8")
+
+
+class TestExport:
+
+    @pytest.mark.asyncio
+    async def test_client_export_ndjson_newest_first(self, transactions_table):
+        # Execute
+        body = await collect(TransaccionService.iter_client_transaction_pages('C123456'), 'ndjson')
+
+        # Assert
+        rows = [json.loads(line) for line in body.splitlines()]
+        assert [r['transactionDate'] for r in rows] == ['2025-03-10T09:00:00', '2025-02-10T09:00:00',
+                                                       '2025-01-10T09:00:00']
+        assert rows[0]['amount'] == 75000
+
+    @pytest.mark.asyncio
+    async def test_client_export_filters_by_fund_and_date(self, transactions_table):
+        # Execute
+        pages = TransaccionService.iter_client_transaction_pages(
+            'C123456', fund_id='1', start=datetime(2025, 2, 1), end=datetime(2025, 3, 31)
+        )
+        body = await collect(pages, 'csv')
+
+        # Assert
+        rows = list(csv.reader(io.StringIO(body)))
+        assert tuple(rows[0]) == EXPORT_COLUMNS
+        assert [(r[2], r[3], r[5]) for r in rows[1:]] == [('1', 'CANCELLATION', '2025-03-10T09:00:00')]
+
+    @pytest.mark.asyncio
+    async def test_fund_export_across_clients(self, transactions_table):
+        # Execute
+        body = await collect(TransaccionService.iter_fund_transaction_pages('1', end=datetime(2025, 2, 28)), 'ndjson')
+
+        # Assert
+        rows = [json.loads(line) for line in body.splitlines()]
+        assert [r['clientId'] for r in rows] == ['C999999', 'C123456']
+
+    @pytest.mark.asyncio
+    async def test_fund_export_queries_the_fund_index(self):
+        # Setup
+        table = MagicMock()
+        table.query.return_value = {'Items': [transaction('C123456', '1', '2025-01-10T09:00:00')]}
+
+        # Execute
+        with patch('app.services.transaccion_service.transaction_table', table):
+            body = await collect(TransaccionService.iter_fund_transaction_pages('1'), 'ndjson')
+
+        # Assert: a Query on TransactionsByFund, never a full-table Scan
+        assert len(body.splitlines()) == 1
+        assert table.query.call_args[1]['IndexName'] == 'TransactionsByFund'
+        assert table.query.call_args[1]['ExpressionAttributeValues'][':fid'] == '1'
+        table.scan.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_export_follows_pages_one_at_a_time(self):
+        # Setup
+        table = MagicMock()
+        table.query.side_effect = [
+            {'Items': [transaction('C123456', '1', '2025-03-10T09:00:00')], 'LastEvaluatedKey': {'k': 1}},
+            {'Items': [transaction('C123456', '1', '2025-01-10T09:00:00')]}
+        ]
+        before = export_stats.stats()
+
+        # Execute
+        with patch('app.services.transaccion_service.transaction_table', table):
+            chunks = [c async for c in stream_export(TransaccionService.iter_client_transaction_pages('C123456'),
+                                                     'ndjson')]
+
+        # Assert: one chunk per page, continuation key passed to the second query
+        assert len(chunks) == 2
+        assert table.query.call_args_list[1][1]['ExclusiveStartKey'] == {'k': 1}
+        stats = export_stats.stats()
+        assert stats['exports'] == before['exports'] + 1
+        assert stats['last']['rows'] == 2
+        assert stats['last']['bytes'] == sum(len(c) for c in chunks)
+        assert stats['last']['completed'] is True
+
+    def test_export_endpoint_streams_csv(self, transactions_table):
+        # Execute
+        response = client.get("/api/v1/transacciones/export",
+                              params={"format": "csv", "start_date": "2025-02-01T00:00:00"})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers['content-type'].startswith('text/csv')
+        assert 'attachment; filename="transacciones-C123456.csv"' == response.headers['content-disposition']
+        assert len(response.text.splitlines()) == 3
+        assert client.get("/api/v1/transacciones/export/stats").json()['last']['rows'] == 2
+
+    def test_export_endpoint_rejects_invalid_parameters(self):
+        # Execute / Assert
+        assert client.get("/api/v1/transacciones/export", params={"format": "xml"}).status_code == 422
+        assert client.get("/api/v1/transacciones/export/funds/1", params={
+            "start_date": "2025-03-01T00:00:00", "end_date": "2025-02-01T00:00:00"
+        }).status_code == 400
+
+    def test_export_endpoint_fails_before_streaming_when_first_page_fails(self):
+        # Setup
+        table = MagicMock()
+        table.query.side_effect = ClientError({'Error': {'Code': 'InternalServerError', 'Message': 'boom'}}, 'Query')
+
+        # Execute
+        with patch('app.services.transaccion_service.transaction_table', table):
+            response = client.get("/api/v1/transacciones/export/funds/1")
+
+        # Assert: a 500 instead of an empty 200 download
+        assert response.status_code == 500
+        assert response.json()['detail'] == "Error al exportar las transacciones"
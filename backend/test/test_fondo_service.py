@@ -1,14 +1,30 @@
+import asyncio
 import pytest
 import boto3
 from decimal import Decimal
 from unittest.mock import patch, MagicMock, AsyncMock 
-from app.services.fondo_service import FondoService
+from botocore.exceptions import ClientError
+from app.services.fondo_service import FondoService, fund_catalog
+from app.services.memory_engine import create_app_tables
 
 @pytest.fixture
 def mock_dynamodb_table():
     with patch('app.services.fondo_service.table') as mock_table:
         yield mock_table
 
+@pytest.fixture(autouse=True)
+def reset_fund_catalog():
+    # El catálogo es global al proceso: cada test parte de una caché vacía
+    fund_catalog.invalidate()
+    fund_catalog.hits = fund_catalog.misses = fund_catalog.invalidations = 0
+    yield
+    fund_catalog.invalidate()
+
+@pytest.fixture
+def cache_disabled():
+    with patch.object(fund_catalog, 'ttl_seconds', 0):
+        yield
+
 @pytest.fixture
 def sample_funds_data():
     return [
@@ -67,7 +83,7 @@ class TestFondoService:
         assert result == []
     
     @pytest.mark.asyncio
-    async def test_get_fund_success(self, mock_dynamodb_table, sample_funds_data):
+    async def test_get_fund_success(self, cache_disabled, mock_dynamodb_table, sample_funds_data):
         # Setup
         mock_dynamodb_table.get_item.return_value = {'Item': sample_funds_data[0]}
         
@@ -79,7 +95,7 @@ class TestFondoService:
         assert result == sample_funds_data[0]
     
     @pytest.mark.asyncio
-    async def test_get_fund_not_found(self, mock_dynamodb_table):
+    async def test_get_fund_not_found(self, cache_disabled, mock_dynamodb_table):
         # Setup
         mock_dynamodb_table.get_item.return_value = {}
         
@@ -91,7 +107,7 @@ class TestFondoService:
         assert result is None
     
     @pytest.mark.asyncio
-    async def test_get_fund_error(self, mock_dynamodb_table):
+    async def test_get_fund_error(self, cache_disabled, mock_dynamodb_table):
         # Setup
         from botocore.exceptions import ClientError
         error_response = {'Error': {'Message': 'Test error message'}}
@@ -102,4 +118,243 @@ class TestFondoService:
         
         # Assert
         mock_dynamodb_table.get_item.assert_called_once_with(Key={'fundId': '1'})
-        assert result is None
\ No newline at end of file
+        assert result is None
+    
+    @pytest.mark.asyncio
+    async def test_get_fund_served_from_catalog(self, mock_dynamodb_table, sample_funds_data):
+        # Setup
+        mock_dynamodb_table.scan.return_value = {'Items': sample_funds_data}
+        
+        # Execute
+        first = await FondoService.get_fund('1')
+        second = await FondoService.get_fund('2')
+        funds = await FondoService.get_all_funds()
+        
+        # Assert: un único scan para cargar el catálogo, ningún get_item
+        mock_dynamodb_table.scan.assert_called_once()
+        mock_dynamodb_table.get_item.assert_not_called()
+        assert first == sample_funds_data[0]
+        assert second == sample_funds_data[1]
+        assert funds == sample_funds_data
+        assert FondoService.cache_stats()['hits'] == 2
+        assert FondoService.cache_stats()['misses'] == 1
+    
+    @pytest.mark.asyncio
+    async def test_get_fund_unknown_id_from_catalog(self, mock_dynamodb_table, sample_funds_data):
+        # Setup
+        mock_dynamodb_table.scan.return_value = {'Items': sample_funds_data}
+        
+        # Execute
+        result = await FondoService.get_fund('999')
+        
+        # Assert
+        mock_dynamodb_table.get_item.assert_not_called()
+        assert result is None
+    
+    @pytest.mark.asyncio
+    async def test_catalog_returns_copies(self, mock_dynamodb_table, sample_funds_data):
+        # Setup
+        mock_dynamodb_table.scan.return_value = {'Items': sample_funds_data}
+        
+        # Execute: modificar el resultado no debe alterar la caché
+        fund = await FondoService.get_fund('1')
+        fund['fundName'] = 'otro'
+        
+        # Assert
+        assert 'fundName' not in await FondoService.get_fund('1')
+    
+    @pytest.mark.asyncio
+    async def test_catalog_reloads_after_ttl(self, mock_dynamodb_table, sample_funds_data):
+        # Setup
+        mock_dynamodb_table.scan.return_value = {'Items': sample_funds_data}
+        
+        # Execute
+        with patch('app.services.fondo_service.time.monotonic', return_value=1000.0):
+            await FondoService.get_fund('1')
+        with patch('app.services.fondo_service.time.monotonic', return_value=1000.0 + fund_catalog.ttl_seconds + 1):
+            await FondoService.get_fund('1')
+        
+        # Assert
+        assert mock_dynamodb_table.scan.call_count == 2
+        assert FondoService.cache_stats()['misses'] == 2
+    
+    @pytest.mark.asyncio
+    async def test_invalidate_cache_forces_reload(self, mock_dynamodb_table, sample_funds_data):
+        # Setup
+        mock_dynamodb_table.scan.return_value = {'Items': sample_funds_data}
+        await FondoService.get_all_funds()
+        
+        # Execute
+        FondoService.invalidate_cache()
+        await FondoService.get_all_funds()
+        
+        # Assert
+        assert mock_dynamodb_table.scan.call_count == 2
+        assert FondoService.cache_stats()['invalidations'] == 1
+    
+    @pytest.mark.asyncio
+    async def test_catalog_not_marked_loaded_on_error(self, mock_dynamodb_table, sample_funds_data):
+        # Setup
+        from botocore.exceptions import ClientError
+        error_response = {'Error': {'Message': 'Test error message'}}
+        mock_dynamodb_table.scan.side_effect = [ClientError(error_response, 'Scan'), {'Items': sample_funds_data}]
+        
+        # Execute
+        failed = await FondoService.get_fund('1')
+        recovered = await FondoService.get_fund('1')
+        
+        # Assert
+        assert failed is None
+        assert recovered == sample_funds_data[0]
+        assert mock_dynamodb_table.scan.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_get_funds_by_ids_batch_get(self, cache_disabled, mock_dynamodb_table, sample_funds_data):
+        # Setup
+        with patch('app.services.fondo_service.dynamodb') as mock_dynamodb:
+            mock_dynamodb.batch_get_item.side_effect = [
+                {'Responses': {'Funds': [sample_funds_data[0]]},
+                 'UnprocessedKeys': {'Funds': {'Keys': [{'fundId': '2'}]}}},
+                {'Responses': {'Funds': [sample_funds_data[1]]}}
+            ]
+            
+            # Execute
+            result = await FondoService.get_funds_by_ids(['1', '2', '1'])
+        
+        # Assert: las claves no procesadas se reintentan
+        assert mock_dynamodb.batch_get_item.call_count == 2
+        first_request = mock_dynamodb.batch_get_item.call_args_list[0][1]['RequestItems']
+        assert first_request == {'Funds': {'Keys': [{'fundId': '1'}, {'fundId': '2'}]}}
+        mock_dynamodb_table.get_item.assert_not_called()
+        assert result == {'1': sample_funds_data[0], '2': sample_funds_data[1]}
+    
+    @pytest.mark.asyncio
+    async def test_get_funds_by_ids_chunks_of_100(self, cache_disabled, mock_dynamodb_table):
+        # Setup
+        with patch('app.services.fondo_service.dynamodb') as mock_dynamodb:
+            mock_dynamodb.batch_get_item.return_value = {'Responses': {'Funds': []}}
+            
+            # Execute
+            await FondoService.get_funds_by_ids(str(i) for i in range(150))
+        
+        # Assert
+        assert mock_dynamodb.batch_get_item.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_get_funds_by_ids_from_catalog(self, mock_dynamodb_table, sample_funds_data):
+        # Setup
+        mock_dynamodb_table.scan.return_value = {'Items': sample_funds_data}
+        
+        # Execute
+        result = await FondoService.get_funds_by_ids(['2', '999'])
+        
+        # Assert
+        mock_dynamodb_table.scan.assert_called_once()
+        assert result == {'2': sample_funds_data[1]}
+    
+    @pytest.mark.asyncio
+    async def test_get_funds_by_ids_empty(self, mock_dynamodb_table):
+        # Execute
+        result = await FondoService.get_funds_by_ids([])
+        
+        # Assert
+        mock_dynamodb_table.scan.assert_not_called()
+        assert result == {}
+
+
+@pytest.fixture
+def large_funds_table():
+    """Tabla Funds en memoria con 250 fondos"""
+    database = create_app_tables()
+    funds = database.Table('Funds')
+    for i in range(250):
+        funds.put_item(Item={'fundId': f'{i:04d}', 'name': f'FONDO_{i}', 'category': 'FIC',
+                             'minimumAmount': Decimal('50000')})
+    with patch('app.services.fondo_service.table', funds):
+        yield funds
+
+
+class TestFondoScan:
+
+    @pytest.mark.asyncio
+    async def test_get_all_funds_follows_last_evaluated_key(self, large_funds_table, cache_disabled):
+        # Setup
+        with patch('app.services.fondo_service.settings.FUNDS_SCAN_PAGE_SIZE', 100):
+            # Execute
+            result = await FondoService.get_all_funds()
+
+        # Assert: 3 páginas (100 + 100 + 50), ningún fondo perdido ni repetido
+        assert large_funds_table.call_count('Scan') == 3
+        assert sorted(f['fundId'] for f in result) == [f'{i:04d}' for i in range(250)]
+
+    @pytest.mark.asyncio
+    async def test_parallel_scan_covers_every_segment(self, large_funds_table):
+        # Setup
+        scan = MagicMock(side_effect=large_funds_table.scan)
+        with patch.object(large_funds_table, 'scan', scan), \
+                patch('app.services.fondo_service.settings.FUNDS_SCAN_PAGE_SIZE', 40), \
+                patch('app.services.fondo_service.settings.FUNDS_SCAN_SEGMENTS', 4):
+            # Execute
+            result = await FondoService.get_all_funds()
+
+        # Assert
+        segments = {call[1]['Segment'] for call in scan.call_args_list if call[1]['TotalSegments'] == 4}
+        assert segments == {0, 1, 2, 3}
+        assert len(result) == 250
+        assert len({f['fundId'] for f in result}) == 250
+        assert fund_catalog.stats()['size'] == 250
+
+    @pytest.mark.asyncio
+    async def test_scan_pages_yields_pages_as_they_arrive(self, large_funds_table):
+        # Setup
+        with patch('app.services.fondo_service.settings.FUNDS_SCAN_PAGE_SIZE', 50):
+            pages = FondoService.scan_pages(total_segments=1)
+
+            # Execute: consumir solo la primera página y cerrar el generador
+            first = await pages.__anext__()
+            await pages.aclose()
+
+        # Assert: el scan no siguió leyendo la tabla completa
+        assert len(first) == 50
+        assert large_funds_table.call_count('Scan') < 5
+
+    @pytest.mark.asyncio
+    async def test_stream_funds_loads_catalog_after_full_scan(self, large_funds_table):
+        # Execute
+        streamed = []
+        async for page in FondoService.stream_funds():
+            streamed.extend(page)
+        cached = [page async for page in FondoService.stream_funds()]
+
+        # Assert
+        assert len(streamed) == 250
+        assert fund_catalog.stats()['misses'] == 1
+        assert fund_catalog.stats()['hits'] == 1
+        assert len(cached) == 1 and len(cached[0]) == 250
+        assert large_funds_table.call_count('Scan') == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_funds_raises_on_client_error(self, mock_dynamodb_table):
+        # Setup
+        error_response = {'Error': {'Code': 'InternalServerError', 'Message': 'Internal error'}}
+        mock_dynamodb_table.scan.side_effect = ClientError(error_response, 'Scan')
+
+        # Execute / Assert: the stream must abort instead of ending as a truncated catalog
+        with pytest.raises(ClientError):
+            [page async for page in FondoService.stream_funds()]
+        assert not fund_catalog.is_fresh()
+
+    @pytest.mark.asyncio
+    async def test_parallel_scan_buffers_at_most_one_page_per_segment(self, large_funds_table):
+        # Setup
+        with patch('app.services.fondo_service.settings.FUNDS_SCAN_PAGE_SIZE', 10):
+            pages = FondoService.scan_pages(total_segments=2)
+
+            # Execute: read one page, then give the segments time to run ahead
+            await pages.__anext__()
+            await asyncio.sleep(0.05)
+            scans = large_funds_table.call_count('Scan')
+            await pages.aclose()
+
+        # Assert: the queue holds one page per segment, plus one page blocked in each segment
+        assert scans <= 5
@@ -1,6 +1,8 @@
 import pytest
 from fastapi.testclient import TestClient
+from decimal import Decimal
 from unittest.mock import patch, MagicMock, AsyncMock 
+from botocore.exceptions import ClientError
 from app.main import app
 
 client = TestClient(app)
@@ -48,6 +50,68 @@ class TestFondosAPI:
         assert response.status_code == 200
         assert response.json() == []
     
+    @patch('app.api.endpoints.fondos.FondoService')
+    def test_get_all_funds_stream(self, mock_service):
+        # Setup: dos páginas, la segunda vacía
+        async def pages():
+            yield [
+                {'fundId': '1', 'name': 'FPV_EL CLIENTE_RECAUDADORA', 'category': 'FPV', 'minimumAmount': Decimal('75000')},
+                {'fundId': '3', 'name': 'DEUDAPRIVADA', 'category': 'FIC', 'minimumAmount': Decimal('50000.5')}
+            ]
+            yield []
+        mock_service.stream_funds = MagicMock(return_value=pages())
+        
+        # Execute
+        response = client.get("/api/v1/fondos?stream=true")
+        
+        # Assert
+        assert response.status_code == 200
+        assert response.headers['content-type'] == 'application/json'
+        assert [f['fundId'] for f in response.json()] == ['1', '3']
+        assert response.json()[1]['minimumAmount'] == 50000.5
+        mock_service.get_all_funds.assert_not_called()
+    
+    @patch('app.api.endpoints.fondos.FondoService')
+    def test_get_all_funds_stream_empty(self, mock_service):
+        # Setup
+        async def pages():
+            return
+            yield
+        mock_service.stream_funds = MagicMock(return_value=pages())
+        
+        # Execute
+        response = client.get("/api/v1/fondos?stream=true")
+        
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == []
+    
+    @patch('app.api.endpoints.fondos.FondoService')
+    def test_get_all_funds_stream_error_before_first_page(self, mock_service):
+        # Setup
+        async def pages():
+            raise ClientError({'Error': {'Code': 'InternalServerError', 'Message': 'boom'}}, 'Scan')
+            yield
+        mock_service.stream_funds = MagicMock(return_value=pages())
+
+        # Execute
+        response = client.get("/api/v1/fondos?stream=true")
+
+        # Assert
+        assert response.status_code == 500
+
+    @patch('app.api.endpoints.fondos.FondoService')
+    def test_get_all_funds_stream_error_mid_stream_is_not_closed(self, mock_service):
+        # Setup
+        async def pages():
+            yield [{'fundId': '1', 'name': 'FPV', 'category': 'FPV', 'minimumAmount': Decimal('75000')}]
+            raise ClientError({'Error': {'Code': 'InternalServerError', 'Message': 'boom'}}, 'Scan')
+        mock_service.stream_funds = MagicMock(return_value=pages())
+
+        # Execute / Assert: the response is aborted instead of ending with a valid truncated array
+        with pytest.raises(ClientError):
+            client.get("/api/v1/fondos?stream=true")
+
     @patch('app.api.endpoints.fondos.FondoService')
     def test_get_fund_success(self, mock_service):
         # Setup
@@ -78,4 +142,30 @@ class TestFondosAPI:
         
         # Assert
         assert response.status_code == 404
-        assert response.json()['detail'] == "Fondo no encontrado"
\ No newline at end of file
+        assert response.json()['detail'] == "Fondo no encontrado"
+    
+    @patch('app.api.endpoints.fondos.FondoService')
+    def test_get_funds_cache_stats(self, mock_service):
+        # Setup
+        mock_service.cache_stats = MagicMock(return_value={'enabled': True, 'hits': 10, 'misses': 1})
+        
+        # Execute
+        response = client.get("/api/v1/fondos/cache/stats")
+        
+        # Assert
+        assert response.status_code == 200
+        assert response.json()['hits'] == 10
+        assert response.json()['misses'] == 1
+    
+    @patch('app.api.endpoints.fondos.FondoService')
+    def test_invalidate_funds_cache(self, mock_service):
+        # Setup
+        mock_service.cache_stats = MagicMock(return_value={'enabled': True, 'size': 0})
+        
+        # Execute
+        response = client.delete("/api/v1/fondos/cache")
+        
+        # Assert
+        assert response.status_code == 200
+        mock_service.invalidate_cache.assert_called_once()
+        assert response.json()['size'] == 0
@@ -0,0 +1,51 @@
+from unittest.mock import patch
+from uuid import UUID
+from app.models import ids
+from app.models.ids import time_ordered_id, id_for_timestamp, is_time_ordered, id_timestamp_ms
+from app.models.transaccion import Transaccion, Subscription
+
+
+class TestTimeOrderedIds:
+
+    def test_ids_are_uuid_v7_and_strictly_increasing(self):
+        # Execute
+        generated = [time_ordered_id() for _ in range(5000)]
+
+        # Assert: string order (DynamoDB sort key order) matches generation order
+        assert generated == sorted(generated)
+        assert len(set(generated)) == len(generated)
+        assert all(UUID(i).version == 7 for i in generated[:10])
+
+    def test_counter_overflow_moves_to_next_millisecond(self):
+        # Setup: frozen clock, more ids than the 12-bit counter allows in one millisecond
+        with patch('app.models.ids.time.time_ns', return_value=1_700_000_000_000 * 1_000_000), \
+                patch.object(ids, '_last_ms', 0):
+            # Execute
+            generated = [time_ordered_id() for _ in range(5000)]
+
+        # Assert
+        assert generated == sorted(generated)
+        assert id_timestamp_ms(generated[0]) == 1_700_000_000_000
+        assert id_timestamp_ms(generated[-1]) > 1_700_000_000_000
+
+    def test_id_for_timestamp(self):
+        # Execute
+        older = id_for_timestamp(1_700_000_000_000)
+        newer = id_for_timestamp(1_700_000_000_001)
+
+        # Assert
+        assert older < newer
+        assert id_timestamp_ms(older) == 1_700_000_000_000
+        assert is_time_ordered(older)
+        assert not is_time_ordered('00000000-0000-4000-8000-000000000001')
+        assert not is_time_ordered('tx-1')
+
+    def test_models_use_time_ordered_ids(self):
+        # Execute
+        transaction = Transaccion(clientId='C123456', fundId='1', type='SUBSCRIPTION', amount=75000.0)
+        subscription = Subscription(clientId='C123456', fundId='1', amountSubscribed=75000.0)
+
+        # Assert
+        assert is_time_ordered(transaction.transactionId)
+        assert is_time_ordered(subscription.subscriptionId)
+        assert subscription.subscriptionId > transaction.transactionId
@@ -0,0 +1,134 @@
+import json
+import logging
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, AsyncMock
+from app.main import app
+from app.services.log import JsonFormatter, get_logger, set_correlation_id, reset_correlation_id
+from app.services.notification_queue import QueueNotificationDispatcher
+
+client = TestClient(app)
+
+
+def log_lines(capsys):
+    lines = []
+    for line in capsys.readouterr().out.splitlines():
+        if line.startswith('{"timestamp"'):
+            lines.append(json.loads(line))
+    return lines
+
+
+def request_logs(capsys):
+    return [line for line in log_lines(capsys) if line['message'] == 'request']
+
+
+class TestJsonLogging:
+
+    def test_record_is_one_json_line_with_correlation_id_and_extra_fields(self):
+        # Setup
+        record = logging.LogRecord('app.services.test', logging.ERROR, __file__, 1,
+                                   'Error getting client', (), None)
+        record.clientId = 'C1'
+        token = set_correlation_id('abc123')
+
+        # Execute
+        try:
+            entry = json.loads(JsonFormatter().format(record))
+        finally:
+            reset_correlation_id(token)
+
+        # Assert
+        assert entry['level'] == 'ERROR'
+        assert entry['logger'] == 'app.services.test'
+        assert entry['message'] == 'Error getting client'
+        assert entry['correlationId'] == 'abc123'
+        assert entry['clientId'] == 'C1'
+        assert 'args' not in entry and 'msg' not in entry
+
+    def test_service_logs_go_to_stdout_as_json(self, capsys):
+        # Execute
+        get_logger('app.services.cliente_service').error('Error getting client', extra={'clientId': 'C9'})
+
+        # Assert
+        entry = log_lines(capsys)[-1]
+        assert entry['message'] == 'Error getting client' and entry['clientId'] == 'C9'
+
+
+class TestRequestLogMiddleware:
+
+    @patch('app.api.endpoints.cliente.ClienteService')
+    def test_request_log_has_trimmed_fields_and_echoes_correlation_id(self, mock_service, capsys):
+        # Setup
+        mock_service.get_client = AsyncMock(return_value={'clientId': 'C1', 'balance': 500000})
+
+        # Execute
+        response = client.get('/api/v1/clientes/C1', headers={'X-Correlation-Id': 'req-42'})
+
+        # Assert
+        assert response.headers['x-correlation-id'] == 'req-42'
+        entry, = request_logs(capsys)
+        assert entry['correlationId'] == 'req-42'
+        assert entry['route'] == '/api/v1/clientes/{client_id}'
+        assert entry['method'] == 'GET' and entry['status'] == 200
+        assert entry['latencyMs'] >= 0
+        assert 'headers' not in entry and 'body' not in entry
+
+    def test_correlation_id_is_generated_when_missing(self):
+        # Execute
+        first, second = client.get('/'), client.get('/')
+
+        # Assert
+        assert first.headers['x-correlation-id'] != second.headers['x-correlation-id']
+
+    @patch('app.api.endpoints.cliente.ClienteService')
+    def test_sampling_skips_successful_requests_but_not_errors(self, mock_service, capsys):
+        # Setup
+        mock_service.get_client = AsyncMock(side_effect=RuntimeError('boom'))
+        failing_client = TestClient(app, raise_server_exceptions=False)
+
+        # Execute
+        with patch('app.services.log.settings.LOG_SAMPLE_RATE', 0):
+            client.get('/')
+            failing_client.get('/api/v1/clientes/C1')
+
+        # Assert
+        entries = log_lines(capsys)
+        assert [entry['status'] for entry in entries if entry['message'] == 'request'] == [500]
+        assert any(entry['message'] == 'Error no controlado' and 'boom' in entry['exception'] for entry in entries)
+
+    @pytest.mark.asyncio
+    async def test_queued_notifications_keep_the_correlation_id(self, capsys):
+        # Setup
+        dispatcher = QueueNotificationDispatcher(max_size=10, workers=1, max_attempts=1, backoff_seconds=0)
+        token = set_correlation_id('req-7')
+
+        # Execute
+        try:
+            await dispatcher.dispatch(client_id='C1', notification_type='email', message='Hola', email='a@b.co')
+        finally:
+            reset_correlation_id(token)
+        await dispatcher.drain(1)
+
+        # Assert
+        sent = [entry for entry in log_lines(capsys) if entry['message'] == 'Email enviado']
+        assert sent[0]['correlationId'] == 'req-7'
+
+
+class TestLambdaHandler:
+
+    def test_errors_are_logged_and_returned_as_valid_json(self, capsys):
+        # Setup
+        import lambda_handler
+        event = {'resource': '/api/v1/clientes/{client_id}', 'requestContext': {'requestId': 'gw-1'},
+                 'headers': {'Authorization': 'secret'}}
+
+        # Execute
+        with patch('lambda_handler.handler', side_effect=RuntimeError('falla "rara"')):
+            response = lambda_handler.lambda_handler(event, None)
+
+        # Assert
+        assert response['statusCode'] == 500
+        assert json.loads(response['body']) == {'message': 'Error interno del servidor - falla "rara"'}
+        entry = log_lines(capsys)[-1]
+        assert entry['requestId'] == 'gw-1' and entry['route'] == '/api/v1/clientes/{client_id}'
+        assert 'secret' not in json.dumps(entry)
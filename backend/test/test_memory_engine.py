@@ -0,0 +1,156 @@
+import pytest
+from decimal import Decimal
+from unittest.mock import patch, AsyncMock
+from botocore.exceptions import ClientError
+from app.config import settings
+from app.models.transaccion import TransaccionCreate
+from app.services import dynamodb
+from app.services.cliente_service import ClienteService
+from app.services.fondo_service import fund_catalog
+from app.services.memory_engine import MemoryDynamoDB, create_app_tables, seed_default_data
+from app.services.transaccion_service import TransaccionService
+
+
+@pytest.fixture
+def database():
+    return create_app_tables()
+
+
+@pytest.fixture
+def memory_backend():
+    """Servicios sin patches: el recurso compartido es el motor en memoria con los datos iniciales"""
+    database = seed_default_data(create_app_tables(MemoryDynamoDB(record_calls=False)))
+    fund_catalog.invalidate()
+    dynamodb.set_resource(database)
+    with patch('app.services.notificacion_service.NotificacionService.send_notification',
+               new_callable=AsyncMock, return_value=True):
+        yield database
+    dynamodb.set_resource(None)
+    fund_catalog.invalidate()
+
+
+def put_subscriptions(database, client_id, count):
+    table = database.Table(settings.SUBSCRIPTIONS_TABLE_NAME)
+    for i in range(count):
+        table.put_item(Item={'clientId': client_id, 'fundId': f'F{i:02d}', 'activeSince': f'2026-01-{count - i:02d}'})
+
+
+class TestMemoryEngine:
+
+    def test_conditional_put_fails_when_item_exists(self, database):
+        # Setup
+        table = database.Table(settings.CLIENTS_TABLE_NAME)
+        table.put_item(Item={'clientId': 'C1', 'balance': 100})
+
+        # Execute
+        with pytest.raises(ClientError) as error:
+            table.put_item(Item={'clientId': 'C1', 'balance': 0}, ConditionExpression='attribute_not_exists(clientId)')
+
+        # Assert
+        assert error.value.response['Error']['Code'] == 'ConditionalCheckFailedException'
+        assert table.get_item(Key={'clientId': 'C1'})['Item']['balance'] == Decimal('100')
+
+    def test_returned_items_are_copies(self, database):
+        # Setup
+        table = database.Table(settings.CLIENTS_TABLE_NAME)
+        table.put_item(Item={'clientId': 'C1', 'portfolio': {'FPV': 1}})
+
+        # Execute
+        table.get_item(Key={'clientId': 'C1'})['Item']['portfolio']['FPV'] = 99
+
+        # Assert
+        assert table.get_item(Key={'clientId': 'C1'})['Item']['portfolio'] == {'FPV': Decimal('1')}
+
+    def test_query_reads_only_the_partition_in_sort_order_and_paginates(self, database):
+        # Setup
+        put_subscriptions(database, 'C1', 5)
+        put_subscriptions(database, 'C2', 3)
+        table = database.Table(settings.SUBSCRIPTIONS_TABLE_NAME)
+        query = dict(IndexName='ActiveSubscriptions', KeyConditionExpression='clientId = :c',
+                     ExpressionAttributeValues={':c': 'C1'}, ScanIndexForward=False, Limit=2)
+
+        # Execute
+        pages, start = [], None
+        while True:
+            response = table.query(**query, **({'ExclusiveStartKey': start} if start else {}))
+            pages.append([item['activeSince'] for item in response['Items']])
+            start = response.get('LastEvaluatedKey')
+            if not start:
+                break
+
+        # Assert
+        assert pages == [['2026-01-05', '2026-01-04'], ['2026-01-03', '2026-01-02'], ['2026-01-01']]
+
+    def test_index_follows_updates_and_skips_items_without_index_keys(self, database):
+        # Setup
+        put_subscriptions(database, 'C1', 2)
+        table = database.Table(settings.SUBSCRIPTIONS_TABLE_NAME)
+
+        # Execute: quitar activeSince saca la suscripción del índice disperso
+        table.update_item(Key={'clientId': 'C1', 'fundId': 'F00'}, UpdateExpression='REMOVE activeSince')
+        response = table.query(IndexName='ActiveSubscriptions', KeyConditionExpression='clientId = :c',
+                               ExpressionAttributeValues={':c': 'C1'})
+
+        # Assert
+        assert [item['fundId'] for item in response['Items']] == ['F01']
+        assert table.query(KeyConditionExpression='clientId = :c',
+                           ExpressionAttributeValues={':c': 'C1'})['Count'] == 2
+
+    def test_transaction_writes_nothing_when_a_condition_fails(self, database):
+        # Setup
+        database.Table(settings.CLIENTS_TABLE_NAME).put_item(Item={'clientId': 'C1', 'balance': 10})
+
+        # Execute
+        with pytest.raises(ClientError) as error:
+            database.meta.client.transact_write_items(TransactItems=[
+                {'Put': {'TableName': settings.SUBSCRIPTIONS_TABLE_NAME,
+                         'Item': {'clientId': {'S': 'C1'}, 'fundId': {'S': '1'}, 'activeSince': {'S': '2026'}}}},
+                {'Update': {'TableName': settings.CLIENTS_TABLE_NAME, 'Key': {'clientId': {'S': 'C1'}},
+                            'UpdateExpression': 'SET balance = balance - :a',
+                            'ConditionExpression': 'balance >= :a',
+                            'ExpressionAttributeValues': {':a': {'N': '50'}}}},
+            ])
+
+        # Assert
+        assert error.value.response['Error']['Code'] == 'TransactionCanceledException'
+        assert [r['Code'] for r in error.value.response['CancellationReasons']] == ['None', 'ConditionalCheckFailed']
+        assert database.Table(settings.SUBSCRIPTIONS_TABLE_NAME).scan()['Count'] == 0
+        assert database.Table(settings.SUBSCRIPTIONS_TABLE_NAME).query(
+            IndexName='ActiveSubscriptions', KeyConditionExpression='clientId = :c',
+            ExpressionAttributeValues={':c': 'C1'})['Count'] == 0
+
+
+class TestStorageBackend:
+
+    def test_memory_backend_is_selected_from_settings(self):
+        # Execute
+        with patch.object(settings, 'STORAGE_BACKEND', 'memory'):
+            dynamodb.set_resource(None)
+            try:
+                resource = dynamodb.get_resource()
+            finally:
+                dynamodb.set_resource(None)
+
+        # Assert
+        assert isinstance(resource, MemoryDynamoDB)
+        client = resource.Table(settings.CLIENTS_TABLE_NAME).get_item(Key={'clientId': settings.DEFAULT_CLIENT_ID})
+        assert client['Item']['balance'] == Decimal('500000')
+
+    def test_unknown_backend_is_rejected(self):
+        # Execute / Assert
+        with patch.object(settings, 'STORAGE_BACKEND', 'sqlite'):
+            dynamodb.set_resource(None)
+            with pytest.raises(ValueError):
+                dynamodb.get_resource()
+
+    @pytest.mark.asyncio
+    async def test_services_run_against_the_memory_backend_without_patches(self, memory_backend):
+        # Execute
+        result = await TransaccionService.create_subscription(settings.DEFAULT_CLIENT_ID, TransaccionCreate(fundId='1'))
+        client = await ClienteService.get_client(settings.DEFAULT_CLIENT_ID)
+        history = await TransaccionService.get_client_transactions(settings.DEFAULT_CLIENT_ID)
+
+        # Assert
+        assert result['status'] == 'COMPLETED'
+        assert client['balance'] == Decimal('425000')
+        assert [transaction['fundId'] for transaction in history] == ['1']
@@ -0,0 +1,194 @@
+import json
+import pytest
+from botocore.exceptions import ClientError
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from app.main import app
+from app.services.dynamodb import run_db
+from app.services.metrics import metrics, MetricsRegistry, NO_ROUTE
+
+client = TestClient(app)
+
+
+class CapacityTable:
+    """Minimal boto3-like table: reports consumed capacity and remembers the call arguments"""
+
+    def __init__(self, name, items=None):
+        self.name = name
+        self.items = items or {}
+        self.kwargs = []
+
+    def get_item(self, Key, **kwargs):
+        self.kwargs.append(kwargs)
+        response = {'ConsumedCapacity': {'TableName': self.name, 'CapacityUnits': 0.5}}
+        item = self.items.get(next(iter(Key.values())))
+        if item:
+            response['Item'] = item
+        return response
+
+    def put_item(self, Item, **kwargs):
+        raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'failed'}}, 'PutItem')
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+class TestMetricsRegistry:
+
+    def test_render_prometheus_counters_and_histograms(self):
+        # Setup
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        registry.increment('http_requests_total', {'route': '/a', 'status': '200'})
+        registry.increment('http_requests_total', {'route': '/a', 'status': '200'})
+        registry.observe('http_request_duration_seconds', {'route': '/a'}, 0.05)
+        registry.observe('http_request_duration_seconds', {'route': '/a'}, 0.5)
+
+        # Execute
+        text = registry.render_prometheus()
+
+        # Assert
+        assert '# TYPE http_requests_total counter' in text
+        assert 'http_requests_total{route="/a",status="200"} 2' in text
+        assert '# TYPE http_request_duration_seconds histogram' in text
+        assert 'http_request_duration_seconds_bucket{route="/a",le="0.1"} 1' in text
+        assert 'http_request_duration_seconds_bucket{route="/a",le="1.0"} 2' in text
+        assert 'http_request_duration_seconds_bucket{route="/a",le="+Inf"} 2' in text
+        assert 'http_request_duration_seconds_sum{route="/a"} 0.55' in text
+        assert 'http_request_duration_seconds_count{route="/a"} 2' in text
+
+    def test_label_values_are_escaped(self):
+        # Setup
+        registry = MetricsRegistry()
+        registry.increment('dynamodb_calls_total', {'table': 'a"b\\c'})
+
+        # Execute / Assert
+        assert 'dynamodb_calls_total{table="a\\"b\\\\c"} 1' in registry.render_prometheus()
+
+
+class TestDynamoDBInstrumentation:
+
+    @pytest.mark.asyncio
+    async def test_run_db_records_call_latency_and_consumed_capacity(self):
+        # Setup
+        table = CapacityTable('Clients', {'C1': {'clientId': 'C1'}})
+
+        # Execute
+        response = await run_db(table.get_item, Key={'clientId': 'C1'})
+
+        # Assert
+        assert response['Item'] == {'clientId': 'C1'}
+        assert table.kwargs == [{'ReturnConsumedCapacity': 'TOTAL'}]
+        labels = {'route': NO_ROUTE, 'table': 'Clients', 'operation': 'get_item'}
+        assert metrics.counter_value('dynamodb_calls_total', outcome='ok', **labels) == 1
+        assert metrics.histogram_count('dynamodb_call_duration_seconds', **labels) == 1
+        assert metrics.counter_value('dynamodb_consumed_capacity_units_total', **labels) == 0.5
+
+    @pytest.mark.asyncio
+    async def test_run_db_records_error_code_as_outcome(self):
+        # Setup
+        table = CapacityTable('Subscriptions')
+
+        # Execute
+        with pytest.raises(ClientError):
+            await run_db(table.put_item, Item={'clientId': 'C1'})
+
+        # Assert
+        assert metrics.counter_value('dynamodb_calls_total', table='Subscriptions', operation='put_item',
+                                     outcome='ConditionalCheckFailedException') == 1
+
+    @pytest.mark.asyncio
+    async def test_run_db_labels_transactions_with_every_table(self):
+        # Setup
+        def transact_write_items(TransactItems, **kwargs):
+            return {'ConsumedCapacity': [{'TableName': 'Clients', 'CapacityUnits': 2.0},
+                                         {'TableName': 'Transactions', 'CapacityUnits': 2.0}]}
+
+        items = [{'Update': {'TableName': 'Clients'}}, {'Put': {'TableName': 'Transactions'}}]
+
+        # Execute
+        await run_db(transact_write_items, TransactItems=items)
+
+        # Assert
+        assert metrics.counter_value('dynamodb_calls_total', table='Clients,Transactions',
+                                     operation='transact_write_items') == 1
+        assert metrics.counter_value('dynamodb_consumed_capacity_units_total', table='Clients') == 2.0
+        assert metrics.counter_value('dynamodb_consumed_capacity_units_total', table='Transactions') == 2.0
+
+    @pytest.mark.asyncio
+    async def test_consumed_capacity_can_be_disabled(self):
+        # Setup
+        table = CapacityTable('Clients')
+
+        # Execute
+        with patch('app.services.dynamodb.settings.DYNAMODB_RETURN_CONSUMED_CAPACITY', 'NONE'):
+            await run_db(table.get_item, Key={'clientId': 'C1'})
+
+        # Assert
+        assert table.kwargs == [{}]
+
+
+class TestMetricsMiddleware:
+
+    def test_request_latency_and_dynamodb_calls_by_route_template(self):
+        # Setup
+        table = CapacityTable('Clients', {'C1': {'clientId': 'C1', 'balance': 500000}})
+
+        # Execute
+        with patch('app.services.cliente_service.table', table):
+            response = client.get('/api/v1/clientes/C1')
+            client.get('/api/v1/clientes/C2')
+
+        # Assert
+        assert response.status_code == 200
+        route = '/api/v1/clientes/{client_id}'
+        assert metrics.counter_value('http_requests_total', method='GET', route=route, status='200') == 1
+        assert metrics.counter_value('http_requests_total', method='GET', route=route, status='404') == 1
+        assert metrics.histogram_count('http_request_duration_seconds', method='GET', route=route) == 2
+        assert metrics.counter_value('dynamodb_calls_total', route=route, table='Clients', operation='get_item') == 2
+        assert metrics.counter_value('dynamodb_consumed_capacity_units_total', route=route) == 1.0
+
+    def test_unknown_paths_share_one_series(self):
+        # Execute
+        client.get('/no/existe/1')
+        client.get('/no/existe/2')
+
+        # Assert
+        assert metrics.counter_value('http_requests_total', route='unmatched', status='404') == 2
+
+    def test_metrics_endpoint_serves_prometheus_text(self):
+        # Setup
+        client.get('/')
+
+        # Execute
+        response = client.get('/metrics')
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+        assert 'http_requests_total{method="GET",route="/",status="200"} 1' in response.text
+
+    def test_emf_line_per_request(self, capsys):
+        # Setup
+        table = CapacityTable('Clients', {'C1': {'clientId': 'C1', 'balance': 500000}})
+
+        # Execute
+        with patch('app.services.cliente_service.table', table), \
+                patch('app.services.metrics.settings.METRICS_EMF_ENABLED', True):
+            client.get('/api/v1/clientes/C1')
+
+        # Assert
+        lines = [line for line in capsys.readouterr().out.splitlines() if line.startswith('{"_aws"')]
+        assert len(lines) == 1
+        record = json.loads(lines[0])
+        directive = record['_aws']['CloudWatchMetrics'][0]
+        assert directive['Dimensions'] == [['route', 'method']]
+        assert {metric['Name'] for metric in directive['Metrics']} <= set(record)
+        assert record['route'] == '/api/v1/clientes/{client_id}'
+        assert record['status'] == 200
+        assert record['DynamoDBCalls'] == 1
+        assert record['ConsumedCapacity'] == 0.5
+        assert record['dynamodb']['Clients.get_item']['calls'] == 1
@@ -0,0 +1,100 @@
+import importlib.util
+import os
+import pytest
+from decimal import Decimal
+from app.config import settings
+from app.models.ids import is_time_ordered, time_ordered_id
+from app.services.memory_engine import create_app_tables
+
+SCRIPT = os.path.join(os.path.dirname(__file__), '..', 'scripts', 'migrate_transaction_ids.py')
+spec = importlib.util.spec_from_file_location('migrate_transaction_ids', SCRIPT)
+migrate_transaction_ids = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(migrate_transaction_ids)
+
+
+@pytest.fixture
+def database():
+    database = create_app_tables()
+    transactions = database.Table(settings.TRANSACTIONS_TABLE_NAME)
+    # Rows written with uuid4 ids: their key order does not follow transactionDate
+    for transaction_id, date in (('f0000000-0000-4000-8000-000000000001', '2025-01-01T10:00:00'),
+                                 ('10000000-0000-4000-8000-000000000002', '2025-02-01T10:00:00'),
+                                 ('80000000-0000-4000-8000-000000000003', '2025-03-01T10:00:00')):
+        transactions.put_item(Item={'clientId': 'C123456', 'transactionId': transaction_id, 'fundId': '1',
+                                    'type': 'SUBSCRIPTION', 'amount': Decimal('75000'),
+                                    'transactionDate': date, 'status': 'COMPLETED'})
+    transactions.put_item(Item={'clientId': 'C123456', 'transactionId': time_ordered_id(), 'fundId': '1',
+                                'type': 'CANCELLATION', 'amount': Decimal('75000'),
+                                'transactionDate': '2026-10-18T10:00:00', 'status': 'COMPLETED'})
+    return database
+
+
+def history_dates(database):
+    response = database.Table(settings.TRANSACTIONS_TABLE_NAME).query(
+        KeyConditionExpression="clientId = :cid",
+        ExpressionAttributeValues={':cid': 'C123456'},
+        ScanIndexForward=False
+    )
+    return [item['transactionDate'] for item in response['Items']]
+
+
+class TestMigrateTransactionIds:
+
+    def test_migration_orders_base_table_by_date(self, database):
+        # Execute
+        result = migrate_transaction_ids.migrate(database)
+
+        # Assert
+        assert result == (3, 0)
+        assert history_dates(database) == ['2026-10-18T10:00:00', '2025-03-01T10:00:00',
+                                           '2025-02-01T10:00:00', '2025-01-01T10:00:00']
+        items = database.Table(settings.TRANSACTIONS_TABLE_NAME).items.values()
+        assert len(items) == 4
+        assert all(is_time_ordered(item['transactionId']) for item in items)
+        assert {item.get('legacyTransactionId', '')[:1] for item in items} == {'', 'f', '1', '8'}
+
+    def test_migration_is_idempotent(self, database):
+        # Execute
+        migrate_transaction_ids.migrate(database)
+        second = migrate_transaction_ids.migrate(database)
+
+        # Assert
+        assert second == (0, 0)
+
+    def test_dry_run_does_not_write(self, database):
+        # Execute
+        result = migrate_transaction_ids.migrate(database, dry_run=True)
+
+        # Assert
+        assert result == (0, 0)
+        assert history_dates(database)[0] == '2025-01-01T10:00:00'  # uuid4 'f...' comes first, out of date order
+
+    def test_naive_dates_are_read_as_utc_regardless_of_local_timezone(self, monkeypatch):
+        # Setup: a workstation in UTC-5
+        import time
+        from datetime import datetime, timezone
+        monkeypatch.setenv('TZ', 'America/Bogota')
+        time.tzset()
+        try:
+            # Execute
+            new_id = migrate_transaction_ids.new_transaction_id({'transactionDate': '2025-01-01T10:00:00'})
+        finally:
+            monkeypatch.delenv('TZ')
+            time.tzset()
+
+        # Assert
+        expected = int(datetime(2025, 1, 1, 10, tzinfo=timezone.utc).timestamp() * 1000)
+        assert int(new_id.replace('-', '')[:12], 16) == expected
+
+    def test_explicit_timezone_applies_to_naive_dates(self):
+        # Setup
+        from datetime import datetime, timezone
+        from zoneinfo import ZoneInfo
+
+        # Execute
+        new_id = migrate_transaction_ids.new_transaction_id({'transactionDate': '2025-01-01T10:00:00'},
+                                                            ZoneInfo('America/Bogota'))
+
+        # Assert
+        expected = int(datetime(2025, 1, 1, 15, tzinfo=timezone.utc).timestamp() * 1000)
+        assert int(new_id.replace('-', '')[:12], 16) == expected
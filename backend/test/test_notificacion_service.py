@@ -1,3 +1,5 @@
+import asyncio
+import time
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock 
 from app.services.notificacion_service import NotificacionService
@@ -55,12 +57,12 @@ class TestNotificacionService:
     @pytest.mark.asyncio
     async def test_send_email_success(self):
         # Setup
-        with patch('builtins.print') as mock_print:
+        with patch('app.services.notificacion_service.logger') as mock_logger:
             # Execute
             result = await NotificacionService.send_email('test@example.com', 'Test message')
             
             # Assert
-            mock_print.assert_called_once()
+            mock_logger.info.assert_called_once()
             assert result is True
     
     @pytest.mark.asyncio
@@ -110,12 +112,12 @@ class TestNotificacionService:
     @pytest.mark.asyncio
     async def test_send_sms_success(self):
         # Setup
-        with patch('builtins.print') as mock_print:
+        with patch('app.services.notificacion_service.logger') as mock_logger:
             # Execute
             result = await NotificacionService.send_sms('+573001234567', 'Test message')
             
             # Assert
-            mock_print.assert_called_once()
+            mock_logger.info.assert_called_once()
             assert result is True
     
     @pytest.mark.asyncio
@@ -130,4 +132,97 @@ class TestNotificacionService:
                     notification_type='sms',
                     message='Test message',
                     phone='+573001234567'
-                )
\ No newline at end of file
+                )
+
+def batch_item(client_id, channel, email='cliente@ejemplo.com', phone='+573001234567'):
+    return {
+        'client_id': client_id,
+        'notification_type': channel,
+        'message': f'Mensaje para {client_id}',
+        'email': email,
+        'phone': phone
+    }
+
+
+class TestNotificacionBatch:
+
+    @pytest.mark.asyncio
+    async def test_send_batch_groups_by_channel_and_keeps_order(self):
+        # Setup
+        notifications = [
+            batch_item('C1', 'email'),
+            batch_item('C2', 'sms'),
+            batch_item('C3', 'email', email=None),
+            batch_item('C4', 'push'),
+        ]
+        with patch.object(NotificacionService, 'send_email', new_callable=AsyncMock, return_value=True) as mock_email, \
+                patch.object(NotificacionService, 'send_sms', new_callable=AsyncMock, return_value=True) as mock_sms:
+            # Execute
+            results = await NotificacionService.send_batch(notifications)
+
+        # Assert
+        mock_email.assert_called_once_with('cliente@ejemplo.com', 'Mensaje para C1')
+        mock_sms.assert_called_once_with('+573001234567', 'Mensaje para C2')
+        assert [r['clientId'] for r in results] == ['C1', 'C2', 'C3', 'C4']
+        assert [r['success'] for r in results] == [True, True, False, False]
+        assert results[2]['error'] == 'Datos insuficientes'
+
+    @pytest.mark.asyncio
+    async def test_send_batch_reports_failures_per_item(self):
+        # Setup
+        notifications = [batch_item('C1', 'email'), batch_item('C2', 'email'), batch_item('C3', 'email')]
+        send_email = AsyncMock(side_effect=[True, False, Exception("Throttling")])
+
+        with patch.object(NotificacionService, 'send_email', send_email), \
+                patch('app.services.notificacion_service.settings.EMAIL_BATCH_CONCURRENCY', 1):
+            # Execute
+            results = await NotificacionService.send_batch(notifications)
+
+        # Assert
+        assert [r['success'] for r in results] == [True, False, False]
+        assert results[1]['error'] == 'Envío rechazado'
+        assert results[2]['error'] == 'Throttling'
+
+    @pytest.mark.asyncio
+    async def test_send_batch_bounds_concurrency_per_channel(self):
+        # Setup
+        in_flight = {'email': 0, 'sms': 0}
+        peak = {'email': 0, 'sms': 0}
+
+        def tracked(channel):
+            async def send(destination, message):
+                in_flight[channel] += 1
+                peak[channel] = max(peak[channel], in_flight[channel])
+                await asyncio.sleep(0.001)
+                in_flight[channel] -= 1
+                return True
+            return send
+
+        notifications = [batch_item(f'C{i}', 'email' if i % 2 else 'sms') for i in range(100)]
+        with patch.object(NotificacionService, 'send_email', side_effect=tracked('email')), \
+                patch.object(NotificacionService, 'send_sms', side_effect=tracked('sms')), \
+                patch('app.services.notificacion_service.settings.EMAIL_BATCH_CONCURRENCY', 3), \
+                patch('app.services.notificacion_service.settings.SMS_BATCH_CONCURRENCY', 5), \
+                patch('app.services.notificacion_service.settings.EMAIL_RATE_PER_SECOND', 0), \
+                patch('app.services.notificacion_service.settings.SMS_RATE_PER_SECOND', 0):
+            # Execute
+            results = await NotificacionService.send_batch(notifications)
+
+        # Assert
+        assert all(r['success'] for r in results)
+        assert peak == {'email': 3, 'sms': 5}
+
+    @pytest.mark.asyncio
+    async def test_send_batch_respects_rate_limit(self):
+        # Setup: 20/s con ráfaga de 20, así que 25 SMS necesitan al menos 0,25 s
+        notifications = [batch_item(f'C{i}', 'sms') for i in range(25)]
+        with patch.object(NotificacionService, 'send_sms', new_callable=AsyncMock, return_value=True), \
+                patch('app.services.notificacion_service.settings.SMS_RATE_PER_SECOND', 20):
+            # Execute
+            start = time.monotonic()
+            results = await NotificacionService.send_batch(notifications)
+            elapsed = time.monotonic() - start
+
+        # Assert
+        assert all(r['success'] for r in results)
+        assert elapsed >= 0.2
@@ -0,0 +1,209 @@
+import pytest
+import asyncio
+from unittest.mock import patch, AsyncMock, MagicMock
+from botocore.exceptions import ClientError
+from app.config import settings
+from app.services.memory_engine import create_app_tables
+from app.services.notification_queue import (
+    InlineNotificationDispatcher, QueueNotificationDispatcher, OutboxNotificationDispatcher, create_dispatcher
+)
+
+NOTIFICATION = {
+    'client_id': 'C123456',
+    'notification_type': 'email',
+    'message': 'Test message',
+    'email': 'cliente@ejemplo.com',
+    'phone': None
+}
+
+
+def queue_dispatcher(max_size=10, workers=2, max_attempts=3):
+    return QueueNotificationDispatcher(max_size, workers, max_attempts, backoff_seconds=0.001)
+
+
+class TestNotificationQueue:
+
+    @pytest.mark.asyncio
+    async def test_dispatch_returns_before_delivery(self):
+        # Setup
+        dispatcher = queue_dispatcher()
+        delivered = asyncio.Event()
+
+        async def slow_send(**kwargs):
+            await asyncio.sleep(0.05)
+            delivered.set()
+            return True
+
+        with patch('app.services.notificacion_service.NotificacionService.send_notification', side_effect=slow_send):
+            # Execute
+            accepted = await dispatcher.dispatch(**NOTIFICATION)
+
+            # Assert: encolada pero aún no entregada
+            assert accepted is True
+            assert not delivered.is_set()
+            assert await dispatcher.drain(timeout=1) is True
+            assert delivered.is_set()
+            assert dispatcher.stats()['delivered'] == 1
+
+    @pytest.mark.asyncio
+    async def test_retries_with_backoff_until_success(self):
+        # Setup
+        dispatcher = queue_dispatcher()
+        send = AsyncMock(side_effect=[Exception("SES throttling"), Exception("SES throttling"), True])
+
+        with patch('app.services.notificacion_service.NotificacionService.send_notification', send):
+            # Execute
+            await dispatcher.dispatch(**NOTIFICATION)
+            await dispatcher.drain(timeout=1)
+
+        # Assert
+        assert send.call_count == 3
+        send.assert_called_with(**NOTIFICATION)
+        assert dispatcher.stats()['delivered'] == 1
+        assert dispatcher.stats()['failed'] == 0
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_attempts(self):
+        # Setup
+        dispatcher = queue_dispatcher(max_attempts=2)
+        send = AsyncMock(side_effect=Exception("SES unavailable"))
+
+        with patch('app.services.notificacion_service.NotificacionService.send_notification', send):
+            # Execute
+            await dispatcher.dispatch(**NOTIFICATION)
+            await dispatcher.drain(timeout=1)
+
+        # Assert
+        assert send.call_count == 2
+        assert dispatcher.stats()['failed'] == 1
+
+    @pytest.mark.asyncio
+    async def test_definitive_failure_is_not_retried(self):
+        # Setup
+        dispatcher = queue_dispatcher()
+        send = AsyncMock(return_value=False)
+
+        with patch('app.services.notificacion_service.NotificacionService.send_notification', send):
+            # Execute
+            await dispatcher.dispatch(**NOTIFICATION)
+            await dispatcher.drain(timeout=1)
+
+        # Assert
+        send.assert_called_once()
+        assert dispatcher.stats()['failed'] == 1
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_without_blocking(self):
+        # Setup: un worker bloqueado y capacidad para una sola notificación
+        dispatcher = queue_dispatcher(max_size=1, workers=1)
+        release = asyncio.Event()
+
+        async def blocked_send(**kwargs):
+            await release.wait()
+            return True
+
+        with patch('app.services.notificacion_service.NotificacionService.send_notification', side_effect=blocked_send):
+            await dispatcher.dispatch(**NOTIFICATION)
+            await asyncio.sleep(0)  # El worker toma la primera notificación
+
+            # Execute
+            second = await dispatcher.dispatch(**NOTIFICATION)
+            third = await dispatcher.dispatch(**NOTIFICATION)
+            release.set()
+            await dispatcher.drain(timeout=1)
+
+        # Assert
+        assert second is True
+        assert third is False
+        assert dispatcher.stats()['dropped'] == 1
+        assert dispatcher.stats()['delivered'] == 2
+
+    @pytest.mark.asyncio
+    async def test_drain_times_out_with_pending_notifications(self):
+        # Setup
+        dispatcher = queue_dispatcher(workers=1)
+
+        async def never_returns(**kwargs):
+            await asyncio.Event().wait()
+
+        with patch('app.services.notificacion_service.NotificacionService.send_notification', side_effect=never_returns):
+            await dispatcher.dispatch(**NOTIFICATION)
+
+            # Execute
+            drained = await dispatcher.drain(timeout=0.05)
+
+        # Assert
+        assert drained is False
+        assert dispatcher.stats()['pending'] == 0
+
+    @pytest.mark.asyncio
+    async def test_inline_dispatcher_delivers_before_returning(self):
+        # Setup
+        dispatcher = InlineNotificationDispatcher(max_attempts=3, backoff_seconds=0.001)
+        send = AsyncMock(return_value=True)
+
+        with patch('app.services.notificacion_service.NotificacionService.send_notification', send):
+            # Execute
+            await dispatcher.dispatch(**NOTIFICATION)
+
+        # Assert
+        send.assert_called_once_with(**NOTIFICATION)
+        assert dispatcher.stats() == {'mode': 'inline', 'delivered': 1, 'failed': 0, 'dropped': 0}
+
+    def test_create_dispatcher_rejects_unknown_mode(self):
+        # Execute / Assert
+        assert create_dispatcher('inline').mode == 'inline'
+        assert create_dispatcher('queue').mode == 'queue'
+        assert create_dispatcher('outbox').mode == 'outbox'
+        with pytest.raises(ValueError):
+            create_dispatcher('smtp')
+
+
+class TestOutboxDispatcher:
+
+    def test_transaction_item_is_a_typed_put_on_the_outbox_table(self):
+        # Setup
+        dispatcher = OutboxNotificationDispatcher('Outbox', MagicMock())
+
+        # Execute
+        item = dispatcher.transaction_item(**NOTIFICATION)
+        dispatcher.recorded()
+
+        # Assert: nothing is written until the operation's transaction commits
+        assert item['Put']['TableName'] == 'Outbox'
+        assert item['Put']['Item']['clientId'] == {'S': 'C123456'}
+        assert item['Put']['Item']['status'] == {'S': 'PENDING'}
+        assert 'phone' not in item['Put']['Item']
+        assert dispatcher.stats()['recorded'] == 1
+        dispatcher.table.put_item.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_dispatch_records_the_notification(self):
+        # Setup
+        database = create_app_tables()
+        outbox = database.Table(settings.NOTIFICATION_OUTBOX_TABLE_NAME)
+        dispatcher = OutboxNotificationDispatcher(settings.NOTIFICATION_OUTBOX_TABLE_NAME, outbox)
+
+        # Execute
+        accepted = await dispatcher.dispatch(**NOTIFICATION)
+
+        # Assert
+        items = outbox.scan()['Items']
+        assert accepted is True
+        assert len(items) == 1
+        assert items[0]['email'] == 'cliente@ejemplo.com'
+        assert 'phone' not in items[0]
+
+    @pytest.mark.asyncio
+    async def test_dispatch_failure_is_counted_as_dropped(self):
+        # Setup
+        table = MagicMock()
+        table.put_item.side_effect = ClientError({'Error': {'Code': 'InternalServerError', 'Message': 'boom'}}, 'PutItem')
+        dispatcher = OutboxNotificationDispatcher('Outbox', table)
+
+        # Execute
+        accepted = await dispatcher.dispatch(**NOTIFICATION)
+
+        # Assert
+        assert accepted is False
+        assert dispatcher.stats()['dropped'] == 1
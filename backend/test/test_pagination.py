@@ -0,0 +1,45 @@
+import pytest
+from decimal import Decimal
+from app.services.pagination import encode_page_token, decode_page_token
+
+
+class TestPagination:
+
+    def test_round_trip(self):
+        # Setup
+        key = {'clientId': 'C123456', 'transactionId': 'tx-1', 'transactionDate': '2025-03-28T12:00:00'}
+
+        # Execute
+        token = encode_page_token(key)
+        decoded = decode_page_token(token, ('clientId', 'transactionId', 'transactionDate'), clientId='C123456')
+
+        # Assert
+        assert decoded == key
+        assert '=' not in token
+
+    def test_round_trip_keeps_numbers(self):
+        # Setup
+        key = {'clientId': 'C123456', 'amount': Decimal('75000.5')}
+
+        # Execute
+        decoded = decode_page_token(encode_page_token(key), ('clientId', 'amount'))
+
+        # Assert
+        assert decoded['amount'] == Decimal('75000.5')
+
+    def test_no_more_pages(self):
+        assert encode_page_token(None) is None
+        assert encode_page_token({}) is None
+
+    @pytest.mark.parametrize('token', ['basura', '', '!!!', encode_page_token({'otro': 'x'})])
+    def test_invalid_token(self, token):
+        with pytest.raises(ValueError):
+            decode_page_token(token, ('clientId', 'transactionId', 'transactionDate'))
+
+    def test_token_for_another_client(self):
+        # Setup
+        token = encode_page_token({'clientId': 'C999999', 'transactionId': 'tx-1', 'transactionDate': 'x'})
+
+        # Execute / Assert
+        with pytest.raises(ValueError):
+            decode_page_token(token, ('clientId', 'transactionId', 'transactionDate'), clientId='C123456')
@@ -0,0 +1,95 @@
+import json
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from boto3.dynamodb.types import TypeSerializer
+from app.models.transaccion import Transaccion, Subscription
+from app.models.cliente import Cliente
+from app.services.serialization import (
+    serialize_item, serialize_value, deserialize_item, json_friendly, json_number
+)
+
+
+@pytest.fixture
+def sample_transaction():
+    return Transaccion(
+        transactionId='00000000-0000-0000-0000-000000000001',
+        clientId='C123456',
+        fundId='1',
+        type='SUBSCRIPTION',
+        amount=75000.0,
+        transactionDate=datetime(2025, 3, 28, 12, 0, 0)
+    )
+
+
+def boto3_typed(model):
+    """Previous write path: model.dict() + recursive float/datetime conversion + TypeSerializer"""
+    serializer = TypeSerializer()
+    converted = {}
+    for key, value in model.dict().items():
+        if isinstance(value, float):
+            value = Decimal(str(value))
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        converted[key] = serializer.serialize(value)
+    return converted
+
+
+class TestSerialization:
+
+    def test_serialize_model_matches_previous_write_path(self, sample_transaction):
+        # Setup
+        subscription = Subscription(clientId='C123456', fundId='3', amountSubscribed=50000.5,
+                                    subscriptionDate=datetime(2025, 3, 28, 12, 0, 0))
+        client = Cliente(clientId='C123456', email='cliente@ejemplo.com')
+
+        # Execute / Assert
+        for model in (sample_transaction, subscription, client):
+            assert serialize_item(model) == boto3_typed(model)
+
+    def test_serialize_item_types(self, sample_transaction):
+        # Execute
+        result = serialize_item(sample_transaction)
+
+        # Assert
+        assert result['amount'] == {'N': '75000.0'}
+        assert result['transactionDate'] == {'S': '2025-03-28T12:00:00'}
+        assert result['type'] == {'S': 'SUBSCRIPTION'}
+
+    def test_serialize_value_nested_and_special_types(self):
+        # Execute / Assert
+        assert serialize_value({'a': [10.5, 'x', True, None]}) == {'M': {'a': {'L': [
+            {'N': '10.5'}, {'S': 'x'}, {'BOOL': True}, {'NULL': True}
+        ]}}}
+        assert serialize_value(Decimal('125000')) == {'N': '125000'}
+        assert serialize_value({'1', '3'}) == {'SS': ['1', '3']}
+        assert sorted(serialize_value({1, 2})['NS']) == ['1', '2']
+        with pytest.raises(TypeError):
+            serialize_value(float('nan'))
+        with pytest.raises(TypeError):
+            serialize_value(set())
+        with pytest.raises(TypeError):
+            serialize_value(object())
+
+    def test_deserialize_item_returns_json_numbers(self, sample_transaction):
+        # Execute
+        result = deserialize_item(serialize_item(sample_transaction))
+
+        # Assert
+        assert result['amount'] == 75000.0
+        assert isinstance(result['amount'], float)
+        assert deserialize_item({'balance': {'N': '500000'}}) == {'balance': 500000}
+        assert deserialize_item({'ids': {'SS': ['3', '1']}}) == {'ids': ['1', '3']}
+
+    def test_json_friendly_handles_decimals(self):
+        # Setup
+        item = {'balance': Decimal('500000'), 'amount': Decimal('75000.50'), 'funds': {'1'}, 'tags': [Decimal('1')]}
+
+        # Execute
+        result = json_friendly(item)
+
+        # Assert
+        assert result == {'balance': 500000, 'amount': 75000.5, 'funds': ['1'], 'tags': [1]}
+        json.dumps(result)
+        assert json_number('1.5E+3') == 1500
+        assert json_number(Decimal('10.0')) == 10.0
@@ -0,0 +1,171 @@
+import asyncio
+import time
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+from botocore.exceptions import ClientError
+from app.config import settings
+from app.services.cliente_service import ClienteService, client_cache
+from app.services.fondo_service import FondoService, fund_catalog
+from app.services.metrics import metrics
+from app.services.single_flight import SingleFlight
+
+
+def slow_get_item(item, delay=0.05):
+    """get_item that takes long enough for concurrent callers to overlap"""
+    def get_item(**kwargs):
+        time.sleep(delay)
+        return {'Item': dict(item)}
+    return get_item
+
+
+class TestSingleFlight:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        # Setup
+        flight = SingleFlight()
+        release = asyncio.Event()
+        calls = []
+
+        async def read():
+            calls.append(1)
+            await release.wait()
+            return {'balance': Decimal('10')}
+
+        # Execute
+        callers = [asyncio.ensure_future(flight.run('Clients', 'C1', read)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*callers)
+
+        # Assert
+        assert len(calls) == 1
+        assert results == [{'balance': Decimal('10')}] * 5
+        assert results[0] is not results[1]
+        assert flight.stats() == {'enabled': True, 'inFlight': 0, 'executed': 1, 'coalesced': 4}
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_caller_and_next_call_runs_again(self):
+        # Setup
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def failing_read():
+            await release.wait()
+            raise RuntimeError('boom')
+
+        # Execute
+        callers = [asyncio.ensure_future(flight.run('Funds', '1', failing_read)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+
+        # Assert
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert await flight.run('Funds', '1', lambda: asyncio.sleep(0, result='ok')) == 'ok'
+        assert flight.executed == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_cancel_the_shared_read(self):
+        # Setup
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def read():
+            await release.wait()
+            return 'item'
+
+        leader = asyncio.ensure_future(flight.run('Clients', 'C1', read))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.run('Clients', 'C1', read))
+        await asyncio.sleep(0)
+
+        # Execute
+        leader.cancel()
+        release.set()
+
+        # Assert
+        assert await follower == 'item'
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    @pytest.mark.asyncio
+    async def test_disabled_runs_every_call(self):
+        # Setup
+        flight = SingleFlight()
+        calls = []
+
+        async def read():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+
+        # Execute
+        with patch.object(settings, 'SINGLE_FLIGHT_ENABLED', False):
+            await asyncio.gather(*(flight.run('Clients', 'C1', read) for _ in range(3)))
+
+        # Assert
+        assert len(calls) == 3
+
+
+class TestServiceCoalescing:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_client_reads_issue_one_get_item(self):
+        # Setup
+        metrics.reset()
+        with patch('app.services.cliente_service.table') as mock_table:
+            mock_table.get_item.side_effect = slow_get_item({'clientId': 'C1', 'balance': Decimal('100')})
+
+            # Execute
+            results = await asyncio.gather(*(ClienteService.get_client('C1') for _ in range(10)))
+
+        # Assert
+        assert mock_table.get_item.call_count == 1
+        assert all(result['balance'] == Decimal('100') for result in results)
+        assert metrics.counter_value('singleflight_reads_total', table=settings.CLIENTS_TABLE_NAME,
+                                     result='coalesced') == 9
+
+    @pytest.mark.asyncio
+    async def test_client_read_does_not_join_a_flight_started_before_a_write(self):
+        # Setup
+        with patch('app.services.cliente_service.table') as mock_table:
+            mock_table.get_item.side_effect = slow_get_item({'clientId': 'C1', 'balance': Decimal('100')})
+            before = asyncio.ensure_future(ClienteService.get_client('C1'))
+            await asyncio.sleep(0)
+
+            # Execute: a write from this instance starts while the first read is in flight
+            with client_cache.writing('C1'):
+                after = await ClienteService.get_client('C1')
+            await before
+
+        # Assert
+        assert after['balance'] == Decimal('100')
+        assert mock_table.get_item.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_client_read_error_is_logged_for_every_caller(self):
+        # Setup
+        error = ClientError({'Error': {'Code': 'InternalServerError', 'Message': 'boom'}}, 'GetItem')
+        with patch('app.services.cliente_service.table') as mock_table:
+            mock_table.get_item.side_effect = error
+
+            # Execute
+            results = await asyncio.gather(*(ClienteService.get_client('C1') for _ in range(3)))
+
+        # Assert
+        assert results == [None, None, None]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_fund_reads_without_catalog_cache_issue_one_get_item(self):
+        # Setup
+        with patch.object(fund_catalog, 'ttl_seconds', 0), \
+                patch('app.services.fondo_service.table') as mock_table:
+            mock_table.get_item.side_effect = slow_get_item({'fundId': '1', 'name': 'FPV'})
+
+            # Execute
+            results = await asyncio.gather(*(FondoService.get_fund('1') for _ in range(5)))
+
+        # Assert
+        assert mock_table.get_item.call_count == 1
+        assert [result['name'] for result in results] == ['FPV'] * 5
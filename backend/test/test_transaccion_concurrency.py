@@ -0,0 +1,354 @@
+import pytest
+import asyncio
+from decimal import Decimal
+from unittest.mock import patch, AsyncMock
+from app.config import settings
+from app.models.transaccion import TransaccionCreate
+from app.services.fondo_service import fund_catalog
+from app.services.notification_queue import OutboxNotificationDispatcher, drain_notifications
+from app.services.transaccion_service import TransaccionService
+from app.services.memory_engine import create_app_tables
+
+FUNDS = [
+    {'fundId': '1', 'name': 'FPV_EL CLIENTE_RECAUDADORA', 'category': 'FPV', 'minimumAmount': Decimal('75000')},
+    {'fundId': '2', 'name': 'FPV_EL CLIENTE_ECOPETROL', 'category': 'FPV', 'minimumAmount': Decimal('125000')},
+    {'fundId': '3', 'name': 'DEUDAPRIVADA', 'category': 'FIC', 'minimumAmount': Decimal('50000')},
+    {'fundId': '4', 'name': 'FDO-ACCIONES', 'category': 'FIC', 'minimumAmount': Decimal('250000')},
+    {'fundId': '5', 'name': 'FPV_EL CLIENTE_DINAMICA', 'category': 'FPV', 'minimumAmount': Decimal('100000')},
+]
+
+
+@pytest.fixture
+def local_dynamodb():
+    """Servicios apuntando a un DynamoDB en memoria con 5 ms de latencia por llamada"""
+    database = create_app_tables()
+    database.latency = 0.005
+    for fund in FUNDS:
+        database.Table(settings.FUNDS_TABLE_NAME).put_item(Item=fund)
+    database.Table(settings.CLIENTS_TABLE_NAME).put_item(Item={
+        'clientId': 'C123456',
+        'balance': Decimal('500000'),
+        'preferredNotification': 'email',
+        'email': 'cliente@ejemplo.com'
+    })
+
+    # Registrar cada saldo escrito para comprobar que nunca fue negativo
+    balances = []
+    database.listeners.append(
+        lambda table, item: balances.append(item['balance']) if table == settings.CLIENTS_TABLE_NAME else None
+    )
+    database.balances = balances
+
+    fund_catalog.invalidate()
+    with patch('app.services.cliente_service.table', database.Table(settings.CLIENTS_TABLE_NAME)), \
+            patch('app.services.fondo_service.table', database.Table(settings.FUNDS_TABLE_NAME)), \
+            patch('app.services.transaccion_service.subscription_table', database.Table(settings.SUBSCRIPTIONS_TABLE_NAME)), \
+            patch('app.services.transaccion_service.transaction_table', database.Table(settings.TRANSACTIONS_TABLE_NAME)), \
+            patch('app.services.transaccion_service.dynamodb_client', database.meta.client), \
+            patch('app.services.idempotency.idempotency_table', database.Table(settings.IDEMPOTENCY_TABLE_NAME)), \
+            patch('app.services.notificacion_service.NotificacionService.send_notification',
+                  new_callable=AsyncMock, return_value=True):
+        yield database
+    fund_catalog.invalidate()
+
+
+def client_item(database):
+    return database.Table(settings.CLIENTS_TABLE_NAME).get_item(Key={'clientId': 'C123456'})['Item']
+
+
+def stored_items(database, table_name):
+    return list(database.Table(table_name).items.values())
+
+
+@pytest.fixture
+def outbox_mode(local_dynamodb):
+    """Dispatcher en modo outbox sobre el mismo DynamoDB en memoria"""
+    dispatcher = OutboxNotificationDispatcher(settings.NOTIFICATION_OUTBOX_TABLE_NAME,
+                                              local_dynamodb.Table(settings.NOTIFICATION_OUTBOX_TABLE_NAME))
+    with patch('app.services.notification_queue.notification_dispatcher', dispatcher):
+        yield dispatcher
+
+
+class TestTransaccionConcurrency:
+
+    @pytest.mark.asyncio
+    async def test_parallel_subscriptions_never_overdraw(self, local_dynamodb):
+        # Setup: 10 intentos simultáneos por cada uno de los 5 fondos (600.000 en mínimos > 500.000 de saldo)
+        requests = [TransaccionCreate(fundId=fund['fundId']) for fund in FUNDS for _ in range(10)]
+
+        # Execute
+        results = await asyncio.gather(*(
+            TransaccionService.create_subscription('C123456', request) for request in requests
+        ))
+
+        # Assert
+        completed = [r for r in results if r.get('status') == 'COMPLETED']
+        subscriptions = stored_items(local_dynamodb, settings.SUBSCRIPTIONS_TABLE_NAME)
+        transactions = stored_items(local_dynamodb, settings.TRANSACTIONS_TABLE_NAME)
+        final_balance = client_item(local_dynamodb)['balance']
+
+        assert all(balance >= 0 for balance in local_dynamodb.balances)
+        assert final_balance >= 0
+        # Cada fondo se suscribe como máximo una vez
+        assert len({r['fundId'] for r in completed}) == len(completed)
+        assert len(subscriptions) == len(completed) == len(transactions)
+        # El saldo final coincide exactamente con lo debitado
+        debited = sum(Decimal(str(r['amount'])) for r in completed)
+        assert final_balance == Decimal('500000') - debited
+        # El resumen de cartera se actualizó en la misma escritura que cada débito
+        portfolio = client_item(local_dynamodb)
+        assert portfolio.get('activeFundIds', set()) == {r['fundId'] for r in completed}
+        assert portfolio['totalInvested'] == debited
+        categories = {fund['fundId']: fund['category'] for fund in FUNDS}
+        for category in ('FPV', 'FIC'):
+            expected = len([r for r in completed if categories[r['fundId']] == category])
+            assert portfolio.get(f'activeCount_{category}', 0) == expected
+        assert all(r['status'] == 'FAILED' for r in results if r not in completed)
+
+    @pytest.mark.asyncio
+    async def test_parallel_cancellations_refund_once(self, local_dynamodb):
+        # Setup
+        result = await TransaccionService.create_subscription('C123456', TransaccionCreate(fundId='1'))
+        assert result['status'] == 'COMPLETED'
+
+        # Execute: 10 cancelaciones simultáneas de la misma suscripción
+        results = await asyncio.gather(*(
+            TransaccionService.cancel_subscription('C123456', '1') for _ in range(10)
+        ))
+
+        # Assert: solo una reintegra el saldo
+        completed = [r for r in results if r.get('status') == 'COMPLETED']
+        assert len(completed) == 1
+        assert client_item(local_dynamodb)['balance'] == Decimal('500000')
+        portfolio = client_item(local_dynamodb)
+        assert 'activeFundIds' not in portfolio
+        assert portfolio['totalInvested'] == 0
+        assert portfolio['activeCount_FPV'] == 0
+        cancellations = [t for t in stored_items(local_dynamodb, settings.TRANSACTIONS_TABLE_NAME)
+                         if t['type'] == 'CANCELLATION']
+        assert len(cancellations) == 1
+
+    @pytest.mark.asyncio
+    async def test_parallel_subscriptions_report_committed_balances(self, local_dynamodb):
+        # Execute: two subscriptions racing on the same 500000 balance
+        results = await asyncio.gather(
+            TransaccionService.create_subscription('C123456', TransaccionCreate(fundId='1')),
+            TransaccionService.create_subscription('C123456', TransaccionCreate(fundId='3'))
+        )
+
+        # Assert: each reported balance is one of the states actually written, and the last is the stored one
+        assert all(r['status'] == 'COMPLETED' for r in results)
+        reported = sorted(r['balance'] for r in results)
+        assert reported == sorted(local_dynamodb.balances)
+        assert reported[0] == client_item(local_dynamodb)['balance'] == Decimal('375000')
+
+    @pytest.mark.asyncio
+    async def test_stale_cached_client_does_not_leak_into_the_reported_balance(self, local_dynamodb):
+        # Setup: the client is cached, then another instance debits 100000
+        from app.services.cliente_service import ClienteService
+        await ClienteService.get_client('C123456')
+        local_dynamodb.Table(settings.CLIENTS_TABLE_NAME).update_item(
+            Key={'clientId': 'C123456'}, UpdateExpression="SET balance = balance - :a ADD revision :one",
+            ExpressionAttributeValues={':a': Decimal('100000'), ':one': 1}
+        )
+
+        # Execute: balance check served from the (stale) cache
+        with patch.object(settings, 'CLIENT_CONSISTENT_READS', False):
+            result = await TransaccionService.create_subscription('C123456', TransaccionCreate(fundId='1'))
+
+        # Assert
+        assert result['balance'] == client_item(local_dynamodb)['balance'] == Decimal('325000')
+
+    @pytest.mark.asyncio
+    async def test_balance_is_omitted_when_every_guarded_attempt_conflicts(self, local_dynamodb):
+        # Setup: another writer changes the client right before each guarded attempt
+        from app.services.transaccion_service import GUARDED_WRITE_ATTEMPTS
+        client = local_dynamodb.meta.client
+        original = client.transact_write_items
+        attempts = []
+
+        def interfering_write(**kwargs):
+            attempts.append(1)
+            if len(attempts) <= GUARDED_WRITE_ATTEMPTS:
+                local_dynamodb.Table(settings.CLIENTS_TABLE_NAME).update_item(
+                    Key={'clientId': 'C123456'}, UpdateExpression="ADD revision :one",
+                    ExpressionAttributeValues={':one': 1}
+                )
+            return original(**kwargs)
+
+        # Execute
+        with patch.object(client, 'transact_write_items', side_effect=interfering_write):
+            result = await TransaccionService.create_subscription('C123456', TransaccionCreate(fundId='1'))
+
+        # Assert: committed without the revision guard, so no balance is reported
+        assert result['status'] == 'COMPLETED'
+        assert 'balance' not in result
+        assert len(attempts) == GUARDED_WRITE_ATTEMPTS + 1
+        assert client_item(local_dynamodb)['balance'] == Decimal('425000')
+
+    @pytest.mark.asyncio
+    async def test_response_does_not_wait_for_notification(self, local_dynamodb):
+        # Setup: un envío de notificación que tarda 300 ms
+        delivered = asyncio.Event()
+
+        async def slow_send(**kwargs):
+            await asyncio.sleep(0.3)
+            delivered.set()
+            return True
+
+        with patch('app.services.notificacion_service.NotificacionService.send_notification', side_effect=slow_send):
+            # Execute
+            start = asyncio.get_running_loop().time()
+            result = await TransaccionService.create_subscription('C123456', TransaccionCreate(fundId='1'))
+            elapsed = asyncio.get_running_loop().time() - start
+
+            # Assert: la respuesta llega con la escritura confirmada y la notificación se entrega después
+            assert result['status'] == 'COMPLETED'
+            assert elapsed < 0.3
+            assert not delivered.is_set()
+            assert await drain_notifications(timeout=1) is True
+            assert delivered.is_set()
+
+    @pytest.mark.asyncio
+    async def test_active_subscriptions_index_only_reads_active_rows(self, local_dynamodb):
+        # Setup: historial largo de suscripciones canceladas y dos activas
+        subscriptions = local_dynamodb.Table(settings.SUBSCRIPTIONS_TABLE_NAME)
+        for i in range(30):
+            subscriptions.put_item(Item={'clientId': 'C123456', 'fundId': f'old-{i}', 'status': 'CANCELLED',
+                                         'amountSubscribed': Decimal('50000')})
+        for fund_id in ('1', '3', '5'):
+            assert (await TransaccionService.create_subscription('C123456', TransaccionCreate(fundId=fund_id)))['status'] == 'COMPLETED'
+        assert (await TransaccionService.cancel_subscription('C123456', '5'))['status'] == 'COMPLETED'
+
+        # Execute
+        responses = []
+        original_query = subscriptions.query
+
+        def recorded_query(**kwargs):
+            responses.append(original_query(**kwargs))
+            return responses[-1]
+
+        with patch.object(subscriptions, 'query', side_effect=recorded_query):
+            result = await TransaccionService.get_client_active_subscriptions('C123456', with_fund_names=False)
+
+        # Assert: la consulta solo recorre (y factura) las filas activas
+        assert sorted(s['fundId'] for s in result) == ['1', '3']
+        assert [r['ScannedCount'] for r in responses] == [2]
+        assert 'activeSince' not in subscriptions.get_item(Key={'clientId': 'C123456', 'fundId': '5'})['Item']
+
+    @pytest.mark.asyncio
+    async def test_retries_with_same_idempotency_key_debit_once(self, local_dynamodb):
+        # Execute: the client retries the same request 5 times in parallel, then once more
+        results = await asyncio.gather(*(
+            TransaccionService.create_subscription('C123456', TransaccionCreate(fundId='1'), 'retry-1')
+            for _ in range(5)
+        ))
+        for table in local_dynamodb.tables.values():
+            table.calls.clear()
+        replay = await TransaccionService.create_subscription('C123456', TransaccionCreate(fundId='1'), 'retry-1')
+        replay_calls = {name: list(table.calls) for name, table in local_dynamodb.tables.items()}
+
+        # Assert: one debit, every attempt gets the same response
+        assert client_item(local_dynamodb)['balance'] == Decimal('425000')
+        assert len(stored_items(local_dynamodb, settings.TRANSACTIONS_TABLE_NAME)) == 1
+        assert {r['transactionId'] for r in results + [replay]} == {results[0]['transactionId']}
+        assert all(r['status'] == 'COMPLETED' and r['fundName'] == 'FPV_EL CLIENTE_RECAUDADORA'
+                   for r in results + [replay])
+        # The replay is a single read of the idempotency table
+        assert replay_calls[settings.IDEMPOTENCY_TABLE_NAME] == ['GetItem']
+        assert replay_calls[settings.CLIENTS_TABLE_NAME] == []
+        assert replay_calls[settings.FUNDS_TABLE_NAME] == []
+
+    @pytest.mark.asyncio
+    async def test_retried_cancellation_refunds_once(self, local_dynamodb):
+        # Setup
+        await TransaccionService.create_subscription('C123456', TransaccionCreate(fundId='1'))
+
+        # Execute
+        first = await TransaccionService.cancel_subscription('C123456', '1', 'cancel-1')
+        retry = await TransaccionService.cancel_subscription('C123456', '1', 'cancel-1')
+        without_key = await TransaccionService.cancel_subscription('C123456', '1')
+
+        # Assert
+        assert first['status'] == 'COMPLETED'
+        # Same JSON body (the stored copy keeps the date as its ISO string)
+        assert retry == {**first, 'transactionDate': first['transactionDate'].isoformat()}
+        assert without_key['status'] == 'FAILED'
+        assert client_item(local_dynamodb)['balance'] == Decimal('500000')
+
+    @pytest.mark.asyncio
+    async def test_idempotency_key_reused_for_other_operation(self, local_dynamodb):
+        # Setup
+        await TransaccionService.create_subscription('C123456', TransaccionCreate(fundId='1'), 'retry-1')
+
+        # Execute
+        result = await TransaccionService.create_subscription('C123456', TransaccionCreate(fundId='3'), 'retry-1')
+        other_client = await TransaccionService.cancel_subscription('C999999', '1', 'retry-1')
+
+        # Assert: rejected without writing; keys are scoped per client
+        assert result == {"error": "La clave de idempotencia ya se usó para otra operación", "status": "FAILED"}
+        assert client_item(local_dynamodb)['balance'] == Decimal('425000')
+        assert other_client['error'] == "No está suscrito a este fondo"
+
+    @pytest.mark.asyncio
+    async def test_expired_idempotency_key_is_not_replayed(self, local_dynamodb):
+        # Setup: a record past its TTL that DynamoDB has not deleted yet
+        first = await TransaccionService.create_subscription('C123456', TransaccionCreate(fundId='1'), 'retry-1')
+        await TransaccionService.cancel_subscription('C123456', '1')
+        keys = local_dynamodb.Table(settings.IDEMPOTENCY_TABLE_NAME)
+        for item in keys.items.values():
+            item['expiresAt'] = Decimal('1')
+
+        # Execute
+        second = await TransaccionService.create_subscription('C123456', TransaccionCreate(fundId='1'), 'retry-1')
+
+        # Assert: treated as a new request and the record is replaced
+        assert second['status'] == 'COMPLETED'
+        assert second['transactionId'] != first['transactionId']
+        assert next(iter(keys.items.values()))['response']['transactionId'] == second['transactionId']
+
+    @pytest.mark.asyncio
+    async def test_history_reads_newest_first_from_base_table(self, local_dynamodb):
+        # Setup
+        for fund_id in ('1', '3'):
+            await TransaccionService.create_subscription('C123456', TransaccionCreate(fundId=fund_id))
+        await TransaccionService.cancel_subscription('C123456', '1')
+
+        # Execute
+        first = await TransaccionService.get_client_transactions_page('C123456', 2, with_fund_names=False)
+        second = await TransaccionService.get_client_transactions_page('C123456', 2, first['nextToken'],
+                                                                        with_fund_names=False)
+
+        # Assert
+        history = [(t['type'], t['fundId']) for t in first['items'] + second['items']]
+        assert history == [('CANCELLATION', '1'), ('SUBSCRIPTION', '3'), ('SUBSCRIPTION', '1')]
+        assert second['nextToken'] is None
+
+    @pytest.mark.asyncio
+    async def test_outbox_record_is_committed_with_the_subscription(self, local_dynamodb, outbox_mode):
+        # Execute: five subscriptions fit in the balance, fund 4 (250000) does not
+        results = await asyncio.gather(*(
+            TransaccionService.create_subscription('C123456', TransaccionCreate(fundId=fund['fundId']))
+            for fund in FUNDS
+        ))
+
+        # Assert: one outbox record per committed subscription, written in its transaction
+        completed = [r for r in results if r['status'] == 'COMPLETED']
+        records = stored_items(local_dynamodb, settings.NOTIFICATION_OUTBOX_TABLE_NAME)
+        assert len(records) == len(completed) == len(stored_items(local_dynamodb, settings.TRANSACTIONS_TABLE_NAME))
+        assert {r['message'] for r in records} == {
+            f"Se ha suscrito exitosamente al fondo {r['fundName']}" for r in completed
+        }
+        assert local_dynamodb.Table(settings.NOTIFICATION_OUTBOX_TABLE_NAME).call_count('PutItem') == 0
+        assert outbox_mode.stats()['recorded'] == len(completed)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_transaction_leaves_no_outbox_record(self, local_dynamodb, outbox_mode):
+        # Execute: 10 simultaneous subscriptions to the same fund, only one can commit
+        results = await asyncio.gather(*(
+            TransaccionService.create_subscription('C123456', TransaccionCreate(fundId='1')) for _ in range(10)
+        ))
+
+        # Assert
+        assert sum(1 for r in results if r['status'] == 'COMPLETED') == 1
+        assert len(stored_items(local_dynamodb, settings.NOTIFICATION_OUTBOX_TABLE_NAME)) == 1
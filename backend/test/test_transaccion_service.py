@@ -5,7 +5,7 @@ from decimal import Decimal
 from datetime import datetime
 from unittest.mock import patch, MagicMock, ANY, AsyncMock  
 from app.models.transaccion import TransaccionCreate, Transaccion, Subscription
-from app.services.transaccion_service import TransaccionService, convert_types_for_dynamodb
+from app.services.transaccion_service import TransaccionService
 
 # Fixtures
 @pytest.fixture
@@ -18,6 +18,19 @@ def mock_subscription_table():
     with patch('app.services.transaccion_service.subscription_table') as mock_table:
         yield mock_table
 
+@pytest.fixture
+def mock_dynamodb_client():
+    with patch('app.services.transaccion_service.dynamodb_client') as mock_client:
+        yield mock_client
+
+def transaction_cancelled(*codes):
+    """ClientError equivalente a un TransactWriteItems cancelado con los códigos indicados"""
+    from botocore.exceptions import ClientError
+    return ClientError({
+        'Error': {'Code': 'TransactionCanceledException', 'Message': 'Transaction cancelled'},
+        'CancellationReasons': [{'Code': code} for code in codes]
+    }, 'TransactWriteItems')
+
 @pytest.fixture
 def mock_cliente_service():
     with patch('app.services.transaccion_service.ClienteService') as mock_service:
@@ -31,12 +44,13 @@ def mock_fondo_service():
     with patch('app.services.transaccion_service.FondoService') as mock_service:
         # Configure get_fund to return a coroutine that resolves to the desired value
         mock_service.get_fund = AsyncMock()
+        mock_service.get_funds_by_ids = AsyncMock()
         yield mock_service
 
 @pytest.fixture
 def mock_notificacion_service():
-    with patch('app.services.transaccion_service.NotificacionService') as mock_service:
-        yield mock_service
+    with patch('app.services.transaccion_service.dispatch_notification', new_callable=AsyncMock) as mock_dispatch:
+        yield mock_dispatch
 
 @pytest.fixture
 def sample_client_data():
@@ -61,7 +75,7 @@ class TestTransaccionService:
     
     @pytest.mark.asyncio
     async def test_create_subscription_success(
-        self, mock_transaction_table, mock_subscription_table,
+        self, mock_transaction_table, mock_subscription_table, mock_dynamodb_client,
         mock_cliente_service, mock_fondo_service, mock_notificacion_service,
         sample_client_data, sample_fund_data
     ):
@@ -76,7 +90,7 @@ class TestTransaccionService:
                     new_callable=AsyncMock, return_value=sample_fund_data):
                 with patch('app.services.transaccion_service.ClienteService.update_client_balance', 
                         new_callable=AsyncMock, return_value={'balance': Decimal('425000')}):
-                    with patch('app.services.transaccion_service.NotificacionService.send_notification', 
+                    with patch('app.services.transaccion_service.dispatch_notification', 
                             new_callable=AsyncMock, return_value=True):
                         
                         # Mock subscription check (not already subscribed)
@@ -94,6 +108,24 @@ class TestTransaccionService:
                                 assert result['fundName'] == 'FPV_EL CLIENTE_RECAUDADORA'
                                 assert result['type'] == 'SUBSCRIPTION'
                                 assert result['status'] == 'COMPLETED'
+                                
+                                # Una sola escritura transaccional: débito + suscripción + transacción
+                                mock_dynamodb_client.transact_write_items.assert_called_once()
+                                items = mock_dynamodb_client.transact_write_items.call_args[1]['TransactItems']
+                                # Client read without a revision: the write requires it to still be absent
+                                assert items[0]['Update']['ConditionExpression'] == \
+                                    "balance >= :amount AND attribute_not_exists(#rev)"
+                                assert items[0]['Update']['ExpressionAttributeValues'] == {
+                                    ':amount': {'N': '75000'}, ':fundIds': {'SS': ['1']}, ':c0': {'N': '1'},
+                                    ':one': {'N': '1'}
+                                }
+                                assert items[0]['Update']['ExpressionAttributeNames'] == {
+                                    '#c0': 'activeCount_FPV', '#rev': 'revision'
+                                }
+                                assert items[1]['Put']['Item']['status'] == {'S': 'ACTIVE'}
+                                assert items[2]['Put']['Item']['type'] == {'S': 'SUBSCRIPTION'}
+                                mock_subscription_table.put_item.assert_not_called()
+                                mock_transaction_table.put_item.assert_not_called()
                             
                                 
     @pytest.mark.asyncio
@@ -126,8 +158,8 @@ class TestTransaccionService:
     
     @pytest.mark.asyncio
     async def test_create_subscription_already_subscribed(
-        self, mock_subscription_table, mock_cliente_service, mock_fondo_service,
-        sample_client_data, sample_fund_data
+        self, mock_dynamodb_client, mock_cliente_service, mock_fondo_service,
+        mock_notificacion_service, sample_client_data, sample_fund_data
     ):
         # Setup
         client_id = 'C123456'
@@ -136,14 +168,10 @@ class TestTransaccionService:
         mock_cliente_service.get_client.return_value = sample_client_data
         mock_fondo_service.get_fund.return_value = sample_fund_data
         
-        # Mock existing active subscription
-        mock_subscription_table.get_item.return_value = {
-            'Item': {
-                'clientId': 'C123456',
-                'fundId': '1',
-                'status': 'ACTIVE'
-            }
-        }
+        # La condición de la suscripción (no ACTIVE) falla dentro de la transacción
+        mock_dynamodb_client.transact_write_items.side_effect = transaction_cancelled(
+            'None', 'ConditionalCheckFailed', 'None'
+        )
         
         # Execute
         result = await TransaccionService.create_subscription(client_id, subscription_data)
@@ -152,10 +180,49 @@ class TestTransaccionService:
         assert 'error' in result
         assert result['status'] == 'FAILED'
         assert 'Ya está suscrito a este fondo' in result['error']
+        mock_notificacion_service.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_create_subscription_balance_changed_concurrently(
+        self, mock_dynamodb_client, mock_cliente_service, mock_fondo_service,
+        sample_client_data, sample_fund_data
+    ):
+        # Setup: el saldo leído alcanza, pero otra operación lo consumió antes de escribir
+        mock_cliente_service.get_client.return_value = sample_client_data
+        mock_fondo_service.get_fund.return_value = sample_fund_data
+        mock_dynamodb_client.transact_write_items.side_effect = transaction_cancelled(
+            'ConditionalCheckFailed', 'None', 'None'
+        )
+        
+        # Execute
+        result = await TransaccionService.create_subscription('C123456', TransaccionCreate(fundId='1'))
+        
+        # Assert
+        assert result['status'] == 'FAILED'
+        assert 'No tiene saldo disponible' in result['error']
+    
+    @pytest.mark.asyncio
+    async def test_create_subscription_write_error(
+        self, mock_dynamodb_client, mock_cliente_service, mock_fondo_service,
+        sample_client_data, sample_fund_data
+    ):
+        # Setup
+        from botocore.exceptions import ClientError
+        mock_cliente_service.get_client.return_value = sample_client_data
+        mock_fondo_service.get_fund.return_value = sample_fund_data
+        mock_dynamodb_client.transact_write_items.side_effect = ClientError(
+            {'Error': {'Code': 'InternalServerError', 'Message': 'boom'}}, 'TransactWriteItems'
+        )
+        
+        # Execute
+        result = await TransaccionService.create_subscription('C123456', TransaccionCreate(fundId='1'))
+        
+        # Assert
+        assert result == {"error": "Error al crear suscripción", "status": "FAILED"}
     
     @pytest.mark.asyncio
     async def test_cancel_subscription_success(
-        self, mock_transaction_table, mock_subscription_table,
+        self, mock_transaction_table, mock_subscription_table, mock_dynamodb_client,
         mock_cliente_service, mock_fondo_service, mock_notificacion_service,
         sample_client_data, sample_fund_data
     ):
@@ -180,7 +247,7 @@ class TestTransaccionService:
                     new_callable=AsyncMock, return_value=sample_fund_data):
                 with patch('app.services.transaccion_service.ClienteService.update_client_balance', 
                         new_callable=AsyncMock, return_value={'balance': Decimal('575000')}):
-                    with patch('app.services.transaccion_service.NotificacionService.send_notification', 
+                    with patch('app.services.transaccion_service.dispatch_notification', 
                             new_callable=AsyncMock, return_value=True):
                         
                         # Mock UUID generation for consistent testing
@@ -195,6 +262,14 @@ class TestTransaccionService:
                                 assert result['fundName'] == 'FPV_EL CLIENTE_RECAUDADORA'
                                 assert result['type'] == 'CANCELLATION'
                                 assert result['status'] == 'COMPLETED'
+                                
+                                mock_dynamodb_client.transact_write_items.assert_called_once()
+                                items = mock_dynamodb_client.transact_write_items.call_args[1]['TransactItems']
+                                assert items[0]['Update']['ConditionExpression'] == "#status = :active AND amountSubscribed = :amount"
+                                assert items[1]['Update']['UpdateExpression'].startswith("SET balance = balance + :amount ")
+                                assert items[1]['Update']['ExpressionAttributeValues'][':fundIds'] == {'SS': ['1']}
+                                assert items[2]['Put']['Item']['type'] == {'S': 'CANCELLATION'}
+                                mock_subscription_table.update_item.assert_not_called()
                             
     
     @pytest.mark.asyncio
@@ -214,6 +289,28 @@ class TestTransaccionService:
         assert result['status'] == 'FAILED'
         assert 'No está suscrito a este fondo' in result['error']
     
+    @pytest.mark.asyncio
+    async def test_cancel_subscription_cancelled_concurrently(
+        self, mock_subscription_table, mock_dynamodb_client, mock_cliente_service,
+        mock_fondo_service, mock_notificacion_service, sample_client_data, sample_fund_data
+    ):
+        # Setup: otra petición canceló la suscripción entre la lectura y la escritura
+        mock_subscription_table.get_item.return_value = {
+            'Item': {'clientId': 'C123456', 'fundId': '1', 'status': 'ACTIVE', 'amountSubscribed': Decimal('75000')}
+        }
+        mock_cliente_service.get_client.return_value = sample_client_data
+        mock_fondo_service.get_fund.return_value = sample_fund_data
+        mock_dynamodb_client.transact_write_items.side_effect = transaction_cancelled(
+            'ConditionalCheckFailed', 'None', 'None'
+        )
+        
+        # Execute
+        result = await TransaccionService.cancel_subscription('C123456', '1')
+        
+        # Assert
+        assert result == {"error": "No está suscrito a este fondo", "status": "FAILED"}
+        mock_notificacion_service.assert_not_called()
+    
     @pytest.mark.asyncio
     async def test_get_client_transactions_success(
         self, mock_transaction_table, mock_fondo_service
@@ -241,16 +338,19 @@ class TestTransaccionService:
         
         mock_transaction_table.query.return_value = {'Items': transactions}
         
-        mock_fondo_service.get_fund.side_effect = [
-            {'name': 'FPV_EL CLIENTE_RECAUDADORA'},
-            {'name': 'FPV_EL CLIENTE_ECOPETROL'}
-        ]
+        mock_fondo_service.get_funds_by_ids.return_value = {
+            '1': {'name': 'FPV_EL CLIENTE_RECAUDADORA'},
+            '2': {'name': 'FPV_EL CLIENTE_ECOPETROL'}
+        }
         
         # Execute
         result = await TransaccionService.get_client_transactions(client_id, 2)
         
         # Assert
         mock_transaction_table.query.assert_called_once()
+        assert 'IndexName' not in mock_transaction_table.query.call_args[1]  # base table, no GSI
+        assert mock_transaction_table.query.call_args[1]['ScanIndexForward'] is False
+        mock_fondo_service.get_funds_by_ids.assert_called_once()
         assert len(result) == 2
         assert result[0]['fundName'] == 'FPV_EL CLIENTE_RECAUDADORA'
         assert result[1]['fundName'] == 'FPV_EL CLIENTE_ECOPETROL'
@@ -280,42 +380,202 @@ class TestTransaccionService:
         
         mock_subscription_table.query.return_value = {'Items': subscriptions}
         
-        mock_fondo_service.get_fund.side_effect = [
-            {'name': 'FPV_EL CLIENTE_RECAUDADORA'},
-            {'name': 'DEUDAPRIVADA'}
-        ]
+        mock_fondo_service.get_funds_by_ids.return_value = {
+            '1': {'name': 'FPV_EL CLIENTE_RECAUDADORA'},
+            '3': {'name': 'DEUDAPRIVADA'}
+        }
         
         # Execute
         result = await TransaccionService.get_client_active_subscriptions(client_id)
         
         # Assert
         mock_subscription_table.query.assert_called_once()
+        mock_fondo_service.get_funds_by_ids.assert_called_once()
         assert len(result) == 2
         assert result[0]['fundName'] == 'FPV_EL CLIENTE_RECAUDADORA'
         assert result[1]['fundName'] == 'DEUDAPRIVADA'
     
-    def test_convert_types_for_dynamodb(self):
-        # Test conversion of datetime
-        test_date = datetime(2025, 3, 28, 12, 0, 0)
-        assert convert_types_for_dynamodb(test_date) == '2025-03-28T12:00:00'
-        
-        # Test conversion of float
-        assert convert_types_for_dynamodb(10.5) == Decimal('10.5')
-        
-        # Test conversion of dict with mixed types
-        test_dict = {
-            'float_val': 10.5,
-            'str_val': 'test',
-            'date_val': datetime(2025, 3, 28, 12, 0, 0)
-        }
-        expected = {
-            'float_val': Decimal('10.5'),
-            'str_val': 'test',
-            'date_val': '2025-03-28T12:00:00'
+    @pytest.mark.asyncio
+    async def test_get_client_active_subscriptions_uses_sparse_index_and_paginates(
+        self, mock_subscription_table, mock_fondo_service
+    ):
+        # Setup: dos páginas del índice
+        mock_subscription_table.query.side_effect = [
+            {'Items': [{'clientId': 'C123456', 'fundId': '1', 'status': 'ACTIVE'}],
+             'LastEvaluatedKey': {'clientId': 'C123456', 'fundId': '1', 'activeSince': '2025-03-28T12:00:00'}},
+            {'Items': [{'clientId': 'C123456', 'fundId': '3', 'status': 'ACTIVE'}]}
+        ]
+        mock_fondo_service.get_funds_by_ids.return_value = {}
+        
+        # Execute
+        result = await TransaccionService.get_client_active_subscriptions('C123456')
+        
+        # Assert
+        assert [s['fundId'] for s in result] == ['1', '3']
+        first, second = mock_subscription_table.query.call_args_list
+        assert first[1]['IndexName'] == 'ActiveSubscriptions'
+        assert 'FilterExpression' not in first[1]
+        assert second[1]['ExclusiveStartKey'] == {
+            'clientId': 'C123456', 'fundId': '1', 'activeSince': '2025-03-28T12:00:00'
         }
-        assert convert_types_for_dynamodb(test_dict) == expected
+    
+    @pytest.mark.asyncio
+    async def test_get_client_transactions_page_continuation(
+        self, mock_transaction_table, mock_fondo_service
+    ):
+        # Setup
+        client_id = 'C123456'
+        last_key = {'clientId': client_id, 'transactionId': 'tx-2'}
+        mock_transaction_table.query.side_effect = [
+            {'Items': [{'transactionId': 'tx-1', 'fundId': '1'}, {'transactionId': 'tx-2', 'fundId': '1'}],
+             'LastEvaluatedKey': last_key},
+            {'Items': [{'transactionId': 'tx-3', 'fundId': '1'}]}
+        ]
+        mock_fondo_service.get_funds_by_ids.return_value = {'1': {'name': 'FPV_EL CLIENTE_RECAUDADORA'}}
+        
+        # Execute
+        first = await TransaccionService.get_client_transactions_page(client_id, 2)
+        second = await TransaccionService.get_client_transactions_page(client_id, 2, first['nextToken'])
+        
+        # Assert
+        assert [tx['transactionId'] for tx in first['items']] == ['tx-1', 'tx-2']
+        assert first['nextToken']
+        assert mock_transaction_table.query.call_args_list[1][1]['ExclusiveStartKey'] == last_key
+        assert [tx['transactionId'] for tx in second['items']] == ['tx-3']
+        assert second['nextToken'] is None
+    
+    @pytest.mark.asyncio
+    async def test_get_client_transactions_page_rejects_other_client_token(self, mock_transaction_table):
+        # Setup
+        from app.services.pagination import encode_page_token
+        token = encode_page_token({'clientId': 'C999999', 'transactionId': 'tx-2'})
+        # Token issued by the former TransactionsByDate index
+        index_token = encode_page_token({
+            'clientId': 'C123456',
+            'transactionId': 'tx-2',
+            'transactionDate': '2025-03-28T12:00:00'
+        })
+        
+        # Execute / Assert
+        for invalid in (token, index_token):
+            with pytest.raises(ValueError):
+                await TransaccionService.get_client_transactions_page('C123456', 2, invalid)
+        mock_transaction_table.query.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_get_client_transactions_single_funds_read_without_cache(self, mock_transaction_table):
+        # Setup: 50 transacciones sobre 5 fondos distintos, caché de catálogo desactivada
+        client_id = 'C123456'
+        transactions = [
+            {'transactionId': str(i), 'clientId': client_id, 'fundId': str(i % 5 + 1),
+             'type': 'SUBSCRIPTION', 'amount': Decimal('75000'), 'status': 'COMPLETED'}
+            for i in range(50)
+        ]
+        mock_transaction_table.query.return_value = {'Items': transactions}
+        funds = [{'fundId': str(i), 'name': f'FONDO_{i}'} for i in range(1, 6)]
+        
+        with patch('app.services.fondo_service.fund_catalog.ttl_seconds', 0), \
+                patch('app.services.fondo_service.table') as mock_funds_table, \
+                patch('app.services.fondo_service.dynamodb') as mock_dynamodb:
+            mock_dynamodb.batch_get_item.return_value = {'Responses': {'Funds': funds}}
+            
+            # Execute
+            result = await TransaccionService.get_client_transactions(client_id, 50)
+        
+        # Assert: una sola lectura a Funds para toda la página
+        mock_dynamodb.batch_get_item.assert_called_once()
+        requested_keys = mock_dynamodb.batch_get_item.call_args[1]['RequestItems']['Funds']['Keys']
+        assert len(requested_keys) == 5
+        mock_funds_table.get_item.assert_not_called()
+        mock_funds_table.scan.assert_not_called()
+        assert all(tx['fundName'] == f"FONDO_{tx['fundId']}" for tx in result)
+    
+    @pytest.mark.asyncio
+    async def test_get_client_active_subscriptions_single_funds_read_with_cache(self, mock_subscription_table):
+        # Setup: 20 suscripciones, catálogo de fondos con caché
+        from app.services.fondo_service import fund_catalog
+        client_id = 'C123456'
+        subscriptions = [
+            {'subscriptionId': str(i), 'clientId': client_id, 'fundId': str(i % 5 + 1),
+             'status': 'ACTIVE', 'amountSubscribed': Decimal('75000')}
+            for i in range(20)
+        ]
+        mock_subscription_table.query.return_value = {'Items': subscriptions}
+        funds = [{'fundId': str(i), 'name': f'FONDO_{i}'} for i in range(1, 6)]
+        fund_catalog.invalidate()
+        
+        with patch('app.services.fondo_service.table') as mock_funds_table, \
+                patch('app.services.fondo_service.dynamodb') as mock_dynamodb:
+            mock_funds_table.scan.return_value = {'Items': funds}
+            
+            # Execute: dos listados seguidos
+            await TransaccionService.get_client_active_subscriptions(client_id)
+            result = await TransaccionService.get_client_active_subscriptions(client_id)
+        fund_catalog.invalidate()
         
-        # Test conversion of list with mixed types
-        test_list = [10.5, 'test', datetime(2025, 3, 28, 12, 0, 0)]
-        expected = [Decimal('10.5'), 'test', '2025-03-28T12:00:00']
-        assert convert_types_for_dynamodb(test_list) == expected
\ No newline at end of file
+        # Assert: un único scan para cargar el catálogo y ninguna lectura más a Funds
+        mock_funds_table.scan.assert_called_once()
+        mock_funds_table.get_item.assert_not_called()
+        mock_dynamodb.batch_get_item.assert_not_called()
+        assert all(sub['fundName'] == f"FONDO_{sub['fundId']}" for sub in result)
+
+
+class TestOperationDelta:
+
+    @pytest.mark.asyncio
+    async def test_subscription_returns_new_balance_and_subscription_without_reads(
+        self, mock_transaction_table, mock_subscription_table, mock_dynamodb_client,
+        mock_cliente_service, mock_fondo_service, mock_notificacion_service,
+        sample_client_data, sample_fund_data
+    ):
+        # Setup
+        mock_cliente_service.get_client.return_value = sample_client_data
+        mock_fondo_service.get_fund.return_value = sample_fund_data
+
+        # Execute
+        result = await TransaccionService.create_subscription('C123456', TransaccionCreate(fundId='1'))
+
+        # Assert
+        assert result['balance'] == Decimal('425000')
+        assert result['type'] == 'SUBSCRIPTION' and result['fundName'] == 'FPV_EL CLIENTE_RECAUDADORA'
+        assert result['subscription']['status'] == 'ACTIVE'
+        assert result['subscription']['fundName'] == 'FPV_EL CLIENTE_RECAUDADORA'
+        assert 'activeSince' in result['subscription']
+        assert 'portfolio' not in result
+        mock_subscription_table.query.assert_not_called()
+        mock_transaction_table.query.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_cancellation_with_portfolio_merges_the_operation_into_the_view(
+        self, mock_subscription_table, mock_dynamodb_client, mock_cliente_service,
+        mock_fondo_service, mock_notificacion_service, sample_client_data, sample_fund_data
+    ):
+        # Setup: the index and the history have not caught up with the write yet
+        active = {'clientId': 'C123456', 'fundId': '1', 'status': 'ACTIVE', 'amountSubscribed': Decimal('75000'),
+                  'activeSince': '2025-03-28T12:00:00'}
+        other = {**active, 'fundId': '3', 'fundName': 'DEUDAPRIVADA'}
+        client = {**sample_client_data, 'balance': Decimal('425000'), 'totalInvested': Decimal('75000'),
+                  'activeFundIds': {'1'}, 'activeCount_FPV': Decimal('1')}
+        mock_subscription_table.get_item.return_value = {'Item': active}
+        mock_cliente_service.get_client.return_value = client
+        mock_fondo_service.get_fund.return_value = sample_fund_data
+        old_transaction = {'transactionId': 'T0', 'fundId': '1', 'type': 'SUBSCRIPTION'}
+
+        # Execute
+        with patch.object(TransaccionService, 'get_client_active_subscriptions',
+                          new_callable=AsyncMock, return_value=[{**active, 'fundName': 'X'}, other]), \
+                patch.object(TransaccionService, 'get_client_transactions_page',
+                             new_callable=AsyncMock, return_value={'items': [old_transaction], 'nextToken': None}):
+            result = await TransaccionService.cancel_subscription('C123456', '1', include_portfolio=True)
+
+        # Assert
+        assert result['balance'] == Decimal('500000')
+        assert result['subscription']['status'] == 'CANCELLED' and 'activeSince' not in result['subscription']
+        portfolio = result['portfolio']
+        assert portfolio['client']['balance'] == Decimal('500000')
+        assert portfolio['client']['totalInvested'] == Decimal('0')
+        assert 'activeFundIds' not in portfolio['client']
+        assert portfolio['activeSubscriptions'] == [other]
+        assert [t['transactionId'] for t in portfolio['transactions']] == [result['transactionId'], 'T0']
+        assert 'balance' not in portfolio['transactions'][0]
+        mock_cliente_service.get_client.assert_called_once()
@@ -94,6 +94,106 @@ class TestTransaccionesAPI:
         assert response.status_code == 400
         assert response.json()['detail'] == 'No está suscrito a este fondo'
     
+    @patch('app.api.endpoints.transacciones.TransaccionService')
+    def test_idempotency_key_is_passed_to_service(self, mock_service):
+        # Setup
+        mock_service.create_subscription = AsyncMock(return_value={'transactionId': '1234', 'status': 'COMPLETED'})
+        mock_service.cancel_subscription = AsyncMock(return_value={'transactionId': '5678', 'status': 'COMPLETED'})
+        
+        # Execute
+        created = client.post("/api/v1/transacciones/subscriptions", json={"fundId": "1"},
+                              headers={"Idempotency-Key": "retry-1"})
+        cancelled = client.delete("/api/v1/transacciones/subscriptions/1", headers={"Idempotency-Key": "retry-2"})
+        
+        # Assert
+        assert created.status_code == 200
+        assert cancelled.status_code == 200
+        assert mock_service.create_subscription.call_args[0][2] == 'retry-1'
+        mock_service.cancel_subscription.assert_called_once_with('C123456', '1', 'retry-2', include_portfolio=False)
+    
+    @patch('app.api.endpoints.transacciones.TransaccionService')
+    def test_include_portfolio_is_passed_to_service(self, mock_service):
+        # Setup
+        mock_service.create_subscription = AsyncMock(return_value={'transactionId': '1234', 'status': 'COMPLETED'})
+        
+        # Execute
+        included = client.post("/api/v1/transacciones/subscriptions?include=portfolio", json={"fundId": "1"})
+        invalid = client.post("/api/v1/transacciones/subscriptions?include=everything", json={"fundId": "1"})
+        
+        # Assert
+        assert included.status_code == 200
+        assert mock_service.create_subscription.call_args[1] == {'include_portfolio': True}
+        assert invalid.status_code == 422
+    
+    @patch('app.api.endpoints.transacciones.TransaccionService')
+    def test_idempotency_key_reused_for_other_operation(self, mock_service):
+        # Setup
+        mock_service.create_subscription = AsyncMock(return_value={
+            'error': 'La clave de idempotencia ya se usó para otra operación',
+            'status': 'FAILED'
+        })
+        
+        # Execute
+        response = client.post("/api/v1/transacciones/subscriptions", json={"fundId": "2"},
+                               headers={"Idempotency-Key": "retry-1"})
+        
+        # Assert
+        assert response.status_code == 422
+    
+    @patch('app.api.endpoints.transacciones.TransaccionService')
+    def test_idempotency_key_too_long(self, mock_service):
+        # Execute
+        response = client.post("/api/v1/transacciones/subscriptions", json={"fundId": "1"},
+                               headers={"Idempotency-Key": "x" * 256})
+        
+        # Assert
+        assert response.status_code == 422
+        mock_service.create_subscription.assert_not_called()
+    
+    @patch('app.api.endpoints.transacciones.BatchService')
+    def test_process_batch(self, mock_service):
+        # Setup
+        mock_service.process = AsyncMock(return_value={
+            'results': [
+                {'index': 0, 'clientId': 'C1', 'fundId': '1', 'type': 'SUBSCRIPTION', 'status': 'COMPLETED'},
+                {'index': 1, 'clientId': 'C2', 'fundId': '1', 'type': 'CANCELLATION', 'status': 'FAILED',
+                 'error': 'No está suscrito a este fondo'}
+            ],
+            'completed': 1,
+            'failed': 1
+        })
+        
+        # Execute
+        response = client.post("/api/v1/transacciones/batch", json={"operations": [
+            {"clientId": "C1", "fundId": "1", "type": "SUBSCRIPTION"},
+            {"clientId": "C2", "fundId": "1", "type": "CANCELLATION"}
+        ]})
+        
+        # Assert
+        assert response.status_code == 200
+        assert response.json()['completed'] == 1
+        operations = mock_service.process.call_args[0][0]
+        assert [(o.clientId, o.type) for o in operations] == [('C1', 'SUBSCRIPTION'), ('C2', 'CANCELLATION')]
+    
+    @patch('app.api.endpoints.transacciones.BatchService')
+    def test_process_batch_rejects_invalid_batches(self, mock_service):
+        # Execute
+        empty = client.post("/api/v1/transacciones/batch", json={"operations": []})
+        unknown_type = client.post("/api/v1/transacciones/batch", json={"operations": [
+            {"clientId": "C1", "fundId": "1", "type": "TRANSFER"}
+        ]})
+        with patch('app.api.endpoints.transacciones.settings.BATCH_MAX_OPERATIONS', 1):
+            too_large = client.post("/api/v1/transacciones/batch", json={"operations": [
+                {"clientId": "C1", "fundId": "1", "type": "SUBSCRIPTION"},
+                {"clientId": "C1", "fundId": "3", "type": "SUBSCRIPTION"}
+            ]})
+        
+        # Assert
+        assert empty.status_code == 422
+        assert unknown_type.status_code == 422
+        assert too_large.status_code == 400
+        mock_service.process.assert_not_called()
+    
     @patch('app.api.endpoints.transacciones.TransaccionService')
     def test_get_transactions_history_success(self, mock_service):
         # Setup
@@ -117,7 +217,9 @@ class TestTransaccionesAPI:
                 'fundName': 'FPV_EL CLIENTE_ECOPETROL'
             }
         ]
-        mock_service.get_client_transactions = AsyncMock(return_value=mock_transactions)
+        mock_service.get_client_transactions_page = AsyncMock(
+            return_value={'items': mock_transactions, 'nextToken': 'abc123'}
+        )
         
         # Execute
         response = client.get("/api/v1/transacciones/history?limit=2")
@@ -128,6 +230,37 @@ class TestTransaccionesAPI:
         assert len(data) == 2
         assert data[0]['transactionId'] == '1'
         assert data[1]['transactionId'] == '2'
+        assert response.headers['X-Next-Token'] == 'abc123'
+    
+    @patch('app.api.endpoints.transacciones.TransaccionService')
+    def test_get_transactions_history_next_page(self, mock_service):
+        # Setup
+        mock_service.get_client_transactions_page = AsyncMock(
+            return_value={'items': [], 'nextToken': None}
+        )
+        
+        # Execute
+        response = client.get("/api/v1/transacciones/history?limit=2&next_token=abc123")
+        
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == []
+        assert 'X-Next-Token' not in response.headers
+        mock_service.get_client_transactions_page.assert_called_once_with('C123456', 2, 'abc123')
+    
+    @patch('app.api.endpoints.transacciones.TransaccionService')
+    def test_get_transactions_history_invalid_token(self, mock_service):
+        # Setup
+        mock_service.get_client_transactions_page = AsyncMock(
+            side_effect=ValueError("Token de paginación inválido")
+        )
+        
+        # Execute
+        response = client.get("/api/v1/transacciones/history?next_token=basura")
+        
+        # Assert
+        assert response.status_code == 400
+        assert response.json()['detail'] == "Token de paginación inválido"
     
     @patch('app.api.endpoints.transacciones.TransaccionService')
     def test_get_active_subscriptions_success(self, mock_service):
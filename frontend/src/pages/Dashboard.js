@@ -17,11 +17,8 @@ import FundCard from '../components/FundCard';
 import TransactionHistory from '../components/TransactionHistory';
 import SubscriptionsList from '../components/SubscriptionsList';
 import ClientBalance from '../components/ClientBalance';
-import { fetchClientInfo } from '../store/slices/clienteSlice';
-import { fetchAllFunds } from '../store/slices/fondoSlice';
+import { fetchDashboard } from '../store/dashboardThunks';
 import { 
-  fetchActiveSubscriptions, 
-  fetchTransactionHistory,
   subscribeToFundAction,
   cancelFundSubscription,
   clearError,
@@ -45,12 +42,9 @@ const Dashboard = () => {
     lastOperation
   } = useSelector(state => state.transaccion);
   
-  // Cargar datos al iniciar
+  // Cargar datos al iniciar (una sola petición agregada)
   useEffect(() => {
-    dispatch(fetchClientInfo());
-    dispatch(fetchAllFunds());
-    dispatch(fetchActiveSubscriptions());
-    dispatch(fetchTransactionHistory());
+    dispatch(fetchDashboard());
   }, [dispatch]);
   
   // Mostrar errores si ocurren
@@ -89,11 +83,10 @@ const Dashboard = () => {
       }
       setOpenAlert(true);
       
-      // Actualizar datos después de una operación exitosa
-      if (lastOperation.success) {
-        dispatch(fetchClientInfo());
-        dispatch(fetchActiveSubscriptions());
-        dispatch(fetchTransactionHistory());
+      // La respuesta de la operación ya actualizó saldo, suscripciones e historial; solo se
+      // recarga el dashboard si no trae el saldo posterior (backend anterior)
+      if (lastOperation.success && lastOperation.data?.balance === undefined) {
+        dispatch(fetchDashboard());
       }
       
       // Limpiar el estado de la operación
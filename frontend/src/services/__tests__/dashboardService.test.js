@@ -0,0 +1,54 @@
+// src/services/__tests__/dashboardService.test.js
+import { getDashboard } from '../dashboardService';
+import api from '../api';
+
+// Mock the api module
+jest.mock('../api');
+
+describe('Dashboard Service', () => {
+  beforeEach(() => {
+    // Clear all mocks before each test
+    jest.clearAllMocks();
+  });
+
+  describe('getDashboard', () => {
+    it('should fetch the aggregated dashboard with default parameters', async () => {
+      // Setup mock response with one payload for the whole page
+      const mockDashboard = {
+        client: { clientId: 'C123456', balance: 500000 },
+        funds: [{ fundId: '1', name: 'FPV_EL CLIENTE_RECAUDADORA', category: 'FPV', minimumAmount: 75000 }],
+        activeSubscriptions: [],
+        transactions: [],
+        nextToken: null
+      };
+      api.get.mockResolvedValue({ data: mockDashboard });
+
+      // Call the function
+      const result = await getDashboard();
+
+      // Check if API was called correctly
+      expect(api.get).toHaveBeenCalledWith('/dashboard/C123456', { params: { limit: 10 } });
+      expect(result).toEqual(mockDashboard);
+    });
+
+    it('should use the provided client id and limit', async () => {
+      // Setup mock response
+      api.get.mockResolvedValue({ data: {} });
+
+      // Call the function with custom parameters
+      await getDashboard('C999999', 5);
+
+      // Check if API was called correctly
+      expect(api.get).toHaveBeenCalledWith('/dashboard/C999999', { params: { limit: 5 } });
+    });
+
+    it('should propagate errors from the API', async () => {
+      // Setup mock to throw an error
+      const errorMessage = 'Cliente no encontrado';
+      api.get.mockRejectedValue(new Error(errorMessage));
+
+      // Call the function and expect it to throw
+      await expect(getDashboard('C999999')).rejects.toThrow(errorMessage);
+    });
+  });
+});
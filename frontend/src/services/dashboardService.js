@@ -0,0 +1,8 @@
+import api from './api';
+
+export const getDashboard = async (clientId = 'C123456', limit = 10) => {
+  const response = await api.get(`/dashboard/${clientId}`, {
+    params: { limit }
+  });
+  return response.data;
+};
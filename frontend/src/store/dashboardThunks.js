@@ -0,0 +1,14 @@
+import { createAsyncThunk } from '@reduxjs/toolkit';
+import { getDashboard } from '../services/dashboardService';
+
+// Una sola llamada para la página principal: cada slice toma su parte de la respuesta
+export const fetchDashboard = createAsyncThunk(
+  'dashboard/fetch',
+  async (clientId = 'C123456', { rejectWithValue }) => {
+    try {
+      return await getDashboard(clientId);
+    } catch (error) {
+      return rejectWithValue(error.response?.data?.detail || error.message || "Error desconocido");
+    }
+  }
+);
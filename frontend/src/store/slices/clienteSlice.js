@@ -1,5 +1,17 @@
 import { createSlice, createAsyncThunk } from '@reduxjs/toolkit';
 import { getClientInfo, updateClientPreferences } from '../../services/clienteService';
+import { fetchDashboard } from '../dashboardThunks';
+import { subscribeToFundAction, cancelFundSubscription } from './transaccionSlice';
+
+// El saldo posterior llega en la respuesta de la operación: no hace falta volver a leer el cliente
+const applyOperationBalance = (state, action) => {
+  const result = action.payload || {};
+  if (result.portfolio?.client) {
+    state.clientInfo = result.portfolio.client;
+  } else if (result.balance !== undefined && state.clientInfo) {
+    state.clientInfo = { ...state.clientInfo, balance: result.balance };
+  }
+};
 
 export const fetchClientInfo = createAsyncThunk(
   'cliente/fetchInfo',
@@ -47,9 +59,24 @@ const clienteSlice = createSlice({
         state.loading = false;
         state.error = action.payload;
       })
+      // Carga agregada del dashboard
+      .addCase(fetchDashboard.pending, (state) => {
+        state.loading = true;
+        state.error = null;
+      })
+      .addCase(fetchDashboard.fulfilled, (state, action) => {
+        state.loading = false;
+        state.clientInfo = action.payload.client;
+      })
+      .addCase(fetchDashboard.rejected, (state, action) => {
+        state.loading = false;
+        state.error = action.payload;
+      })
       .addCase(updatePreferences.fulfilled, (state, action) => {
         state.clientInfo = { ...state.clientInfo, ...action.payload };
-      });
+      })
+      .addCase(subscribeToFundAction.fulfilled, applyOperationBalance)
+      .addCase(cancelFundSubscription.fulfilled, applyOperationBalance);
   }
 });
 
@@ -1,5 +1,6 @@
 import { createSlice, createAsyncThunk } from '@reduxjs/toolkit';
 import { getAllFunds, getFundDetails } from '../../services/fondoService';
+import { fetchDashboard } from '../dashboardThunks';
 
 export const fetchAllFunds = createAsyncThunk(
   'fondo/fetchAll',
@@ -49,6 +50,17 @@ const fondoSlice = createSlice({
         state.loading = false;
         state.error = action.payload;
       })
+      // Carga agregada del dashboard (el error se muestra desde el slice del cliente)
+      .addCase(fetchDashboard.pending, (state) => {
+        state.loading = true;
+      })
+      .addCase(fetchDashboard.fulfilled, (state, action) => {
+        state.loading = false;
+        state.fundsList = action.payload.funds || [];
+      })
+      .addCase(fetchDashboard.rejected, (state) => {
+        state.loading = false;
+      })
       // Fondo específico
       .addCase(fetchFundDetails.pending, (state) => {
         state.loading = true;
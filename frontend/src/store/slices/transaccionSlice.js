@@ -5,6 +5,7 @@ import {
   getTransactionHistory, 
   getActiveSubscriptions 
 } from '../../services/transaccionService';
+import { fetchDashboard } from '../dashboardThunks';
 
 export const fetchTransactionHistory = createAsyncThunk(
   'transaccion/fetchHistory',
@@ -58,6 +59,30 @@ const initialState = {
   lastOperation: null
 };
 
+// Tamaño de la primera página del historial que muestra el dashboard
+const HISTORY_PAGE_SIZE = 10;
+
+// Aplica la respuesta de una suscripción o cancelación (transacción, nuevo saldo y fila de la
+// suscripción, o la vista completa con ?include=portfolio) sin volver a pedir el dashboard
+const applyOperationResult = (state, result) => {
+  if (!result) {
+    return;
+  }
+  if (result.portfolio) {
+    state.activeSubscriptions = result.portfolio.activeSubscriptions || [];
+    state.transactions = result.portfolio.transactions || [];
+    return;
+  }
+  const { balance, subscription, ...transaction } = result;
+  if (subscription) {
+    const others = state.activeSubscriptions.filter(sub => sub.fundId !== subscription.fundId);
+    state.activeSubscriptions = subscription.status === 'ACTIVE' ? [...others, subscription] : others;
+  }
+  if (transaction.transactionId && !state.transactions.some(t => t.transactionId === transaction.transactionId)) {
+    state.transactions = [transaction, ...state.transactions].slice(0, HISTORY_PAGE_SIZE);
+  }
+};
+
 const transaccionSlice = createSlice({
   name: 'transaccion',
   initialState,
@@ -99,6 +124,18 @@ const transaccionSlice = createSlice({
         state.error = action.payload;
         state.activeSubscriptions = [];
       })
+      // Carga agregada del dashboard
+      .addCase(fetchDashboard.pending, (state) => {
+        state.loading = true;
+      })
+      .addCase(fetchDashboard.fulfilled, (state, action) => {
+        state.loading = false;
+        state.activeSubscriptions = action.payload.activeSubscriptions || [];
+        state.transactions = action.payload.transactions || [];
+      })
+      .addCase(fetchDashboard.rejected, (state) => {
+        state.loading = false;
+      })
       // Suscribir a fondo
       .addCase(subscribeToFundAction.pending, (state) => {
         state.loading = true;
@@ -106,6 +143,7 @@ const transaccionSlice = createSlice({
       })
       .addCase(subscribeToFundAction.fulfilled, (state, action) => {
         state.loading = false;
+        applyOperationResult(state, action.payload);
         state.lastOperation = {
           type: 'SUBSCRIPTION',
           data: action.payload,
@@ -128,6 +166,7 @@ const transaccionSlice = createSlice({
       })
       .addCase(cancelFundSubscription.fulfilled, (state, action) => {
         state.loading = false;
+        applyOperationResult(state, action.payload);
         state.lastOperation = {
           type: 'CANCELLATION',
           data: action.payload,